@@ -11,7 +11,9 @@ import sys
 from datetime import datetime
 
 from app import app
+from app.services.conexoes import iniciar_aquecimento
 from app.services.diagnostics import verificar_conectividade_api
+from app.services.pedidos_agregados import restaurar_agregados
 
 # Configurar encoding UTF-8 para Windows
 if sys.platform == 'win32':
@@ -38,6 +40,14 @@ if __name__ == '__main__':
         print("[AVISO] Flask iniciando APESAR da API Externa estar offline")
         print("   Requisicoes podem falhar ate que a API esteja disponivel\n")
 
+    # Agregados de analytics partem dos rollups gravados na última execução
+    restaurantes = restaurar_agregados()
+    if restaurantes:
+        print(f"[ANALYTICS] Agregados de {restaurantes} restaurante(s) restaurados dos rollups")
+
+    # Conexões keep-alive com a API externa abertas em segundo plano (e renovadas periodicamente)
+    iniciar_aquecimento()
+
     print("[SERVIDOR] Iniciando servidor Flask...")
     print("   Host: 0.0.0.0")
     print("   Porta: 5000")
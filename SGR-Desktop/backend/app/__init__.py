@@ -1,4 +1,6 @@
-from flask import Flask
+import time
+
+from flask import Flask, Response, current_app, g, request
 from flask_cors import CORS
 
 from .config import (
@@ -7,6 +9,8 @@ from .config import (
     API_EXTERNA_PORT,
     API_EXTERNA_PROTOCOL,
     API_TIMEOUT,
+    SERVER_TIMING,
+    SERVER_TIMING_JSON,
 )
 from .proxy import api_session  # noqa: F401  # garante inicialização da sessão
 from .routes.analytics import analytics_bp
@@ -14,6 +18,20 @@ from .routes.avaliacoes import avaliacoes_bp
 from .routes.cardapio import cardapio_bp
 from .routes.pedidos import pedidos_bp
 from .routes.system import system_bp
+from .utils.deadline import deadline_da_rota, definir_deadline, ler_header_deadline, restaurar_deadline
+from .utils.escalonador import definir_prioridade, prioridade_da_rota, restaurar_prioridade
+from .utils.logs import configurar_logs
+from .utils.metricas import (
+    JSONProviderMedido,
+    cabecalho_server_timing,
+    caches_atuais,
+    classe_status,
+    encerrar_fases,
+    fases_da_rota,
+    iniciar_fases,
+    metricas,
+)
+from .utils.sessoes import definir_restaurante, normalizar_restaurante, restaurar_restaurante
 
 
 def register_blueprints(flask_app: Flask) -> None:
@@ -24,9 +42,126 @@ def register_blueprints(flask_app: Flask) -> None:
     flask_app.register_blueprint(system_bp)
 
 
+def _iniciar_deadline() -> None:
+    """Prazo da requisição: orçamento da rota, encurtado pelo X-Request-Deadline do frontend."""
+    orcamento = deadline_da_rota(request.path)
+    do_cliente = ler_header_deadline(request.headers.get('X-Request-Deadline'))
+    if do_cliente is not None:
+        orcamento = do_cliente if orcamento <= 0 else min(orcamento, do_cliente)
+    if orcamento > 0 or do_cliente is not None:
+        g.deadline_token = definir_deadline(orcamento)
+
+
+def _encerrar_deadline(_exc: object) -> None:
+    token = g.pop('deadline_token', None)
+    if token is not None:
+        try:
+            restaurar_deadline(token)
+        except ValueError:
+            pass  # token criado em outro contexto: o contexto da requisição é descartado de qualquer forma
+
+
+def _restaurante_da_requisicao():
+    """restaurante_id da rota, da query, do header X-Restaurante-Id ou do corpo JSON."""
+    candidatos = (
+        (request.view_args or {}).get('restaurante_id'),
+        request.args.get('restaurante_id'),
+        request.headers.get('X-Restaurante-Id'),
+    )
+    for candidato in candidatos:
+        restaurante_id = normalizar_restaurante(candidato)
+        if restaurante_id is not None:
+            return restaurante_id
+    if request.is_json:
+        corpo = request.get_json(silent=True)
+        if isinstance(corpo, dict):
+            return normalizar_restaurante(corpo.get('restaurante_id'))
+    return None
+
+
+def _iniciar_restaurante() -> None:
+    """Restaurante da requisição: escolhe a sessão (cookie jar) usada nas chamadas à API externa."""
+    g.restaurante_token = definir_restaurante(_restaurante_da_requisicao())
+
+
+def _encerrar_restaurante(_exc: object) -> None:
+    token = g.pop('restaurante_token', None)
+    if token is not None:
+        try:
+            restaurar_restaurante(token)
+        except ValueError:
+            pass
+
+
+def _iniciar_prioridade() -> None:
+    """Classe da rota no escalonador de chamadas à API externa (escritas, listagens ou analytics)."""
+    g.prioridade_token = definir_prioridade(prioridade_da_rota(request.method, request.path))
+
+
+def _encerrar_prioridade(_exc: object) -> None:
+    token = g.pop('prioridade_token', None)
+    if token is not None:
+        try:
+            restaurar_prioridade(token)
+        except ValueError:
+            pass
+
+
+def _iniciar_metricas() -> None:
+    g.metricas_inicio = time.perf_counter()
+    g.metricas_token = iniciar_fases()
+
+
+def _registrar_metricas_rota(response: Response) -> Response:
+    """
+    Duração da rota e de cada fase (`agregacao` é o tempo local fora das demais): histogramas de
+    /api/metrics, header Server-Timing e, com SERVER_TIMING_JSON, o campo `_timing` no JSON.
+    """
+    inicio = g.get('metricas_inicio')
+    if inicio is None:
+        return response
+    total = time.perf_counter() - inicio
+    fases = fases_da_rota(total)
+
+    if metricas.ativo:
+        rota = request.url_rule.rule if request.url_rule is not None else 'sem_rota'
+        metricas.observar(
+            'sgr_rota_segundos', total, rota=rota, metodo=request.method, status=classe_status(response.status_code),
+            restaurante=(request.view_args or {}).get('restaurante_id', ''),
+        )
+        for fase, segundos in fases.items():
+            metricas.observar('sgr_rota_fase_segundos', segundos, rota=rota, fase=fase)
+
+    if SERVER_TIMING:
+        caches = caches_atuais()
+        response.headers['Server-Timing'] = cabecalho_server_timing(fases, total, caches)
+        response.headers['Timing-Allow-Origin'] = '*'
+        if SERVER_TIMING_JSON and response.is_json and not response.direct_passthrough:
+            corpo = response.get_json(silent=True)
+            if isinstance(corpo, dict):
+                corpo['_timing'] = {
+                    'total_ms': round(total * 1000, 2),
+                    'fases_ms': {fase: round(segundos * 1000, 2) for fase, segundos in fases.items()},
+                    'caches': caches,
+                }
+                response.set_data(current_app.json.dumps(corpo))
+    return response
+
+
+def _encerrar_metricas(_exc: object) -> None:
+    token = g.pop('metricas_token', None)
+    if token is not None:
+        try:
+            encerrar_fases(token)
+        except ValueError:
+            pass
+
+
 def create_app() -> Flask:
+    configurar_logs()
     flask_app = Flask(__name__)
     CORS(flask_app)
+    flask_app.json = JSONProviderMedido(flask_app)
 
     flask_app.config['API_EXTERNA_BASE_URL'] = API_EXTERNA_BASE_URL
     flask_app.config['API_EXTERNA_TIMEOUT'] = API_TIMEOUT
@@ -34,6 +169,15 @@ def create_app() -> Flask:
     flask_app.config['API_EXTERNA_HOST'] = API_EXTERNA_HOST
     flask_app.config['API_EXTERNA_PORT'] = API_EXTERNA_PORT
 
+    flask_app.before_request(_iniciar_metricas)
+    flask_app.before_request(_iniciar_deadline)
+    flask_app.before_request(_iniciar_restaurante)
+    flask_app.before_request(_iniciar_prioridade)
+    flask_app.after_request(_registrar_metricas_rota)
+    flask_app.teardown_request(_encerrar_deadline)
+    flask_app.teardown_request(_encerrar_metricas)
+    flask_app.teardown_request(_encerrar_prioridade)
+    flask_app.teardown_request(_encerrar_restaurante)
     register_blueprints(flask_app)
     return flask_app
 
@@ -17,6 +17,151 @@ if API_EXTERNA_BASE_URL:
 
 API_TIMEOUT = int(os.getenv('API_TIMEOUT', '30'))
 
+# Timeouts separados de conexão e de leitura nas chamadas à API externa (o de leitura herda API_TIMEOUT).
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', '5'))
+API_READ_TIMEOUT = float(os.getenv('API_READ_TIMEOUT', str(API_TIMEOUT)))
+
+# Timeout de leitura adaptativo por endpoint da API externa: quantil TIMEOUT_ADAPTATIVO_QUANTIL das
+# latências recentes (histograma com meia-vida de TIMEOUT_ADAPTATIVO_MEIA_VIDA respostas) vezes
+# TIMEOUT_ADAPTATIVO_FATOR, entre TIMEOUT_ADAPTATIVO_PISO segundos e API_READ_TIMEOUT. Opt-in ('true'
+# liga). TIMEOUT_ADAPTATIVO_ISENTOS (separados por vírgula, ids como {id}) são listagens em massa
+# que sempre usam API_READ_TIMEOUT: um dump grande após uma pausa da API não vira download abortado.
+TIMEOUT_ADAPTATIVO = os.getenv('TIMEOUT_ADAPTATIVO', 'false').strip().lower() in ('1', 'true', 'yes')
+TIMEOUT_ADAPTATIVO_QUANTIL = float(os.getenv('TIMEOUT_ADAPTATIVO_QUANTIL', '0.99'))
+TIMEOUT_ADAPTATIVO_FATOR = float(os.getenv('TIMEOUT_ADAPTATIVO_FATOR', '3'))
+TIMEOUT_ADAPTATIVO_PISO = float(os.getenv('TIMEOUT_ADAPTATIVO_PISO', '2'))
+TIMEOUT_ADAPTATIVO_MEIA_VIDA = float(os.getenv('TIMEOUT_ADAPTATIVO_MEIA_VIDA', '200'))
+TIMEOUT_ADAPTATIVO_ISENTOS = tuple(
+    endpoint.strip().strip('/')
+    for endpoint in os.getenv(
+        'TIMEOUT_ADAPTATIVO_ISENTOS', 'pedidos/restaurante,itens,cardapio/{id},avaliacoes/{id},avaliacoes-prato'
+    ).split(',')
+    if endpoint.strip()
+)
+
+# Pool de conexões HTTP da sessão com a API externa: pools por host, conexões por pool, se a
+# requisição espera uma conexão livre (true) ou abre uma avulsa (false) e novas tentativas de conexão.
+API_POOL_CONEXOES = int(os.getenv('API_POOL_CONEXOES', '10'))
+API_POOL_MAXSIZE = int(os.getenv('API_POOL_MAXSIZE', '10'))
+API_POOL_BLOCK = os.getenv('API_POOL_BLOCK', 'false').strip().lower() in ('1', 'true', 'yes')
+API_MAX_RETRIES = int(os.getenv('API_MAX_RETRIES', '0'))
+
+# Aquecimento na inicialização: conexões (TCP + TLS) abertas com a API externa antes do primeiro
+# clique (padrão 0, desativado: liga uma thread que pinga a API enquanto o processo viver) e
+# intervalo (segundos) entre os pings que as mantêm vivas (0 desativa).
+API_WARMUP_CONEXOES = int(os.getenv('API_WARMUP_CONEXOES', '0'))
+API_KEEPALIVE_INTERVALO = float(os.getenv('API_KEEPALIVE_INTERVALO', '45'))
+
+# Novas tentativas de chamadas idempotentes à API externa (GET, DELETE, PUT de status) após conexão
+# perdida ou 502/503/504: tentativas extras (0 desativa), espera base e teto (segundos) do backoff
+# exponencial com jitter e maior Retry-After respeitado (acima dele a resposta volta sem nova tentativa).
+API_RETENTATIVAS = int(os.getenv('API_RETENTATIVAS', '2'))
+API_RETENTATIVA_BASE = float(os.getenv('API_RETENTATIVA_BASE', '0.2'))
+API_RETENTATIVA_TETO = float(os.getenv('API_RETENTATIVA_TETO', '2'))
+API_RETRY_AFTER_MAXIMO = float(os.getenv('API_RETRY_AFTER_MAXIMO', '5'))
+
+# Hedging de GETs lentos (opt-in): endpoints da API externa (como em /api/metrics, ids como {id},
+# separados por vírgula) que recebem uma segunda requisição idêntica quando a primeira passa do
+# quantil HEDGE_QUANTIL das últimas HEDGE_JANELA latências do endpoint (nunca antes de
+# HEDGE_ATRASO_MINIMO segundos). HEDGE_TAXA_MAXIMA limita a fração de GETs que ganham hedge.
+HEDGE_ENDPOINTS = tuple(
+    endpoint.strip().strip('/') for endpoint in os.getenv('HEDGE_ENDPOINTS', '').split(',') if endpoint.strip()
+)
+HEDGE_QUANTIL = float(os.getenv('HEDGE_QUANTIL', '0.9'))
+HEDGE_JANELA = int(os.getenv('HEDGE_JANELA', '200'))
+HEDGE_ATRASO_MINIMO = float(os.getenv('HEDGE_ATRASO_MINIMO', '0.05'))
+HEDGE_TAXA_MAXIMA = float(os.getenv('HEDGE_TAXA_MAXIMA', '0.1'))
+
+# Escalonador das chamadas à API externa: no máximo ESCALONADOR_LIMITE simultâneas (0 desativa), das
+# quais ESCALONADOR_RESERVA_INTERATIVA só para escritas (PUT de status, POST, DELETE). Na fila saem
+# primeiro as escritas, depois as listagens e por último analytics/avaliações, em rodízio entre
+# restaurantes. ESCALONADOR_ROTAS define a classe dos GETs por prefixo do caminho após /api/
+# (interativa, listagem ou analytics; sem prefixo, listagem).
+ESCALONADOR_LIMITE = int(os.getenv('ESCALONADOR_LIMITE', '6'))
+ESCALONADOR_RESERVA_INTERATIVA = int(os.getenv('ESCALONADOR_RESERVA_INTERATIVA', '1'))
+ESCALONADOR_ROTAS = {
+    prefixo.strip().strip('/'): classe.strip()
+    for prefixo, _, classe in (
+        item.partition('=') for item in os.getenv(
+            'ESCALONADOR_ROTAS', 'dashboard=analytics,vendas=analytics,top-produtos=analytics,avaliacoes=analytics',
+        ).split(',')
+    )
+    if prefixo.strip() and classe.strip()
+}
+
+# Orçamento (segundos) de cada requisição ao Flask, descontado por todas as chamadas à API externa
+# que ela fizer. DEADLINES_ROTAS sobrescreve por prefixo do caminho após /api/, ex.:
+# 'dashboard=20,restaurantes/upload=120'. O header X-Request-Deadline do frontend só encurta o prazo.
+DEADLINE_PADRAO = float(os.getenv('DEADLINE_PADRAO', '30'))
+DEADLINES_ROTAS = {
+    prefixo.strip().strip('/'): float(segundos)
+    for prefixo, _, segundos in (
+        item.partition('=') for item in os.getenv('DEADLINES_ROTAS', 'upload=120,restaurantes/upload=120').split(',')
+    )
+    if prefixo.strip() and segundos.strip()
+}
+
+# Logs: nível mínimo (DEBUG, INFO, WARNING, ERROR), dumps detalhados de cada requisição
+# (URL, params, corpo, cookies; opt-in para depuração, 'true' liga) e janela (segundos) das
+# mensagens de diagnóstico repetitivas.
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').strip().upper()
+LOG_REQUEST_DUMPS = os.getenv('LOG_REQUEST_DUMPS', 'false').strip().lower() in ('1', 'true', 'yes')
+LOG_AMOSTRAGEM_JANELA = float(os.getenv('LOG_AMOSTRAGEM_JANELA', '60'))
+
+# Circuit breaker por família de endpoint da API externa: falhas consecutivas (timeout, conexão,
+# 502/503/504) que abrem o circuito (0 desativa) e segundos aberto antes de liberar uma sonda.
+CIRCUIT_BREAKER_FALHAS = int(os.getenv('CIRCUIT_BREAKER_FALHAS', '5'))
+CIRCUIT_BREAKER_ABERTO = float(os.getenv('CIRCUIT_BREAKER_ABERTO', '15'))
+
+# Histogramas de latência (chamadas à API externa e rotas Flask) expostos em /api/metrics.
+METRICAS_ATIVAS = os.getenv('METRICAS_ATIVAS', 'true').strip().lower() not in ('0', 'false', 'no')
+
+# Header Server-Timing com o tempo de cada fase da rota (upstream, decodificacao, normalizacao,
+# agregacao, serializacao) e o hit/miss dos caches; SERVER_TIMING_JSON repete o detalhamento no
+# campo `_timing` das respostas JSON (depuração).
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'true').strip().lower() not in ('0', 'false', 'no')
+SERVER_TIMING_JSON = os.getenv('SERVER_TIMING_JSON', 'false').strip().lower() in ('1', 'true', 'yes')
+
+# Codificação do corpo (JSON ou form-urlencoded) aprendida por endpoint da API externa,
+# persistida em SQLite (caminho do arquivo; vazio mantém só em memória).
+CODIFICACAO_ENDPOINTS_DB = os.getenv('CODIFICACAO_ENDPOINTS_DB', '').strip()
+
+# Parser HTML usado pelo BeautifulSoup: 'auto' (lxml quando instalado), 'lxml' ou 'html.parser'.
+HTML_PARSER = os.getenv('HTML_PARSER', 'auto').strip().lower()
+
+# Tempo (segundos) que um snapshot de pedidos/restaurante permanece válido. 0 desativa o cache.
+PEDIDOS_CACHE_TTL = float(os.getenv('PEDIDOS_CACHE_TTL', '5'))
+
+# Analytics a partir de agregados incrementais (apenas pedidos alterados entre snapshots).
+# 'false' volta ao recálculo completo a cada requisição.
+ANALYTICS_INCREMENTAL = os.getenv('ANALYTICS_INCREMENTAL', 'true').strip().lower() not in ('0', 'false', 'no')
+
+# Recálculo completo vetorizado (opt-in): com ANALYTICS_INCREMENTAL=false e NumPy instalado, os pedidos
+# concluídos viram colunas NumPy uma vez por snapshot e as rotas agregam com searchsorted/bincount.
+ANALYTICS_COLUNAR = os.getenv('ANALYTICS_COLUNAR', 'false').strip().lower() in ('1', 'true', 'yes')
+
+# Pasta de dados locais do app (bancos SQLite). O Electron passa a pasta userData; rodando o
+# backend avulso, %LOCALAPPDATA%\SGR-Desktop no Windows ou $XDG_DATA_HOME/sgr-desktop nos demais.
+SGR_DADOS_DIR = os.getenv('SGR_DADOS_DIR', '').strip() or (
+    os.path.join(os.getenv('LOCALAPPDATA') or os.path.expanduser('~'), 'SGR-Desktop')
+    if os.name == 'nt'
+    else os.path.join(os.getenv('XDG_DATA_HOME') or os.path.expanduser('~/.local/share'), 'sgr-desktop')
+)
+
+# Rollups diários de vendas persistidos em SQLite, de onde os agregados de analytics partem ao iniciar
+# (caminho do arquivo; padrão na pasta de dados, vazio mantém só em memória).
+ANALYTICS_ROLLUPS_DB = os.getenv(
+    'ANALYTICS_ROLLUPS_DB', os.path.join(SGR_DADOS_DIR, 'analytics_rollups.sqlite3')
+).strip()
+
+# Espelho SQLite opcional de pedidos/restaurante (caminho do arquivo; vazio desativa) e
+# idade máxima (segundos) antes de sincronizar novamente com a API externa.
+PEDIDOS_ESPELHO_DB = os.getenv('PEDIDOS_ESPELHO_DB', '').strip()
+PEDIDOS_ESPELHO_MAX_IDADE = float(os.getenv('PEDIDOS_ESPELHO_MAX_IDADE', '30'))
+# Segundos que uma leitura espera pela sincronização de um espelho desatualizado antes de servir
+# os dados locais; a sincronização continua em segundo plano.
+PEDIDOS_ESPELHO_ESPERA = float(os.getenv('PEDIDOS_ESPELHO_ESPERA', '0.5'))
+
 try:
     parsed_url = urlparse(API_EXTERNA_BASE_URL.rstrip('/'))
     API_EXTERNA_PROTOCOL = parsed_url.scheme or 'http'
@@ -30,8 +175,54 @@ except Exception:
 __all__ = [
     'API_EXTERNA_BASE_URL',
     'API_TIMEOUT',
+    'API_CONNECT_TIMEOUT',
+    'API_READ_TIMEOUT',
+    'TIMEOUT_ADAPTATIVO',
+    'TIMEOUT_ADAPTATIVO_QUANTIL',
+    'TIMEOUT_ADAPTATIVO_FATOR',
+    'TIMEOUT_ADAPTATIVO_PISO',
+    'TIMEOUT_ADAPTATIVO_MEIA_VIDA',
+    'TIMEOUT_ADAPTATIVO_ISENTOS',
+    'API_POOL_CONEXOES',
+    'API_POOL_MAXSIZE',
+    'API_POOL_BLOCK',
+    'API_MAX_RETRIES',
+    'API_WARMUP_CONEXOES',
+    'API_KEEPALIVE_INTERVALO',
+    'API_RETENTATIVAS',
+    'API_RETENTATIVA_BASE',
+    'API_RETENTATIVA_TETO',
+    'API_RETRY_AFTER_MAXIMO',
+    'HEDGE_ENDPOINTS',
+    'HEDGE_QUANTIL',
+    'HEDGE_JANELA',
+    'HEDGE_ATRASO_MINIMO',
+    'HEDGE_TAXA_MAXIMA',
+    'ESCALONADOR_LIMITE',
+    'ESCALONADOR_RESERVA_INTERATIVA',
+    'ESCALONADOR_ROTAS',
+    'DEADLINE_PADRAO',
+    'DEADLINES_ROTAS',
     'API_EXTERNA_PROTOCOL',
     'API_EXTERNA_HOST',
     'API_EXTERNA_PORT',
+    'LOG_LEVEL',
+    'LOG_REQUEST_DUMPS',
+    'LOG_AMOSTRAGEM_JANELA',
+    'CIRCUIT_BREAKER_FALHAS',
+    'CIRCUIT_BREAKER_ABERTO',
+    'METRICAS_ATIVAS',
+    'SERVER_TIMING',
+    'SERVER_TIMING_JSON',
+    'CODIFICACAO_ENDPOINTS_DB',
+    'HTML_PARSER',
+    'PEDIDOS_CACHE_TTL',
+    'ANALYTICS_INCREMENTAL',
+    'ANALYTICS_COLUNAR',
+    'SGR_DADOS_DIR',
+    'ANALYTICS_ROLLUPS_DB',
+    'PEDIDOS_ESPELHO_DB',
+    'PEDIDOS_ESPELHO_MAX_IDADE',
+    'PEDIDOS_ESPELHO_ESPERA',
 ]
 
@@ -0,0 +1,151 @@
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..utils.status import is_status_concluido
+
+
+def _to_float(valor: Any) -> float:
+    try:
+        return float(valor or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _to_int(valor: Any) -> Optional[int]:
+    try:
+        return int(valor) if valor else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_data_pedido(valor: Any) -> Optional[date]:
+    """Converte `criadoEm`/`criado_em` (ISO 8601, com ou sem `Z`) em `date`."""
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(str(valor).replace('Z', '+00:00')).date()
+    except ValueError:
+        return None
+
+
+class ItemPedido:
+    """
+    Item de pedido normalizado. Resolve uma única vez as variações de chave da API Java
+    (`itemRestaurante`/`item_restaurante`, `preco`/`valorUnitario`/`valor`/`subtotal`).
+    """
+
+    __slots__ = ('produto_id', 'nome', 'quantidade', 'preco_unitario', 'observacoes')
+
+    def __init__(
+        self,
+        produto_id: Any = None,
+        nome: Optional[str] = None,
+        quantidade: int = 0,
+        preco_unitario: float = 0.0,
+        observacoes: Optional[str] = None,
+    ) -> None:
+        self.produto_id = produto_id
+        self.nome = nome
+        self.quantidade = quantidade
+        self.preco_unitario = preco_unitario
+        self.observacoes = observacoes
+
+    @property
+    def subtotal(self) -> float:
+        return self.quantidade * self.preco_unitario
+
+    @classmethod
+    def from_dict(cls, item: Dict[str, Any]) -> 'ItemPedido':
+        quantidade = item.get('quantidade', 0) or item.get('quantidadeItem', 0) or 0
+        produto_id = None
+        nome = None
+        preco = 0.0
+
+        item_restaurante = item.get('itemRestaurante')
+        if not (item_restaurante and isinstance(item_restaurante, dict)):
+            item_restaurante = item.get('item_restaurante')
+        if item_restaurante and isinstance(item_restaurante, dict):
+            produto_id = item_restaurante.get('id')
+            nome = item_restaurante.get('nome')
+            preco = _to_float(item_restaurante.get('preco', 0) or item_restaurante.get('valor', 0))
+
+        if not nome:
+            produto_id = item.get('produto_id') or item.get('id')
+            nome = item.get('nome') or item.get('produto_nome')
+
+        if preco == 0:
+            preco = _to_float(item.get('preco', 0) or item.get('valorUnitario', 0) or item.get('valor', 0))
+        if preco == 0 and item.get('subtotal') and quantidade > 0:
+            preco = _to_float(item['subtotal']) / quantidade
+
+        return cls(
+            produto_id=produto_id,
+            nome=nome,
+            quantidade=quantidade,
+            preco_unitario=preco,
+            observacoes=item.get('observacoes') or item.get('observacoes_item'),
+        )
+
+
+class Pedido:
+    """
+    Pedido normalizado a partir do dicionário bruto da API Java, com campos pré-calculados
+    (`data`, `restaurante_id`, `valor_total`, `concluido`) para agregações sem `dict.get` encadeado.
+    O dicionário original fica em `bruto` para as rotas que devolvem o pedido ao frontend.
+    """
+
+    __slots__ = (
+        'id',
+        'restaurante_id',
+        'status',
+        'concluido',
+        'criado_em',
+        'data',
+        'itens',
+        'valor_itens',
+        'valor_informado',
+        'valor_total',
+        'quantidade_itens',
+        'bruto',
+    )
+
+    def __init__(self, bruto: Dict[str, Any]) -> None:
+        self.bruto = bruto
+        self.id = bruto.get('id')
+
+        restaurante = bruto.get('restaurante')
+        if isinstance(restaurante, dict) and restaurante.get('id'):
+            self.restaurante_id = _to_int(restaurante['id'])
+        else:
+            self.restaurante_id = _to_int(bruto.get('restaurante_id'))
+
+        status = bruto.get('status')
+        self.status = str(status or '').upper()
+        self.concluido = is_status_concluido(status)
+
+        self.criado_em = bruto.get('criadoEm') or bruto.get('criado_em') or ''
+        self.data = parse_data_pedido(self.criado_em)
+
+        itens_brutos = bruto.get('itens')
+        if isinstance(itens_brutos, list):
+            self.itens = [ItemPedido.from_dict(item) for item in itens_brutos if isinstance(item, dict)]
+        else:
+            self.itens = []
+
+        self.valor_itens = sum(item.subtotal for item in self.itens)
+        self.quantidade_itens = sum(item.quantidade for item in self.itens)
+        self.valor_informado = _to_float(
+            bruto.get('valor_total', 0)
+            or bruto.get('valor', 0)
+            or bruto.get('valorTotal', 0)
+            or bruto.get('total', 0)
+        )
+        self.valor_total = self.valor_itens or self.valor_informado
+
+
+def normalizar_pedidos(pedidos: Iterable[Any]) -> List[Pedido]:
+    """Converte a lista bruta da API externa em `Pedido`s, ignorando registros que não são objetos."""
+    return [Pedido(pedido) for pedido in pedidos if isinstance(pedido, dict)]
+
+
+__all__ = ['ItemPedido', 'Pedido', 'normalizar_pedidos', 'parse_data_pedido']
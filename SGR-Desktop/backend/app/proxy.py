@@ -1,29 +1,191 @@
+import copy
+import html
 import json
+import logging
 import re
+import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional, Tuple
-from urllib.parse import urlencode
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from .config import (
     API_EXTERNA_BASE_URL,
     API_EXTERNA_HOST,
     API_EXTERNA_PORT,
     API_EXTERNA_PROTOCOL,
-    API_TIMEOUT,
+    API_CONNECT_TIMEOUT,
+    API_MAX_RETRIES,
+    API_POOL_BLOCK,
+    API_POOL_CONEXOES,
+    API_POOL_MAXSIZE,
+    API_READ_TIMEOUT,
+    API_RETENTATIVA_BASE,
+    API_RETENTATIVA_TETO,
+    API_RETENTATIVAS,
+    API_RETRY_AFTER_MAXIMO,
+    CIRCUIT_BREAKER_ABERTO,
+    CIRCUIT_BREAKER_FALHAS,
+    CODIFICACAO_ENDPOINTS_DB,
+    ESCALONADOR_LIMITE,
+    ESCALONADOR_RESERVA_INTERATIVA,
+    HEDGE_ATRASO_MINIMO,
+    HEDGE_ENDPOINTS,
+    HEDGE_JANELA,
+    HEDGE_QUANTIL,
+    HEDGE_TAXA_MAXIMA,
+    HTML_PARSER,
+    LOG_REQUEST_DUMPS,
+    TIMEOUT_ADAPTATIVO,
+    TIMEOUT_ADAPTATIVO_FATOR,
+    TIMEOUT_ADAPTATIVO_ISENTOS,
+    TIMEOUT_ADAPTATIVO_MEIA_VIDA,
+    TIMEOUT_ADAPTATIVO_PISO,
+    TIMEOUT_ADAPTATIVO_QUANTIL,
 )
+from .utils.circuit_breaker import CircuitBreaker
+from .utils.codificacao_endpoints import CORPO_FORM, CORPO_JSON, CodificacaoEndpoints, alternativa, corpo_formulario
+from .utils.cookies import CookiesSessao, contar_cookie, substituir_cookie, valor_cookie
+from .utils.deadline import DeadlineExcedido, deadline_esgotado, tempo_restante, timeout_upstream
+from .utils.decodificacao import HTML, JSON, decodificar_corpo
+from .utils.escalonador import EscalonadorUpstream, prioridade_atual, sem_vaga
+from .utils.hedge import PoliticaHedge, tentativa_descartada
+from .utils.logs import amostragem, obter_logger
+from .utils.metricas import classe_status, metricas, registrar_fase, rotulo_endpoint, tempo_fase
+from .utils.retentativas import PoliticaRetentativas, chamada_idempotente
+from .utils.sessoes import (
+    RegistroSessoes,
+    normalizar_restaurante,
+    restaurante_atual,
+    sessao_forcada,
+)
+from .utils.singleflight import SingleFlight
+from .utils.tabela_itens import LXML_AVAILABLE, extrair_itens_tabela
+from .utils.timeouts_adaptativos import TimeoutsAdaptativos
+
+logger = obter_logger('proxy')
 
 try:
-    from bs4 import BeautifulSoup
+    from bs4 import BeautifulSoup, Tag
 
     BS4_AVAILABLE = True
 except ImportError:
     BS4_AVAILABLE = False
-    print("AVISO: beautifulsoup4 nao instalado. Execute: pip install beautifulsoup4")
-
-api_session = requests.Session()
+    logger.warning("AVISO: beautifulsoup4 nao instalado. Execute: pip install beautifulsoup4")
+
+
+def _resolver_parser_html(preferido: str) -> str:
+    """Converte a configuração HTML_PARSER no parser efetivo do BeautifulSoup."""
+    if preferido in ('auto', 'lxml', ''):
+        if LXML_AVAILABLE:
+            return 'lxml'
+        if preferido == 'lxml':
+            logger.warning("AVISO: HTML_PARSER=lxml mas lxml nao instalado. Usando html.parser")
+        return 'html.parser'
+    if preferido != 'html.parser':
+        logger.warning("AVISO: HTML_PARSER '%s' desconhecido. Usando html.parser", preferido)
+    return 'html.parser'
+
+
+HTML_PARSER_BACKEND = _resolver_parser_html(HTML_PARSER)
+
+def _criar_adaptador() -> HTTPAdapter:
+    """Adaptador com o pool de conexões de config.env (API_POOL_*, API_MAX_RETRIES)."""
+    return HTTPAdapter(
+        pool_connections=API_POOL_CONEXOES,
+        pool_maxsize=API_POOL_MAXSIZE,
+        max_retries=API_MAX_RETRIES,
+        pool_block=API_POOL_BLOCK,
+    )
+
+
+def _criar_sessao(adaptador: Optional[HTTPAdapter] = None) -> requests.Session:
+    """Sessão com `adaptador` (ou um pool novo) montado para http e https e cookies indexados por nome."""
+    sessao = requests.Session()
+    sessao.cookies = CookiesSessao()
+    adaptador = adaptador if adaptador is not None else _criar_adaptador()
+    sessao.mount('https://', adaptador)
+    sessao.mount('http://', adaptador)
+    return sessao
+
+
+_adaptador_api = _criar_adaptador()
+api_session = _criar_sessao(_adaptador_api)
+# Sessões por restaurante: cookie jar próprio, mesmo pool de conexões da api_session.
+sessoes = RegistroSessoes(lambda: _criar_sessao(_adaptador_api))
 session_cookies_store: Dict[Any, str] = {}
+upstream_singleflight = SingleFlight()
+upstream_circuito = CircuitBreaker(CIRCUIT_BREAKER_FALHAS, CIRCUIT_BREAKER_ABERTO)
+codificacao_endpoints = CodificacaoEndpoints(CODIFICACAO_ENDPOINTS_DB)
+
+
+def _aguardar_retentativa(segundos: float) -> None:
+    """Espera entre tentativas sem ocupar vaga do `upstream_escalonador`; volta à fila ao acordar."""
+    try:
+        with sem_vaga(tempo_restante):
+            time.sleep(segundos)
+    except TimeoutError:
+        raise DeadlineExcedido('sem vaga para a nova tentativa até o fim do prazo') from None
+
+
+upstream_retentativas = PoliticaRetentativas(
+    API_RETENTATIVAS, API_RETENTATIVA_BASE, API_RETENTATIVA_TETO, API_RETRY_AFTER_MAXIMO,
+    dormir=_aguardar_retentativa,
+)
+upstream_timeouts = TimeoutsAdaptativos(
+    TIMEOUT_ADAPTATIVO_QUANTIL, TIMEOUT_ADAPTATIVO_FATOR, TIMEOUT_ADAPTATIVO_PISO, API_READ_TIMEOUT,
+    TIMEOUT_ADAPTATIVO_MEIA_VIDA, TIMEOUT_ADAPTATIVO, TIMEOUT_ADAPTATIVO_ISENTOS,
+)
+upstream_hedge = PoliticaHedge(HEDGE_ENDPOINTS, HEDGE_QUANTIL, HEDGE_JANELA, HEDGE_ATRASO_MINIMO, HEDGE_TAXA_MAXIMA)
+upstream_escalonador = EscalonadorUpstream(ESCALONADOR_LIMITE, ESCALONADOR_RESERVA_INTERATIVA)
+
+# Respostas que indicam API externa fora do ar (contam como falha no circuit breaker).
+STATUS_FALHA_UPSTREAM = frozenset({502, 503, 504})
+
+_NOMES_CODIFICACAO = {CORPO_JSON: 'JSON', CORPO_FORM: 'form-urlencoded'}
+
+# Palavras que, numa resposta 400, indicam corpo na codificação errada (JSON x form-urlencoded).
+PALAVRAS_ERRO_FORMATO = ('formato', 'format', 'content-type', 'invalid', 'form')
+
+
+def sessao_da_requisicao() -> requests.Session:
+    """
+    Sessão das chamadas à API externa no contexto atual: a forçada com `usar_sessao` (login), a do
+    restaurante da requisição, se ele tiver uma, ou a `api_session` compartilhada.
+    """
+    sessao = sessao_forcada()
+    if sessao is None:
+        sessao = sessoes.sessao(restaurante_atual())
+    return sessao if sessao is not None else api_session
+
+
+def restaurante_ambiguo() -> bool:
+    """
+    True se a requisição cairia na `api_session` (último login) enquanto ela pode ser de outro
+    restaurante: sem sessão própria e com outro restaurante logado (ou mais de um, quando o
+    restaurante não foi identificado). Escritas nesse caso são recusadas, não feitas em nome do outro.
+    """
+    if sessao_forcada() is not None:
+        return False
+    restaurante = restaurante_atual()
+    if sessoes.sessao(restaurante) is not None:
+        return False
+    outros = [logado for logado in sessoes.restaurantes() if logado != restaurante]
+    return len(outros) > 1 if restaurante is None else bool(outros)
+
+
+def resposta_restaurante_ambiguo(method: str, endpoint: str) -> Tuple[int, Any]:
+    """400 sem chamar a API externa: a escrita iria com os cookies do último login, talvez de outro restaurante."""
+    logger.warning(
+        "[SESSAO] %s %s recusado: restaurante da requisição sem sessão própria com %s restaurante(s) logado(s)",
+        method, endpoint, len(sessoes.restaurantes()),
+    )
+    return 400, {
+        'status': 'error',
+        'message': 'Restaurante da requisição não identificado: envie o header X-Restaurante-Id do restaurante logado',
+        'diagnostico': {'tipo_erro': 'restaurante_nao_identificado'},
+    }
 
 
 def get_session_cookie(restaurante_id: Optional[int] = None) -> Optional[str]:
@@ -34,37 +196,246 @@ def get_session_cookie(restaurante_id: Optional[int] = None) -> Optional[str]:
 
 
 def set_session_cookie(cookie_value: str, restaurante_id: Optional[int] = None) -> None:
-    """Armazena cookie de sessão, removendo duplicatas."""
+    """
+    Armazena cookie de sessão (substituindo o anterior de mesmo nome) na sessão padrão e, com
+    `restaurante_id`, também na sessão própria do restaurante.
+    """
     if cookie_value and '=' in cookie_value:
         cookie_name, cookie_val = cookie_value.split('=', 1)
-        try:
-            cookies_to_keep = {
-                name: value for name, value in api_session.cookies.items() if name != cookie_name
-            }
-            api_session.cookies.clear()
-            for name, value in cookies_to_keep.items():
-                api_session.cookies.set(name, value)
-        except Exception as exc:  # pragma: no cover - logs
-            print(f"[SESSION] Erro ao limpar cookies: {exc}")
-        api_session.cookies.set(cookie_name, cookie_val)
+        substituir_cookie(api_session.cookies, cookie_name, cookie_val)
+        chave = normalizar_restaurante(restaurante_id)
+        if chave is not None:
+            substituir_cookie(sessoes.obter_ou_criar(chave).cookies, cookie_name, cookie_val)
         if restaurante_id:
             session_cookies_store[restaurante_id] = cookie_value
         session_cookies_store['latest'] = cookie_value
 
 
 def clear_session_cookie(restaurante_id: Optional[int] = None) -> None:
-    """Limpa cookie de sessão."""
+    """Limpa cookie de sessão (e a sessão própria do restaurante)."""
     if restaurante_id:
         session_cookies_store.pop(restaurante_id, None)
+        chave = normalizar_restaurante(restaurante_id)
+        if chave is not None:
+            sessoes.remover(chave)
     else:
         session_cookies_store.clear()
         api_session.cookies.clear()
+        sessoes.limpar()
+
+
+_RE_LOGIN_SUCESSO = re.compile(r'Login bem-sucedido.*?Bem-vindo\(a\),\s*(.+?)\.', re.IGNORECASE)
+_RE_ID_SCRIPT = re.compile(r'restaurante[_\s]*id\s*[=:]\s*(\d+)', re.IGNORECASE)
+_RE_JSON_SCRIPT = re.compile(r'\{[^}]*restaurante[_\s]*id[^}]*\}', re.IGNORECASE | re.DOTALL)
+_RE_ID_HREF = re.compile(r'[?&](?:id|restaurante_id)=(\d+)', re.IGNORECASE)
+# Uma passada pelo HTML bruto: comentários e <style> são pulados, <script> traz o conteúdo
+# e as demais tags de abertura trazem nome e atributos (valores entre aspas podem conter '>').
+_RE_TOKENS_LOGIN = re.compile(
+    r'<!--.*?-->'
+    r'|<style\b[^>]*>.*?</style\s*>'
+    r'|<script\b(?:[^>"\']|"[^"]*"|\'[^\']*\')*>(?P<script>.*?)</script\s*>'
+    r'|<(?P<tag>[a-zA-Z][^\s/>]*)(?P<atributos>(?:[^>"\']|"[^"]*"|\'[^\']*\')*)>',
+    re.IGNORECASE | re.DOTALL,
+)
+_RE_ATRIBUTO = re.compile(r'([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+
+
+def _atributos(texto: str) -> Dict[str, str]:
+    atributos: Dict[str, str] = {}
+    for nome, aspas_duplas, aspas_simples, sem_aspas in _RE_ATRIBUTO.findall(texto):
+        atributos.setdefault(nome.lower(), html.unescape(aspas_duplas or aspas_simples or sem_aspas))
+    return atributos
+
+
+def _restaurante_id_em_script(texto: str) -> Optional[Any]:
+    if 'restaurante' not in texto.lower():
+        return None
+
+    id_match = _RE_ID_SCRIPT.search(texto)
+    if id_match:
+        return int(id_match.group(1))
+
+    json_match = _RE_JSON_SCRIPT.search(texto)
+    if json_match:
+        try:
+            json_data = json.loads(json_match.group().replace("'", '"'))
+            if 'restaurante_id' in json_data:
+                return json_data['restaurante_id']
+        except Exception:
+            pass
+    return None
+
+
+def _escolher_restaurante_id(em_input: Optional[int], em_data_attr: Optional[int], em_link: Optional[int]) -> Optional[int]:
+    if em_input:
+        logger.info("[PARSE] restaurante_id em input hidden: %s", em_input)
+        return em_input
+    if em_data_attr:
+        logger.info("[PARSE] restaurante_id em data-attribute: %s", em_data_attr)
+        return em_data_attr
+    if em_link:
+        logger.info("[PARSE] restaurante_id em URL: %s", em_link)
+        return em_link
+    return None
+
+
+def _restaurante_id_login_rapido(html_content: str) -> Optional[Any]:
+    """
+    Caminho rápido do login: procura o restaurante_id direto no HTML bruto, numa passada com
+    expressões pré-compiladas, sem montar a árvore. Mesma prioridade de `_extrair_restaurante_id_login`.
+    """
+    em_input = None
+    em_data_attr = None
+    data_attr_visto = False
+    em_link = None
+
+    for token in _RE_TOKENS_LOGIN.finditer(html_content):
+        script = token.group('script')
+        if script is not None:
+            restaurante_id = _restaurante_id_em_script(script) if script.strip() else None
+            if restaurante_id:
+                logger.info("[PARSE] restaurante_id encontrado em script: %s", restaurante_id)
+                return restaurante_id
+            continue
+
+        nome = token.group('tag')
+        if nome is None:
+            continue
+        texto_atributos = token.group('atributos')
+        nome = nome.lower()
+        if nome not in ('input', 'a') and (data_attr_visto or 'data-restaurante-id' not in texto_atributos.lower()):
+            continue
+
+        atributos = _atributos(texto_atributos)
+        if nome == 'input' and em_input is None and atributos.get('type') == 'hidden':
+            nome_input = atributos.get('name', '').lower()
+            if 'restaurante' in nome_input and 'id' in nome_input:
+                try:
+                    em_input = int(atributos.get('value', 0))
+                except Exception:
+                    pass
+        elif nome == 'a' and em_link is None:
+            id_match = _RE_ID_HREF.search(atributos.get('href') or '')
+            if id_match:
+                em_link = int(id_match.group(1))
+
+        if not data_attr_visto and 'data-restaurante-id' in atributos:
+            data_attr_visto = True
+            try:
+                em_data_attr = int(atributos['data-restaurante-id'])
+            except Exception:
+                pass
+
+    return _escolher_restaurante_id(em_input, em_data_attr, em_link)
+
+
+def _extrair_restaurante_id_login(soup: Any) -> Optional[Any]:
+    """
+    Procura o restaurante_id numa única passada pela árvore. Prioridade (como antes):
+    script > input hidden > atributo data-restaurante-id > link com ?id= ou ?restaurante_id=.
+    """
+    em_input = None
+    em_data_attr = None
+    data_attr_visto = False
+    em_link = None
+
+    for tag in soup.descendants:
+        if not isinstance(tag, Tag):
+            continue
+        nome = tag.name
+
+        if nome == 'script':
+            if tag.string:
+                restaurante_id = _restaurante_id_em_script(tag.string)
+                if restaurante_id:
+                    logger.info("[PARSE] restaurante_id encontrado em script: %s", restaurante_id)
+                    return restaurante_id
+        elif nome == 'input' and em_input is None and tag.get('type') == 'hidden':
+            nome_input = tag.get('name', '').lower()
+            if 'restaurante' in nome_input and 'id' in nome_input:
+                try:
+                    em_input = int(tag.get('value', 0))
+                except Exception:
+                    pass
+        elif nome == 'a' and em_link is None:
+            id_match = _RE_ID_HREF.search(tag.get('href') or '')
+            if id_match:
+                em_link = int(id_match.group(1))
+
+        if not data_attr_visto and tag.has_attr('data-restaurante-id'):
+            data_attr_visto = True
+            try:
+                em_data_attr = int(tag.get('data-restaurante-id'))
+            except Exception:
+                pass
+
+    return _escolher_restaurante_id(em_input, em_data_attr, em_link)
+
+
+def _localizar_tabela_itens(soup: Any) -> Optional[Any]:
+    """`table#tabelaItens` ou, na falta dela, a primeira tabela do documento (uma passada)."""
+    primeira = None
+    for tag in soup.descendants:
+        if isinstance(tag, Tag) and tag.name == 'table':
+            if tag.get('id') == 'tabelaItens':
+                return tag
+            if primeira is None:
+                primeira = tag
+    return primeira
+
+
+def _linhas_tabela(tabela: Any) -> List[List[Any]]:
+    """
+    Células (`td`/`th`) de cada linha da tabela, coletadas numa passada pela subárvore.
+    Cada célula pertence à `tr` mais próxima que a contém.
+    """
+    linhas: List[List[Any]] = []
+    por_linha: Dict[int, List[Any]] = {}
+    for tag in tabela.descendants:
+        if not isinstance(tag, Tag):
+            continue
+        if tag.name == 'tr':
+            celulas: List[Any] = []
+            linhas.append(celulas)
+            por_linha[id(tag)] = celulas
+        elif tag.name in ('td', 'th'):
+            pai = tag.parent
+            while pai is not None and pai is not tabela and pai.name != 'tr':
+                pai = pai.parent
+            celulas = por_linha.get(id(pai))
+            if celulas is not None:
+                celulas.append(tag)
+    return linhas
+
+
+def _item_da_linha(cells: List[Any]) -> Dict[str, Any]:
+    item: Dict[str, Any] = {}
+    texto = cells[0].get_text(strip=True)
+    item['id'] = int(texto) if texto.isdigit() else None
+    item['nome'] = cells[1].get_text(strip=True)
+    preco_text = cells[2].get_text(strip=True).replace('R$', '').replace(',', '.').strip()
+    try:
+        item['preco'] = float(preco_text)
+    except Exception:
+        item['preco'] = 0.0
+    if len(cells) > 3:
+        restaurante_cell = cells[3].get_text(strip=True)
+        if restaurante_cell.isdigit():
+            item['restaurante_id'] = int(restaurante_cell)
+            item['restaurante'] = {'id': int(restaurante_cell)}
+    if len(cells) > 4:
+        img_link = next((tag for tag in cells[4].descendants if isinstance(tag, Tag) and tag.name == 'a'), None)
+        if img_link is not None:
+            item['imagemUrl'] = img_link.get('href', '')
+    return item
 
 
 def parse_html_response(html_content: str, endpoint: str = '') -> Dict[str, Any]:
     """
     Parseia resposta HTML da API externa e converte para JSON estruturado.
     Especializado para extrair dados de login e listagem de itens.
+    O parser do BeautifulSoup vem de HTML_PARSER (lxml quando disponível); com lxml, a tabela de
+    itens é lida em fluxo (`utils/tabela_itens.py`) sem montar a árvore do documento inteiro.
     """
     try:
         if not BS4_AVAILABLE:
@@ -74,76 +445,20 @@ def parse_html_response(html_content: str, endpoint: str = '') -> Dict[str, Any]
                 'raw_html': html_content[:500],
             }
 
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = None
 
         if 'restaurantes/login' in endpoint or 'restaurante.html' in html_content.lower():
-            success_pattern = re.compile(
-                r'Login bem-sucedido.*?Bem-vindo\(a\),\s*(.+?)\.', re.IGNORECASE
-            )
-            match = success_pattern.search(html_content)
+            match = _RE_LOGIN_SUCESSO.search(html_content)
             restaurante_nome = None
 
             if match:
                 restaurante_nome = match.group(1).strip()
-                print(f"[PARSE] Nome do restaurante extraido: {restaurante_nome}")
-
-            scripts = soup.find_all('script')
-            restaurante_id = None
-
-            for script in scripts:
-                if script.string:
-                    id_match = re.search(
-                        r'restaurante[_\s]*id\s*[=:]\s*(\d+)', script.string, re.IGNORECASE
-                    )
-                    if id_match:
-                        restaurante_id = int(id_match.group(1))
-                        print(f"[PARSE] restaurante_id encontrado em script: {restaurante_id}")
-                        break
-
-                    json_match = re.search(
-                        r'\{[^}]*restaurante[_\s]*id[^}]*\}', script.string, re.IGNORECASE | re.DOTALL
-                    )
-                    if json_match:
-                        try:
-                            json_data = json.loads(json_match.group().replace("'", '"'))
-                            if 'restaurante_id' in json_data:
-                                restaurante_id = json_data['restaurante_id']
-                                print(f"[PARSE] restaurante_id do JSON: {restaurante_id}")
-                                break
-                        except Exception:
-                            pass
+                logger.info("[PARSE] Nome do restaurante extraido: %s", restaurante_nome)
 
+            restaurante_id = _restaurante_id_login_rapido(html_content)
             if not restaurante_id:
-                hidden_inputs = soup.find_all('input', {'type': 'hidden'})
-                for inp in hidden_inputs:
-                    if 'restaurante' in inp.get('name', '').lower() and 'id' in inp.get(
-                        'name', ''
-                    ).lower():
-                        try:
-                            restaurante_id = int(inp.get('value', 0))
-                            print(f"[PARSE] restaurante_id em input hidden: {restaurante_id}")
-                            break
-                        except Exception:
-                            pass
-
-            if not restaurante_id:
-                elements = soup.find_all(attrs={'data-restaurante-id': True})
-                if elements:
-                    try:
-                        restaurante_id = int(elements[0].get('data-restaurante-id'))
-                        print(f"[PARSE] restaurante_id em data-attribute: {restaurante_id}")
-                    except Exception:
-                        pass
-
-            if not restaurante_id:
-                links = soup.find_all('a', href=True)
-                for link in links:
-                    href = link.get('href', '')
-                    id_match = re.search(r'[?&](?:id|restaurante_id)=(\d+)', href, re.IGNORECASE)
-                    if id_match:
-                        restaurante_id = int(id_match.group(1))
-                        print(f"[PARSE] restaurante_id em URL: {restaurante_id}")
-                        break
+                soup = BeautifulSoup(html_content, HTML_PARSER_BACKEND)
+                restaurante_id = _extrair_restaurante_id_login(soup)
 
             result: Dict[str, Any] = {
                 'status': 'success',
@@ -153,17 +468,17 @@ def parse_html_response(html_content: str, endpoint: str = '') -> Dict[str, Any]
 
             if restaurante_id:
                 result['data']['restaurante_id'] = restaurante_id
-                print(f"[PARSE] restaurante_id incluído na resposta: {restaurante_id}")
+                logger.info("[PARSE] restaurante_id incluído na resposta: %s", restaurante_id)
             else:
-                print("[AVISO] restaurante_id nao encontrado no HTML, mas login teve sucesso")
+                logger.warning("[AVISO] restaurante_id nao encontrado no HTML, mas login teve sucesso")
 
             if match and restaurante_nome:
                 result['data']['restaurante_nome'] = restaurante_nome
-                print(f"[PARSE] restaurante_nome incluído na resposta: {restaurante_nome}")
+                logger.info("[PARSE] restaurante_nome incluído na resposta: %s", restaurante_nome)
 
             if not restaurante_id and match:
-                print("[INFO] Login bem-sucedido mas restaurante_id não encontrado")
-                print("[INFO] Frontend pode tentar buscar ID via endpoint /restaurantes/perfil")
+                logger.info("[INFO] Login bem-sucedido mas restaurante_id não encontrado")
+                logger.info("[INFO] Frontend pode tentar buscar ID via endpoint /restaurantes/perfil")
 
             return result
 
@@ -172,52 +487,31 @@ def parse_html_response(html_content: str, endpoint: str = '') -> Dict[str, Any]
             or 'cardapio' in endpoint.lower()
             or 'tabelaItens' in html_content
         ):
-            print("[PARSE] Tentando parsear lista de itens do HTML...")
+            logger.info("[PARSE] Tentando parsear lista de itens do HTML...")
             items = []
 
-            tabela = soup.find('table', id='tabelaItens')
-            if not tabela:
-                tabela = soup.find('table')
+            if HTML_PARSER_BACKEND == 'lxml':
+                items = extrair_itens_tabela(html_content)
+            else:
+                soup = BeautifulSoup(html_content, HTML_PARSER_BACKEND)
+                tabela = _localizar_tabela_itens(soup)
 
-            if tabela:
-                rows = tabela.find_all('tr')
-                for row in rows:
-                    cells = row.find_all(['td', 'th'])
+                for cells in _linhas_tabela(tabela) if tabela else []:
                     if len(cells) >= 3:
                         try:
-                            item: Dict[str, Any] = {}
-                            if len(cells) > 0:
-                                texto = cells[0].get_text(strip=True)
-                                item['id'] = int(texto) if texto.isdigit() else None
-                            if len(cells) > 1:
-                                item['nome'] = cells[1].get_text(strip=True)
-                            if len(cells) > 2:
-                                preco_text = (
-                                    cells[2].get_text(strip=True).replace('R$', '').replace(',', '.').strip()
-                                )
-                                try:
-                                    item['preco'] = float(preco_text)
-                                except Exception:
-                                    item['preco'] = 0.0
-                            if len(cells) > 3:
-                                restaurante_cell = cells[3].get_text(strip=True)
-                                if restaurante_cell.isdigit():
-                                    item['restaurante_id'] = int(restaurante_cell)
-                                    item['restaurante'] = {'id': int(restaurante_cell)}
-                            if len(cells) > 4:
-                                img_link = cells[4].find('a')
-                                if img_link:
-                                    item['imagemUrl'] = img_link.get('href', '')
-
+                            item = _item_da_linha(cells)
                             if item.get('nome') and item.get('id'):
                                 items.append(item)
                         except Exception as exc:
-                            print(f"[PARSE] Erro ao parsear linha da tabela: {exc}")
+                            logger.warning("[PARSE] Erro ao parsear linha da tabela: %s", exc)
                             continue
 
-                if items:
-                    print(f"[PARSE] Parseou {len(items)} itens da tabela HTML")
-                    return items
+            if items:
+                logger.info("[PARSE] Parseou %s itens da tabela HTML", len(items))
+                return items
+
+        if soup is None:
+            soup = BeautifulSoup(html_content, HTML_PARSER_BACKEND)
 
         scripts = soup.find_all('script')
         for script in scripts:
@@ -265,10 +559,7 @@ def parse_html_response(html_content: str, endpoint: str = '') -> Dict[str, Any]
         }
 
     except Exception as exc:
-        print(f"[AVISO] Erro ao parsear HTML: {exc}")
-        import traceback
-
-        print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+        logger.warning("[AVISO] Erro ao parsear HTML: %s", exc, exc_info=True)
         return {
             'status': 'success',
             'message': 'Resposta HTML recebida (não parseado)',
@@ -301,6 +592,52 @@ def mapear_endpoint_flask_para_api(flask_endpoint: str) -> str:
     return endpoint
 
 
+def _registrar_dump_requisicao(
+    method: str,
+    endpoint: str,
+    endpoint_api: str,
+    data: Optional[Dict[str, Any]],
+    params: Optional[Dict[str, Any]],
+) -> None:
+    """
+    Detalhes da requisição (LOG_REQUEST_DUMPS) num único registro: endpoints, destino, params,
+    corpo sem senha e cookies.
+    """
+    partes = [
+        f"Endpoint Flask: {endpoint} | API Externa: {endpoint_api} | "
+        f"{API_EXTERNA_PROTOCOL}://{API_EXTERNA_HOST}:{API_EXTERNA_PORT} | "
+        f"timeout {API_CONNECT_TIMEOUT:g}s/{API_READ_TIMEOUT:g}s"
+    ]
+    restante = tempo_restante()
+    if restante is not None:
+        partes.append(f"Prazo restante: {restante:.1f}s")
+    if params:
+        partes.append(f"Query Params: {params}")
+    if data:
+        data_log = data.copy()
+        if 'senha' in data_log:
+            data_log['senha'] = '***'
+        if 'password' in data_log:
+            data_log['password'] = '***'
+        partes.append(f"Body Data: {json.dumps(data_log, ensure_ascii=False)}")
+    cookies = sessao_da_requisicao().cookies
+    if len(cookies) > 0:
+        cookie_list = [f"{name}={value[:20]}..." for name, value in list(cookies.items())[:3]]
+        partes.append(f"Cookies ({len(cookies)}): {', '.join(cookie_list)}")
+    logger.info("[PROXY] %s", ' | '.join(partes))
+
+
+def _chave_singleflight(method: str, endpoint: str, params: Optional[Dict[str, Any]]) -> Tuple[Any, ...]:
+    """Identifica GETs equivalentes: método, endpoint mapeado, params e cookie de sessão."""
+    endpoint_api = mapear_endpoint_flask_para_api(endpoint).lstrip('/')
+    params_key = tuple(sorted((str(k), str(v)) for k, v in params.items())) if params else ()
+    try:
+        jsessionid = sessao_da_requisicao().cookies.get('JSESSIONID')
+    except Exception:
+        jsessionid = None
+    return (method, endpoint_api, params_key, jsessionid)
+
+
 def proxy_request(
     method: str,
     endpoint: str,
@@ -309,10 +646,281 @@ def proxy_request(
 ) -> Tuple[int, Any]:
     """
     Função helper aprimorada para fazer proxy de requisições para a API externa.
+    GETs idênticos em andamento são coalescidos: as chamadas seguidoras aguardam
+    o resultado da primeira em vez de abrir uma nova requisição na API externa
+    (se o prazo do líder acabar antes, a seguidora com prazo maior tenta de novo).
+    Com o circuito da família do endpoint aberto, responde na hora com o último erro.
+    As chamadas que vão à API externa passam pelo escalonador (limite de simultâneas e prioridade).
+    O tempo gasto aqui, fora a decodificação, entra na fase `upstream` da rota.
+    """
+    inicio = time.perf_counter()
+    decodificacao = tempo_fase('decodificacao')
+    try:
+        return _proxy_request(method, endpoint, data, params)
+    finally:
+        registrar_fase('upstream', time.perf_counter() - inicio - (tempo_fase('decodificacao') - decodificacao))
+
+
+def _proxy_request(
+    method: str,
+    endpoint: str,
+    data: Optional[Dict[str, Any]],
+    params: Optional[Dict[str, Any]],
+) -> Tuple[int, Any]:
+    if method != 'GET' and restaurante_ambiguo():
+        return resposta_restaurante_ambiguo(method, endpoint)
+    familia = _familia_endpoint(endpoint)
+    if not upstream_circuito.permitir(familia):
+        return _resposta_circuito_aberto(familia)
+
+    lider = False
+
+    def executar() -> Tuple[int, Any]:
+        # Só quem foi à API registra o resultado: seguidoras coalescidas não contam a mesma falha de novo.
+        nonlocal lider
+        lider = True
+        status_code, response_data = _executar_escalonado(method, endpoint, data, params)
+        _registrar_resultado_circuito(familia, status_code, response_data)
+        return status_code, response_data
+
+    try:
+        if method == 'GET' and not data:
+            chave = _chave_singleflight(method, endpoint, params)
+            while True:
+                try:
+                    status_code, response_data = upstream_singleflight.do(chave, executar, espera=tempo_restante())
+                except TimeoutError:
+                    upstream_circuito.liberar_sonda(familia)
+                    return _resposta_deadline_excedido(method, endpoint)
+                # O prazo que acabou foi o do líder: com tempo sobrando, a seguidora tenta de novo (como líder ou
+                # coalescida numa chamada mais nova).
+                if lider or not _prazo_excedido(response_data) or deadline_esgotado():
+                    return status_code, response_data
+        return executar()
+    except BaseException:
+        upstream_circuito.liberar_sonda(familia)
+        raise
+
+
+def _executar_escalonado(
+    method: str,
+    endpoint: str,
+    data: Optional[Dict[str, Any]],
+    params: Optional[Dict[str, Any]],
+) -> Tuple[int, Any]:
+    """
+    Executa a requisição numa vaga do `upstream_escalonador`: escritas na frente das listagens e
+    estas na frente de analytics, em rodízio entre restaurantes. Só o líder do singleflight ocupa
+    vaga. Sem vaga até o fim do prazo, responde 504 sem chamar a API externa.
+    """
+    try:
+        with upstream_escalonador.vaga(prioridade_atual(method), restaurante_atual(), espera=tempo_restante()):
+            return _executar_proxy_request(method, endpoint, data, params)
+    except TimeoutError:
+        amostragem.registrar(
+            logger, 'proxy.escalonador', logging.WARNING,
+            "[ESCALONADOR] Sem vaga para %s %s até o fim do prazo (limite de %s chamadas simultâneas)",
+            method, endpoint, upstream_escalonador.limite,
+        )
+        return _resposta_deadline_excedido(method, endpoint)
+
+
+def _observar_upstream(endpoint_api: str, response: Optional[requests.Response], inicio: float) -> None:
+    """Histogramas da chamada à API externa: espera (até o corpo baixado) e tamanho do corpo."""
+    status_code = getattr(response, 'status_code', None)
+    rotulos = {
+        'endpoint': rotulo_endpoint(endpoint_api),
+        'status': classe_status(status_code if isinstance(status_code, int) else None),
+    }
+    metricas.observar('sgr_upstream_espera_segundos', time.perf_counter() - inicio, **rotulos)
+    corpo = getattr(response, '_content', None)
+    if isinstance(corpo, bytes):
+        metricas.observar('sgr_upstream_corpo_bytes', len(corpo), **rotulos)
+
+
+def _observar_decodificacao(endpoint_api: str, formato: str, inicio: float) -> None:
+    duracao = time.perf_counter() - inicio
+    metricas.observar('sgr_decodificacao_segundos', duracao, endpoint=rotulo_endpoint(endpoint_api), formato=formato)
+    registrar_fase('decodificacao', duracao)
+
+
+def _familia_endpoint(endpoint: str) -> str:
+    """Família do endpoint para o circuit breaker: primeiro segmento do caminho na API externa."""
+    return mapear_endpoint_flask_para_api(endpoint).strip('/').split('/', 1)[0].split('?', 1)[0]
+
+
+def _prazo_excedido(response_data: Any) -> bool:
+    """Resposta 504 montada por `_resposta_deadline_excedido` (o prazo do cliente acabou)."""
+    return isinstance(response_data, dict) and (response_data.get('diagnostico') or {}).get('tipo_erro') == 'deadline_excedido'
+
+
+def _registrar_resultado_circuito(familia: str, status_code: int, response_data: Any) -> None:
+    if _prazo_excedido(response_data):
+        upstream_circuito.liberar_sonda(familia)  # o prazo do cliente acabou: não diz nada sobre a API externa
+        return
+    if status_code not in STATUS_FALHA_UPSTREAM:
+        anterior = upstream_circuito.registrar_sucesso(familia)
+        if anterior is not None:
+            logger.info("[CIRCUITO] '%s' fechado: API externa respondeu (%s)", familia or '/', status_code)
+        return
+    if upstream_circuito.registrar_falha(familia, (status_code, response_data)):
+        logger.warning(
+            "[CIRCUITO] '%s' aberto após falha %s: respostas imediatas por %.0fs até a próxima sonda",
+            familia or '/', status_code, upstream_circuito.tempo_aberto,
+        )
+
+
+def _chave_codificacao(method: str, endpoint_api: str) -> str:
+    """Chave da tabela de codificações: método e endpoint mapeado, sem ids."""
+    return f'{method} {rotulo_endpoint(endpoint_api)}'
+
+
+def _codificacao_recusada(response: requests.Response) -> bool:
+    """401/403, ou 400 cuja mensagem aponta formato do corpo: vale tentar a outra codificação."""
+    if response.status_code in (401, 403):
+        return True
+    if response.status_code != 400:
+        return False
+    _, dados, _ = decodificar_corpo(response.content, response.headers.get('Content-Type'))
+    mensagem = str(dados.get('message') or '').lower() if isinstance(dados, dict) else ''
+    return any(palavra in mensagem for palavra in PALAVRAS_ERRO_FORMATO)
+
+
+def _sessao_da_tentativa(sessao: requests.Session) -> requests.Session:
+    """Cópia rasa da sessão (mesmo pool e headers) com um cookie jar próprio, copiado do atual."""
+    copia = copy.copy(sessao)
+    copia.cookies = sessao.cookies.copy()
+    return copia
+
+
+def _adotar_cookies(sessao: requests.Session, response: requests.Response) -> None:
+    """Grava na sessão os cookies recebidos pela resposta (e pelos redirecionamentos dela)."""
+    for resposta in (*response.history, response):
+        for cookie in resposta.cookies:
+            sessao.cookies.set_cookie(cookie)
+
+
+def _enviar_upstream(
+    sessao: requests.Session,
+    method: str,
+    url: str,
+    endpoint_api: str,
+    codificacao: str,
+    data: Optional[Dict[str, Any]],
+    params: Optional[Dict[str, Any]],
+    headers: Dict[str, str],
+) -> requests.Response:
+    """
+    Uma chamada à API externa com o corpo em JSON ou form-urlencoded (`codificacao`). Chamadas
+    idempotentes (GET, DELETE, PUT de status) são repetidas após conexão perdida ou 502/503/504,
+    conforme `upstream_retentativas`; cada tentativa tem o próprio timeout dentro do prazo, com a
+    leitura derivada da latência do endpoint (`upstream_timeouts`). GETs dos endpoints de
+    HEDGE_ENDPOINTS ganham uma cópia paralela quando passam do limiar (`upstream_hedge`); a
+    tentativa perdedora não registra métricas nem latência e não mexe nos cookies da sessão.
+    """
+    corpo: Dict[str, Any] = {'json': data}
+    if codificacao == CORPO_FORM:
+        headers = {**headers, 'Content-Type': 'application/x-www-form-urlencoded'}
+        corpo = {'data': corpo_formulario(data)}
+
+    def tentativa(sessao_tentativa: requests.Session = sessao) -> requests.Response:
+        response = None
+        inicio_upstream = time.perf_counter()
+        leitura = upstream_timeouts.leitura(endpoint_api)
+        timeout = timeout_upstream(read=leitura)
+        try:
+            response = sessao_tentativa.request(
+                method=method,
+                url=url,
+                params=params,
+                headers=headers,
+                timeout=timeout,
+                allow_redirects=True,
+                **corpo,
+            )
+        except requests.exceptions.ReadTimeout:
+            # Só conta se o limite foi o do endpoint (não um prazo de requisição quase no fim).
+            if timeout[1] >= (leitura or API_READ_TIMEOUT) and not tentativa_descartada():
+                upstream_timeouts.observar_timeout(endpoint_api, timeout[1])
+            raise
+        finally:
+            if not tentativa_descartada():
+                _observar_upstream(endpoint_api, response, inicio_upstream)
+        if not tentativa_descartada():
+            upstream_timeouts.observar(endpoint_api, time.perf_counter() - inicio_upstream)
+        return response
+
+    def tentativa_isolada() -> requests.Response:
+        return tentativa(_sessao_da_tentativa(sessao))
+
+    def vaga_hedge() -> Optional[Callable[[], None]]:
+        return upstream_escalonador.ocupar_livre(prioridade_atual(method), restaurante_atual())
+
+    def chamada() -> requests.Response:
+        if upstream_hedge.elegivel(method, endpoint_api):
+            # Cada tentativa do hedge usa cópia própria dos cookies; só os da vencedora voltam à sessão.
+            # A cópia paralela ocupa vaga própria no escalonador, e só sai se houver uma livre.
+            response = upstream_hedge.executar(tentativa_isolada, endpoint_api, vaga=vaga_hedge)
+            _adotar_cookies(sessao, response)
+            return response
+        return tentativa()
+
+    if upstream_retentativas.ativo and chamada_idempotente(method, endpoint_api):
+        return upstream_retentativas.executar(chamada, endpoint_api)
+    return chamada()
+
+
+def _resposta_deadline_excedido(method: str, url: str) -> Tuple[int, Any]:
+    """504 sem (ou sem terminar) a chamada à API externa: o cliente já desistiu da requisição."""
+    amostragem.registrar(
+        logger, 'proxy.deadline', logging.WARNING,
+        "[PRAZO] Prazo da requisição esgotado em %s %s: chamada à API externa interrompida", method, url,
+    )
+    return 504, {
+        'status': 'error',
+        'message': 'Prazo da requisição esgotado antes da resposta da API externa',
+        'diagnostico': {
+            'tipo_erro': 'deadline_excedido',
+            'timeout_configurado': f'{API_CONNECT_TIMEOUT:g}s conexão / {API_READ_TIMEOUT:g}s leitura',
+        },
+    }
+
+
+def _resposta_circuito_aberto(familia: str) -> Tuple[int, Any]:
+    """Repete o último erro da família (com o `diagnostico` original), sem chamar a API externa."""
+    status_code, response_data = upstream_circuito.ultima_falha(familia) or (503, {
+        'status': 'error',
+        'message': 'Servidor não está disponível ou não acessível',
+        'diagnostico': {'tipo_erro': 'connection_error'},
+    })
+    response_data = dict(response_data) if isinstance(response_data, dict) else {'status': 'error', 'message': str(response_data)}
+    diagnostico = dict(response_data.get('diagnostico') or {})
+    diagnostico['circuito'] = {
+        'estado': upstream_circuito.estado(familia),
+        'familia': familia,
+        'proxima_tentativa_em': round(upstream_circuito.reabre_em(familia), 1),
+    }
+    response_data['diagnostico'] = diagnostico
+    amostragem.registrar(
+        logger, ('proxy.circuito', familia), logging.INFO,
+        "[CIRCUITO] '%s' aberto: respondendo %s sem chamar a API externa", familia or '/', status_code,
+    )
+    return status_code, response_data
+
+
+def _executar_proxy_request(
+    method: str,
+    endpoint: str,
+    data: Optional[Dict[str, Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> Tuple[int, Any]:
+    """
+    Executa uma requisição na API externa.
     Inclui logs detalhados e diagnóstico completo de erros de rede.
     """
     endpoint_api = endpoint
     url = f'{API_EXTERNA_BASE_URL}{endpoint.lstrip("/")}'
+    leitura = API_READ_TIMEOUT
 
     try:
         endpoint_api = mapear_endpoint_flask_para_api(endpoint)
@@ -330,65 +938,29 @@ def proxy_request(
         elif method in ['POST', 'PUT']:
             headers['Content-Type'] = 'application/x-www-form-urlencoded'
 
-        jsessionid_count = sum(1 for name in api_session.cookies.keys() if name == 'JSESSIONID')
+        # Sessão do restaurante da requisição (cookie jar próprio) ou a compartilhada.
+        sessao = sessao_da_requisicao()
+
+        jsessionid_count = contar_cookie(sessao.cookies, 'JSESSIONID')
         if jsessionid_count > 1:
-            print(f"   [COOKIE] AVISO: Encontrados {jsessionid_count} cookies JSESSIONID - limpando duplicatas...")
-            jsessionid_val = api_session.cookies.get('JSESSIONID')
-            cookies_backup = {name: value for name, value in api_session.cookies.items() if name != 'JSESSIONID'}
-            api_session.cookies.clear()
-            for name, value in cookies_backup.items():
-                api_session.cookies.set(name, value)
-            if jsessionid_val:
-                api_session.cookies.set('JSESSIONID', jsessionid_val)
-            print("   [COOKIE] Duplicatas removidas - mantido apenas 1 JSESSIONID")
-        elif jsessionid_count == 1:
-            print("   [COOKIE] JSESSIONID presente na sessao - será enviado automaticamente")
-
-        if len(api_session.cookies) > 0:
-            cookie_list = [f"{name}={value[:20]}..." for name, value in list(api_session.cookies.items())[:3]]
-            print(f"   [COOKIE] Sessao tem {len(api_session.cookies)} cookie(s): {', '.join(cookie_list)}")
+            logger.warning("[COOKIE] Encontrados %s cookies JSESSIONID - limpando duplicatas", jsessionid_count)
+            substituir_cookie(sessao.cookies, 'JSESSIONID', valor_cookie(sessao.cookies, 'JSESSIONID'))
+            logger.info("[COOKIE] Duplicatas removidas - mantido apenas 1 JSESSIONID")
 
-        try:
-            print(f"\n{'='*60}")
-            print("[PROXY] PROXY REQUEST")
-            print(f"{'='*60}")
-            print(f"   Metodo: {method}")
-            print(f"   URL Completa: {url}")
-            print(f"   Base URL: {API_EXTERNA_BASE_URL}")
-            print(f"   Endpoint Flask: {endpoint}")
-            print(f"   Endpoint API Externa: {endpoint_api}")
-        except UnicodeEncodeError:
-            print(f"\n{'='*60}")
-            print("[PROXY] PROXY REQUEST")
-            print(f"{'='*60}")
-            print(f"   Metodo: {method}")
-            print(f"   URL Completa: {url}")
-            print(f"   Endpoint API Externa: {endpoint_api}")
-        print(f"   Timeout: {API_TIMEOUT}s")
-        print(f"   Protocolo: {API_EXTERNA_PROTOCOL.upper()}")
-        print(f"   Host: {API_EXTERNA_HOST}")
-        print(f"   Porta: {API_EXTERNA_PORT}")
-
-        if params:
-            print(f"   Query Params: {params}")
-        if data:
-            data_log = data.copy()
-            if 'senha' in data_log:
-                data_log['senha'] = '***'
-            if 'password' in data_log:
-                data_log['password'] = '***'
-            print(f"   Body Data: {json.dumps(data_log, indent=2, ensure_ascii=False)}")
-        print(f"{'='*60}\n")
-
-        response = api_session.request(
-            method=method,
-            url=url,
-            json=data,
-            params=params,
-            headers=headers,
-            timeout=API_TIMEOUT,
-            allow_redirects=True,
-        )
+        logger.info("[PROXY] %s %s", method, url)
+        if LOG_REQUEST_DUMPS:
+            _registrar_dump_requisicao(method, endpoint, endpoint_api, data, params)
+
+        # POST com corpo: começa pela codificação que o endpoint aceitou por último.
+        escolhe_codificacao = method == 'POST' and bool(data)
+        chave_codificacao = _chave_codificacao(method, endpoint_api)
+        codificacao = codificacao_endpoints.preferida(chave_codificacao) if escolhe_codificacao else CORPO_JSON
+        if codificacao == CORPO_FORM:
+            logger.debug("[CODIFICACAO] %s aceita form-urlencoded - enviando direto", chave_codificacao)
+
+        # Timeout de leitura em vigor para o endpoint (diagnóstico, se estourar).
+        leitura = upstream_timeouts.leitura(endpoint_api) or API_READ_TIMEOUT
+        response = _enviar_upstream(sessao, method, url, endpoint_api, codificacao, data, params, headers)
 
         set_cookie_headers = (
             response.headers.get_list('Set-Cookie') if hasattr(response.headers, 'get_list') else []
@@ -404,27 +976,15 @@ def proxy_request(
 
                 if cookie_value.startswith('JSESSIONID='):
                     jsessionid_value = cookie_value
-                    print(f"   [COOKIE] JSESSIONID recebido: {cookie_value[:50]}...")
+                    logger.debug("[COOKIE] JSESSIONID recebido: %s...", cookie_value[:50])
 
             if jsessionid_value:
                 cookie_name, cookie_val = jsessionid_value.split('=', 1)
 
-                if 'JSESSIONID' in api_session.cookies:
-                    cookies_backup = {}
-                    for name, value in api_session.cookies.items():
-                        if name != 'JSESSIONID':
-                            cookies_backup[name] = value
-
-                    api_session.cookies.clear()
-
-                    for name, value in cookies_backup.items():
-                        api_session.cookies.set(name, value)
-
-                    print("   [COOKIE] JSESSIONID antigo removido para evitar duplicata")
-
-                api_session.cookies.set('JSESSIONID', cookie_val)
+                # O requests já gravou o cookie com o domínio da API: troca todas as cópias por uma só.
+                substituir_cookie(sessao.cookies, cookie_name, cookie_val)
 
-                restaurante_id = None
+                restaurante_id = restaurante_atual()
                 if data and isinstance(data, dict) and 'restaurante_id' in data:
                     restaurante_id = data.get('restaurante_id')
 
@@ -432,73 +992,65 @@ def proxy_request(
                 if restaurante_id:
                     session_cookies_store[restaurante_id] = jsessionid_value
 
-                print("   [COOKIE] JSESSIONID salvo na sessao e store")
+                logger.info("[COOKIE] JSESSIONID salvo na sessao e store")
 
-        if len(api_session.cookies) > 0:
-            cookie_info = [f"{name}={value[:20]}..." for name, value in list(api_session.cookies.items())[:3]]
-            print(f"   [COOKIE] Sessao agora tem {len(api_session.cookies)} cookie(s): {', '.join(cookie_info)}")
-
-        print(f"[RESPOSTA] Status Code: {response.status_code}")
-        print(f"   Content-Type: {response.headers.get('Content-Type', 'unknown')}")
+        logger.info(
+            "[RESPOSTA] Status Code: %s | Content-Type: %s",
+            response.status_code, response.headers.get('Content-Type', 'unknown'),
+        )
 
         if response.status_code in [401, 403]:
             status_name = "401 - Não autorizado" if response.status_code == 401 else "403 - Acesso negado"
-            print(f"\n[ERRO] Status {response.status_code} - {status_name}")
-            print(f"{'='*60}")
-            print(f"   URL testada: {url}")
-            print(f"   Host: {API_EXTERNA_HOST}")
-            print(f"   Porta: {API_EXTERNA_PORT}")
-            print(f"\n[DIAGNOSTICO] Possiveis causas:")
+            logger.error("[ERRO] Status %s - %s (URL testada: %s)", response.status_code, status_name, url)
 
             if API_EXTERNA_HOST == 'localhost' or API_EXTERNA_HOST == '127.0.0.1':
-                print("   ⚠️  ATENÇÃO: Tentando conectar em localhost:8080")
-                print("   1. Formato de dados pode estar incorreto (tentando JSON, pode precisar form-urlencoded)")
-                print("   2. Endpoint pode estar incorreto")
-                print("   3. Credenciais podem estar incorretas")
-                print("\n   💡 SOLUCAO:")
-                print("   - Tentando automaticamente como form-urlencoded...")
+                amostragem.registrar(
+                    logger, 'proxy.auth.localhost', logging.INFO,
+                    "[DIAGNOSTICO] Possiveis causas:\n"
+                    "   ⚠️  ATENÇÃO: Tentando conectar em localhost:8080\n"
+                    "   1. Formato de dados pode estar incorreto (tentando JSON, pode precisar form-urlencoded)\n"
+                    "   2. Endpoint pode estar incorreto\n"
+                    "   3. Credenciais podem estar incorretas\n"
+                    "   💡 SOLUCAO: tentando automaticamente a outra codificação (JSON/form-urlencoded)",
+                )
             else:
-                print("   1. Formato de dados incorreto (JSON vs Form-urlencoded)")
-                print("   2. Endpoint requer autenticacao")
-                print("   3. CORS bloqueando requisicao")
-                print("   4. Headers incorretos ou faltando")
-                print("   5. Credenciais incorretas")
-
-            print(f"{'='*60}\n")
-
-            if method == 'POST' and data:
-                print("[TENTATIVA] Reenviando como form-urlencoded...")
-                try:
-                    headers_form = headers.copy()
-                    headers_form['Content-Type'] = 'application/x-www-form-urlencoded'
-
-                    if isinstance(data, dict):
-                        form_data = urlencode(data)
-                    else:
-                        form_data = data
-
-                    response_retry = api_session.post(
-                        url, data=form_data, headers=headers_form, timeout=API_TIMEOUT, allow_redirects=True
-                    )
-
-                    if response_retry.status_code not in [401, 403]:
-                        print(f"[SUCESSO] Form-urlencoded funcionou! Status: {response_retry.status_code}")
-                        response = response_retry
-                    else:
-                        print(f"[FALHA] Form-urlencoded tambem retornou {response_retry.status_code}")
-                except Exception as exc:
-                    print(f"[ERRO] Erro ao tentar form-urlencoded: {exc}")
+                amostragem.registrar(
+                    logger, 'proxy.auth', logging.INFO,
+                    "[DIAGNOSTICO] Possiveis causas:\n"
+                    "   1. Formato de dados incorreto (JSON vs Form-urlencoded)\n"
+                    "   2. Endpoint requer autenticacao\n"
+                    "   3. CORS bloqueando requisicao\n"
+                    "   4. Headers incorretos ou faltando\n"
+                    "   5. Credenciais incorretas",
+                )
+
+        if escolhe_codificacao and _codificacao_recusada(response):
+            outra = alternativa(codificacao)
+            logger.info("[TENTATIVA] Reenviando como %s...", _NOMES_CODIFICACAO[outra])
+            try:
+                response_retry = _enviar_upstream(sessao, method, url, endpoint_api, outra, data, params, headers)
+
+                if not _codificacao_recusada(response_retry):
+                    logger.info("[SUCESSO] %s funcionou! Status: %s", _NOMES_CODIFICACAO[outra], response_retry.status_code)
+                    response = response_retry
+                    if response.status_code < 400 and codificacao_endpoints.registrar(
+                        chave_codificacao, outra, primeira_tentativa=False
+                    ):
+                        logger.info("[CODIFICACAO] %s passa a usar %s", chave_codificacao, _NOMES_CODIFICACAO[outra])
+                else:
+                    logger.error("[FALHA] %s tambem retornou %s", _NOMES_CODIFICACAO[outra], response_retry.status_code)
+            except Exception as exc:
+                logger.error("[ERRO] Erro ao tentar %s: %s", _NOMES_CODIFICACAO[outra], exc)
+        elif escolhe_codificacao and response.status_code < 400:
+            codificacao_endpoints.registrar(chave_codificacao, codificacao)
 
-        content_type = response.headers.get('Content-Type', '').lower()
+        # Corpo decodificado uma única vez, conforme o Content-Type (prefixo farejado se faltar).
+        inicio_decodificacao = time.perf_counter()
+        formato, response_data_json, texto = decodificar_corpo(response.content, response.headers.get('Content-Type'))
+        logger.debug("[RESPOSTA] Formato detectado: %s", formato)
 
-        response_data_json = None
-        try:
-            response_data_json = response.json()
-            print("   Response (JSON detectado): OK")
-        except (ValueError, json.JSONDecodeError):
-            pass
-
-        if response_data_json is not None:
+        if formato == JSON:
+            _observar_decodificacao(endpoint_api, JSON, inicio_decodificacao)
             response_data = response_data_json
 
             try:
@@ -510,12 +1062,12 @@ def proxy_request(
                             'status': 'error',
                             'message': error_msg,
                         }
-                        print(f"[PARSE] Login JSON erro: {error_msg}")
+                        logger.info("[PARSE] Login JSON erro: %s", error_msg)
                         return status_final, response_data
 
                     if response_data.get('status') == 'success' and 'data' in response_data:
                         if 'restaurante_id' in response_data['data'] or 'restaurante_nome' in response_data['data']:
-                            print("[PARSE] Login JSON ja formatado corretamente")
+                            logger.info("[PARSE] Login JSON ja formatado corretamente")
                             return response.status_code, response_data
 
                     restaurante_id = None
@@ -524,16 +1076,16 @@ def proxy_request(
                     if 'nome' in response_data and ('id' in response_data or 'restaurante_id' in response_data):
                         restaurante_id = response_data.get('id') or response_data.get('restaurante_id')
                         restaurante_nome = response_data.get('nome')
-                        print(f"[PARSE] Login JSON formato direto: id={restaurante_id}, nome={restaurante_nome}")
+                        logger.info("[PARSE] Login JSON formato direto: id=%s, nome=%s", restaurante_id, restaurante_nome)
                     elif 'restaurante' in response_data:
                         restaurante = response_data.get('restaurante', {})
                         restaurante_id = restaurante.get('id') or restaurante.get('restaurante_id')
                         restaurante_nome = restaurante.get('nome')
-                        print(f"[PARSE] Login JSON formato aninhado: id={restaurante_id}, nome={restaurante_nome}")
+                        logger.info("[PARSE] Login JSON formato aninhado: id=%s, nome=%s", restaurante_id, restaurante_nome)
                     elif 'email' in response_data and 'id' in response_data:
                         restaurante_id = response_data.get('id') or response_data.get('restaurante_id')
                         restaurante_nome = response_data.get('nome') or response_data.get('restaurante_nome')
-                        print(f"[PARSE] Login JSON formato com email: id={restaurante_id}, nome={restaurante_nome}")
+                        logger.info("[PARSE] Login JSON formato com email: id=%s, nome=%s", restaurante_id, restaurante_nome)
 
                     if restaurante_id or restaurante_nome:
                         response_data = {
@@ -543,15 +1095,16 @@ def proxy_request(
                         }
                         if restaurante_id:
                             response_data['data']['restaurante_id'] = restaurante_id
-                            print(f"[PARSE] restaurante_id incluído na resposta: {restaurante_id}")
+                            logger.info("[PARSE] restaurante_id incluído na resposta: %s", restaurante_id)
                         if restaurante_nome:
                             response_data['data']['restaurante_nome'] = restaurante_nome
-                            print(f"[PARSE] restaurante_nome incluído na resposta: {restaurante_nome}")
-                        print("[PARSE] Login JSON convertido para formato desktop")
+                            logger.info("[PARSE] restaurante_nome incluído na resposta: %s", restaurante_nome)
+                        logger.info("[PARSE] Login JSON convertido para formato desktop")
                     else:
-                        print("[AVISO] Formato JSON de login nao reconhecido completamente")
-                        print(f"[DEBUG] Chaves recebidas: {list(response_data.keys())}")
-                        print(f"[DEBUG] Conteudo: {json.dumps(response_data, indent=2, ensure_ascii=False)[:500]}")
+                        logger.warning("[AVISO] Formato JSON de login nao reconhecido completamente")
+                        logger.debug("[DEBUG] Chaves recebidas: %s", list(response_data.keys()))
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("[DEBUG] Conteudo: %s", json.dumps(response_data, ensure_ascii=False)[:500])
 
                         if 'erro' in str(response_data).lower() or 'fail' in str(response_data).lower():
                             response_data = {
@@ -569,22 +1122,17 @@ def proxy_request(
                 return response.status_code, response_data
 
             except Exception as exc:
-                print(f"[AVISO] Erro ao processar JSON: {exc}")
-                import traceback
-
-                print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+                logger.warning("[AVISO] Erro ao processar JSON: %s", exc, exc_info=True)
                 return response.status_code, response_data_json
 
         if response_data_json is None:
-            if 'text/html' in content_type or (
-                response.text
-                and (response.text.strip().startswith('<!DOCTYPE') or response.text.strip().startswith('<html'))
-            ):
-                print("   Response (HTML): Detectado - Convertendo para JSON...")
-                response_data = parse_html_response(response.text, endpoint_api)
-                print("   Response convertido: OK")
+            if formato == HTML:
+                logger.debug("[RESPOSTA] HTML detectado - convertendo para JSON")
+                response_data = parse_html_response(texto, endpoint_api)
+                _observar_decodificacao(endpoint_api, formato, inicio_decodificacao)
                 return response.status_code, response_data
 
+            _observar_decodificacao(endpoint_api, formato, inicio_decodificacao)
             if response.status_code >= 400:
                 error_data: Dict[str, Any] = {
                     'status': 'error',
@@ -602,43 +1150,48 @@ def proxy_request(
                         'sugestao': 'Use API_EXTERNA_URL=http://3.90.155.156:8080 no config.env para usar o servidor da nuvem',
                     }
 
-                if response.text:
-                    error_data['response_text'] = response.text[:500]
+                if texto:
+                    error_data['response_text'] = texto[:500]
                 return response.status_code, error_data
 
             response_data = {
                 'status': 'success' if response.status_code < 400 else 'error',
-                'message': response.text[:500] if response.text else 'Resposta vazia',
-                'raw_response': response.text[:200] if response.text else '',
+                'message': texto[:500] if texto else 'Resposta vazia',
+                'raw_response': texto[:200] if texto else '',
             }
-            print(f"   Response (Text): {response.text[:100] if response.text else 'vazio'}...")
+            logger.debug("[RESPOSTA] Texto: %s...", texto[:100] if texto else 'vazio')
             return response.status_code, response_data
 
+    except DeadlineExcedido:
+        return _resposta_deadline_excedido(method, url)
+
     except requests.exceptions.Timeout:
-        print(f"\n[ERRO] TIMEOUT")
-        print(f"{'='*60}")
-        print(f"   Timeout configurado: {API_TIMEOUT}s")
-        print(f"   Protocolo: {API_EXTERNA_PROTOCOL}")
-        print(f"   Host: {API_EXTERNA_HOST}")
-        print(f"   Porta: {API_EXTERNA_PORT}")
-        print(f"\n[DIAGNOSTICO] Possiveis causas:")
-        print("   1. Servidor pode estar sobrecarregado")
-        print("   2. Rede lenta ou instável")
-        print("   3. Firewall bloqueando conexões")
-        print("   4. Servidor não está respondendo a tempo")
-        print("   5. IP/Porta podem estar incorretos")
-        print(f"\n🔧 SUGESTÕES:")
-        print(f"   - Verificar se servidor está rodando: ping {API_EXTERNA_HOST}")
-        print(f"   - Testar conectividade: curl {API_EXTERNA_BASE_URL}")
-        print(f"   - Aumentar timeout no config.env (atual: {API_TIMEOUT}s)")
-        print(f"{'='*60}\n")
+        if deadline_esgotado():
+            return _resposta_deadline_excedido(method, url)
+        logger.error(
+            "[ERRO] TIMEOUT (conexão %ss, leitura %ss) em %s %s", API_CONNECT_TIMEOUT, leitura, method, url,
+        )
+        amostragem.registrar(
+            logger, 'proxy.timeout', logging.INFO,
+            "[DIAGNOSTICO] Possiveis causas:\n"
+            "   1. Servidor pode estar sobrecarregado\n"
+            "   2. Rede lenta ou instável\n"
+            "   3. Firewall bloqueando conexões\n"
+            "   4. Servidor não está respondendo a tempo\n"
+            "   5. IP/Porta podem estar incorretos\n"
+            "🔧 SUGESTÕES:\n"
+            "   - Verificar se servidor está rodando: ping %s\n"
+            "   - Testar conectividade: curl %s\n"
+            "   - Aumentar API_READ_TIMEOUT ou TIMEOUT_ADAPTATIVO_PISO no config.env (leitura atual: %ss)",
+            API_EXTERNA_HOST, API_EXTERNA_BASE_URL, leitura,
+        )
 
         return 504, {
             'status': 'error',
-            'message': f'Timeout ({API_TIMEOUT}s) ao conectar com o servidor',
+            'message': f'Timeout (conexão {API_CONNECT_TIMEOUT:g}s, leitura {leitura:g}s) ao conectar com o servidor',
             'diagnostico': {
                 'tipo_erro': 'timeout',
-                'timeout_configurado': f'{API_TIMEOUT}s',
+                'timeout_configurado': f'{API_CONNECT_TIMEOUT:g}s conexão / {leitura:g}s leitura',
                 'protocolo': API_EXTERNA_PROTOCOL,
                 'host': API_EXTERNA_HOST,
                 'porta': API_EXTERNA_PORT,
@@ -652,25 +1205,22 @@ def proxy_request(
         }
 
     except requests.exceptions.ConnectionError as exc:
-        print(f"\n[ERRO] CONEXAO FALHOU")
-        print(f"{'='*60}")
-        print(f"   Protocolo: {API_EXTERNA_PROTOCOL}")
-        print(f"   Host: {API_EXTERNA_HOST}")
-        print(f"   Porta: {API_EXTERNA_PORT}")
-        print(f"   Erro tecnico: {str(exc)}")
-        print(f"\n[DIAGNOSTICO] Possiveis causas:")
-        print(f"   1. Servidor não está rodando na porta {API_EXTERNA_PORT}")
-        print(f"   2. IP {API_EXTERNA_HOST} está incorreto ou mudou")
-        print(f"   3. Firewall bloqueando conexões na porta {API_EXTERNA_PORT}")
-        print("   4. Servidor não está configurado para aceitar conexões externas")
-        print("   5. Protocolo incorreto (tentando HTTP mas servidor usa HTTPS ou vice-versa)")
-        print(f"\n🔧 SUGESTÕES:")
-        print(f"   - Verificar se servidor está ativo: ping {API_EXTERNA_HOST}")
-        print(f"   - Testar porta: telnet {API_EXTERNA_HOST} {API_EXTERNA_PORT}")
-        print(f"   - Testar URL manualmente: curl {API_EXTERNA_BASE_URL}")
-        print(f"   - Verificar config.env: API_EXTERNA_URL={API_EXTERNA_BASE_URL}")
-        print("   - Confirmar com administrador se API está acessível externamente")
-        print(f"{'='*60}\n")
+        logger.error("[ERRO] CONEXAO FALHOU em %s %s: %s", method, url, exc)
+        amostragem.registrar(
+            logger, 'proxy.conexao', logging.INFO,
+            "[DIAGNOSTICO] Possiveis causas:\n"
+            "   1. Servidor não está rodando na porta %s\n"
+            "   2. IP %s está incorreto ou mudou\n"
+            "   3. Firewall bloqueando conexões na porta %s\n"
+            "   4. Servidor não está configurado para aceitar conexões externas\n"
+            "   5. Protocolo incorreto (tentando HTTP mas servidor usa HTTPS ou vice-versa)\n"
+            "🔧 SUGESTÕES:\n"
+            "   - Verificar se servidor está ativo: ping %s\n"
+            "   - Testar porta: telnet %s %s\n"
+            "   - Verificar config.env: API_EXTERNA_URL=%s",
+            API_EXTERNA_PORT, API_EXTERNA_HOST, API_EXTERNA_PORT,
+            API_EXTERNA_HOST, API_EXTERNA_HOST, API_EXTERNA_PORT, API_EXTERNA_BASE_URL,
+        )
 
         return 503, {
             'status': 'error',
@@ -693,27 +1243,24 @@ def proxy_request(
 
     except requests.exceptions.RequestException as exc:
         error_type = type(exc).__name__
-        print(f"\n[ERRO] {error_type}")
-        print(f"{'='*60}")
-        print(f"   Erro: {str(exc)}")
+        logger.error("[ERRO] %s: %s", error_type, exc)
 
         if 'Failed to parse' in str(exc) or 'Invalid URL' in str(exc):
-            print("\n[DIAGNOSTICO] Erro de parsing da URL")
-            print("   URL pode estar malformada")
-            print("   Verifique config.env - API_EXTERNA_URL")
-            print(f"   URL atual: {API_EXTERNA_BASE_URL}")
-            print("\n[SOLUCAO]")
-            print("   - Remova comentários inline da URL no config.env")
-            print("   - Formato correto: API_EXTERNA_URL=http://127.0.0.1:8080")
-            print("   - Não inclua comentários na mesma linha")
+            amostragem.registrar(
+                logger, 'proxy.url', logging.INFO,
+                "[DIAGNOSTICO] Erro de parsing da URL (atual: %s)\n"
+                "[SOLUCAO]\n"
+                "   - Remova comentários inline da URL no config.env\n"
+                "   - Formato correto: API_EXTERNA_URL=http://127.0.0.1:8080",
+                API_EXTERNA_BASE_URL,
+            )
         elif 'SSL' in error_type or 'certificate' in str(exc).lower():
-            print("\n[INFO] Problema com certificado SSL")
-            print("   Servidor pode estar usando HTTPS mas URL está como HTTP")
-
-        print("\n[SUGESTAO]")
-        print("   - Verificar se URL deve ser https:// em vez de http://")
-        print(f"   - Atualizar config.env: API_EXTERNA_URL=https://{API_EXTERNA_HOST}:{API_EXTERNA_PORT}")
-        print(f"{'='*60}\n")
+            amostragem.registrar(
+                logger, 'proxy.ssl', logging.INFO,
+                "[INFO] Problema com certificado SSL: servidor pode estar usando HTTPS mas URL está como HTTP\n"
+                "[SUGESTAO] Atualizar config.env: API_EXTERNA_URL=https://%s:%s",
+                API_EXTERNA_HOST, API_EXTERNA_PORT,
+            )
 
         if 'Failed to parse' in str(exc) or 'Invalid URL' in str(exc):
             error_msg = 'URL inválida no config.env. Remova comentários inline da linha API_EXTERNA_URL.'
@@ -737,11 +1284,7 @@ def proxy_request(
         }
 
     except Exception as exc:  # pragma: no cover - fallback
-        print(f"\n[ERRO] GENERICO")
-        print(f"{'='*60}")
-        print(f"   Tipo: {type(exc).__name__}")
-        print(f"   Mensagem: {str(exc)}")
-        print(f"{'='*60}\n")
+        logger.exception("[ERRO] GENERICO (%s): %s", type(exc).__name__, exc)
 
         return 500, {
             'status': 'error',
@@ -752,7 +1295,17 @@ def proxy_request(
 
 __all__ = [
     'api_session',
+    'sessoes',
+    'sessao_da_requisicao',
+    'restaurante_ambiguo',
+    'resposta_restaurante_ambiguo',
     'session_cookies_store',
+    'upstream_singleflight',
+    'upstream_circuito',
+    'upstream_escalonador',
+    'upstream_retentativas',
+    'upstream_hedge',
+    'upstream_timeouts',
     'proxy_request',
     'parse_html_response',
     'mapear_endpoint_flask_para_api',
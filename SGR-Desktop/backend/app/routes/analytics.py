@@ -1,15 +1,102 @@
 import json
+import logging
+from bisect import bisect_right
 from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
-import requests
 from flask import Blueprint, jsonify
 
-from ..proxy import proxy_request
-from ..utils.status import is_status_concluido
+from ..config import ANALYTICS_COLUNAR, ANALYTICS_INCREMENTAL
+from ..services.pedidos import listar_pedidos_concluidos
+from ..services.pedidos_agregados import obter_agregados
+from ..services.pedidos_colunar import NUMPY_AVAILABLE, carregar_pedidos_colunares
+from ..utils.logs import amostragem, obter_logger
+
+logger = obter_logger('routes.analytics')
 
 analytics_bp = Blueprint('analytics', __name__)
 
+MESES_ABREVIADOS_PT = {
+    1: 'Jan', 2: 'Fev', 3: 'Mar', 4: 'Abr', 5: 'Mai', 6: 'Jun',
+    7: 'Jul', 8: 'Ago', 9: 'Set', 10: 'Out', 11: 'Nov', 12: 'Dez',
+}
+
+
+def _buscar_concluidos(restaurante_id):
+    """
+    Retorna `(status_code, pedidos, agregados, idade)` dos pedidos concluídos do restaurante.
+    Com `ANALYTICS_INCREMENTAL` vêm os `agregados` (e `pedidos` vazio); sem ele, com `ANALYTICS_COLUNAR`
+    e NumPy, `agregados` são as colunas do snapshot (`PedidosColunares`); senão, a lista `pedidos`.
+    `idade` só vem preenchida quando os agregados são os últimos rollups (API externa fora do ar).
+    """
+    if ANALYTICS_INCREMENTAL:
+        status_code, agregados, idade = obter_agregados(restaurante_id)
+        return status_code, [], agregados, idade
+
+    if ANALYTICS_COLUNAR and NUMPY_AVAILABLE:
+        status_code, colunas = carregar_pedidos_colunares(restaurante_id)
+        return status_code, [], colunas, None
+
+    status_code, pedidos, _ = listar_pedidos_concluidos(restaurante_id)
+    return status_code, pedidos, None, None
+
+
+def _resposta_sucesso(data, idade):
+    """Resposta 200; dados servidos dos rollups com a API fora do ar levam `stale` e a idade em segundos."""
+    corpo = {'status': 'success', 'data': data}
+    if idade is not None:
+        corpo.update(stale=True, idade_segundos=round(idade))
+    return jsonify(corpo), 200
+
+
+def _registrar_pedidos_valor_zero(restaurante_id, pedidos):
+    """Um aviso amostrado por restaurante; a estrutura de cada pedido só é serializada em DEBUG."""
+    if not pedidos:
+        return
+    amostragem.registrar(
+        logger, ('dashboard.valor_zero', restaurante_id), logging.WARNING,
+        "[DASHBOARD] %d pedido(s) com valor zero no restaurante %s", len(pedidos), restaurante_id,
+    )
+    if logger.isEnabledFor(logging.DEBUG):
+        for pedido in pedidos:
+            logger.debug("[DASHBOARD] Pedido %s tem valor zero. Estrutura: %s", pedido.id, json.dumps(pedido.bruto, default=str)[:500])
+
+
+def _intervalos_vendas(periodo, hoje):
+    """
+    Labels e limites `[inicio, fim)` de cada intervalo do gráfico de vendas.
+    Retorna `None` para período inválido.
+    """
+    if periodo == 'semanal':
+        labels = ['Sem 1', 'Sem 2', 'Sem 3', 'Sem 4']
+        limites = [hoje - timedelta(days=27 - 7 * indice) for indice in range(4)]
+        limites.append(hoje + timedelta(days=1))
+        return labels, limites
+
+    if periodo == 'mensal':
+        meses = []
+        for indice in range(5, -2, -1):
+            mes_num = hoje.month - indice
+            ano_num = hoje.year
+            while mes_num <= 0:
+                mes_num += 12
+                ano_num -= 1
+            while mes_num > 12:
+                mes_num -= 12
+                ano_num += 1
+            meses.append(date(ano_num, mes_num, 1))
+        labels = [MESES_ABREVIADOS_PT[mes.month] for mes in meses[:-1]]
+        meses[0] = max(meses[0], hoje - timedelta(days=180))
+        return labels, meses
+
+    if periodo == 'anual':
+        labels = [str(hoje.year - indice) for indice in range(4, -1, -1)]
+        limites = [date(hoje.year - indice, 1, 1) for indice in range(4, -2, -1)]
+        limites[0] = max(limites[0], hoje - timedelta(days=1825))
+        return labels, limites
+
+    return None
+
 
 @analytics_bp.route('/api/top-produtos/<int:restaurante_id>/<periodo>')
 def get_top_produtos(restaurante_id, periodo):
@@ -18,23 +105,14 @@ def get_top_produtos(restaurante_id, periodo):
     Usa /pedidos/restaurante da API Java e calcula localmente.
     """
     try:
-        print(f"\n{'='*60}")
-        print(f"[TOP-PRODUTOS] Buscando top produtos {periodo} para restaurante {restaurante_id}")
+        logger.info("[TOP-PRODUTOS] Buscando top produtos %s para restaurante %s", periodo, restaurante_id)
 
-        status_code, response_data = proxy_request('GET', 'pedidos/restaurante')
+        status_code, pedidos_concluidos, agregados, idade = _buscar_concluidos(restaurante_id)
 
         if status_code != 200:
-            print(f"[TOP-PRODUTOS] Erro ao buscar pedidos: {status_code}")
+            logger.warning("[TOP-PRODUTOS] Erro ao buscar pedidos: %s", status_code)
             return jsonify({'status': 'error', 'message': f'Erro ao buscar pedidos: Status {status_code}'}), status_code
 
-        pedidos_todos = []
-        if isinstance(response_data, list):
-            pedidos_todos = response_data
-        elif isinstance(response_data, dict):
-            pedidos_todos = response_data.get('data', []) or response_data.get('pedidos', [])
-            if not isinstance(pedidos_todos, list):
-                pedidos_todos = []
-
         hoje = datetime.now().date()
         if periodo == 'semanal':
             data_inicio = hoje - timedelta(days=7)
@@ -45,93 +123,40 @@ def get_top_produtos(restaurante_id, periodo):
         else:
             return jsonify({'status': 'error', 'message': 'Período inválido. Use: semanal, mensal ou anual'}), 400
 
-        produtos_vendidos = defaultdict(
-            lambda: {'quantidade': 0, 'valor_total': 0, 'nome': None, 'preco_unitario': 0}
-        )
+        if agregados is not None:
+            produtos_ordenados = agregados.top_produtos(data_inicio, limite=3)
+        else:
+            produtos_vendidos = defaultdict(
+                lambda: {'quantidade': 0, 'valor_total': 0, 'nome': None, 'preco_unitario': 0}
+            )
 
-        for pedido in pedidos_todos:
-            if not isinstance(pedido, dict):
-                continue
-
-            pedido_restaurante_id = None
-            if pedido.get('restaurante') and isinstance(pedido.get('restaurante'), dict):
-                pedido_restaurante_id = pedido['restaurante'].get('id')
-            elif pedido.get('restaurante_id'):
-                pedido_restaurante_id = pedido['restaurante_id']
-
-            if not pedido_restaurante_id or int(pedido_restaurante_id) != int(restaurante_id):
-                continue
-
-            data_pedido = None
-            if pedido.get('criadoEm'):
-                try:
-                    data_pedido = datetime.fromisoformat(str(pedido['criadoEm']).replace('Z', '+00:00')).date()
-                except Exception:
-                    pass
-            elif pedido.get('criado_em'):
-                try:
-                    data_pedido = datetime.fromisoformat(str(pedido['criado_em']).replace('Z', '+00:00')).date()
-                except Exception:
-                    pass
-
-            if not data_pedido or data_pedido < data_inicio:
-                continue
-
-            if not is_status_concluido(pedido.get('status')):
-                continue
-
-            if pedido.get('itens') and isinstance(pedido.get('itens'), list):
-                for item in pedido['itens']:
-                    if not isinstance(item, dict):
-                        continue
-
-                    produto_id = None
-                    produto_nome = None
-                    quantidade = item.get('quantidade', 0) or item.get('quantidadeItem', 0) or 1
-                    preco_unitario = 0
-
-                    if item.get('itemRestaurante') and isinstance(item.get('itemRestaurante'), dict):
-                        item_rest = item['itemRestaurante']
-                        produto_id = item_rest.get('id')
-                        produto_nome = item_rest.get('nome')
-                        preco_unitario = float(item_rest.get('preco', 0) or 0)
-                    elif item.get('item_restaurante') and isinstance(item.get('item_restaurante'), dict):
-                        item_rest = item['item_restaurante']
-                        produto_id = item_rest.get('id')
-                        produto_nome = item_rest.get('nome')
-                        preco_unitario = float(item_rest.get('preco', 0) or 0)
-
-                    if not produto_nome:
-                        produto_id = item.get('produto_id') or item.get('id')
-                        produto_nome = item.get('nome') or item.get('produto_nome') or f"Item #{produto_id}"
-
-                    if preco_unitario == 0:
-                        preco_unitario = float(
-                            item.get('preco', 0)
-                            or item.get('valorUnitario', 0)
-                            or item.get('valor', 0)
-                            or 0
-                        )
-
-                    if preco_unitario == 0 and item.get('subtotal'):
-                        preco_unitario = float(item['subtotal']) / quantidade
-
-                    if produto_nome:
-                        chave_produto = produto_id or produto_nome
-
-                        produtos_vendidos[chave_produto]['quantidade'] += quantidade
-                        produtos_vendidos[chave_produto]['valor_total'] += quantidade * preco_unitario
-                        if not produtos_vendidos[chave_produto]['nome']:
-                            produtos_vendidos[chave_produto]['nome'] = produto_nome
-                        if preco_unitario > produtos_vendidos[chave_produto]['preco_unitario']:
-                            produtos_vendidos[chave_produto]['preco_unitario'] = preco_unitario
-
-        produtos_ordenados = sorted(
-            produtos_vendidos.items(), key=lambda item: item[1]['quantidade'], reverse=True
-        )[:3]
+            for pedido in pedidos_concluidos:
+                if not pedido.data or pedido.data < data_inicio:
+                    continue
+
+                for item in pedido.itens:
+                    quantidade = item.quantidade or 1
+                    preco_unitario = item.preco_unitario
+                    produto_nome = item.nome or f"Item #{item.produto_id}"
+                    chave_produto = item.produto_id or produto_nome
+
+                    produto = produtos_vendidos[chave_produto]
+                    produto['quantidade'] += quantidade
+                    produto['valor_total'] += quantidade * preco_unitario
+                    if not produto['nome']:
+                        produto['nome'] = produto_nome
+                    if preco_unitario > produto['preco_unitario']:
+                        produto['preco_unitario'] = preco_unitario
+
+            produtos_ordenados = [
+                dict(dados, chave=chave)
+                for chave, dados in sorted(
+                    produtos_vendidos.items(), key=lambda item: item[1]['quantidade'], reverse=True
+                )[:3]
+            ]
 
         produtos_formatados = []
-        for posicao, (produto_key, dados) in enumerate(produtos_ordenados, 1):
+        for posicao, dados in enumerate(produtos_ordenados, 1):
             valor_unitario = (
                 dados['preco_unitario']
                 if dados['preco_unitario'] > 0
@@ -139,24 +164,18 @@ def get_top_produtos(restaurante_id, periodo):
             )
             produtos_formatados.append({
                 'posicao': posicao,
-                'nome': dados['nome'] or f'Produto {produto_key}',
+                'nome': dados['nome'] or f"Produto {dados['chave']}",
                 'quantidade_vendida': dados['quantidade'],
                 'valor_unitario': valor_unitario,
                 'valor_total_vendas': dados['valor_total'],
             })
 
-        print(f"[TOP-PRODUTOS] Top 3 produtos encontrados: {len(produtos_formatados)}")
+        logger.info("[TOP-PRODUTOS] Top 3 produtos encontrados: %s", len(produtos_formatados))
 
-        return jsonify({
-            'status': 'success',
-            'data': {'periodo': periodo, 'produtos': produtos_formatados},
-        }), 200
+        return _resposta_sucesso({'periodo': periodo, 'produtos': produtos_formatados}, idade)
 
     except Exception as exc:
-        print(f"[ERRO] Erro no endpoint de top produtos: {exc}")
-        import traceback
-
-        print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+        logger.error("[ERRO] Erro no endpoint de top produtos: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': f'Erro interno: {str(exc)}'}), 500
 
 
@@ -167,189 +186,50 @@ def get_vendas_periodo(restaurante_id, periodo):
     Usa /pedidos/restaurante da API Java e calcula localmente.
     """
     try:
-        print(f"\n{'='*60}")
-        print(f"[VENDAS-PERIODO] Buscando vendas {periodo} para restaurante {restaurante_id}")
+        logger.info("[VENDAS-PERIODO] Buscando vendas %s para restaurante %s", periodo, restaurante_id)
 
-        status_code, response_data = proxy_request('GET', 'pedidos/restaurante')
+        status_code, pedidos_restaurante, agregados, idade = _buscar_concluidos(restaurante_id)
 
         if status_code != 200:
-            print(f"[VENDAS-PERIODO] Erro ao buscar pedidos: {status_code}")
+            logger.warning("[VENDAS-PERIODO] Erro ao buscar pedidos: %s", status_code)
             return jsonify({'status': 'error', 'message': f'Erro ao buscar pedidos: Status {status_code}'}), status_code
 
-        pedidos_todos = []
-        if isinstance(response_data, list):
-            pedidos_todos = response_data
-        elif isinstance(response_data, dict):
-            pedidos_todos = response_data.get('data', []) or response_data.get('pedidos', [])
-            if not isinstance(pedidos_todos, list):
-                pedidos_todos = []
-
-        pedidos_restaurante = []
-        for pedido in pedidos_todos:
-            if not isinstance(pedido, dict):
-                continue
-
-            pedido_restaurante_id = None
-            if pedido.get('restaurante') and isinstance(pedido.get('restaurante'), dict):
-                pedido_restaurante_id = pedido['restaurante'].get('id')
-            elif pedido.get('restaurante_id'):
-                pedido_restaurante_id = pedido['restaurante_id']
-
-            if not pedido_restaurante_id or int(pedido_restaurante_id) != int(restaurante_id):
-                continue
-
-            if not is_status_concluido(pedido.get('status')):
-                continue
-
-            if 'itens' not in pedido:
-                pedido['itens'] = []
-
-            pedidos_restaurante.append(pedido)
-
-        print(f"[VENDAS-PERIODO] Total de pedidos do restaurante: {len(pedidos_restaurante)}")
+        total_pedidos = agregados.total_pedidos if agregados is not None else len(pedidos_restaurante)
+        logger.info("[VENDAS-PERIODO] Total de pedidos do restaurante: %s", total_pedidos)
 
         hoje = datetime.now().date()
-        if periodo == 'semanal':
-            data_inicio = hoje - timedelta(days=28)
-            dias_agrupamento = 7
-        elif periodo == 'mensal':
-            data_inicio = hoje - timedelta(days=180)
-            dias_agrupamento = 30
-        elif periodo == 'anual':
-            data_inicio = hoje - timedelta(days=1825)
-            dias_agrupamento = 365
-        else:
+        intervalos = _intervalos_vendas(periodo, hoje)
+        if intervalos is None:
             return jsonify({'status': 'error', 'message': 'Período inválido. Use: semanal, mensal ou anual'}), 400
+        labels, limites = intervalos
 
-        vendas_por_periodo = {}
-        produtos_por_periodo = {}
-
-        for pedido in pedidos_restaurante:
-            data_pedido = None
-            if pedido.get('criadoEm'):
-                try:
-                    data_pedido = datetime.fromisoformat(str(pedido['criadoEm']).replace('Z', '+00:00')).date()
-                except Exception:
-                    pass
-            elif pedido.get('criado_em'):
-                try:
-                    data_pedido = datetime.fromisoformat(str(pedido['criado_em']).replace('Z', '+00:00')).date()
-                except Exception:
-                    pass
-
-            if not data_pedido or data_pedido < data_inicio:
-                continue
-
-            valor_pedido = 0
-            quantidade_itens = 0
-
-            if pedido.get('itens') and isinstance(pedido.get('itens'), list):
-                for item in pedido['itens']:
-                    if isinstance(item, dict):
-                        quantidade = item.get('quantidade', 0) or 0
-                        preco = 0
-
-                        if item.get('itemRestaurante') and isinstance(item.get('itemRestaurante'), dict):
-                            preco = float(item['itemRestaurante'].get('preco', 0) or 0)
-                        elif item.get('item_restaurante') and isinstance(item.get('item_restaurante'), dict):
-                            preco = float(item['item_restaurante'].get('preco', 0) or 0)
-                        elif item.get('preco'):
-                            preco = float(item.get('preco', 0) or 0)
-                        elif item.get('valorUnitario'):
-                            preco = float(item.get('valorUnitario', 0) or 0)
-
-                        valor_pedido += quantidade * preco
-                        quantidade_itens += quantidade
-
-            if valor_pedido == 0:
-                valor_pedido = float(
-                    pedido.get('valor_total', 0)
-                    or pedido.get('valor', 0)
-                    or pedido.get('valorTotal', 0)
-                    or 0
-                )
-
-            if periodo == 'semanal':
-                dias_diferenca = (hoje - data_pedido).days
-                semana_num = 3 - (dias_diferenca // 7)
-                if semana_num < 0 or semana_num > 3:
-                    continue
-                periodo_key = f'Sem {semana_num + 1}'
-            elif periodo == 'mensal':
-                periodo_key = data_pedido.strftime('%Y-%m')
-            else:
-                periodo_key = data_pedido.strftime('%Y')
+        if agregados is not None:
+            vendas_data, produtos_data, _ = agregados.somar_por_intervalos(limites)
+        else:
+            vendas_data = [0] * len(labels)
+            produtos_data = [0] * len(labels)
 
-            if periodo_key not in vendas_por_periodo:
-                vendas_por_periodo[periodo_key] = 0
-                produtos_por_periodo[periodo_key] = 0
+            for pedido in pedidos_restaurante:
+                if not pedido.data:
+                    continue
+                indice = bisect_right(limites, pedido.data) - 1
+                if indice < 0 or indice >= len(labels):
+                    continue
 
-            vendas_por_periodo[periodo_key] += valor_pedido
-            produtos_por_periodo[periodo_key] += quantidade_itens
+                vendas_data[indice] += pedido.valor_total
+                produtos_data[indice] += pedido.quantidade_itens
 
-        if periodo == 'semanal':
-            labels = ['Sem 1', 'Sem 2', 'Sem 3', 'Sem 4']
-        elif periodo == 'mensal':
-            labels = []
-            meses_abreviados_pt = {
-                1: 'Jan', 2: 'Fev', 3: 'Mar', 4: 'Abr', 5: 'Mai', 6: 'Jun',
-                7: 'Jul', 8: 'Ago', 9: 'Set', 10: 'Out', 11: 'Nov', 12: 'Dez',
-            }
-            for indice in range(6):
-                mes_atual = hoje.month
-                ano_atual = hoje.year
-                mes_num = mes_atual - indice
-                ano_num = ano_atual
-                while mes_num <= 0:
-                    mes_num += 12
-                    ano_num -= 1
-                chave_mes = f'{ano_num}-{mes_num:02d}'
-                label_mes = meses_abreviados_pt[mes_num]
-                labels.insert(0, label_mes)
-                if chave_mes not in vendas_por_periodo:
-                    vendas_por_periodo[chave_mes] = 0
-                    produtos_por_periodo[chave_mes] = 0
-        else:
-            labels = []
-            for indice in range(5):
-                ano = hoje.year - indice
-                labels.insert(0, str(ano))
-
-        if periodo == 'mensal':
-            vendas_data = []
-            produtos_data = []
-            for indice in range(6):
-                mes_atual = hoje.month
-                ano_atual = hoje.year
-                mes_num = mes_atual - indice
-                ano_num = ano_atual
-                while mes_num <= 0:
-                    mes_num += 12
-                    ano_num -= 1
-                chave_mes = f'{ano_num}-{mes_num:02d}'
-                vendas_data.insert(0, vendas_por_periodo.get(chave_mes, 0))
-                produtos_data.insert(0, produtos_por_periodo.get(chave_mes, 0))
-        else:
-            vendas_data = [vendas_por_periodo.get(label, 0) for label in labels]
-            produtos_data = [produtos_por_periodo.get(label, 0) for label in labels]
+        logger.info("[VENDAS-PERIODO] Dados calculados: labels=%s, vendas=%s, produtos=%s", labels, vendas_data, produtos_data)
 
-        print(f"[VENDAS-PERIODO] Dados calculados: labels={labels}, vendas={vendas_data}, produtos={produtos_data}")
-
-        return jsonify({
-            'status': 'success',
-            'data': {
-                'periodo': periodo,
-                'labels': labels,
-                'vendas': vendas_data,
-                'produtos': produtos_data,
-            },
-        }), 200
+        return _resposta_sucesso({
+            'periodo': periodo,
+            'labels': labels,
+            'vendas': vendas_data,
+            'produtos': produtos_data,
+        }, idade)
 
     except Exception as exc:
-        print(f"[ERRO] Erro no endpoint de vendas por periodo: {exc}")
-        import traceback
-
-        print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+        logger.error("[ERRO] Erro no endpoint de vendas por periodo: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': f'Erro interno: {str(exc)}'}), 500
 
 
@@ -360,140 +240,82 @@ def get_dashboard_completo(restaurante_id):
     Busca pedidos da API externa e calcula métricas baseado em pedidos concluídos.
     """
     try:
-        print(f"\n{'='*60}")
-        print(f"[DASHBOARD] Buscando dados para restaurante {restaurante_id}")
-
-        try:
-            from ..services.diagnostics import verificar_conectividade_api  # noqa: F401  # Import only for side-effects?
-        except Exception:
-            pass
+        logger.info("[DASHBOARD] Buscando dados para restaurante %s", restaurante_id)
 
         try:
-            from flask import current_app  # noqa: F401
-        except Exception:
-            pass
-
-        try:
-            response_internal = requests.get(
-                f'http://localhost:5000/api/pedidos/restaurante/{restaurante_id}/concluidos',
-                timeout=10,
-            )
-
-            if response_internal.status_code == 200:
-                data_internal = response_internal.json()
-                if data_internal.get('status') == 'success':
-                    pedidos = data_internal.get('data', [])
-                    print(f"[DASHBOARD] Pedidos CONCLUÍDOS encontrados via endpoint específico: {len(pedidos)}")
-                else:
-                    pedidos = []
-                    print(f"[DASHBOARD] Endpoint retornou erro: {data_internal.get('message')}")
+            status_code, pedidos, agregados, idade = _buscar_concluidos(restaurante_id)
+            if status_code == 200:
+                logger.info("[DASHBOARD] Pedidos CONCLUÍDOS encontrados via serviço de pedidos: %s", agregados.total_pedidos if agregados else len(pedidos))
             else:
-                print(f"[DASHBOARD] Erro ao chamar endpoint de pedidos concluídos: {response_internal.status_code}")
-                pedidos = []
+                logger.warning("[DASHBOARD] Erro ao buscar pedidos concluídos: %s", status_code)
         except Exception as exc:
-            print(f"[DASHBOARD] Erro ao buscar pedidos concluídos: {exc}")
-            import traceback
-
-            print(f"[DASHBOARD] Traceback: {traceback.format_exc()}")
+            logger.warning("[DASHBOARD] Erro ao buscar pedidos concluídos: %s", exc, exc_info=True)
             pedidos = []
+            agregados = None
+            idade = None
 
         pedidos_concluidos = pedidos
-        print(f"[DASHBOARD] Total de pedidos concluídos do restaurante: {len(pedidos_concluidos)}")
+        total_pedidos = agregados.total_pedidos if agregados is not None else len(pedidos_concluidos)
+        logger.info("[DASHBOARD] Total de pedidos concluídos do restaurante: %s", total_pedidos)
 
         if len(pedidos_concluidos) > 0:
-            print(f"[DASHBOARD] Primeiro pedido encontrado: {json.dumps(pedidos_concluidos[0], indent=2, default=str)[:300]}")
-        else:
-            print(f"[DASHBOARD] ⚠️ Nenhum pedido concluído encontrado para restaurante {restaurante_id}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[DASHBOARD] Primeiro pedido encontrado: %s", json.dumps(pedidos_concluidos[0].bruto, default=str)[:300])
+        elif total_pedidos == 0:
+            logger.warning("[DASHBOARD] Nenhum pedido concluído encontrado para restaurante %s", restaurante_id)
 
         hoje = datetime.now().date()
         ontem = hoje - timedelta(days=1)
         semana_atras = hoje - timedelta(days=7)
         mes_atras = hoje - timedelta(days=30)
 
-        total_vendas = 0
-        produtos_vendidos = 0
-        pedidos_hoje = 0
-        vendas_hoje = 0
-
-        vendas_ontem = 0
-        pedidos_ontem = 0
-
-        vendas_por_dia = {}
-        produtos_por_dia = {}
-
-        for indice in range(7):
-            data = hoje - timedelta(days=6 - indice)
-            vendas_por_dia[data.strftime('%Y-%m-%d')] = 0
-            produtos_por_dia[data.strftime('%Y-%m-%d')] = 0
-
-        for pedido in pedidos_concluidos:
-            valor_pedido = 0
-            quantidade_itens = 0
-
-            if pedido.get('itens') and isinstance(pedido.get('itens'), list):
-                for item in pedido['itens']:
-                    if isinstance(item, dict):
-                        quantidade = item.get('quantidade', 0) or item.get('quantidadeItem', 0) or 0
-                        preco = 0
-
-                        if item.get('itemRestaurante') and isinstance(item.get('itemRestaurante'), dict):
-                            preco = float(item['itemRestaurante'].get('preco', 0) or item['itemRestaurante'].get('valor', 0) or 0)
-                        elif item.get('item_restaurante') and isinstance(item.get('item_restaurante'), dict):
-                            preco = float(item['item_restaurante'].get('preco', 0) or item['item_restaurante'].get('valor', 0) or 0)
-                        elif item.get('preco'):
-                            preco = float(item.get('preco', 0) or 0)
-                        elif item.get('valorUnitario'):
-                            preco = float(item.get('valorUnitario', 0) or 0)
-                        elif item.get('valor'):
-                            preco = float(item.get('valor', 0) or 0)
-                        elif item.get('subtotal') and quantidade > 0:
-                            preco = float(item.get('subtotal', 0) or 0) / quantidade
-
-                        valor_pedido += quantidade * preco
-                        quantidade_itens += quantidade
-
-            if valor_pedido == 0:
-                valor_pedido = float(
-                    pedido.get('valor_total', 0)
-                    or pedido.get('valor', 0)
-                    or pedido.get('valorTotal', 0)
-                    or pedido.get('total', 0)
-                    or 0
-                )
-
-            if valor_pedido == 0:
-                print(f"[DASHBOARD] AVISO: Pedido {pedido.get('id')} tem valor zero. Estrutura: {json.dumps(pedido, indent=2, default=str)[:500]}")
-
-            data_pedido_str = None
-            if pedido.get('criadoEm'):
-                try:
-                    data_pedido = datetime.fromisoformat(str(pedido['criadoEm']).replace('Z', '+00:00')).date()
-                    data_pedido_str = data_pedido.strftime('%Y-%m-%d')
-                except Exception:
-                    pass
-            elif pedido.get('criado_em'):
-                try:
-                    data_pedido = datetime.fromisoformat(str(pedido['criado_em']).replace('Z', '+00:00')).date()
-                    data_pedido_str = data_pedido.strftime('%Y-%m-%d')
-                except Exception:
-                    pass
-
-            total_vendas += valor_pedido
-            produtos_vendidos += quantidade_itens
-
-            if data_pedido_str:
-                if data_pedido_str in vendas_por_dia:
-                    vendas_por_dia[data_pedido_str] += valor_pedido
-                    produtos_por_dia[data_pedido_str] += quantidade_itens
-
-                if data_pedido_str == hoje.strftime('%Y-%m-%d'):
-                    vendas_hoje += valor_pedido
-                    pedidos_hoje += 1
-                elif data_pedido_str == ontem.strftime('%Y-%m-%d'):
-                    vendas_ontem += valor_pedido
-                    pedidos_ontem += 1
-
-        ticket_medio = total_vendas / len(pedidos_concluidos) if len(pedidos_concluidos) > 0 else 0
+        dias_grafico = [hoje - timedelta(days=6 - indice) for indice in range(7)]
+
+        limites = dias_grafico + [hoje + timedelta(days=1)]
+
+        if agregados is not None:
+            total_vendas, produtos_vendidos = agregados.total_vendas, agregados.produtos_vendidos
+            data_vendas, data_produtos, pedidos_por_dia = agregados.somar_por_intervalos(limites)
+            vendas_hoje, pedidos_hoje = data_vendas[-1], pedidos_por_dia[-1]
+            vendas_ontem, pedidos_ontem = data_vendas[-2], pedidos_por_dia[-2]
+        else:
+            total_vendas = 0
+            produtos_vendidos = 0
+            pedidos_hoje = 0
+            vendas_hoje = 0
+
+            vendas_ontem = 0
+            pedidos_ontem = 0
+
+            vendas_por_dia = {dia: 0 for dia in dias_grafico}
+            produtos_por_dia = {dia: 0 for dia in dias_grafico}
+
+            _registrar_pedidos_valor_zero(restaurante_id, [pedido for pedido in pedidos_concluidos if pedido.valor_total == 0])
+
+            for pedido in pedidos_concluidos:
+                valor_pedido = pedido.valor_total
+                quantidade_itens = pedido.quantidade_itens
+
+                total_vendas += valor_pedido
+                produtos_vendidos += quantidade_itens
+
+                data_pedido = pedido.data
+                if data_pedido:
+                    if data_pedido in vendas_por_dia:
+                        vendas_por_dia[data_pedido] += valor_pedido
+                        produtos_por_dia[data_pedido] += quantidade_itens
+
+                    if data_pedido == hoje:
+                        vendas_hoje += valor_pedido
+                        pedidos_hoje += 1
+                    elif data_pedido == ontem:
+                        vendas_ontem += valor_pedido
+                        pedidos_ontem += 1
+
+            data_vendas = [vendas_por_dia[dia] for dia in dias_grafico]
+            data_produtos = [produtos_por_dia[dia] for dia in dias_grafico]
+
+        ticket_medio = total_vendas / total_pedidos if total_pedidos > 0 else 0
 
         if vendas_ontem > 0:
             evolucao_percentual = ((vendas_hoje - vendas_ontem) / vendas_ontem) * 100
@@ -506,7 +328,7 @@ def get_dashboard_completo(restaurante_id):
         else:
             evolucao_percentual = 0
 
-        print(f"[DASHBOARD] Evolução calculada: vendas_hoje={vendas_hoje}, vendas_ontem={vendas_ontem}, evolucao={evolucao_percentual:.1f}%")
+        logger.info("[DASHBOARD] Evolução calculada: vendas_hoje=%s, vendas_ontem=%s, evolucao=%.1f%%", vendas_hoje, vendas_ontem, evolucao_percentual)
 
         cards = {
             'total_vendas': {
@@ -528,16 +350,8 @@ def get_dashboard_completo(restaurante_id):
             },
         }
 
-        hoje_data = datetime.now().date()
-        todos_os_dias = [(hoje_data - timedelta(days=6 - indice)).strftime('%Y-%m-%d') for indice in range(7)]
-
-        dias_ordenados = sorted(set(todos_os_dias + list(vendas_por_dia.keys())))
-        labels_vendas = [datetime.strptime(data, '%Y-%m-%d').strftime('%d/%m') for data in dias_ordenados]
-        data_vendas = [vendas_por_dia.get(data, 0) for data in dias_ordenados]
-
-        dias_ordenados_produtos = sorted(set(todos_os_dias + list(produtos_por_dia.keys())))
-        labels_produtos = [datetime.strptime(data, '%Y-%m-%d').strftime('%d/%m') for data in dias_ordenados_produtos]
-        data_produtos = [produtos_por_dia.get(data, 0) for data in dias_ordenados_produtos]
+        labels_vendas = [dia.strftime('%d/%m') for dia in dias_grafico]
+        labels_produtos = list(labels_vendas)
 
         graficos = {
             'valor_diario': {
@@ -550,27 +364,19 @@ def get_dashboard_completo(restaurante_id):
             },
         }
 
-        print(f"[DASHBOARD] Tem vendas significativas: {any(v > 0 for v in data_vendas)}, Tem produtos significativos: {any(p > 0 for p in data_produtos)}")
-        print(f"[DASHBOARD] Labels vendas: {labels_vendas}")
-        print(f"[DASHBOARD] Data vendas: {data_vendas}")
-        print(f"[DASHBOARD] Labels produtos: {labels_produtos}")
-        print(f"[DASHBOARD] Data produtos: {data_produtos}")
-        print(f"[DASHBOARD] Métricas calculadas:")
-        print(f"   Total de vendas: R$ {total_vendas:.2f}")
-        print(f"   Produtos vendidos: {produtos_vendidos}")
-        print(f"   Ticket médio: R$ {ticket_medio:.2f}")
-        print(f"   Evolução: {evolucao_percentual:.1f}%")
-        print(f"   Pedidos processados: {len(pedidos_concluidos)}")
-        print(f"[DASHBOARD] Cards a retornar: {json.dumps(cards, indent=2, default=str)}")
-        print(f"[DASHBOARD] Graficos a retornar: labels={graficos.get('valor_diario', {}).get('labels', [])[:3]}..., data={graficos.get('valor_diario', {}).get('data', [])[:3]}...")
-
-        return jsonify({'status': 'success', 'data': {'cards': cards, 'graficos': graficos}}), 200
+        logger.info(
+            "[DASHBOARD] Métricas calculadas: vendas R$ %.2f, produtos %s, ticket médio R$ %.2f, evolução %.1f%%, pedidos %s",
+            total_vendas, produtos_vendidos, ticket_medio, evolucao_percentual, total_pedidos,
+        )
+        logger.debug("[DASHBOARD] Labels vendas: %s | Data vendas: %s", labels_vendas, data_vendas)
+        logger.debug("[DASHBOARD] Labels produtos: %s | Data produtos: %s", labels_produtos, data_produtos)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[DASHBOARD] Cards a retornar: %s", json.dumps(cards, default=str))
+
+        return _resposta_sucesso({'cards': cards, 'graficos': graficos}, idade)
 
     except Exception as exc:
-        print(f"[ERRO] ERRO no dashboard: {exc}")
-        import traceback
-
-        print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+        logger.error("[ERRO] ERRO no dashboard: %s", exc, exc_info=True)
         return jsonify({
             'status': 'success',
             'data': {'cards': {}, 'graficos': {}},
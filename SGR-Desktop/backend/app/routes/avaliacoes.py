@@ -1,8 +1,12 @@
 import json
+import logging
 
 from flask import Blueprint, jsonify, request
 
 from ..proxy import proxy_request
+from ..utils.logs import obter_logger
+
+logger = obter_logger('routes.avaliacoes')
 
 avaliacoes_bp = Blueprint('avaliacoes', __name__)
 
@@ -11,21 +15,18 @@ avaliacoes_bp = Blueprint('avaliacoes', __name__)
 def get_avaliacoes(restaurante_id):
     """Lista avaliações de um restaurante - Proxy para API externa."""
     try:
-        print(f"[AVALIACOES] Buscando avaliações para restaurante {restaurante_id}")
+        logger.info("[AVALIACOES] Buscando avaliações para restaurante %s", restaurante_id)
         status_code, response_data = proxy_request('GET', f'avaliacoes/{restaurante_id}')
 
         if isinstance(response_data, list):
-            print(f"[AVALIACOES] Retornando array direto com {len(response_data)} avaliações")
+            logger.info("[AVALIACOES] Retornando array direto com %s avaliações", len(response_data))
             return jsonify(response_data), status_code
 
-        print(f"[AVALIACOES] Retornando objeto com status: {response_data.get('status', 'unknown')}")
+        logger.info("[AVALIACOES] Retornando objeto com status: %s", response_data.get('status', 'unknown'))
         return jsonify(response_data), status_code
 
     except Exception as exc:
-        print(f"[ERRO] Erro ao buscar avaliações: {exc}")
-        import traceback
-
-        print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+        logger.error("[ERRO] Erro ao buscar avaliações: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': str(exc)}), 500
 
 
@@ -41,20 +42,17 @@ def criar_avaliacao_prato():
         if not data.get('nota') or not data.get('prato'):
             return jsonify({'status': 'error', 'message': 'Campos obrigatórios: nota e prato.id'}), 400
 
-        print("[AVALIACOES-PRATO] Criando avaliação de prato:")
-        print(f"   Nota: {data.get('nota')}")
-        print(f"   Prato ID: {data.get('prato', {}).get('id')}")
-        print(f"   Comentário: {data.get('comentario', '')[:50]}...")
+        logger.info(
+            "[AVALIACOES-PRATO] Criando avaliação de prato: nota %s, prato %s, comentário %s...",
+            data.get('nota'), data.get('prato', {}).get('id'), data.get('comentario', '')[:50],
+        )
 
         status_code, response_data = proxy_request('POST', 'avaliacoes-prato', data=data)
 
         return jsonify(response_data), status_code
 
     except Exception as exc:
-        print(f"[ERRO] Erro ao criar avaliação de prato: {exc}")
-        import traceback
-
-        print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+        logger.error("[ERRO] Erro ao criar avaliação de prato: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': str(exc)}), 500
 
 
@@ -64,20 +62,19 @@ def get_avaliacoes_pratos(restaurante_id):
     Lista avaliações específicas de pratos por restaurante - Proxy para API externa.
     """
     try:
-        print(f"\n{'='*60}")
-        print(f"[AVALIACOES-PRATO] Buscando avaliações de pratos para restaurante {restaurante_id}")
-        print(f"[AVALIACOES-PRATO] Endpoint Flask: /api/avaliacoes/pratos/{restaurante_id}")
+        logger.info("[AVALIACOES-PRATO] Buscando avaliações de pratos para restaurante %s", restaurante_id)
+        logger.info("[AVALIACOES-PRATO] Endpoint Flask: /api/avaliacoes/pratos/%s", restaurante_id)
 
         status_code, response_data = proxy_request('GET', 'avaliacoes-prato')
 
-        print(f"[AVALIACOES-PRATO] Status code recebido: {status_code}")
-        print(f"[AVALIACOES-PRATO] Tipo de resposta: {type(response_data)}")
+        logger.info("[AVALIACOES-PRATO] Status code recebido: %s", status_code)
+        logger.info("[AVALIACOES-PRATO] Tipo de resposta: %s", type(response_data))
 
         if status_code >= 400:
-            print(f"[AVALIACOES-PRATO] ⚠️ Erro na API externa: {status_code}")
+            logger.warning("[AVALIACOES-PRATO] ⚠️ Erro na API externa: %s", status_code)
             if isinstance(response_data, dict):
                 error_msg = response_data.get('message', response_data.get('error', 'Erro desconhecido'))
-                print(f"[AVALIACOES-PRATO] Mensagem de erro: {error_msg}")
+                logger.info("[AVALIACOES-PRATO] Mensagem de erro: %s", error_msg)
                 return jsonify({'status': 'error', 'message': error_msg}), status_code
             return jsonify({'status': 'error', 'message': f'Erro ao buscar avaliações de pratos: Status {status_code}'}), status_code
 
@@ -89,11 +86,12 @@ def get_avaliacoes_pratos(restaurante_id):
             if not isinstance(avaliacoes_todas, list):
                 avaliacoes_todas = []
 
-        print(f"[AVALIACOES-PRATO] Total de avaliações recebidas: {len(avaliacoes_todas)}")
+        logger.info("[AVALIACOES-PRATO] Total de avaliações recebidas: %s", len(avaliacoes_todas))
 
         if len(avaliacoes_todas) > 0:
             primeira_avaliacao = avaliacoes_todas[0]
-            print(f"[AVALIACOES-PRATO] Estrutura da primeira avaliação: {json.dumps(primeira_avaliacao, indent=2, default=str)[:500]}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[AVALIACOES-PRATO] Estrutura da primeira avaliação: %s", json.dumps(primeira_avaliacao, default=str)[:500])
 
         avaliacoes_filtradas = []
 
@@ -116,9 +114,9 @@ def get_avaliacoes_pratos(restaurante_id):
                         if item_restaurante_id and int(item_restaurante_id) == int(restaurante_id) and item_id:
                             itens_restaurante_ids.add(int(item_id))
 
-            print(f"[AVALIACOES-PRATO] IDs de itens do restaurante {restaurante_id}: {len(itens_restaurante_ids)} itens")
+            logger.info("[AVALIACOES-PRATO] IDs de itens do restaurante %s: %s itens", restaurante_id, len(itens_restaurante_ids))
         except Exception as exc:
-            print(f"[AVALIACOES-PRATO] ⚠️ Erro ao buscar itens do restaurante: {exc}")
+            logger.warning("[AVALIACOES-PRATO] ⚠️ Erro ao buscar itens do restaurante: %s", exc)
             itens_restaurante_ids = set()
 
         for avaliacao in avaliacoes_todas:
@@ -153,7 +151,7 @@ def get_avaliacoes_pratos(restaurante_id):
             if pertence_ao_restaurante:
                 avaliacoes_filtradas.append(avaliacao)
 
-        print(f"[AVALIACOES-PRATO] Avaliações filtradas para restaurante {restaurante_id}: {len(avaliacoes_filtradas)}")
+        logger.info("[AVALIACOES-PRATO] Avaliações filtradas para restaurante %s: %s", restaurante_id, len(avaliacoes_filtradas))
 
         media_notas = 0
         if len(avaliacoes_filtradas) > 0:
@@ -171,13 +169,10 @@ def get_avaliacoes_pratos(restaurante_id):
             },
         }
 
-        print(f"[AVALIACOES-PRATO] Retornando {len(avaliacoes_filtradas)} avaliações com média {media_notas:.2f}")
+        logger.info("[AVALIACOES-PRATO] Retornando %s avaliações com média %.2f", len(avaliacoes_filtradas), media_notas)
         return jsonify(resultado), 200
 
     except Exception as exc:
-        print(f"[ERRO] Erro ao carregar avaliacoes de pratos: {exc}")
-        import traceback
-
-        print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+        logger.error("[ERRO] Erro ao carregar avaliacoes de pratos: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': str(exc)}), 500
 
@@ -1,15 +1,11 @@
 import json
 from flask import Blueprint, jsonify, request
 
-from ..config import API_EXTERNA_BASE_URL, API_TIMEOUT
-from ..proxy import (
-    BS4_AVAILABLE,
-    api_session,
-    get_session_cookie,
-    mapear_endpoint_flask_para_api,
-    parse_html_response,
-    proxy_request,
-)
+from ..config import LOG_REQUEST_DUMPS
+from ..proxy import BS4_AVAILABLE, HTML_PARSER_BACKEND, get_session_cookie, proxy_request, sessao_da_requisicao
+from ..utils.logs import obter_logger
+
+logger = obter_logger('routes.cardapio')
 
 cardapio_bp = Blueprint('cardapio', __name__)
 
@@ -18,33 +14,33 @@ cardapio_bp = Blueprint('cardapio', __name__)
 def listar_cardapio(restaurante_id):
     """Rota para LER (Listar) todos os itens do cardápio - Proxy para API externa."""
     try:
-        print(f"[CARDAPIO] Listando cardápio para restaurante {restaurante_id}")
+        logger.info("[CARDAPIO] Listando cardápio para restaurante %s", restaurante_id)
 
         # 🔥 CORREÇÃO: Não precisa passar params, o endpoint já tem o restaurante_id na URL
         # O mapeamento converte cardapio/{id} para itens/restaurante/{id}
         status_code, response_data = proxy_request('GET', f'cardapio/{restaurante_id}', params=None)
 
-        print(f"[CARDAPIO] Resposta da API externa (GET): Status {status_code}")
-        print(f"[CARDAPIO] Tipo de resposta: {type(response_data)}")
+        logger.info("[CARDAPIO] Resposta da API externa (GET): Status %s", status_code)
+        logger.info("[CARDAPIO] Tipo de resposta: %s", type(response_data))
 
         if 200 <= status_code < 300:
             if isinstance(response_data, list):
-                print(f"[CARDAPIO] Resposta é lista com {len(response_data)} itens")
+                logger.info("[CARDAPIO] Resposta é lista com %s itens", len(response_data))
                 return jsonify({'status': 'success', 'data': response_data}), 200
             if isinstance(response_data, dict):
                 if 'data' in response_data:
-                    print("[CARDAPIO] Resposta tem campo 'data'")
+                    logger.info("[CARDAPIO] Resposta tem campo 'data'")
                     return jsonify({'status': 'success', 'data': response_data.get('data', [])}), 200
                 if 'itens' in response_data:
-                    print("[CARDAPIO] Resposta tem campo 'itens'")
+                    logger.info("[CARDAPIO] Resposta tem campo 'itens'")
                     return jsonify({'status': 'success', 'data': response_data.get('itens', [])}), 200
                 if isinstance(response_data.get('data'), list):
-                    print("[CARDAPIO] Resposta dict com data array")
+                    logger.info("[CARDAPIO] Resposta dict com data array")
                     return jsonify({'status': 'success', 'data': response_data.get('data', [])}), 200
-                print("[CARDAPIO] Resposta dict com status")
+                logger.info("[CARDAPIO] Resposta dict com status")
                 return jsonify(response_data), status_code
 
-            print(f"[CARDAPIO] AVISO: Formato de resposta inesperado: {type(response_data)}")
+            logger.warning("[CARDAPIO] AVISO: Formato de resposta inesperado: %s", type(response_data))
             return jsonify({'status': 'success', 'data': []}), 200
 
         if status_code in (401, 403):
@@ -63,10 +59,7 @@ def listar_cardapio(restaurante_id):
         }), status_code
 
     except Exception as exc:
-        print(f"[ERRO] Erro ao listar cardapio: {exc}")
-        import traceback
-
-        print(f"[ERRO] Traceback: {traceback.format_exc()}")
+        logger.error("[ERRO] Erro ao listar cardapio: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': f'Falha ao listar o cardápio: {str(exc)}'}), 500
 
 
@@ -74,23 +67,23 @@ def listar_cardapio(restaurante_id):
 def buscar_item_por_id(item_id):
     """Rota para buscar um item específico do cardápio por ID - Proxy para API externa."""
     try:
-        print(f"[CARDAPIO] Buscando item {item_id}")
+        logger.info("[CARDAPIO] Buscando item %s", item_id)
 
         # A API Java tem GET /itens/{id} conforme o controller
         status_code, response_data = proxy_request('GET', f'itens/{item_id}', params=None)
 
-        print(f"[CARDAPIO] Resposta da API externa (GET item): Status {status_code}")
-        print(f"[CARDAPIO] Tipo de resposta: {type(response_data)}")
+        logger.info("[CARDAPIO] Resposta da API externa (GET item): Status %s", status_code)
+        logger.info("[CARDAPIO] Tipo de resposta: %s", type(response_data))
 
         if 200 <= status_code < 300:
             if isinstance(response_data, dict):
-                print("[CARDAPIO] Item encontrado")
+                logger.info("[CARDAPIO] Item encontrado")
                 return jsonify({'status': 'success', 'data': response_data}), 200
             if isinstance(response_data, list) and len(response_data) > 0:
-                print("[CARDAPIO] Resposta é lista, retornando primeiro item")
+                logger.info("[CARDAPIO] Resposta é lista, retornando primeiro item")
                 return jsonify({'status': 'success', 'data': response_data[0]}), 200
 
-            print(f"[CARDAPIO] AVISO: Formato de resposta inesperado: {type(response_data)}")
+            logger.warning("[CARDAPIO] AVISO: Formato de resposta inesperado: %s", type(response_data))
             return jsonify({'status': 'error', 'message': 'Item não encontrado'}), 404
 
         if status_code == 404:
@@ -112,10 +105,7 @@ def buscar_item_por_id(item_id):
         }), status_code
 
     except Exception as exc:
-        print(f"[ERRO] Erro ao buscar item: {exc}")
-        import traceback
-
-        print(f"[ERRO] Traceback: {traceback.format_exc()}")
+        logger.error("[ERRO] Erro ao buscar item: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': f'Falha ao buscar item: {str(exc)}'}), 500
 
 
@@ -126,16 +116,17 @@ def adicionar_item():
         dados = request.get_json()
 
         if not dados:
-            print("[ERRO] Nenhum dado recebido no POST /api/cardapio/add")
+            logger.error("[ERRO] Nenhum dado recebido no POST /api/cardapio/add")
             return jsonify({'status': 'error', 'message': 'Dados não fornecidos'}), 400
 
-        print(f"[CARDAPIO] Dados recebidos para adicionar item: {json.dumps(dados, indent=2, ensure_ascii=False)}")
+        if LOG_REQUEST_DUMPS:
+            logger.info("[CARDAPIO] Dados recebidos para adicionar item: %s", json.dumps(dados, ensure_ascii=False))
 
         campos_obrigatorios = ['nome', 'preco', 'restaurante_id']
         campos_faltando = [campo for campo in campos_obrigatorios if campo not in dados or dados[campo] is None]
 
         if campos_faltando:
-            print(f"[ERRO] Campos obrigatórios faltando: {campos_faltando}")
+            logger.error("[ERRO] Campos obrigatórios faltando: %s", campos_faltando)
             return jsonify({
                 'status': 'error',
                 'message': f'Campos obrigatórios faltando: {", ".join(campos_faltando)}',
@@ -162,108 +153,55 @@ def adicionar_item():
         else:
             dados_para_api['imagemUrl'] = ''
 
-        print("[CARDAPIO] Dados preparados para API externa:")
-        print(f"   {json.dumps(dados_para_api, indent=2, ensure_ascii=False)}")
+        if LOG_REQUEST_DUMPS:
+            logger.info("[CARDAPIO] Dados preparados para API externa: %s", json.dumps(dados_para_api, ensure_ascii=False))
 
-        print(f"[CARDAPIO] Cookies na sessão: {len(api_session.cookies)} cookie(s)")
-        for cookie in api_session.cookies:
-            print(f"   Cookie: {cookie.name} = {cookie.value[:20]}...")
+        cookies = sessao_da_requisicao().cookies
+        logger.info("[CARDAPIO] Cookies na sessão: %s cookie(s)", len(cookies))
+        for cookie in cookies:
+            logger.debug("[CARDAPIO] Cookie: %s = %s...", cookie.name, cookie.value[:20])
 
         restaurante_id_para_cookie = dados_para_api['restaurante']['id']
         cookie_manual = get_session_cookie(restaurante_id_para_cookie)
         if cookie_manual:
-            print(f"[CARDAPIO] Cookie manual encontrado para restaurante {restaurante_id_para_cookie}: {cookie_manual[:30]}...")
+            logger.info("[CARDAPIO] Cookie manual encontrado para restaurante %s: %s...", restaurante_id_para_cookie, cookie_manual[:30])
         else:
-            print(f"[CARDAPIO] AVISO: Nenhum cookie encontrado para restaurante {restaurante_id_para_cookie}")
+            logger.warning("[CARDAPIO] AVISO: Nenhum cookie encontrado para restaurante %s", restaurante_id_para_cookie)
 
         params = {'restaurante_id': restaurante_id_para_cookie}
 
-        print("[CARDAPIO] Fazendo requisição POST para 'cardapio/add' (mapeado para 'itens')")
+        logger.info("[CARDAPIO] Fazendo requisição POST para 'cardapio/add' (mapeado para 'itens')")
 
+        # Erro de formato (JSON x form-urlencoded) é reenviado pelo proxy, que lembra a codificação aceita.
         status_code, response_data = proxy_request('POST', 'cardapio/add', data=dados_para_api, params=params)
 
-        print("\n[CARDAPIO] === RESPOSTA DA API EXTERNA ===")
-        print(f"[CARDAPIO] Status Code: {status_code}")
-        print(f"[CARDAPIO] Tipo de Resposta: {type(response_data)}")
-
-        if isinstance(response_data, dict):
-            print("[CARDAPIO] Response Data (dict):")
-            print(f"   {json.dumps(response_data, indent=2, ensure_ascii=False)}")
-        elif isinstance(response_data, str):
-            print(f"[CARDAPIO] Response Data (string): {response_data[:500]}")
-        else:
-            print(f"[CARDAPIO] Response Data (outro tipo): {str(response_data)[:500]}")
-        print("[CARDAPIO] ===================================\n")
-
-        if status_code == 400 and isinstance(response_data, dict):
-            error_msg_check = response_data.get('message', '').lower()
-            if any(palavra in error_msg_check for palavra in ['formato', 'format', 'content-type', 'invalid', 'form']):
-                print("[CARDAPIO] Erro pode ser de formato - tentando form-urlencoded...")
-                try:
-                    endpoint_api = mapear_endpoint_flask_para_api('cardapio/add')
-                    url = f"{API_EXTERNA_BASE_URL}{endpoint_api}"
-
-                    headers_form = {
-                        'Accept': 'text/html,application/json,application/xhtml+xml,text/plain,*/*',
-                        'User-Agent': 'SGR-Desktop-Flask-Proxy/1.0',
-                        'Origin': 'http://localhost:5000',
-                        'Content-Type': 'application/x-www-form-urlencoded',
-                    }
-
-                    if len(api_session.cookies) > 0:
-                        cookie_header = '; '.join([f"{name}={value}" for name, value in api_session.cookies.items()])
-                        headers_form['Cookie'] = cookie_header
+        logger.info("[CARDAPIO] Resposta da API externa: status %s, tipo %s", status_code, type(response_data).__name__)
 
-                    import urllib.parse
-
-                    form_data_parts = []
-                    for key, value in dados_para_api.items():
-                        if key == 'restaurante' and isinstance(value, dict):
-                            restaurante_id = value.get('id', '')
-                            form_data_parts.append(f"restaurante.id={urllib.parse.quote(str(restaurante_id))}")
-                        elif key in {'nome', 'descricao', 'imagemUrl', 'categoria'}:
-                            form_data_parts.append(f"{key}={urllib.parse.quote(str(value))}")
-                        else:
-                            form_data_parts.append(f"{key}={urllib.parse.quote(str(value))}")
-                    form_data = '&'.join(form_data_parts)
-
-                    print("[CARDAPIO] Tentando form-urlencoded:")
-                    print(f"   URL: {url}")
-                    print(f"   Form Data: {form_data}")
-
-                    response_form = api_session.post(url, data=form_data, headers=headers_form, timeout=API_TIMEOUT)
-
-                    if response_form.status_code != 400:
-                        print(f"[CARDAPIO] Form-urlencoded funcionou! Status: {response_form.status_code}")
-                        try:
-                            response_data = response_form.json()
-                        except Exception:
-                            response_data = parse_html_response(response_form.text, endpoint_api)
-                        status_code = response_form.status_code
-                    else:
-                        print("[CARDAPIO] Form-urlencoded também retornou 400")
-                except Exception as exc:
-                    print(f"[CARDAPIO] Erro ao tentar form-urlencoded: {exc}")
+        if LOG_REQUEST_DUMPS:
+            if isinstance(response_data, dict):
+                logger.info("[CARDAPIO] Response Data (dict): %s", json.dumps(response_data, ensure_ascii=False))
+            else:
+                logger.info("[CARDAPIO] Response Data: %s", str(response_data)[:500])
 
         if status_code == 400:
             error_msg = 'Erro ao adicionar item'
 
-            print("[CARDAPIO] Extraindo mensagem de erro do status 400...")
+            logger.info("[CARDAPIO] Extraindo mensagem de erro do status 400...")
 
             if isinstance(response_data, dict):
                 error_msg = response_data.get('message', response_data.get('error', response_data.get('mensagem', 'Dados inválidos')))
-                print(f"[CARDAPIO] Mensagem extraída do dict: {error_msg}")
+                logger.info("[CARDAPIO] Mensagem extraída do dict: %s", error_msg)
             elif isinstance(response_data, str):
-                print("[CARDAPIO] Resposta é string, procurando mensagens de erro...")
+                logger.info("[CARDAPIO] Resposta é string, procurando mensagens de erro...")
                 if BS4_AVAILABLE and ('<' in response_data and '>' in response_data):
                     try:
                         from bs4 import BeautifulSoup
 
-                        soup = BeautifulSoup(response_data, 'html.parser')
+                        soup = BeautifulSoup(response_data, HTML_PARSER_BACKEND)
                         error_div = soup.find(class_=['error', 'alert-danger', 'message', 'error'])
                         if error_div:
                             error_msg = error_div.get_text(strip=True)
-                            print(f"[CARDAPIO] Mensagem extraída do HTML: {error_msg}")
+                            logger.info("[CARDAPIO] Mensagem extraída do HTML: %s", error_msg)
                         else:
                             body = soup.find('body')
                             if body:
@@ -271,7 +209,7 @@ def adicionar_item():
                             else:
                                 error_msg = response_data[:200]
                     except Exception as parse_error:
-                        print(f"[CARDAPIO] Erro ao fazer parse HTML: {parse_error}")
+                        logger.warning("[CARDAPIO] Erro ao fazer parse HTML: %s", parse_error)
                         error_msg = response_data[:200]
                 else:
                     if 'erro' in response_data.lower() or 'error' in response_data.lower():
@@ -279,15 +217,15 @@ def adicionar_item():
                     else:
                         error_msg = 'Erro ao adicionar item. Verifique os dados enviados.'
 
-            print(f"[ERRO] API externa retornou 400: {error_msg}")
+            logger.error("[ERRO] API externa retornou 400: %s", error_msg)
             return jsonify({'status': 'error', 'message': error_msg}), 400
 
         if status_code == 403:
-            print("[ERRO] API externa retornou 403 - Acesso negado")
+            logger.error("[ERRO] API externa retornou 403 - Acesso negado")
             return jsonify({'status': 'error', 'message': 'Acesso negado. Verifique se você está autenticado.'}), 403
 
         if 200 <= status_code < 300:
-            print(f"[CARDAPIO] Sucesso! Status {status_code}")
+            logger.info("[CARDAPIO] Sucesso! Status %s", status_code)
 
             if not isinstance(response_data, dict):
                 if isinstance(response_data, str):
@@ -305,10 +243,11 @@ def adicionar_item():
             elif 'status' not in response_data:
                 response_data['status'] = 'success'
 
-            print(f"[CARDAPIO] Retornando resposta formatada: {json.dumps(response_data, indent=2, ensure_ascii=False)}")
+            if LOG_REQUEST_DUMPS:
+                logger.info("[CARDAPIO] Retornando resposta formatada: %s", json.dumps(response_data, ensure_ascii=False))
             return jsonify(response_data), status_code
 
-        print(f"[CARDAPIO] Status não tratado: {status_code}")
+        logger.info("[CARDAPIO] Status não tratado: %s", status_code)
         return jsonify({
             'status': 'error',
             'message': response_data.get('message', f'Erro ao adicionar item (status {status_code})')
@@ -317,13 +256,10 @@ def adicionar_item():
         }), status_code
 
     except ValueError as exc:
-        print(f"[ERRO] Erro de validação: {exc}")
+        logger.error("[ERRO] Erro de validação: %s", exc)
         return jsonify({'status': 'error', 'message': f'Erro de validação: {str(exc)}'}), 400
     except Exception as exc:
-        print(f"[ERRO] Erro ao adicionar item: {exc}")
-        import traceback
-
-        print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+        logger.error("[ERRO] Erro ao adicionar item: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': f'Falha ao adicionar item: {str(exc)}'}), 500
 
 
@@ -335,8 +271,9 @@ def editar_item(item_id):
         if not dados:
             return jsonify({'status': 'error', 'message': 'Dados não fornecidos'}), 400
 
-        print(f"[CARDAPIO] Editando item {item_id}")
-        print(f"[CARDAPIO] Dados recebidos: {json.dumps(dados, indent=2, ensure_ascii=False)}")
+        logger.info("[CARDAPIO] Editando item %s", item_id)
+        if LOG_REQUEST_DUMPS:
+            logger.info("[CARDAPIO] Dados recebidos: %s", json.dumps(dados, ensure_ascii=False))
 
         dados_para_api = {
             'nome': dados.get('nome', '').strip(),
@@ -355,7 +292,7 @@ def editar_item(item_id):
 
         status_code, response_data = proxy_request('PUT', f'itens/{item_id}', data=dados_para_api, params=params)
 
-        print(f"[CARDAPIO] Resposta da API externa (PUT): Status {status_code}")
+        logger.info("[CARDAPIO] Resposta da API externa (PUT): Status %s", status_code)
 
         if 200 <= status_code < 300:
             return jsonify({
@@ -371,10 +308,7 @@ def editar_item(item_id):
         return jsonify({'status': 'error', 'message': error_msg}), status_code
 
     except Exception as exc:
-        print(f"[ERRO] Erro ao editar item: {exc}")
-        import traceback
-
-        print(f"[ERRO] Traceback: {traceback.format_exc()}")
+        logger.error("[ERRO] Erro ao editar item: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': f'Falha ao atualizar item: {str(exc)}'}), 500
 
 
@@ -382,13 +316,13 @@ def editar_item(item_id):
 def deletar_item(item_id):
     """Rota para DELETAR um item - Proxy para API externa."""
     try:
-        print(f"[CARDAPIO] Deletando item {item_id}")
+        logger.info("[CARDAPIO] Deletando item %s", item_id)
 
         params = {}
 
         status_code, response_data = proxy_request('DELETE', f'itens/{item_id}', params=params)
 
-        print(f"[CARDAPIO] Resposta da API externa (DELETE): Status {status_code}")
+        logger.info("[CARDAPIO] Resposta da API externa (DELETE): Status %s", status_code)
 
         if status_code in (200, 204):
             return jsonify({'status': 'success', 'message': 'Item deletado com sucesso'}), 200
@@ -400,9 +334,6 @@ def deletar_item(item_id):
         return jsonify({'status': 'error', 'message': error_msg}), status_code
 
     except Exception as exc:
-        print(f"[ERRO] Erro ao deletar item: {exc}")
-        import traceback
-
-        print(f"[ERRO] Traceback: {traceback.format_exc()}")
+        logger.error("[ERRO] Erro ao deletar item: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': f'Falha ao deletar item: {str(exc)}'}), 500
 
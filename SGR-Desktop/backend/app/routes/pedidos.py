@@ -3,8 +3,25 @@ from datetime import datetime, timedelta
 
 from flask import Blueprint, jsonify, request
 
-from ..proxy import api_session, proxy_request
-from ..utils.status import is_status_concluido
+from ..config import LOG_REQUEST_DUMPS
+from ..proxy import proxy_request, sessao_da_requisicao
+from ..services.pedidos import (
+    buscar_pedido_por_id,
+    buscar_pedidos_restaurante,
+    listar_pedidos_concluidos,
+    serializar_pedidos,
+)
+from ..services.pedidos_cache import invalidar_pedidos_cache
+from ..services.pedidos_espelho import (
+    buscar_pedidos_espelho,
+    espelho_ativo,
+    expirar_espelho,
+    listar_concluidos_espelho,
+)
+from ..utils.logs import obter_logger
+from ..utils.sessoes import restaurante_atual
+
+logger = obter_logger('routes.pedidos')
 
 pedidos_bp = Blueprint('pedidos', __name__)
 
@@ -21,105 +38,26 @@ def get_pedidos_restaurante(restaurante_id):
         data_fim = request.args.get('data_fim')
 
         inicio_tempo = datetime.now()
-        print(f"[PEDIDOS-RESTAURANTE] Buscando pedidos para restaurante {restaurante_id} (status: {status or 'todos'})")
+        logger.info("[PEDIDOS-RESTAURANTE] Buscando pedidos para restaurante %s (status: %s)", restaurante_id, status or 'todos')
 
         try:
-            status_code, response_data = proxy_request('GET', 'pedidos/restaurante')
+            buscar = buscar_pedidos_espelho if espelho_ativo() else buscar_pedidos_restaurante
+            status_code, pedidos, total_recebido = buscar(
+                restaurante_id, status=status, data_inicio=data_inicio, data_fim=data_fim
+            )
 
             if status_code != 200:
-                print(f"[PEDIDOS-RESTAURANTE] Erro ao buscar pedidos: {status_code}")
+                logger.warning("[PEDIDOS-RESTAURANTE] Erro ao buscar pedidos: %s", status_code)
                 return jsonify({'status': 'error', 'message': f'Erro ao buscar pedidos: Status {status_code}'}), status_code
 
-            pedidos_todos = []
-            if isinstance(response_data, list):
-                pedidos_todos = response_data
-            elif isinstance(response_data, dict):
-                pedidos_todos = response_data.get('data', []) or response_data.get('pedidos', [])
-                if not isinstance(pedidos_todos, list):
-                    pedidos_todos = []
-
-            print(f"[PEDIDOS-RESTAURANTE] Total de pedidos recebidos: {len(pedidos_todos)}")
-
-            # 🔥 OTIMIZAÇÃO: Filtrar mais eficientemente
-            pedidos_filtrados = []
-            restaurante_id_int = int(restaurante_id)
-            status_upper = status.upper() if status else None
-            
-            for pedido in pedidos_todos:
-                if not isinstance(pedido, dict):
-                    continue
-
-                # Extrair restaurante_id de forma mais eficiente
-                pedido_restaurante_id = None
-                restaurante_obj = pedido.get('restaurante')
-                if isinstance(restaurante_obj, dict):
-                    pedido_restaurante_id = restaurante_obj.get('id')
-                elif pedido.get('restaurante_id'):
-                    pedido_restaurante_id = pedido['restaurante_id']
-
-                # Filtrar por restaurante_id primeiro (mais rápido)
-                if pedido_restaurante_id and int(pedido_restaurante_id) != restaurante_id_int:
-                    continue
-
-                # Filtrar por status se fornecido
-                if status_upper:
-                    pedido_status = (pedido.get('status') or '').upper()
-                    if status_upper in ['FINALIZADO', 'CONCLUIDO', 'CONCLUÍDO']:
-                        if pedido_status not in ['FINALIZADO', 'CONCLUIDO', 'CONCLUÍDO']:
-                            continue
-                    else:
-                        if pedido_status != status_upper:
-                            continue
-
-                if data_inicio or data_fim:
-                    pedido_data_str = None
-                    if pedido.get('criadoEm'):
-                        try:
-                            pedido_data = datetime.fromisoformat(str(pedido['criadoEm']).replace('Z', '+00:00')).date()
-                            pedido_data_str = pedido_data.strftime('%Y-%m-%d')
-                        except Exception:
-                            pass
-                    elif pedido.get('criado_em'):
-                        try:
-                            pedido_data = datetime.fromisoformat(str(pedido['criado_em']).replace('Z', '+00:00')).date()
-                            pedido_data_str = pedido_data.strftime('%Y-%m-%d')
-                        except Exception:
-                            pass
-
-                    if pedido_data_str:
-                        if data_inicio and pedido_data_str < data_inicio:
-                            continue
-                        if data_fim and pedido_data_str > data_fim:
-                            continue
-
-                if 'restaurante_id' not in pedido:
-                    pedido['restaurante_id'] = restaurante_id
-
-                if 'criadoEm' not in pedido and 'criado_em' in pedido:
-                    pedido['criadoEm'] = pedido['criado_em']
-                elif 'criado_em' not in pedido and 'criadoEm' in pedido:
-                    pedido['criado_em'] = pedido['criadoEm']
-
-                if 'itens' not in pedido:
-                    pedido['itens'] = []
-
-                pedidos_filtrados.append(pedido)
-
-            # Ordenar por data (mais recente primeiro)
-            pedidos_filtrados.sort(key=lambda pedido: (
-                pedido.get('criadoEm') or pedido.get('criado_em') or ''
-            ), reverse=True)
-
-            pedidos = pedidos_filtrados
-            
+            logger.info("[PEDIDOS-RESTAURANTE] Total de pedidos recebidos: %s", total_recebido)
+
             tempo_decorrido = (datetime.now() - inicio_tempo).total_seconds()
-            print(f"[PEDIDOS-RESTAURANTE] ✅ {len(pedidos)} pedidos filtrados em {tempo_decorrido:.2f}s")
+            logger.info("[PEDIDOS-RESTAURANTE] ✅ %s pedidos filtrados em %.2fs", len(pedidos), tempo_decorrido)
 
         except Exception as exc:
             tempo_decorrido = (datetime.now() - inicio_tempo).total_seconds()
-            print(f"[PEDIDOS-RESTAURANTE] ❌ Erro após {tempo_decorrido:.2f}s: {exc}")
-            import traceback
-            print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+            logger.error("[PEDIDOS-RESTAURANTE] ❌ Erro após %.2fs: %s", tempo_decorrido, exc, exc_info=True)
             pedidos = []
 
         if not pedidos:
@@ -185,82 +123,36 @@ def get_pedidos_concluidos_restaurante(restaurante_id):
     Usa o endpoint /pedidos/restaurante da API Java (Spring Boot).
     """
     try:
-        print(f"\n{'='*60}")
-        print(f"[PEDIDOS-CONCLUIDOS] Buscando pedidos concluídos para restaurante {restaurante_id}")
+        logger.info("[PEDIDOS-CONCLUIDOS] Buscando pedidos concluídos para restaurante %s", restaurante_id)
 
         try:
-            status_code, response_data = proxy_request('GET', 'pedidos/restaurante')
+            if espelho_ativo():
+                status_code, dados, total_recebido = listar_concluidos_espelho(restaurante_id)
+            else:
+                status_code, pedidos_concluidos, total_recebido = listar_pedidos_concluidos(restaurante_id)
+                dados = serializar_pedidos(pedidos_concluidos, restaurante_id)
 
-            print(f"[PEDIDOS-CONCLUIDOS] Status code da API externa: {status_code}")
+            logger.info("[PEDIDOS-CONCLUIDOS] Status code da API externa: %s", status_code)
 
             if status_code != 200:
-                print(f"[PEDIDOS-CONCLUIDOS] Erro ao buscar pedidos: {status_code}")
+                logger.warning("[PEDIDOS-CONCLUIDOS] Erro ao buscar pedidos: %s", status_code)
                 return jsonify({
                     'status': 'error',
                     'message': f'Erro ao buscar pedidos: Status {status_code}',
                     'data': [],
                 }), status_code
 
-            pedidos_todos = []
-            if isinstance(response_data, list):
-                pedidos_todos = response_data
-            elif isinstance(response_data, dict):
-                pedidos_todos = response_data.get('data', []) or response_data.get('pedidos', [])
-                if not isinstance(pedidos_todos, list):
-                    pedidos_todos = []
-
-            print(f"[PEDIDOS-CONCLUIDOS] Total de pedidos recebidos da API: {len(pedidos_todos)}")
-
-            pedidos_concluidos = []
-            for pedido in pedidos_todos:
-                if not isinstance(pedido, dict):
-                    continue
-
-                pedido_restaurante_id = None
-                if pedido.get('restaurante') and isinstance(pedido.get('restaurante'), dict):
-                    pedido_restaurante_id = pedido['restaurante'].get('id')
-                elif pedido.get('restaurante_id'):
-                    pedido_restaurante_id = pedido['restaurante_id']
-
-                if not pedido_restaurante_id or int(pedido_restaurante_id) != int(restaurante_id):
-                    continue
-
-                if not is_status_concluido(pedido.get('status')):
-                    continue
-
-                if 'restaurante_id' not in pedido:
-                    pedido['restaurante_id'] = restaurante_id
-
-                if 'criadoEm' not in pedido and 'criado_em' in pedido:
-                    pedido['criadoEm'] = pedido['criado_em']
-                elif 'criado_em' not in pedido and 'criadoEm' in pedido:
-                    pedido['criado_em'] = pedido['criadoEm']
-
-                if 'itens' not in pedido:
-                    pedido['itens'] = []
-
-                pedidos_concluidos.append(pedido)
-
-            print(f"[PEDIDOS-CONCLUIDOS] Pedidos concluídos encontrados: {len(pedidos_concluidos)}")
-
-            pedidos_concluidos.sort(key=lambda pedido: (
-                pedido.get('criadoEm') or pedido.get('criado_em') or ''
-            ), reverse=True)
+            logger.info("[PEDIDOS-CONCLUIDOS] Total de pedidos recebidos da API: %s", total_recebido)
+            logger.info("[PEDIDOS-CONCLUIDOS] Pedidos concluídos encontrados: %s", len(dados))
 
-            return jsonify({'status': 'success', 'data': pedidos_concluidos, 'count': len(pedidos_concluidos)}), 200
+            return jsonify({'status': 'success', 'data': dados, 'count': len(dados)}), 200
 
         except Exception as exc:
-            print(f"[PEDIDOS-CONCLUIDOS] Erro ao buscar pedidos da API externa: {exc}")
-            import traceback
-
-            print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+            logger.error("[PEDIDOS-CONCLUIDOS] Erro ao buscar pedidos da API externa: %s", exc, exc_info=True)
             return jsonify({'status': 'error', 'message': f'Erro ao buscar pedidos: {str(exc)}', 'data': []}), 500
 
     except Exception as exc:
-        print(f"[PEDIDOS-CONCLUIDOS] Erro geral: {exc}")
-        import traceback
-
-        print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+        logger.error("[PEDIDOS-CONCLUIDOS] Erro geral: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': str(exc), 'data': []}), 500
 
 
@@ -271,20 +163,19 @@ def update_pedido_status(pedido_id):
     CORREÇÃO: Usa endpoint /status-restaurante para restaurantes.
     """
     try:
-        print(f"\n{'='*60}")
-        print(f"[UPDATE-STATUS] Atualizando status do pedido {pedido_id}")
+        logger.info("[UPDATE-STATUS] Atualizando status do pedido %s", pedido_id)
 
         dados = request.get_json()
         if not dados:
-            print("[UPDATE-STATUS] Erro: Dados não fornecidos")
+            logger.warning("[UPDATE-STATUS] Erro: Dados não fornecidos")
             return jsonify({'status': 'error', 'message': 'Dados não fornecidos'}), 400
 
         novo_status = dados.get('status')
         if not novo_status:
-            print("[UPDATE-STATUS] Erro: Status não fornecido")
+            logger.warning("[UPDATE-STATUS] Erro: Status não fornecido")
             return jsonify({'status': 'error', 'message': 'Status não fornecido'}), 400
 
-        print(f"[UPDATE-STATUS] Status recebido: {novo_status}")
+        logger.info("[UPDATE-STATUS] Status recebido: %s", novo_status)
 
         status_mapeado = novo_status.lower().strip()
 
@@ -315,26 +206,33 @@ def update_pedido_status(pedido_id):
                 status_mapeado = status_upper
             else:
                 status_mapeado = status_upper
-                print(f"[UPDATE-STATUS] ⚠️ Status não mapeado: {novo_status} -> usando {status_mapeado}")
+                logger.warning("[UPDATE-STATUS] ⚠️ Status não mapeado: %s -> usando %s", novo_status, status_mapeado)
 
-        print(f"[UPDATE-STATUS] Status mapeado para API Java: {status_mapeado}")
+        logger.info("[UPDATE-STATUS] Status mapeado para API Java: %s", status_mapeado)
 
-        if len(api_session.cookies) > 0:
-            cookie_info = [f"{name}={value[:20]}..." for name, value in list(api_session.cookies.items())[:3]]
-            print(f"[UPDATE-STATUS] Cookies na sessão: {', '.join(cookie_info)}")
+        cookies = sessao_da_requisicao().cookies
+        if len(cookies) > 0:
+            cookie_info = [f"{name}={value[:20]}..." for name, value in list(cookies.items())[:3]]
+            logger.info("[UPDATE-STATUS] Cookies na sessão: %s", ', '.join(cookie_info))
         else:
-            print("[UPDATE-STATUS] ⚠️ AVISO: Nenhum cookie na sessão!")
+            logger.warning("[UPDATE-STATUS] ⚠️ AVISO: Nenhum cookie na sessão!")
 
         params = {'status': status_mapeado}
-        print(f"[UPDATE-STATUS] Enviando requisição: PUT pedidos/{pedido_id}/status-restaurante?status={status_mapeado}")
+        logger.info("[UPDATE-STATUS] Enviando requisição: PUT pedidos/%s/status-restaurante?status=%s", pedido_id, status_mapeado)
 
         status_code, response_data = proxy_request('PUT', f'pedidos/{pedido_id}/status-restaurante', params=params)
 
-        print(f"[UPDATE-STATUS] Resposta da API Java: Status {status_code}")
-        if isinstance(response_data, dict):
-            print(f"[UPDATE-STATUS] Resposta completa: {json.dumps(response_data, indent=2, ensure_ascii=False)}")
-        else:
-            print(f"[UPDATE-STATUS] Resposta (tipo {type(response_data)}): {str(response_data)[:200]}")
+        logger.info("[UPDATE-STATUS] Resposta da API Java: Status %s", status_code)
+        if status_code < 400:
+            # Só o restaurante da requisição; sem ele identificado, todos.
+            restaurante_id = restaurante_atual()
+            invalidar_pedidos_cache(restaurante_id)
+            expirar_espelho(restaurante_id)
+        if LOG_REQUEST_DUMPS:
+            if isinstance(response_data, dict):
+                logger.info("[UPDATE-STATUS] Resposta completa: %s", json.dumps(response_data, ensure_ascii=False))
+            else:
+                logger.info("[UPDATE-STATUS] Resposta (tipo %s): %s", type(response_data), str(response_data)[:200])
 
         if status_code >= 400:
             error_msg = 'Erro ao atualizar status'
@@ -354,18 +252,18 @@ def update_pedido_status(pedido_id):
                 if not isinstance(response_data, dict) or 'message' not in response_data:
                     error_msg = f'Status "{status_mapeado}" inválido ou não permitido para este pedido.'
 
-            print(f"[UPDATE-STATUS] ⚠️ ERRO HTTP {status_code}: {error_msg}")
+            logger.warning("[UPDATE-STATUS] ⚠️ ERRO HTTP %s: %s", status_code, error_msg)
             return jsonify({'status': 'error', 'message': error_msg, 'status_code': status_code}), status_code
 
         if status_code == 200:
             if isinstance(response_data, dict):
                 if 'id' in response_data or 'status' in response_data:
-                    print("[UPDATE-STATUS] Resposta parece ser o pedido atualizado - tratando como sucesso")
+                    logger.info("[UPDATE-STATUS] Resposta parece ser o pedido atualizado - tratando como sucesso")
                     return jsonify({'status': 'success', 'message': 'Status atualizado com sucesso', 'data': response_data}), 200
                 if 'message' in response_data:
                     msg_lower = response_data['message'].lower()
                     if any(palavra in msg_lower for palavra in ['erro', 'error', 'falha', 'inválido', 'invalid']):
-                        print(f"[UPDATE-STATUS] ⚠️ Mensagem indica erro: {response_data['message']}")
+                        logger.warning("[UPDATE-STATUS] ⚠️ Mensagem indica erro: %s", response_data['message'])
                         return jsonify({'status': 'error', 'message': response_data['message']}), 400
                     return jsonify({'status': 'success', 'message': response_data.get('message', 'Status atualizado com sucesso')}), 200
                 return jsonify({'status': 'success', 'message': 'Status atualizado com sucesso', 'data': response_data}), 200
@@ -379,15 +277,11 @@ def update_pedido_status(pedido_id):
         elif 'status' not in response_data:
             response_data['status'] = 'success' if status_code < 400 else 'error'
 
-        print(f"[UPDATE-STATUS] Retornando resposta formatada: status={response_data.get('status')}")
-        print(f"{'='*60}\n")
+        logger.info("[UPDATE-STATUS] Retornando resposta formatada: status=%s", response_data.get('status'))
 
         return jsonify(response_data), status_code
     except Exception as exc:
-        print(f"[UPDATE-STATUS] ⚠️ ERRO: {exc}")
-        import traceback
-
-        print(f"[UPDATE-STATUS] Traceback: {traceback.format_exc()}")
+        logger.error("[UPDATE-STATUS] ⚠️ ERRO: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': f'Erro ao atualizar status: {str(exc)}'}), 500
 
 
@@ -398,91 +292,49 @@ def get_pedido_detalhes(pedido_id):
     A API Java não tem endpoint GET /pedidos/{id}, então buscamos da lista e filtramos.
     """
     try:
-        print(f"[PEDIDO-DETALHES] Buscando detalhes do pedido {pedido_id}")
+        logger.info("[PEDIDO-DETALHES] Buscando detalhes do pedido %s", pedido_id)
 
-        status_code, response_data = proxy_request('GET', 'pedidos/restaurante')
+        status_code, pedido_encontrado = buscar_pedido_por_id(pedido_id)
 
         if status_code != 200:
             return jsonify({'status': 'error', 'message': f'Erro ao buscar pedidos: Status {status_code}'}), status_code
 
-        pedidos_todos = []
-        if isinstance(response_data, list):
-            pedidos_todos = response_data
-        elif isinstance(response_data, dict):
-            pedidos_todos = response_data.get('data', []) or response_data.get('pedidos', [])
-            if not isinstance(pedidos_todos, list):
-                pedidos_todos = []
-
-        pedido_encontrado = None
-        for pedido in pedidos_todos:
-            if isinstance(pedido, dict) and pedido.get('id') == pedido_id:
-                pedido_encontrado = pedido
-                break
-
         if not pedido_encontrado:
             return jsonify({'status': 'error', 'message': 'Pedido não encontrado'}), 404
 
-        itens = pedido_encontrado.get('itens', [])
-
-        valor_total = pedido_encontrado.get('valor_total') or pedido_encontrado.get('valor') or 0
-        if valor_total == 0 and itens:
-            for item in itens:
-                if isinstance(item, dict):
-                    quantidade = item.get('quantidade', 0) or 0
-                    preco = 0
-                    if item.get('itemRestaurante') and isinstance(item.get('itemRestaurante'), dict):
-                        preco = float(item['itemRestaurante'].get('preco', 0) or 0)
-                    elif item.get('item_restaurante') and isinstance(item.get('item_restaurante'), dict):
-                        preco = float(item['item_restaurante'].get('preco', 0) or 0)
-                    elif item.get('preco'):
-                        preco = float(item.get('preco', 0) or 0)
-                    valor_total += quantidade * preco
-
-        data_pedido = pedido_encontrado.get('criadoEm') or pedido_encontrado.get('criado_em') or pedido_encontrado.get('data_pedido')
-
-        itens_formatados = []
-        for item in itens:
-            if isinstance(item, dict):
-                nome = None
-                preco = 0
-                quantidade = item.get('quantidade', 0) or 0
-                observacoes = item.get('observacoes') or item.get('observacoes_item')
-
-                if item.get('itemRestaurante') and isinstance(item.get('itemRestaurante'), dict):
-                    nome = item['itemRestaurante'].get('nome')
-                    preco = float(item['itemRestaurante'].get('preco', 0) or 0)
-                elif item.get('item_restaurante') and isinstance(item.get('item_restaurante'), dict):
-                    nome = item['item_restaurante'].get('nome')
-                    preco = float(item['item_restaurante'].get('preco', 0) or 0)
-                elif item.get('nome'):
-                    nome = item.get('nome')
-                    preco = float(item.get('preco', 0) or item.get('valorUnitario', 0) or 0)
-
-                if nome:
-                    itens_formatados.append({
-                        'nome': nome,
-                        'quantidade': quantidade,
-                        'preco': preco,
-                        'subtotal': quantidade * preco,
-                        'observacoes': observacoes,
-                    })
+        valor_total = pedido_encontrado.valor_informado or pedido_encontrado.valor_itens
+
+        bruto = pedido_encontrado.bruto
+        data_pedido = bruto.get('criadoEm') or bruto.get('criado_em') or bruto.get('data_pedido')
+
+        itens_formatados = [
+            {
+                'nome': item.nome,
+                'quantidade': item.quantidade,
+                'preco': item.preco_unitario,
+                'subtotal': item.subtotal,
+                'observacoes': item.observacoes,
+            }
+            for item in pedido_encontrado.itens
+            if item.nome
+        ]
 
         cliente = {}
-        if pedido_encontrado.get('cliente'):
-            if isinstance(pedido_encontrado['cliente'], dict):
-                cliente = pedido_encontrado['cliente']
+        if bruto.get('cliente'):
+            if isinstance(bruto['cliente'], dict):
+                cliente = bruto['cliente']
             else:
-                cliente = {'nome': str(pedido_encontrado['cliente'])}
+                cliente = {'nome': str(bruto['cliente'])}
 
         return jsonify({
             'status': 'success',
             'data': {
                 'pedido': {
-                    'id': pedido_encontrado.get('id'),
-                    'status': pedido_encontrado.get('status'),
+                    'id': bruto.get('id'),
+                    'status': bruto.get('status'),
                     'data_pedido': data_pedido,
                     'valor_total': valor_total,
-                    'observacoes': pedido_encontrado.get('observacoesGerais') or pedido_encontrado.get('observacoes'),
+                    'observacoes': bruto.get('observacoesGerais') or bruto.get('observacoes'),
                     'cliente': cliente,
                 },
                 'itens': itens_formatados,
@@ -490,9 +342,6 @@ def get_pedido_detalhes(pedido_id):
         }), 200
 
     except Exception as exc:
-        print(f"[ERRO] Erro ao buscar detalhes do pedido: {exc}")
-        import traceback
-
-        print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+        logger.error("[ERRO] Erro ao buscar detalhes do pedido: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': str(exc)}), 500
 
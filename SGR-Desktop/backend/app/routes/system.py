@@ -4,11 +4,34 @@ import uuid
 from datetime import datetime
 from pathlib import Path
 
-from flask import Blueprint, jsonify, request, send_from_directory
+import requests
+from flask import Blueprint, Response, jsonify, request, send_from_directory
 from werkzeug.utils import secure_filename
 
-from ..config import API_EXTERNA_BASE_URL, API_EXTERNA_HOST, API_EXTERNA_PORT, API_TIMEOUT
-from ..proxy import api_session, proxy_request, set_session_cookie
+from ..config import API_EXTERNA_BASE_URL, API_EXTERNA_HOST, API_EXTERNA_PORT, API_READ_TIMEOUT
+from ..proxy import (
+    api_session,
+    codificacao_endpoints,
+    proxy_request,
+    resposta_restaurante_ambiguo,
+    restaurante_ambiguo,
+    sessao_da_requisicao,
+    sessoes,
+    set_session_cookie,
+    upstream_circuito,
+    upstream_escalonador,
+    upstream_hedge,
+    upstream_retentativas,
+    upstream_timeouts,
+)
+from ..services.conexoes import estatisticas_pool
+from ..utils.cookies import substituir_cookie
+from ..utils.deadline import DeadlineExcedido, tempo_restante, timeout_upstream
+from ..utils.logs import obter_logger
+from ..utils.metricas import metricas
+from ..utils.sessoes import normalizar_restaurante, restaurante_atual, usar_sessao
+
+logger = obter_logger('routes.system')
 
 system_bp = Blueprint('system', __name__)
 
@@ -24,6 +47,12 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def _enviar_imagem(sessao, url_api, files, headers):
+    """POST multipart da imagem numa vaga interativa do escalonador; sem vaga até o prazo, TimeoutError."""
+    with upstream_escalonador.vaga('interativa', restaurante_atual(), espera=tempo_restante()):
+        return sessao.post(url_api, files=files, headers=headers, timeout=timeout_upstream())
+
+
 @system_bp.route('/api/health', methods=['GET'])
 def health_check():
     """Verifica saúde da API Flask (proxy)."""
@@ -36,12 +65,67 @@ def health_check():
             'message': 'API Flask (Proxy) está funcionando!',
             'api_externa_status': api_externa_status,
             'api_externa_url': API_EXTERNA_BASE_URL,
+            'circuit_breaker': upstream_circuito.stats(),
+            'codificacao_endpoints': codificacao_endpoints.stats(),
+            'escalonador': upstream_escalonador.stats(),
+            'hedge': upstream_hedge.stats(),
+            'pool_conexoes': estatisticas_pool(),
+            'retentativas': upstream_retentativas.stats(),
+            'sessoes': sessoes.stats(),
+            'timeouts_adaptativos': upstream_timeouts.stats(),
             'timestamp': datetime.now().isoformat(),
         })
     except Exception as exc:
         return jsonify({'status': 'error', 'message': str(exc)}), 500
 
 
+@system_bp.route('/api/metrics', methods=['GET'])
+def exportar_metricas():
+    """Histogramas de latência no formato texto do Prometheus ou em JSON (?formato=json)."""
+    if request.args.get('formato') == 'json' or (
+        request.accept_mimetypes.best_match(['text/plain', 'application/json']) == 'application/json'
+    ):
+        return jsonify({'status': 'success', 'ativo': metricas.ativo, 'metricas': metricas.exportar_json()})
+    return Response(metricas.exportar_prometheus(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+@system_bp.route('/api/proxy/codificacoes', methods=['GET', 'DELETE'])
+def codificacoes_endpoints():
+    """Codificação do corpo (JSON ou form) aprendida por endpoint; DELETE esquece (?chave=... ou todas)."""
+    if request.method == 'DELETE':
+        chaves = request.args.getlist('chave')
+        codificacao_endpoints.esquecer(chaves or None)
+        logger.info("[CODIFICACAO] Tabela esquecida: %s", ', '.join(chaves) if chaves else 'todas')
+    return jsonify({
+        'status': 'success',
+        'codificacoes': codificacao_endpoints.tabela(),
+        'estatisticas': codificacao_endpoints.stats(),
+    })
+
+
+@system_bp.route('/api/proxy/timeouts', methods=['GET', 'DELETE'])
+def timeouts_endpoints():
+    """Latência observada e timeout de leitura em vigor por endpoint; DELETE esquece (?endpoint=... ou todos)."""
+    if request.method == 'DELETE':
+        endpoints = request.args.getlist('endpoint')
+        for endpoint in endpoints or [None]:
+            upstream_timeouts.esquecer(endpoint)
+        logger.info("[TIMEOUT] Latências esquecidas: %s", ', '.join(endpoints) if endpoints else 'todas')
+    return jsonify({
+        'status': 'success',
+        'ativo': upstream_timeouts.ativo,
+        'timeouts': upstream_timeouts.tabela(),
+        'configuracao': {
+            'quantil': upstream_timeouts.quantil,
+            'fator': upstream_timeouts.fator,
+            'piso_s': upstream_timeouts.piso,
+            'teto_s': upstream_timeouts.teto,
+            'meia_vida': upstream_timeouts.meia_vida,
+            'isentos': sorted(upstream_timeouts.isentos),
+        },
+    })
+
+
 @system_bp.route('/api/restaurantes/perfil', methods=['GET'])
 def restaurante_perfil():
     """Busca informações do restaurante logado - Proxy para API externa."""
@@ -106,10 +190,7 @@ def restaurante_perfil():
         return jsonify({'status': 'error', 'message': 'Não foi possível obter informações do restaurante'}), status_code
 
     except Exception as exc:
-        print(f"[ERRO] Erro ao buscar perfil: {exc}")
-        import traceback
-
-        print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+        logger.error("[ERRO] Erro ao buscar perfil: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': str(exc)}), 500
 
 
@@ -117,16 +198,13 @@ def restaurante_perfil():
 def get_restaurante_detalhes(restaurante_id):
     """Busca detalhes completos de um restaurante (incluindo avaliações) - Proxy."""
     try:
-        print(f"[PROXY] Buscando detalhes completos (com avaliações) para ID: {restaurante_id}")
+        logger.info("[PROXY] Buscando detalhes completos (com avaliações) para ID: %s", restaurante_id)
 
         status_code, response_data = proxy_request('GET', f'restaurantes/{restaurante_id}')
 
         return jsonify(response_data), status_code
     except Exception as exc:
-        print(f"[ERRO] Erro ao buscar detalhes do restaurante: {exc}")
-        import traceback
-
-        print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+        logger.error("[ERRO] Erro ao buscar detalhes do restaurante: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': str(exc)}), 500
 
 
@@ -139,7 +217,7 @@ def update_restaurante(restaurante_id):
         if not data:
             return jsonify({'status': 'error', 'message': 'Dados não fornecidos'}), 400
         
-        print(f"[PROXY] Atualizando restaurante ID: {restaurante_id}")
+        logger.info("[PROXY] Atualizando restaurante ID: %s", restaurante_id)
         
         # Remover campos que não podem ser alterados
         data.pop('cnpj', None)
@@ -151,10 +229,7 @@ def update_restaurante(restaurante_id):
         
         return jsonify(response_data), status_code
     except Exception as exc:
-        print(f"[ERRO] Erro ao atualizar restaurante: {exc}")
-        import traceback
-        
-        print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+        logger.error("[ERRO] Erro ao atualizar restaurante: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': str(exc)}), 500
 
 
@@ -167,7 +242,10 @@ def restaurante_login():
         if not data or not data.get('email') or not data.get('senha'):
             return jsonify({'status': 'error', 'message': 'Email e senha são obrigatórios'}), 400
 
-        status_code, response_data = proxy_request('POST', 'restaurantes/login', data=data)
+        # Login numa sessão própria: logins simultâneos de restaurantes diferentes não se misturam.
+        sessao_login = sessoes.nova()
+        with usar_sessao(sessao_login):
+            status_code, response_data = proxy_request('POST', 'restaurantes/login', data=data)
 
         if status_code == 502 and isinstance(response_data, dict) and response_data.get('diagnostico', {}).get('tipo_erro') == 'url_parse_error':
             return jsonify({
@@ -177,7 +255,9 @@ def restaurante_login():
             }), 502
 
         if status_code == 504:
-            error_msg = f'Servidor não respondeu em {API_TIMEOUT} segundos. Verifique se o servidor está rodando em {API_EXTERNA_HOST}:{API_EXTERNA_PORT}'
+            error_msg = f'Servidor não respondeu em {API_READ_TIMEOUT:g} segundos. Verifique se o servidor está rodando em {API_EXTERNA_HOST}:{API_EXTERNA_PORT}'
+            if isinstance(response_data, dict) and response_data.get('diagnostico', {}).get('tipo_erro') == 'deadline_excedido':
+                error_msg = response_data['message']
             return jsonify({'status': 'error', 'message': error_msg}), 504
 
         if status_code == 503:
@@ -201,37 +281,41 @@ def restaurante_login():
 
             restaurante_id = response_data.get('data', {}).get('restaurante_id')
 
-            if len(api_session.cookies) > 0:
-                cookie_names = list(api_session.cookies.keys())
-                print(f"[LOGIN] Cookie(s) na sessao: {', '.join(cookie_names)}")
+            if len(sessao_login.cookies) > 0:
+                cookie_names = list(sessao_login.cookies.keys())
+                logger.info("[LOGIN] Cookie(s) na sessao: %s", ', '.join(cookie_names))
+
+                # A sessão padrão segue com o último login (requisições sem restaurante identificado).
+                for cookie in sessao_login.cookies:
+                    substituir_cookie(api_session.cookies, cookie.name, cookie.value)
 
                 if restaurante_id:
-                    jsessionid = api_session.cookies.get('JSESSIONID')
+                    chave = normalizar_restaurante(restaurante_id)
+                    if chave is not None:
+                        sessoes.adotar(chave, sessao_login)
+                    jsessionid = sessao_login.cookies.get('JSESSIONID')
                     if jsessionid:
                         cookie_string = f"JSESSIONID={jsessionid}"
                         set_session_cookie(cookie_string, restaurante_id)
-                        print(f"[LOGIN] Login bem-sucedido - Cookie JSESSIONID associado ao restaurante_id {restaurante_id}")
+                        logger.info("[LOGIN] Login bem-sucedido - Cookie JSESSIONID associado ao restaurante_id %s", restaurante_id)
                     else:
                         for cookie_name in cookie_names:
-                            cookie_val = api_session.cookies.get(cookie_name)
+                            cookie_val = sessao_login.cookies.get(cookie_name)
                             if cookie_val:
                                 cookie_string = f"{cookie_name}={cookie_val}"
                                 set_session_cookie(cookie_string, restaurante_id)
-                                print(f"[LOGIN] Login bem-sucedido - Cookie {cookie_name} associado ao restaurante_id {restaurante_id}")
+                                logger.info("[LOGIN] Login bem-sucedido - Cookie %s associado ao restaurante_id %s", cookie_name, restaurante_id)
                                 break
                 else:
-                    print("[AVISO] Login bem-sucedido mas restaurante_id nao encontrado na resposta")
-                    print("[AVISO] Cookie salvo mas sem associacao ao restaurante_id")
+                    logger.warning("[AVISO] Login bem-sucedido mas restaurante_id nao encontrado na resposta")
+                    logger.warning("[AVISO] Cookie salvo mas sem associacao ao restaurante_id")
             else:
-                print("[AVISO] Login bem-sucedido mas nenhum cookie foi recebido da API externa")
+                logger.warning("[AVISO] Login bem-sucedido mas nenhum cookie foi recebido da API externa")
 
         return jsonify(response_data), status_code
 
     except Exception as exc:
-        print(f"[ERRO] Erro no login: {exc}")
-        import traceback
-
-        print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+        logger.error("[ERRO] Erro no login: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': str(exc)}), 500
 
 
@@ -276,7 +360,7 @@ def upload_restaurante_imagem(tipo):
                 'message': f'Arquivo muito grande. Tamanho máximo: {max_size / (1024*1024):.1f}MB'
             }), 400
         
-        print(f"[UPLOAD] Fazendo proxy de upload para API Java: {arquivo.filename} ({tamanho} bytes) - Tipo: {tipo}")
+        logger.info("[UPLOAD] Fazendo proxy de upload para API Java: %s (%s bytes) - Tipo: %s", arquivo.filename, tamanho, tipo)
         
         # Fazer proxy para a API Java
         url_api = f"{API_EXTERNA_BASE_URL}restaurantes/upload/{tipo}"
@@ -294,30 +378,26 @@ def upload_restaurante_imagem(tipo):
             'Origin': 'http://localhost:5000',
         }
         
-        # Adicionar cookies da sessão
-        if len(api_session.cookies) > 0:
-            cookie_header = '; '.join([f"{name}={value}" for name, value in api_session.cookies.items()])
-            headers['Cookie'] = cookie_header
+        # Cookies enviados pela própria sessão (a do restaurante, se ele tiver uma)
+        if restaurante_ambiguo():
+            status_code, response_data = resposta_restaurante_ambiguo('POST', url_api)
+            return jsonify(response_data), status_code
+        sessao = sessao_da_requisicao()
         
         # Preparar arquivo para multipart/form-data
         files = {'file': (arquivo.filename, arquivo_content, arquivo.content_type)}
         
         # Fazer requisição para API Java
-        response = api_session.post(
-            url_api,
-            files=files,
-            headers=headers,
-            timeout=API_TIMEOUT
-        )
+        response = _enviar_imagem(sessao, url_api, files, headers)
         
-        print(f"[UPLOAD] Resposta da API Java: Status {response.status_code}")
+        logger.info("[UPLOAD] Resposta da API Java: Status %s", response.status_code)
         
         if response.status_code == 200:
             try:
                 response_data = response.json()
                 url_imagem = response_data.get('url', '')
                 
-                print(f"[UPLOAD] Upload bem-sucedido. URL: {url_imagem}")
+                logger.info("[UPLOAD] Upload bem-sucedido. URL: %s", url_imagem)
                 
                 return jsonify({
                     'status': 'success',
@@ -325,7 +405,7 @@ def upload_restaurante_imagem(tipo):
                     'url': url_imagem
                 }), 200
             except Exception as e:
-                print(f"[UPLOAD] Erro ao parsear resposta JSON: {e}")
+                logger.warning("[UPLOAD] Erro ao parsear resposta JSON: %s", e)
                 return jsonify({
                     'status': 'error',
                     'message': 'Erro ao processar resposta do servidor'
@@ -338,16 +418,17 @@ def upload_restaurante_imagem(tipo):
             except Exception:
                 error_msg = response.text[:200] if response.text else error_msg
             
-            print(f"[UPLOAD] Erro: {error_msg}")
+            logger.warning("[UPLOAD] Erro: %s", error_msg)
             return jsonify({
                 'status': 'error',
                 'message': error_msg
             }), response.status_code
         
+    except (DeadlineExcedido, TimeoutError, requests.exceptions.Timeout) as exc:
+        logger.warning("[UPLOAD] Tempo esgotado no upload: %s", exc)
+        return jsonify({'status': 'error', 'message': 'Tempo esgotado ao enviar a imagem para o servidor'}), 504
     except Exception as exc:
-        print(f"[ERRO] Erro ao fazer upload: {exc}")
-        import traceback
-        print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+        logger.error("[ERRO] Erro ao fazer upload: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': f'Erro ao fazer upload: {str(exc)}'}), 500
 
 
@@ -383,7 +464,7 @@ def upload_imagem():
                 'message': f'Arquivo muito grande. Tamanho máximo: {MAX_FILE_SIZE / (1024*1024):.1f}MB'
             }), 400
         
-        print(f"[UPLOAD] Fazendo proxy de upload para API Java: {arquivo.filename} ({tamanho} bytes)")
+        logger.info("[UPLOAD] Fazendo proxy de upload para API Java: %s (%s bytes)", arquivo.filename, tamanho)
         
         # Fazer proxy para a API Java
         url_api = f"{API_EXTERNA_BASE_URL}itens/upload"
@@ -401,31 +482,27 @@ def upload_imagem():
             'Origin': 'http://localhost:5000',
         }
         
-        # Adicionar cookies da sessão
-        if len(api_session.cookies) > 0:
-            cookie_header = '; '.join([f"{name}={value}" for name, value in api_session.cookies.items()])
-            headers['Cookie'] = cookie_header
+        # Cookies enviados pela própria sessão (a do restaurante, se ele tiver uma)
+        if restaurante_ambiguo():
+            status_code, response_data = resposta_restaurante_ambiguo('POST', url_api)
+            return jsonify(response_data), status_code
+        sessao = sessao_da_requisicao()
         
         # Preparar arquivo para multipart/form-data
         # API Java espera 'file' como nome do campo
         files = {'file': (arquivo.filename, arquivo_content, arquivo.content_type)}
         
         # Fazer requisição para API Java
-        response = api_session.post(
-            url_api,
-            files=files,
-            headers=headers,
-            timeout=API_TIMEOUT
-        )
+        response = _enviar_imagem(sessao, url_api, files, headers)
         
-        print(f"[UPLOAD] Resposta da API Java: Status {response.status_code}")
+        logger.info("[UPLOAD] Resposta da API Java: Status %s", response.status_code)
         
         if response.status_code == 200:
             try:
                 response_data = response.json()
                 url_imagem = response_data.get('url', '')
                 
-                print(f"[UPLOAD] Upload bem-sucedido. URL: {url_imagem}")
+                logger.info("[UPLOAD] Upload bem-sucedido. URL: %s", url_imagem)
                 
                 return jsonify({
                     'status': 'success',
@@ -433,7 +510,7 @@ def upload_imagem():
                     'url': url_imagem
                 }), 200
             except Exception as e:
-                print(f"[UPLOAD] Erro ao parsear resposta JSON: {e}")
+                logger.warning("[UPLOAD] Erro ao parsear resposta JSON: %s", e)
                 return jsonify({
                     'status': 'error',
                     'message': 'Erro ao processar resposta do servidor'
@@ -446,15 +523,16 @@ def upload_imagem():
             except Exception:
                 error_msg = response.text[:200] if response.text else error_msg
             
-            print(f"[UPLOAD] Erro: {error_msg}")
+            logger.warning("[UPLOAD] Erro: %s", error_msg)
             return jsonify({
                 'status': 'error',
                 'message': error_msg
             }), response.status_code
         
+    except (DeadlineExcedido, TimeoutError, requests.exceptions.Timeout) as exc:
+        logger.warning("[UPLOAD] Tempo esgotado no upload: %s", exc)
+        return jsonify({'status': 'error', 'message': 'Tempo esgotado ao enviar a imagem para o servidor'}), 504
     except Exception as exc:
-        print(f"[ERRO] Erro ao fazer upload: {exc}")
-        import traceback
-        print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+        logger.error("[ERRO] Erro ao fazer upload: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': f'Erro ao fazer upload: {str(exc)}'}), 500
 
@@ -0,0 +1,164 @@
+import threading
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import requests
+from urllib3 import Timeout
+from urllib3.connectionpool import HTTPConnectionPool
+
+from .. import proxy
+from ..config import (
+    API_CONNECT_TIMEOUT,
+    API_EXTERNA_BASE_URL,
+    API_KEEPALIVE_INTERVALO,
+    API_READ_TIMEOUT,
+    API_WARMUP_CONEXOES,
+)
+from ..utils.logs import obter_logger
+
+logger = obter_logger('services.conexoes')
+
+_estado_lock = threading.Lock()
+_pings = 0
+_keepalive: Optional[threading.Thread] = None
+_parar_keepalive = threading.Event()
+
+
+def _pools(sessao: requests.Session) -> Iterator[Any]:
+    """Pools do urllib3 abertos pelos adaptadores da sessão (um por host/porta/esquema)."""
+    vistos = set()
+    for adaptador in sessao.adapters.values():
+        if id(adaptador) in vistos:
+            continue
+        vistos.add(id(adaptador))
+        gerenciadores = [getattr(adaptador, 'poolmanager', None), *getattr(adaptador, 'proxy_manager', {}).values()]
+        for gerenciador in gerenciadores:
+            if gerenciador is None:
+                continue
+            for chave in gerenciador.pools.keys():
+                pool = gerenciador.pools.get(chave)
+                if pool is not None:
+                    yield pool
+
+
+def estatisticas_pool(sessao: Optional[requests.Session] = None) -> Dict[str, Any]:
+    """
+    Conexões criadas x reaproveitadas na sessão com a API externa. `requisicoes` inclui os pings
+    de aquecimento; `taxa_reuso` é a fração das requisições atendidas por uma conexão já aberta.
+    """
+    sessao = sessao if sessao is not None else proxy.api_session
+    criadas = requisicoes = ociosas = pools = 0
+    if isinstance(sessao, requests.Session):
+        for pool in _pools(sessao):
+            pools += 1
+            criadas += getattr(pool, 'num_connections', 0)
+            requisicoes += getattr(pool, 'num_requests', 0)
+            fila = getattr(pool, 'pool', None)
+            ociosas += sum(1 for conexao in list(getattr(fila, 'queue', [])) if conexao is not None)
+    reusadas = max(0, requisicoes - criadas)
+    return {
+        'pools': pools,
+        'conexoes_criadas': criadas,
+        'conexoes_reusadas': reusadas,
+        'conexoes_ociosas': ociosas,
+        'requisicoes': requisicoes,
+        'taxa_reuso': round(reusadas / requisicoes, 4) if requisicoes else 0.0,
+        'pings_aquecimento': _pings,
+    }
+
+
+def _pool_da_api(sessao: requests.Session, url: str) -> Tuple[HTTPConnectionPool, str]:
+    """O mesmo pool que `sessao.request` usaria para `url` (mesma chave: TLS, verify e proxies) e o caminho a pedir nele."""
+    adaptador = sessao.get_adapter(url)
+    ambiente = sessao.merge_environment_settings(url, {}, None, None, None)
+    requisicao = requests.Request('HEAD', url).prepare()
+    if hasattr(adaptador, 'get_connection_with_tls_context'):
+        pool = adaptador.get_connection_with_tls_context(
+            requisicao, ambiente['verify'], ambiente['proxies'], ambiente['cert']
+        )
+    else:  # requests < 2.32.2
+        pool = adaptador.get_connection(url, ambiente['proxies'])
+    return pool, adaptador.request_url(requisicao, ambiente['proxies'])
+
+
+def aquecer_conexoes(
+    quantidade: int = API_WARMUP_CONEXOES,
+    sessao: Optional[requests.Session] = None,
+    url: str = API_EXTERNA_BASE_URL,
+) -> int:
+    """
+    Abre (ou renova) `quantidade` conexões keep-alive com a API externa, em paralelo, e as devolve
+    ao pool da sessão. Usa HEAD direto no pool do urllib3 para não mexer nos cookies da sessão.
+    Retorna quantos pings tiveram resposta.
+    """
+    global _pings
+    sessao = sessao if sessao is not None else proxy.api_session
+    if quantidade <= 0 or not isinstance(sessao, requests.Session):
+        return 0
+
+    pool, caminho = _pool_da_api(sessao, url)
+    largada = threading.Barrier(quantidade)
+    respondidas = []
+
+    def ping() -> None:
+        try:
+            largada.wait(API_CONNECT_TIMEOUT)
+        except threading.BrokenBarrierError:
+            pass
+        try:
+            pool.urlopen(
+                'HEAD', caminho, retries=False, redirect=False, preload_content=True, release_conn=True,
+                timeout=Timeout(connect=API_CONNECT_TIMEOUT, read=API_READ_TIMEOUT),
+                headers={'User-Agent': 'SGR-Desktop-Flask-Proxy/1.0', 'Connection': 'keep-alive'},
+            )
+            respondidas.append(1)
+        except Exception as exc:
+            logger.debug("[POOL] Ping de aquecimento falhou: %s", exc)
+
+    threads = [threading.Thread(target=ping, daemon=True) for _ in range(quantidade)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with _estado_lock:
+        _pings += quantidade
+    return len(respondidas)
+
+
+def _laco_keepalive(intervalo: float, quantidade: int) -> None:
+    while not _parar_keepalive.wait(intervalo):
+        aquecer_conexoes(quantidade)
+
+
+def iniciar_aquecimento(
+    quantidade: int = API_WARMUP_CONEXOES,
+    intervalo: float = API_KEEPALIVE_INTERVALO,
+) -> Optional[threading.Thread]:
+    """
+    Aquece o pool em segundo plano (a inicialização não espera) e, com `intervalo` > 0, repete
+    o ping periodicamente para que o servidor não feche as conexões ociosas.
+    """
+    global _keepalive
+    if quantidade <= 0:
+        return None
+
+    def executar() -> None:
+        abertas = aquecer_conexoes(quantidade)
+        logger.info("[POOL] Aquecimento: %s de %s conexão(ões) com a API externa prontas", abertas, quantidade)
+        if intervalo > 0:
+            _laco_keepalive(intervalo, quantidade)
+
+    with _estado_lock:
+        if _keepalive is not None and _keepalive.is_alive():
+            return _keepalive
+        _parar_keepalive.clear()
+        _keepalive = threading.Thread(target=executar, name='sgr-keepalive', daemon=True)
+        _keepalive.start()
+        return _keepalive
+
+
+def parar_aquecimento() -> None:
+    _parar_keepalive.set()
+
+
+__all__ = ['aquecer_conexoes', 'estatisticas_pool', 'iniciar_aquecimento', 'parar_aquecimento']
@@ -7,7 +7,8 @@ from ..config import (
     API_EXTERNA_HOST,
     API_EXTERNA_PORT,
     API_EXTERNA_PROTOCOL,
-    API_TIMEOUT,
+    API_CONNECT_TIMEOUT,
+    API_READ_TIMEOUT,
 )
 
 
@@ -22,7 +23,7 @@ def verificar_conectividade_api() -> bool:
     print(f"[PROTOCOLO] {API_EXTERNA_PROTOCOL.upper()}")
     print(f"[HOST/IP] {API_EXTERNA_HOST}")
     print(f"[PORTA] {API_EXTERNA_PORT}")
-    print(f"[TIMEOUT] {API_TIMEOUT}s")
+    print(f"[TIMEOUT] conexão {API_CONNECT_TIMEOUT:g}s / leitura {API_READ_TIMEOUT:g}s")
     print(f"{'='*70}\n")
 
     print("[TESTE] Conectividade basica (raiz)...")
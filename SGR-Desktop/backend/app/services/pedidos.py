@@ -0,0 +1,208 @@
+import threading
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..models.pedido import Pedido, normalizar_pedidos
+from ..utils.metricas import medir_fase
+from .pedidos_cache import buscar_pedidos_snapshot
+
+STATUS_CONCLUIDO_FILTRO = ['FINALIZADO', 'CONCLUIDO', 'CONCLUÍDO']
+
+_normalizados: Dict[Any, Tuple[Any, List[Pedido]]] = {}
+_normalizados_lock = threading.Lock()
+
+
+def extrair_lista_pedidos(response_data: Any) -> List[Any]:
+    """Extrai a lista de pedidos da resposta da API externa (lista direta ou envelope `data`/`pedidos`)."""
+    if isinstance(response_data, list):
+        return response_data
+    if isinstance(response_data, dict):
+        pedidos = response_data.get('data', []) or response_data.get('pedidos', [])
+        if isinstance(pedidos, list):
+            return pedidos
+    return []
+
+
+def normalizar_pedido(pedido: Dict[str, Any], restaurante_id: int) -> Dict[str, Any]:
+    """
+    Garante os campos esperados pelo frontend (`restaurante_id`, `criadoEm`/`criado_em`, `itens`).
+    O dicionário original vem do snapshot compartilhado, então é copiado antes de ser alterado.
+    """
+    completo = (
+        'restaurante_id' in pedido
+        and 'itens' in pedido
+        and (('criadoEm' in pedido) == ('criado_em' in pedido))
+    )
+    if completo:
+        return pedido
+
+    pedido = dict(pedido)
+    if 'restaurante_id' not in pedido:
+        pedido['restaurante_id'] = restaurante_id
+
+    if 'criadoEm' not in pedido and 'criado_em' in pedido:
+        pedido['criadoEm'] = pedido['criado_em']
+    elif 'criado_em' not in pedido and 'criadoEm' in pedido:
+        pedido['criado_em'] = pedido['criadoEm']
+
+    if 'itens' not in pedido:
+        pedido['itens'] = []
+    return pedido
+
+
+def parse_data_filtro(valor: Optional[str]) -> Optional[date]:
+    """Data de um filtro `data_inicio`/`data_fim` (`AAAA-MM-DD`, hora ignorada); None se ausente ou inválida."""
+    if not valor:
+        return None
+    try:
+        return date.fromisoformat(valor[:10])
+    except ValueError:
+        return None
+
+
+def carregar_pedidos(restaurante_id: Optional[int] = None) -> Tuple[int, List[Pedido]]:
+    """
+    Retorna o snapshot de pedidos já normalizado em `Pedido`s.
+    A normalização é feita uma vez por snapshot e reaproveitada enquanto o cache o mantiver;
+    num snapshot novo, pedidos idênticos aos do anterior reaproveitam o mesmo objeto `Pedido`.
+    """
+    status_code, response_data = buscar_pedidos_snapshot(restaurante_id)
+    if status_code != 200:
+        return status_code, []
+
+    chave = restaurante_id or 'latest'
+    with _normalizados_lock:
+        memo = _normalizados.get(chave)
+    if memo and memo[0] is response_data:
+        return status_code, memo[1]
+
+    with medir_fase('normalizacao'):
+        brutos = extrair_lista_pedidos(response_data)
+        if memo:
+            anteriores = {pedido.id: pedido for pedido in memo[1]}
+            pedidos = []
+            for bruto in brutos:
+                if not isinstance(bruto, dict):
+                    continue
+                anterior = anteriores.get(bruto.get('id'))
+                pedidos.append(anterior if anterior is not None and anterior.bruto == bruto else Pedido(bruto))
+        else:
+            pedidos = normalizar_pedidos(brutos)
+
+    with _normalizados_lock:
+        _normalizados[chave] = (response_data, pedidos)
+    return status_code, pedidos
+
+
+def filtrar_pedidos(
+    pedidos: Iterable[Pedido],
+    restaurante_id: int,
+    status: Optional[str] = None,
+    data_inicio: Optional[str] = None,
+    data_fim: Optional[str] = None,
+    apenas_concluidos: bool = False,
+    exigir_restaurante: bool = False,
+) -> List[Pedido]:
+    """
+    Filtra pedidos por restaurante, status e intervalo de datas (YYYY-MM-DD, inclusivo)
+    e ordena do mais recente para o mais antigo.
+
+    `exigir_restaurante=False` mantém pedidos sem restaurante identificado, já que a API
+    externa devolve apenas os pedidos do restaurante da sessão.
+    """
+    restaurante_id_int = int(restaurante_id)
+    status_upper = status.upper() if status else None
+    status_concluido = status_upper in STATUS_CONCLUIDO_FILTRO
+    inicio = parse_data_filtro(data_inicio)
+    fim = parse_data_filtro(data_fim)
+    filtrados: List[Pedido] = []
+
+    for pedido in pedidos:
+        if pedido.restaurante_id:
+            if pedido.restaurante_id != restaurante_id_int:
+                continue
+        elif exigir_restaurante:
+            continue
+
+        if apenas_concluidos and not pedido.concluido:
+            continue
+
+        if status_upper:
+            if status_concluido:
+                if pedido.status not in STATUS_CONCLUIDO_FILTRO:
+                    continue
+            elif pedido.status != status_upper:
+                continue
+
+        if pedido.data and (inicio or fim):
+            if inicio and pedido.data < inicio:
+                continue
+            if fim and pedido.data > fim:
+                continue
+
+        filtrados.append(pedido)
+
+    filtrados.sort(key=lambda pedido: pedido.criado_em, reverse=True)
+    return filtrados
+
+
+def serializar_pedidos(pedidos: Iterable[Pedido], restaurante_id: int) -> List[Dict[str, Any]]:
+    """Converte `Pedido`s de volta para o formato de dicionário entregue ao frontend."""
+    with medir_fase('normalizacao'):
+        return [normalizar_pedido(pedido.bruto, restaurante_id) for pedido in pedidos]
+
+
+def buscar_pedidos_restaurante(
+    restaurante_id: int,
+    status: Optional[str] = None,
+    data_inicio: Optional[str] = None,
+    data_fim: Optional[str] = None,
+) -> Tuple[int, List[Dict[str, Any]], int]:
+    """
+    Busca, normaliza e filtra os pedidos de um restaurante no formato do frontend.
+    Retorna `(status_code, pedidos, total_recebido)`; em caso de erro a lista vem vazia.
+    """
+    status_code, pedidos_todos = carregar_pedidos(restaurante_id)
+    if status_code != 200:
+        return status_code, [], 0
+
+    pedidos = filtrar_pedidos(pedidos_todos, restaurante_id, status, data_inicio, data_fim)
+    return status_code, serializar_pedidos(pedidos, restaurante_id), len(pedidos_todos)
+
+
+def listar_pedidos_concluidos(restaurante_id: int) -> Tuple[int, List[Pedido], int]:
+    """
+    Retorna os `Pedido`s concluídos/finalizados do restaurante, do mais recente para o mais antigo.
+    Retorna `(status_code, pedidos, total_recebido)`; em caso de erro a lista vem vazia.
+    """
+    status_code, pedidos_todos = carregar_pedidos(restaurante_id)
+    if status_code != 200:
+        return status_code, [], 0
+
+    pedidos = filtrar_pedidos(pedidos_todos, restaurante_id, apenas_concluidos=True, exigir_restaurante=True)
+    return status_code, pedidos, len(pedidos_todos)
+
+
+def buscar_pedido_por_id(pedido_id: int) -> Tuple[int, Optional[Pedido]]:
+    """Localiza um pedido no snapshot (a API Java não expõe GET /pedidos/{id})."""
+    status_code, pedidos = carregar_pedidos()
+    if status_code != 200:
+        return status_code, None
+
+    for pedido in pedidos:
+        if pedido.id == pedido_id:
+            return status_code, pedido
+    return status_code, None
+
+
+__all__ = [
+    'extrair_lista_pedidos',
+    'normalizar_pedido',
+    'parse_data_filtro',
+    'carregar_pedidos',
+    'filtrar_pedidos',
+    'serializar_pedidos',
+    'buscar_pedidos_restaurante',
+    'listar_pedidos_concluidos',
+    'buscar_pedido_por_id',
+]
@@ -0,0 +1,477 @@
+import hashlib
+import json
+import threading
+import time
+from bisect import bisect_right
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+from ..models.pedido import Pedido
+from ..utils.logs import obter_logger
+from ..utils.metricas import registrar_cache
+from .pedidos import carregar_pedidos
+from .pedidos_rollups import RollupsDiarios, codificar, rollups
+
+logger = obter_logger('services.pedidos_agregados')
+
+# (chave_produto, nome, quantidade, valor, preco_unitario) de cada item
+ItemContribuicao = Tuple[Any, str, int, float, float]
+# (data, valor_total, quantidade_itens, itens)
+Contribuicao = Tuple[Optional[date], float, int, Tuple[ItemContribuicao, ...]]
+
+
+def _contribuicao(pedido: Pedido) -> Contribuicao:
+    itens = []
+    for item in pedido.itens:
+        nome = item.nome or f"Item #{item.produto_id}"
+        quantidade = item.quantidade or 1
+        itens.append((item.produto_id or nome, nome, quantidade, quantidade * item.preco_unitario, item.preco_unitario))
+    return pedido.data, pedido.valor_total, pedido.quantidade_itens, tuple(itens)
+
+
+def _canonico(valor: Any) -> bytes:
+    """JSON compacto com chaves ordenadas e datas ISO; o fallback sem orjson gera os mesmos bytes."""
+    if orjson is not None:
+        return orjson.dumps(valor, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(
+        valor, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=date.isoformat
+    ).encode()
+
+
+def _assinatura(pedido: Pedido, contribuicao: Optional[Contribuicao]) -> bytes:
+    """
+    Digest do que o pedido soma nos agregados (status + contribuição), guardado no lugar da
+    contribuição. Estável entre processos (blake2b, sem o sal de `hash()`), então pode ser persistido.
+    """
+    return hashlib.blake2b(_canonico((pedido.status, contribuicao)), digest_size=16).digest()
+
+
+def _codificar_chave(chave: Any) -> str:
+    return codificar(list(chave) if isinstance(chave, tuple) else chave)
+
+
+def _decodificar_chave(texto: str) -> Any:
+    chave = json.loads(texto)
+    return tuple(chave) if isinstance(chave, list) else chave
+
+
+def _codificar_contribuicao(contribuicao: Optional[Contribuicao]) -> Optional[str]:
+    if contribuicao is None:
+        return None
+    data, valor, quantidade, itens = contribuicao
+    return codificar([data.isoformat() if data else None, valor, quantidade, [list(item) for item in itens]])
+
+
+def _decodificar_contribuicao(texto: Optional[str]) -> Optional[Contribuicao]:
+    if texto is None:
+        return None
+    data, valor, quantidade, itens = json.loads(texto)
+    return date.fromisoformat(data) if data else None, valor, quantidade, tuple(tuple(item) for item in itens)
+
+
+class _ProdutoDia:
+    __slots__ = ('quantidade', 'valor_total', 'pedidos', 'precos')
+
+    def __init__(self) -> None:
+        self.quantidade = 0
+        self.valor_total = 0.0
+        self.pedidos = 0
+        self.precos: Dict[float, int] = {}
+
+
+class AgregadosRestaurante:
+    """
+    Somas acumuladas dos pedidos concluídos de um restaurante, por dia e por produto/dia.
+
+    `atualizar` compara o snapshot novo com o anterior e aplica apenas os pedidos novos ou
+    alterados: um pedido que é o mesmo objeto do snapshot anterior é pulado direto, e os demais
+    são comparados pelo digest de status + contribuição guardado por id; pedidos que saem do conjunto concluído (ou do snapshot)
+    têm a contribuição revertida. O custo de um refresh cresce com o número de pedidos alterados,
+    não com o tamanho do histórico.
+
+    Com `rollups`, as linhas de dia, de produto/dia e de pedido alteradas são gravadas em disco a
+    cada atualização, e os agregados partem do que estiver gravado (`restaurado`): somas, dias e
+    produtos vêm do disco, e o primeiro snapshot aplica direto os pedidos criados depois da marca
+    d'água e, dos demais, só os que divergem do digest gravado. A contribuição de um pedido gravado
+    é lida do disco apenas quando ele precisa ser revertido.
+    """
+
+    def __init__(self, restaurante_id: int, rollups: Optional[RollupsDiarios] = None) -> None:
+        self.restaurante_id = int(restaurante_id)
+        self.total_vendas = 0.0
+        self.produtos_vendidos = 0
+        self.total_pedidos = 0
+        self.aplicados = 0
+        self.revertidos = 0
+        self._por_dia: Dict[date, List[Any]] = {}
+        self._produtos_por_dia: Dict[date, Dict[Any, _ProdutoDia]] = {}
+        self._nomes: Dict[Any, str] = {}
+        self._vistos: Dict[Any, Tuple[Optional[Pedido], bytes]] = {}
+        self._contribuicoes: Dict[Any, Contribuicao] = {}
+        self._snapshot: Any = None
+        self._lock = threading.Lock()
+        self._rollups = rollups
+        self._dias_alterados: Set[date] = set()
+        self._produtos_alterados: Set[Tuple[date, Any]] = set()
+        # Pedidos a regravar em disco: (digest, contribuição), ou None para apagar.
+        self._pedidos_alterados: Dict[Any, Optional[Tuple[bytes, Optional[Contribuicao]]]] = {}
+        # Pedidos cuja contribuição está só nos rollups em disco.
+        self._no_disco: Set[Any] = set()
+        # `criadoEm` mais recente entre os pedidos somados (marca d'água dos rollups).
+        self.marca = ''
+        # time.time() da última sincronização (ou da gravação dos rollups restaurados).
+        self.sincronizado_em: Optional[float] = None
+        # Estado carregado dos rollups em disco, ainda não conferido com um snapshot da API.
+        self.restaurado = rollups is not None and self._restaurar()
+
+    def _restaurar(self) -> bool:
+        estado = self._rollups.carregar(self.restaurante_id)
+        if estado is None:
+            return False
+
+        self.total_vendas, self.produtos_vendidos, self.total_pedidos, self.marca, self.sincronizado_em = estado['totais']
+        for dia, receita, itens, pedidos in estado['dias']:
+            self._por_dia[date.fromisoformat(dia)] = [receita, itens, pedidos]
+        for dia, produto_json, nome, receita, itens, pedidos, precos in estado['produtos']:
+            chave = _decodificar_chave(produto_json)
+            produto = _ProdutoDia()
+            produto.quantidade = itens
+            produto.valor_total = receita
+            produto.pedidos = pedidos
+            produto.precos = {preco: contagem for preco, contagem in json.loads(precos)}
+            self._produtos_por_dia.setdefault(date.fromisoformat(dia), {})[chave] = produto
+            self._nomes.setdefault(chave, nome)
+        logger.info(
+            "[ANALYTICS] Agregados do restaurante %s restaurados dos rollups: %s pedido(s) em %s dia(s), marca %s",
+            self.restaurante_id, self.total_pedidos, len(self._por_dia), self.marca or '-',
+        )
+        return True
+
+    @staticmethod
+    def _linha_dia(linha: Optional[List[Any]]) -> Tuple[Any, ...]:
+        return tuple(linha) if linha else (None, 0, 0)
+
+    def _linha_produto(self, chave: Any, produto: Optional[_ProdutoDia]) -> Tuple[Any, ...]:
+        if produto is None:
+            return (None, None, 0, 0, 0.0, '[]')
+        return (
+            self._nomes.get(chave),
+            produto.valor_total,
+            produto.quantidade,
+            produto.pedidos,
+            max(produto.precos, default=0.0),
+            codificar(sorted(produto.precos.items())),
+        )
+
+    def _persistir(self, substituir: bool = False) -> None:
+        totais = (self.total_vendas, self.produtos_vendidos, self.total_pedidos)
+        if substituir:
+            self._rollups.substituir(
+                self.restaurante_id,
+                totais,
+                self.marca,
+                [(dia.isoformat(), *self._linha_dia(linha)) for dia, linha in self._por_dia.items()],
+                [
+                    (dia.isoformat(), _codificar_chave(chave), *self._linha_produto(chave, produto))
+                    for dia, produtos in self._produtos_por_dia.items()
+                    for chave, produto in produtos.items()
+                ],
+                [
+                    (_codificar_chave(chave), assinatura, _codificar_contribuicao(self._contribuicoes.get(chave)))
+                    for chave, (_, assinatura) in self._vistos.items()
+                ],
+            )
+        else:
+            self._rollups.salvar(
+                self.restaurante_id,
+                totais,
+                self.marca,
+                [(dia.isoformat(), *self._linha_dia(self._por_dia.get(dia))) for dia in self._dias_alterados],
+                [
+                    (
+                        dia.isoformat(),
+                        _codificar_chave(chave),
+                        *self._linha_produto(chave, self._produtos_por_dia.get(dia, {}).get(chave)),
+                    )
+                    for dia, chave in self._produtos_alterados
+                ],
+                [
+                    (_codificar_chave(chave), *(
+                        (gravado[0], _codificar_contribuicao(gravado[1])) if gravado else (None, None)
+                    ))
+                    for chave, gravado in self._pedidos_alterados.items()
+                ],
+            )
+        self._dias_alterados.clear()
+        self._produtos_alterados.clear()
+        self._pedidos_alterados.clear()
+
+    def _somar(self, contribuicao: Contribuicao, sinal: int) -> None:
+        data, valor, quantidade, itens = contribuicao
+        self.total_vendas += sinal * valor
+        self.produtos_vendidos += sinal * quantidade
+        self.total_pedidos += sinal
+        if self.total_pedidos == 0:
+            self.total_vendas = 0.0
+
+        if data is None:
+            return
+
+        if self._rollups is not None:
+            self._dias_alterados.add(data)
+        dia = self._por_dia.setdefault(data, [0.0, 0, 0])
+        dia[0] += sinal * valor
+        dia[1] += sinal * quantidade
+        dia[2] += sinal
+        if dia[2] == 0:
+            del self._por_dia[data]
+
+        produtos = self._produtos_por_dia.setdefault(data, {})
+        contados = set()
+        for chave, nome, quantidade_item, valor_item, preco in itens:
+            produto = produtos.get(chave)
+            if produto is None:
+                produto = produtos[chave] = _ProdutoDia()
+                self._nomes.setdefault(chave, nome)
+            if self._rollups is not None:
+                self._produtos_alterados.add((data, chave))
+            if chave not in contados:
+                contados.add(chave)
+                produto.pedidos += sinal
+            produto.quantidade += sinal * quantidade_item
+            produto.valor_total += sinal * valor_item
+            restante = produto.precos.get(preco, 0) + sinal
+            if restante:
+                produto.precos[preco] = restante
+            else:
+                produto.precos.pop(preco, None)
+            if produto.quantidade == 0:
+                del produtos[chave]
+        if not produtos:
+            del self._produtos_por_dia[data]
+
+    def _reverter(self, contribuicao: Optional[Contribuicao]) -> None:
+        if contribuicao is not None:
+            self._somar(contribuicao, -1)
+            self.revertidos += 1
+
+    def _contribuicao_anterior(self, chave: Any) -> Optional[Contribuicao]:
+        anterior = self._contribuicoes.pop(chave, None)
+        if anterior is None and chave in self._no_disco:
+            self._no_disco.discard(chave)
+            anterior = self._contribuicao_gravada(_codificar_chave(chave))
+        return anterior
+
+    def _contribuicao_gravada(self, codigo: str) -> Optional[Contribuicao]:
+        return _decodificar_contribuicao(self._rollups.contribuicao(self.restaurante_id, codigo))
+
+    def atualizar(self, pedidos: Iterable[Pedido]) -> int:
+        """Aplica as diferenças em relação ao snapshot anterior. Retorna quantos pedidos mudaram."""
+        with self._lock:
+            registrar_cache('agregados', pedidos is self._snapshot)
+            if pedidos is self._snapshot:
+                return 0
+            primeira = self._snapshot is None
+            # Digests gravados, consultados só para pedidos até a marca d'água dos rollups restaurados.
+            gravados = self._rollups.digests(self.restaurante_id) if self.restaurado else {}
+            marca = ''
+
+            alterados = 0
+            presentes = set()
+            for indice, pedido in enumerate(pedidos):
+                if pedido.restaurante_id != self.restaurante_id:
+                    continue
+                chave = pedido.id if pedido.id is not None else ('sem_id', indice)
+                presentes.add(chave)
+                criado_em = str(pedido.criado_em)
+                if criado_em > marca:
+                    marca = criado_em
+
+                visto = self._vistos.get(chave)
+                if visto is None and gravados and criado_em <= self.marca:
+                    digest = gravados.pop(_codificar_chave(chave), None)
+                    if digest is not None:
+                        visto = (None, digest)
+                        self._no_disco.add(chave)
+                if visto is not None and visto[0] is pedido:
+                    continue
+
+                contribuicao = _contribuicao(pedido) if pedido.concluido else None
+                assinatura = _assinatura(pedido, contribuicao)
+                self._vistos[chave] = (pedido, assinatura)
+                if visto is not None and visto[1] == assinatura:
+                    continue
+
+                alterados += 1
+                self._reverter(self._contribuicao_anterior(chave))
+                if contribuicao is not None:
+                    if contribuicao[1] == 0:
+                        logger.debug("[ANALYTICS] Pedido %s tem valor zero", pedido.id)
+                    self._somar(contribuicao, 1)
+                    self._contribuicoes[chave] = contribuicao
+                    self.aplicados += 1
+                if self._rollups is not None:
+                    self._pedidos_alterados[chave] = (assinatura, contribuicao)
+
+            for chave in [chave for chave in self._vistos if chave not in presentes]:
+                del self._vistos[chave]
+                self._reverter(self._contribuicao_anterior(chave))
+                if self._rollups is not None:
+                    self._pedidos_alterados[chave] = None
+                alterados += 1
+
+            # Gravados que sobraram: fora do snapshot (removidos) ou criados depois da marca e já
+            # reaplicados acima; em ambos os casos a contribuição gravada sai das somas.
+            for codigo in gravados:
+                self._reverter(self._contribuicao_gravada(codigo))
+                chave = _decodificar_chave(codigo)
+                if chave not in presentes:
+                    self._pedidos_alterados[chave] = None
+                    alterados += 1
+
+            mudou_marca = marca != self.marca
+            self.marca = marca
+            if self._rollups is not None and (alterados or self._dias_alterados or primeira or mudou_marca):
+                self._persistir(substituir=primeira and not self.restaurado)
+            self._snapshot = pedidos
+            self.restaurado = False
+            self.sincronizado_em = time.time()
+            return alterados
+
+    def reserva(self) -> Optional[float]:
+        """
+        Idade, em segundos, dos agregados que podem ser servidos com a API externa fora do ar, ou
+        None se não houver (sem `rollups`, ou nada sincronizado nem restaurado do disco).
+        """
+        if self._rollups is None:
+            return None
+        with self._lock:
+            if self.sincronizado_em is None:
+                return None
+            return max(0.0, time.time() - self.sincronizado_em)
+
+    def somar_por_intervalos(self, limites: Sequence[date]) -> Tuple[List[float], List[int], List[int]]:
+        """
+        Agrupa as somas diárias nos intervalos `[limites[i], limites[i + 1])`.
+        Retorna `(vendas, produtos, pedidos)` com um valor por intervalo.
+        """
+        quantidade = len(limites) - 1
+        vendas = [0.0] * quantidade
+        produtos = [0] * quantidade
+        pedidos = [0] * quantidade
+        with self._lock:
+            for dia, (valor, itens, total) in self._por_dia.items():
+                indice = bisect_right(limites, dia) - 1
+                if 0 <= indice < quantidade:
+                    vendas[indice] += valor
+                    produtos[indice] += itens
+                    pedidos[indice] += total
+        return vendas, produtos, pedidos
+
+    def top_produtos(self, data_inicio: date, limite: int = 3) -> List[Dict[str, Any]]:
+        """
+        Produtos mais vendidos desde `data_inicio`, por quantidade.
+        Cada entrada traz `chave`, `nome`, `quantidade`, `valor_total` e `preco_unitario` (maior preço visto).
+
+        Os agregados não guardam a ordem dos pedidos no snapshot, então o desempate difere do
+        recálculo completo (ordem de aparição): vence a venda mais recente e, no mesmo dia, o nome.
+        """
+        somas: Dict[Any, Dict[str, Any]] = {}
+        ultima_venda: Dict[Any, date] = {}
+        with self._lock:
+            for dia in sorted((dia for dia in self._produtos_por_dia if dia >= data_inicio), reverse=True):
+                for chave, produto in self._produtos_por_dia[dia].items():
+                    soma = somas.get(chave)
+                    if soma is None:
+                        ultima_venda[chave] = dia
+                        soma = somas[chave] = {
+                            'chave': chave,
+                            'nome': self._nomes.get(chave),
+                            'quantidade': 0,
+                            'valor_total': 0.0,
+                            'preco_unitario': 0.0,
+                        }
+                    soma['quantidade'] += produto.quantidade
+                    soma['valor_total'] += produto.valor_total
+                    soma['preco_unitario'] = max(soma['preco_unitario'], max(produto.precos, default=0.0))
+
+        def ordem(soma: Dict[str, Any]) -> Tuple[Any, ...]:
+            return -soma['quantidade'], -ultima_venda[soma['chave']].toordinal(), soma['nome'] or '', str(soma['chave'])
+
+        return sorted(somas.values(), key=ordem)[:limite]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'pedidos_concluidos': self.total_pedidos,
+                'pedidos_rastreados': len(self._vistos),
+                'dias': len(self._por_dia),
+                'aplicados': self.aplicados,
+                'revertidos': self.revertidos,
+                'marca': self.marca,
+                'restaurado': self.restaurado,
+            }
+
+
+_agregados: Dict[int, AgregadosRestaurante] = {}
+_agregados_lock = threading.Lock()
+
+
+def obter_agregados(restaurante_id: int) -> Tuple[int, Optional[AgregadosRestaurante], Optional[float]]:
+    """
+    Retorna `(status_code, agregados, idade)` com os agregados do restaurante sincronizados com o
+    snapshot atual de pedidos (`idade` None). Em caso de erro da API externa, retorna
+    `(status_code, None, None)`, a menos que haja rollups do restaurante: nesse caso os últimos
+    agregados são servidos com 200 e `idade` traz os segundos desde a última sincronização.
+    """
+    with _agregados_lock:
+        agregados = _agregados.get(int(restaurante_id))
+        if agregados is None:
+            agregados = _agregados[int(restaurante_id)] = AgregadosRestaurante(restaurante_id, rollups)
+
+    status_code, pedidos_todos = carregar_pedidos(restaurante_id)
+    if status_code != 200:
+        idade = agregados.reserva()
+        if idade is not None:
+            logger.info(
+                "[ANALYTICS] API externa retornou %s; servindo rollups do restaurante %s de %.0fs atrás",
+                status_code, restaurante_id, idade,
+            )
+            return 200, agregados, idade
+        return status_code, None, None
+
+    alterados = agregados.atualizar(pedidos_todos)
+    if alterados:
+        logger.info("[ANALYTICS] Agregados do restaurante %s atualizados: %s pedido(s) alterado(s)", restaurante_id, alterados)
+    return status_code, agregados, None
+
+
+def restaurar_agregados() -> int:
+    """
+    Cria, na inicialização, os agregados de cada restaurante com rollups em disco, para que a
+    primeira requisição de analytics parta deles. Retorna quantos restaurantes foram restaurados.
+    """
+    if rollups is None:
+        return 0
+    restaurados = 0
+    for restaurante_id in rollups.restaurantes():
+        with _agregados_lock:
+            if restaurante_id in _agregados:
+                continue
+            _agregados[restaurante_id] = AgregadosRestaurante(restaurante_id, rollups)
+        restaurados += 1
+    return restaurados
+
+
+def limpar_agregados() -> None:
+    """Descarta todos os agregados (o próximo acesso reconstrói a partir do snapshot)."""
+    with _agregados_lock:
+        _agregados.clear()
+
+
+__all__ = ['AgregadosRestaurante', 'obter_agregados', 'restaurar_agregados', 'limpar_agregados']
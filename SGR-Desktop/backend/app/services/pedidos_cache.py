@@ -0,0 +1,143 @@
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from ..config import PEDIDOS_CACHE_TTL
+from ..proxy import proxy_request
+from ..utils.logs import obter_logger
+from ..utils.metricas import registrar_cache
+from ..utils.sessoes import restaurante_atual
+
+logger = obter_logger('services.pedidos_cache')
+
+
+class PedidosSnapshotCache:
+    """
+    Cache em memória dos snapshots de `pedidos/restaurante`, com TTL e chave por restaurante.
+    Apenas respostas 200 são armazenadas; erros sempre voltam a consultar a API externa.
+
+    Cada chave tem uma geração, incrementada por `invalidar`. Quem vai buscar um snapshot lê a
+    `geracao` antes da chamada e a passa para `set`: se houve invalidação no meio (ex.: PUT de
+    status enquanto um GET estava em andamento), o snapshot antigo é descartado em vez de voltar
+    ao cache.
+    """
+
+    def __init__(self, ttl: float = PEDIDOS_CACHE_TTL) -> None:
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidacoes = 0
+        self.descartados = 0
+        self._entradas: Dict[Any, Tuple[float, Tuple[int, Any]]] = {}
+        self._geracoes: Dict[Any, int] = {}
+        self._geracao_global = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _chave(restaurante_id: Optional[int]) -> Any:
+        return int(restaurante_id) if restaurante_id else 'latest'
+
+    def get(self, restaurante_id: Optional[int] = None) -> Optional[Tuple[int, Any]]:
+        """Retorna o snapshot ainda válido do restaurante ou None."""
+        chave = self._chave(restaurante_id)
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada and self.ttl > 0 and time.monotonic() - entrada[0] < self.ttl:
+                self.hits += 1
+                return entrada[1]
+            if entrada:
+                self._entradas.pop(chave, None)
+            self.misses += 1
+            return None
+
+    def _geracao(self, chave: Any) -> Tuple[int, int]:
+        return self._geracao_global, self._geracoes.get(chave, 0)
+
+    def geracao(self, restaurante_id: Optional[int] = None) -> Tuple[int, int]:
+        """Geração atual da chave do restaurante; ler antes de buscar o snapshot que irá para `set`."""
+        with self._lock:
+            return self._geracao(self._chave(restaurante_id))
+
+    def set(
+        self,
+        restaurante_id: Optional[int],
+        resultado: Tuple[int, Any],
+        geracao: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        """
+        Armazena o resultado `(status_code, response_data)` se ele puder ser reaproveitado.
+        Com `geracao`, descarta o resultado se a chave foi invalidada depois dela.
+        """
+        if self.ttl <= 0 or resultado[0] != 200:
+            return
+        chave = self._chave(restaurante_id)
+        with self._lock:
+            if geracao is not None and geracao != self._geracao(chave):
+                self.descartados += 1
+                return
+            self._entradas[chave] = (time.monotonic(), resultado)
+
+    def invalidar(self, restaurante_id: Optional[int] = None) -> None:
+        """
+        Descarta o snapshot do restaurante e o da sessão padrão ('latest', que pode ser do mesmo
+        restaurante); sem argumento, descarta todos. Buscas em andamento não voltam ao cache.
+        """
+        with self._lock:
+            if restaurante_id:
+                for chave in (self._chave(restaurante_id), self._chave(None)):
+                    self._entradas.pop(chave, None)
+                    self._geracoes[chave] = self._geracoes.get(chave, 0) + 1
+            else:
+                self._entradas.clear()
+                self._geracao_global += 1
+            self.invalidacoes += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'ttl': self.ttl,
+                'entradas': len(self._entradas),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidacoes': self.invalidacoes,
+                'descartados': self.descartados,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+pedidos_cache = PedidosSnapshotCache()
+
+
+def buscar_pedidos_snapshot(restaurante_id: Optional[int] = None) -> Tuple[int, Any]:
+    """
+    Busca `pedidos/restaurante` na API externa reaproveitando o snapshot em cache.
+    Retorna a mesma tupla `(status_code, response_data)` de `proxy_request`; os dados
+    são compartilhados entre as requisições da mesma janela de validade. Sem `restaurante_id`,
+    vale o restaurante da requisição: o snapshot vem da sessão (cookies) dele.
+    """
+    restaurante_id = restaurante_id or restaurante_atual()
+    resultado = pedidos_cache.get(restaurante_id)
+    registrar_cache('pedidos', resultado is not None)
+    if resultado is not None:
+        logger.info("[PEDIDOS-CACHE] HIT para restaurante %s", restaurante_id or 'latest')
+        return resultado
+
+    geracao = pedidos_cache.geracao(restaurante_id)
+    resultado = proxy_request('GET', 'pedidos/restaurante')
+    pedidos_cache.set(restaurante_id, resultado, geracao)
+    return resultado
+
+
+def invalidar_pedidos_cache(restaurante_id: Optional[int] = None) -> None:
+    """Invalida snapshots após operações que alteram pedidos."""
+    pedidos_cache.invalidar(restaurante_id)
+    logger.info("[PEDIDOS-CACHE] Cache invalidado (%s)", restaurante_id or 'todos')
+
+
+__all__ = [
+    'PedidosSnapshotCache',
+    'pedidos_cache',
+    'buscar_pedidos_snapshot',
+    'invalidar_pedidos_cache',
+]
@@ -0,0 +1,162 @@
+import threading
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - depende do ambiente
+    np = None
+    NUMPY_AVAILABLE = False
+
+from ..models.pedido import Pedido
+from .pedidos import carregar_pedidos, filtrar_pedidos
+
+_colunares: Dict[Any, Tuple[Any, 'PedidosColunares']] = {}
+_colunares_lock = threading.Lock()
+
+
+class PedidosColunares:
+    """
+    Representação colunar (NumPy) dos pedidos concluídos de um restaurante.
+
+    Tabela de pedidos: `datas` (datetime64[D]), `valores` (float64) e `quantidades` (int64).
+    Tabela de itens: índice do pedido, código do produto, quantidade e preço unitário.
+    Os agrupamentos por período viram `searchsorted` + `bincount` em vez de laços por pedido.
+
+    Expõe a mesma interface de leitura de `AgregadosRestaurante` (`total_pedidos`, `total_vendas`,
+    `produtos_vendidos`, `somar_por_intervalos`, `top_produtos`), então as rotas usam qualquer um dos dois.
+    """
+
+    __slots__ = (
+        'pedidos',
+        'datas',
+        'valores',
+        'quantidades',
+        'item_datas',
+        'item_produtos',
+        'item_quantidades',
+        'item_precos',
+        'item_nomes',
+        'produto_chaves',
+        'total_pedidos',
+        'total_vendas',
+        'produtos_vendidos',
+    )
+
+    def __init__(self, pedidos: List[Pedido]) -> None:
+        self.pedidos = pedidos
+        total = len(pedidos)
+        self.datas = np.array([pedido.data for pedido in pedidos], dtype='datetime64[D]').reshape(total)
+        self.valores = np.fromiter((pedido.valor_total for pedido in pedidos), dtype=np.float64, count=total)
+        self.quantidades = np.fromiter((pedido.quantidade_itens for pedido in pedidos), dtype=np.int64, count=total)
+        # Totais de todos os pedidos, inclusive os sem data.
+        self.total_pedidos = total
+        self.total_vendas = float(self.valores.sum())
+        self.produtos_vendidos = int(self.quantidades.sum())
+
+        codigos: Dict[Any, int] = {}
+        self.produto_chaves: List[Any] = []
+        self.item_nomes: List[str] = []
+        item_pedidos: List[int] = []
+        item_produtos: List[int] = []
+        item_quantidades: List[int] = []
+        item_precos: List[float] = []
+
+        for indice, pedido in enumerate(pedidos):
+            for item in pedido.itens:
+                nome = item.nome or f"Item #{item.produto_id}"
+                chave = item.produto_id or nome
+                codigo = codigos.get(chave)
+                if codigo is None:
+                    codigo = codigos[chave] = len(self.produto_chaves)
+                    self.produto_chaves.append(chave)
+                item_pedidos.append(indice)
+                item_produtos.append(codigo)
+                item_quantidades.append(item.quantidade or 1)
+                item_precos.append(item.preco_unitario)
+                self.item_nomes.append(nome)
+
+        self.item_datas = self.datas[np.array(item_pedidos, dtype=np.int64)]
+        self.item_produtos = np.array(item_produtos, dtype=np.int64)
+        self.item_quantidades = np.array(item_quantidades, dtype=np.int64)
+        self.item_precos = np.array(item_precos, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.pedidos)
+
+    def somar_por_intervalos(self, limites: Sequence[date]) -> Tuple[List[float], List[int], List[int]]:
+        """
+        Agrupa os pedidos nos intervalos `[limites[i], limites[i + 1])`.
+        Retorna `(vendas, produtos, pedidos)` com um valor por intervalo.
+        """
+        quantidade = len(limites) - 1
+        bordas = np.array(limites, dtype='datetime64[D]')
+        com_data = ~np.isnat(self.datas)
+        baldes = np.searchsorted(bordas, self.datas[com_data], side='right') - 1
+        dentro = (baldes >= 0) & (baldes < quantidade)
+        baldes = baldes[dentro]
+
+        vendas = np.bincount(baldes, weights=self.valores[com_data][dentro], minlength=quantidade)
+        produtos = np.bincount(baldes, weights=self.quantidades[com_data][dentro], minlength=quantidade)
+        pedidos = np.bincount(baldes, minlength=quantidade)
+        return vendas.tolist(), [int(valor) for valor in produtos], [int(valor) for valor in pedidos]
+
+    def top_produtos(self, data_inicio: date, limite: int = 3) -> List[Dict[str, Any]]:
+        """
+        Produtos mais vendidos desde `data_inicio`, por quantidade (empates pela ordem de aparição).
+        Cada entrada traz `chave`, `nome`, `quantidade`, `valor_total` e `preco_unitario` (maior preço visto).
+        """
+        selecionados = np.flatnonzero(self.item_datas >= np.datetime64(data_inicio, 'D'))
+        if selecionados.size == 0:
+            return []
+
+        codigos = self.item_produtos[selecionados]
+        quantidades = self.item_quantidades[selecionados]
+        precos = self.item_precos[selecionados]
+        total_produtos = len(self.produto_chaves)
+
+        soma_quantidades = np.bincount(codigos, weights=quantidades, minlength=total_produtos)
+        soma_valores = np.bincount(codigos, weights=quantidades * precos, minlength=total_produtos)
+        maior_preco = np.zeros(total_produtos)
+        np.maximum.at(maior_preco, codigos, precos)
+
+        presentes, primeira_posicao = np.unique(codigos, return_index=True)
+        ordem = np.lexsort((primeira_posicao, -soma_quantidades[presentes]))[:limite]
+
+        resultado = []
+        for posicao in ordem:
+            codigo = presentes[posicao]
+            resultado.append({
+                'chave': self.produto_chaves[codigo],
+                'nome': self.item_nomes[selecionados[primeira_posicao[posicao]]],
+                'quantidade': int(soma_quantidades[codigo]),
+                'valor_total': float(soma_valores[codigo]),
+                'preco_unitario': float(maior_preco[codigo]),
+            })
+        return resultado
+
+
+def carregar_pedidos_colunares(restaurante_id: int) -> Tuple[int, Optional[PedidosColunares]]:
+    """
+    Retorna os pedidos concluídos do restaurante em formato colunar.
+    A conversão é feita uma vez por snapshot e reaproveitada enquanto o cache o mantiver.
+    """
+    status_code, pedidos_todos = carregar_pedidos(restaurante_id)
+    if status_code != 200:
+        return status_code, None
+
+    with _colunares_lock:
+        memo = _colunares.get(restaurante_id)
+    if memo and memo[0] is pedidos_todos:
+        return status_code, memo[1]
+
+    concluidos = filtrar_pedidos(pedidos_todos, restaurante_id, apenas_concluidos=True, exigir_restaurante=True)
+    colunas = PedidosColunares(concluidos)
+    with _colunares_lock:
+        _colunares[restaurante_id] = (pedidos_todos, colunas)
+    return status_code, colunas
+
+
+__all__ = ['NUMPY_AVAILABLE', 'PedidosColunares', 'carregar_pedidos_colunares']
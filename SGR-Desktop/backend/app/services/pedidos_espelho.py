@@ -0,0 +1,370 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..config import PEDIDOS_ESPELHO_DB, PEDIDOS_ESPELHO_ESPERA, PEDIDOS_ESPELHO_MAX_IDADE
+from ..models.pedido import Pedido
+from ..utils.logs import obter_logger
+from ..utils.metricas import medir_fase, registrar_cache
+from ..utils.sessoes import definir_restaurante
+from .pedidos import STATUS_CONCLUIDO_FILTRO, carregar_pedidos, normalizar_pedido, parse_data_filtro
+
+logger = obter_logger('services.pedidos_espelho')
+
+# Versão do esquema (PRAGMA user_version). O espelho é uma cópia da API externa: um arquivo de
+# outra versão é recriado vazio e preenchido na próxima sincronização.
+VERSAO_ESQUEMA = 2
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS pedidos (
+    restaurante_id INTEGER NOT NULL,
+    id TEXT NOT NULL,
+    restaurante_confirmado INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    concluido INTEGER NOT NULL,
+    criado_em TEXT NOT NULL,
+    data TEXT,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (restaurante_id, id)
+);
+CREATE INDEX IF NOT EXISTS idx_pedidos_restaurante_criado ON pedidos (restaurante_id, criado_em, id);
+CREATE INDEX IF NOT EXISTS idx_pedidos_restaurante_status_criado ON pedidos (restaurante_id, status, criado_em, id);
+CREATE INDEX IF NOT EXISTS idx_pedidos_restaurante_concluido_criado ON pedidos (restaurante_id, concluido, criado_em, id);
+CREATE INDEX IF NOT EXISTS idx_pedidos_restaurante_data ON pedidos (restaurante_id, data);
+CREATE TABLE IF NOT EXISTS sincronizacoes (
+    restaurante_id INTEGER PRIMARY KEY,
+    sincronizado_em REAL NOT NULL,
+    total_recebido INTEGER NOT NULL
+);
+"""
+
+
+def _chave_sem_id(pedido: Pedido, repeticoes: Dict[str, int]) -> str:
+    """
+    Chave sintética (`sem-id:<digest>`) de um pedido sem `id`: digest do JSON original e da ordem
+    entre pedidos idênticos do snapshot, estável enquanto o conteúdo não muda.
+    """
+    conteudo = json.dumps(pedido.bruto, sort_keys=True, ensure_ascii=False, default=str)
+    ocorrencia = repeticoes.get(conteudo, 0)
+    repeticoes[conteudo] = ocorrencia + 1
+    return 'sem-id:' + hashlib.sha1(f'{ocorrencia}:{conteudo}'.encode()).hexdigest()
+
+
+def _linha(restaurante_id: int, chave: str, pedido: Pedido) -> Tuple[Any, ...]:
+    return (
+        restaurante_id,
+        chave,
+        int(pedido.restaurante_id == restaurante_id),
+        pedido.status,
+        int(pedido.concluido),
+        pedido.criado_em,
+        pedido.data.isoformat() if pedido.data else None,
+        json.dumps(pedido.bruto, ensure_ascii=False, default=str),
+    )
+
+
+class PedidosEspelho:
+    """
+    Espelho local (SQLite) de `pedidos/restaurante`: uma linha por pedido visível para o restaurante,
+    com colunas indexadas para restaurante, status, conclusão e data, e o JSON original em `payload`.
+    Pedidos de outros restaurantes não são gravados. Os ids são gravados e comparados como texto
+    (a API devolve ids numéricos ou não); pedidos sem `id` entram com uma chave sintética
+    (`_chave_sem_id`), como na listagem direta, que também os devolve.
+
+    A sincronização escreve apenas os pedidos cujo objeto `Pedido` mudou desde a última escrita
+    (ver `carregar_pedidos`) e remove os que saíram do snapshot. Nas consultas, o `payload` só é
+    decodificado para pedidos que não estão mais em memória (ex.: após reiniciar com a API fora do ar).
+    """
+
+    def __init__(self, caminho: str) -> None:
+        self.caminho = caminho
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        if caminho != ':memory:':
+            self._conexao.execute('PRAGMA journal_mode=WAL')
+        self._conexao.execute('PRAGMA synchronous=NORMAL')
+        if self._conexao.execute('PRAGMA user_version').fetchone()[0] != VERSAO_ESQUEMA:
+            with self._conexao:
+                self._conexao.execute('DROP TABLE IF EXISTS pedidos')
+                self._conexao.execute('DROP TABLE IF EXISTS sincronizacoes')
+            self._conexao.execute(f'PRAGMA user_version = {VERSAO_ESQUEMA}')
+        self._conexao.executescript(_ESQUEMA)
+        self._escritos: Dict[int, Dict[str, Pedido]] = {}
+        self._lock = threading.Lock()
+
+    def sincronizar(self, restaurante_id: int, pedidos: Iterable[Pedido]) -> int:
+        """Atualiza o espelho do restaurante com o snapshot atual. Retorna quantas linhas mudaram."""
+        restaurante_id = int(restaurante_id)
+        with self._lock:
+            escritos = self._escritos.get(restaurante_id)
+            atuais: Dict[str, Pedido] = {}
+            alterados = []
+            total_recebido = 0
+            repeticoes: Dict[str, int] = {}
+            sem_id = 0
+            for pedido in pedidos:
+                total_recebido += 1
+                if pedido.restaurante_id and pedido.restaurante_id != restaurante_id:
+                    continue
+                if pedido.id is None:
+                    chave = _chave_sem_id(pedido, repeticoes)
+                    sem_id += 1
+                else:
+                    chave = str(pedido.id)
+                atuais[chave] = pedido
+                if escritos is None or escritos.get(chave) is not pedido:
+                    alterados.append(_linha(restaurante_id, chave, pedido))
+            if sem_id:
+                logger.info("[PEDIDOS-ESPELHO] Restaurante %s: %s pedido(s) sem id gravado(s) com chave sintética", restaurante_id, sem_id)
+
+            removidos = [] if escritos is None else [(restaurante_id, pedido_id) for pedido_id in escritos if pedido_id not in atuais]
+
+            with self._conexao:
+                if escritos is None:
+                    # Primeira sincronização do processo: regrava o restaurante inteiro.
+                    self._conexao.execute('DELETE FROM pedidos WHERE restaurante_id = ?', (restaurante_id,))
+                self._conexao.executemany('DELETE FROM pedidos WHERE restaurante_id = ? AND id = ?', removidos)
+                self._conexao.executemany('INSERT OR REPLACE INTO pedidos VALUES (?, ?, ?, ?, ?, ?, ?, ?)', alterados)
+                self._conexao.execute(
+                    'INSERT OR REPLACE INTO sincronizacoes VALUES (?, ?, ?)',
+                    (restaurante_id, time.time(), total_recebido),
+                )
+
+            if escritos is None:
+                self._conexao.execute('ANALYZE')
+            self._escritos[restaurante_id] = atuais
+            return len(alterados) + len(removidos)
+
+    def idade(self, restaurante_id: int) -> Optional[float]:
+        """Segundos desde a última sincronização do restaurante (None se nunca sincronizado)."""
+        with self._lock:
+            linha = self._conexao.execute(
+                'SELECT sincronizado_em FROM sincronizacoes WHERE restaurante_id = ?', (int(restaurante_id),)
+            ).fetchone()
+        return time.time() - linha[0] if linha else None
+
+    def expirar(self, restaurante_id: Optional[int] = None) -> None:
+        """Força a próxima leitura a sincronizar com a API; os dados continuam disponíveis como reserva."""
+        with self._lock, self._conexao:
+            if restaurante_id:
+                self._conexao.execute(
+                    'UPDATE sincronizacoes SET sincronizado_em = 0 WHERE restaurante_id = ?', (int(restaurante_id),)
+                )
+            else:
+                self._conexao.execute('UPDATE sincronizacoes SET sincronizado_em = 0')
+
+    def total_recebido(self, restaurante_id: int) -> int:
+        """Quantidade de pedidos no último snapshot sincronizado (inclusive os não gravados)."""
+        with self._lock:
+            linha = self._conexao.execute(
+                'SELECT total_recebido FROM sincronizacoes WHERE restaurante_id = ?', (int(restaurante_id),)
+            ).fetchone()
+        return linha[0] if linha else 0
+
+    def consultar(
+        self,
+        restaurante_id: int,
+        status: Optional[str] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        apenas_concluidos: bool = False,
+        exigir_restaurante: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Mesmos filtros de `filtrar_pedidos` (restaurante, status, intervalo de datas inclusivo),
+        ordenados do mais recente para o mais antigo. Retorna os dicionários originais da API.
+        """
+        restaurante_id = int(restaurante_id)
+        condicoes = ['restaurante_id = ?']
+        parametros: List[Any] = [restaurante_id]
+
+        if exigir_restaurante:
+            condicoes.append('restaurante_confirmado = 1')
+
+        if apenas_concluidos:
+            condicoes.append('concluido = 1')
+
+        condicoes_data = []
+        parametros_data: List[Any] = []
+        inicio = parse_data_filtro(data_inicio)
+        fim = parse_data_filtro(data_fim)
+        if inicio or fim:
+            # Sempre com os dois limites: com apenas um, o planner do SQLite estima o intervalo como
+            # pouco seletivo e prefere percorrer o índice por `criado_em` inteiro para evitar a ordenação.
+            condicoes_data.append('data BETWEEN ? AND ?')
+            parametros_data.extend([
+                inicio.isoformat() if inicio else '0000-01-01',
+                fim.isoformat() if fim else '9999-12-31',
+            ])
+
+        if status:
+            # Com intervalo de datas, o índice por data é mais seletivo que o de status.
+            coluna_status = '+status' if condicoes_data else 'status'
+            status_upper = status.upper()
+            if status_upper in STATUS_CONCLUIDO_FILTRO:
+                condicoes.append(f"{coluna_status} IN ({', '.join('?' * len(STATUS_CONCLUIDO_FILTRO))})")
+                parametros.extend(STATUS_CONCLUIDO_FILTRO)
+            else:
+                condicoes.append(f'{coluna_status} = ?')
+                parametros.append(status_upper)
+
+        filtro = ' AND '.join(condicoes)
+        ordem = 'ORDER BY criado_em DESC, id DESC'
+        with self._lock:
+            if condicoes_data:
+                # Pedidos sem data passam pelo filtro de datas (como em `filtrar_pedidos`). Consultar as
+                # duas partes separadamente mantém o índice por data na parte principal.
+                linhas = self._conexao.execute(
+                    f"SELECT id, criado_em FROM pedidos WHERE {filtro} AND {' AND '.join(condicoes_data)} {ordem}",
+                    parametros + parametros_data,
+                ).fetchall()
+                sem_data = self._conexao.execute(
+                    f"SELECT id, criado_em FROM pedidos WHERE {filtro} AND data IS NULL {ordem}", parametros
+                ).fetchall()
+                if sem_data:
+                    linhas = sorted(linhas + sem_data, key=lambda linha: (linha[1], linha[0]), reverse=True)
+            else:
+                linhas = self._conexao.execute(f"SELECT id, criado_em FROM pedidos WHERE {filtro} {ordem}", parametros).fetchall()
+            em_memoria = self._escritos.get(restaurante_id) or {}
+
+            ausentes = [linha[0] for linha in linhas if linha[0] not in em_memoria]
+            payloads: Dict[str, Dict[str, Any]] = {}
+            for inicio_lote in range(0, len(ausentes), 500):
+                lote = ausentes[inicio_lote:inicio_lote + 500]
+                consulta = (
+                    f"SELECT id, payload FROM pedidos WHERE restaurante_id = ? AND id IN ({', '.join('?' * len(lote))})"
+                )
+                for pedido_id, payload in self._conexao.execute(consulta, [restaurante_id, *lote]):
+                    payloads[pedido_id] = json.loads(payload)
+
+        return [
+            em_memoria[pedido_id].bruto if pedido_id in em_memoria else payloads[pedido_id]
+            for pedido_id, _ in linhas
+        ]
+
+    def fechar(self) -> None:
+        with self._lock:
+            self._conexao.close()
+
+
+espelho: Optional[PedidosEspelho] = PedidosEspelho(PEDIDOS_ESPELHO_DB) if PEDIDOS_ESPELHO_DB else None
+
+
+def espelho_ativo() -> bool:
+    """Indica se o espelho SQLite foi habilitado (`PEDIDOS_ESPELHO_DB`)."""
+    return espelho is not None
+
+
+# Sincronização em andamento por restaurante (no máximo uma).
+_sincronizacoes: Dict[int, threading.Thread] = {}
+_sincronizacoes_lock = threading.Lock()
+
+
+def _sincronizar(restaurante_id: int) -> int:
+    status_code, pedidos = carregar_pedidos(restaurante_id)
+    if status_code == 200:
+        alterados = espelho.sincronizar(restaurante_id, pedidos)
+        logger.info("[PEDIDOS-ESPELHO] Restaurante %s sincronizado (%s linha(s) alterada(s))", restaurante_id, alterados)
+    return status_code
+
+
+def _sincronizar_em_segundo_plano(restaurante_id: int) -> threading.Thread:
+    """Dispara a sincronização do restaurante numa thread, ou devolve a que já está em andamento."""
+    with _sincronizacoes_lock:
+        thread = _sincronizacoes.get(restaurante_id)
+        if thread is not None:
+            return thread
+
+        def executar() -> None:
+            # Contexto novo: só o restaurante segue (sessão própria); prazo e vaga da requisição que
+            # disparou a sincronização não valem para ela.
+            definir_restaurante(restaurante_id)
+            try:
+                status_code = _sincronizar(restaurante_id)
+                if status_code != 200:
+                    logger.info(
+                        "[PEDIDOS-ESPELHO] API externa retornou %s; espelho do restaurante %s mantido", status_code, restaurante_id
+                    )
+            except Exception:
+                logger.exception("[PEDIDOS-ESPELHO] Falha ao sincronizar o restaurante %s", restaurante_id)
+            finally:
+                with _sincronizacoes_lock:
+                    _sincronizacoes.pop(restaurante_id, None)
+
+        thread = threading.Thread(target=executar, name=f'espelho-{restaurante_id}', daemon=True)
+        _sincronizacoes[restaurante_id] = thread
+        thread.start()
+        return thread
+
+
+def _sincronizar_se_necessario(restaurante_id: int) -> int:
+    """
+    Com o espelho mais velho que `PEDIDOS_ESPELHO_MAX_IDADE`, dispara a sincronização em segundo
+    plano e espera por ela até `PEDIDOS_ESPELHO_ESPERA` segundos; depois disso (ou se a API externa
+    falhar) serve o espelho local, e a sincronização termina sem segurar a requisição.
+    Sem dados locais, sincroniza na própria requisição e propaga o erro da API externa.
+    """
+    idade = espelho.idade(restaurante_id)
+    atualizado = idade is not None and idade <= PEDIDOS_ESPELHO_MAX_IDADE
+    registrar_cache('espelho', atualizado)
+    if atualizado:
+        return 200
+
+    if idade is None:
+        return _sincronizar(restaurante_id)
+
+    sincronizacao = _sincronizar_em_segundo_plano(restaurante_id)
+    sincronizacao.join(PEDIDOS_ESPELHO_ESPERA)
+    if sincronizacao.is_alive():
+        logger.info(
+            "[PEDIDOS-ESPELHO] Sincronização do restaurante %s em andamento; servindo espelho local de %.0fs atrás",
+            restaurante_id, idade,
+        )
+    return 200
+
+
+def buscar_pedidos_espelho(
+    restaurante_id: int,
+    status: Optional[str] = None,
+    data_inicio: Optional[str] = None,
+    data_fim: Optional[str] = None,
+) -> Tuple[int, List[Dict[str, Any]], int]:
+    """Equivalente a `buscar_pedidos_restaurante` lendo do espelho SQLite."""
+    status_code = _sincronizar_se_necessario(restaurante_id)
+    if status_code != 200:
+        return status_code, [], 0
+
+    pedidos = espelho.consultar(restaurante_id, status, data_inicio, data_fim)
+    with medir_fase('normalizacao'):
+        pedidos = [normalizar_pedido(pedido, restaurante_id) for pedido in pedidos]
+    return status_code, pedidos, espelho.total_recebido(restaurante_id)
+
+
+def listar_concluidos_espelho(restaurante_id: int) -> Tuple[int, List[Dict[str, Any]], int]:
+    """Pedidos concluídos do restaurante lidos do espelho SQLite, já no formato do frontend."""
+    status_code = _sincronizar_se_necessario(restaurante_id)
+    if status_code != 200:
+        return status_code, [], 0
+
+    pedidos = espelho.consultar(restaurante_id, apenas_concluidos=True, exigir_restaurante=True)
+    with medir_fase('normalizacao'):
+        pedidos = [normalizar_pedido(pedido, restaurante_id) for pedido in pedidos]
+    return status_code, pedidos, espelho.total_recebido(restaurante_id)
+
+
+def expirar_espelho(restaurante_id: Optional[int] = None) -> None:
+    """Marca o espelho como desatualizado após operações que alteram pedidos."""
+    if espelho is not None:
+        espelho.expirar(restaurante_id)
+
+
+__all__ = [
+    'PedidosEspelho',
+    'espelho',
+    'espelho_ativo',
+    'buscar_pedidos_espelho',
+    'listar_concluidos_espelho',
+    'expirar_espelho',
+]
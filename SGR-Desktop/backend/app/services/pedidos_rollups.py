@@ -0,0 +1,230 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..config import ANALYTICS_ROLLUPS_DB
+from ..utils.logs import obter_logger
+
+logger = obter_logger('services.pedidos_rollups')
+
+# Versão do esquema (PRAGMA user_version). Os rollups são derivados dos pedidos da API externa:
+# um arquivo de outra versão é recriado vazio e reconstruído na próxima sincronização.
+VERSAO_ESQUEMA = 2
+
+_TABELAS = ('rollup_totais', 'rollup_dia', 'rollup_produto_dia', 'rollup_pedidos')
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS rollup_totais (
+    restaurante_id INTEGER PRIMARY KEY,
+    receita REAL NOT NULL,
+    itens INTEGER NOT NULL,
+    pedidos INTEGER NOT NULL,
+    marca TEXT NOT NULL,
+    atualizado_em REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rollup_dia (
+    restaurante_id INTEGER NOT NULL,
+    dia TEXT NOT NULL,
+    receita REAL NOT NULL,
+    itens INTEGER NOT NULL,
+    pedidos INTEGER NOT NULL,
+    PRIMARY KEY (restaurante_id, dia)
+);
+CREATE TABLE IF NOT EXISTS rollup_produto_dia (
+    restaurante_id INTEGER NOT NULL,
+    dia TEXT NOT NULL,
+    produto TEXT NOT NULL,
+    nome TEXT,
+    receita REAL NOT NULL,
+    itens INTEGER NOT NULL,
+    pedidos INTEGER NOT NULL,
+    maior_preco REAL NOT NULL,
+    precos TEXT NOT NULL,
+    PRIMARY KEY (restaurante_id, dia, produto)
+);
+CREATE TABLE IF NOT EXISTS rollup_pedidos (
+    restaurante_id INTEGER NOT NULL,
+    pedido TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    contribuicao TEXT,
+    PRIMARY KEY (restaurante_id, pedido)
+);
+"""
+
+# (dia, receita, itens, pedidos); receita None remove a linha
+LinhaDia = Tuple[str, Optional[float], int, int]
+# (dia, produto_json, nome, receita, itens, pedidos, maior_preco, precos_json); receita None remove a linha
+LinhaProdutoDia = Tuple[str, str, Optional[str], Optional[float], int, int, float, str]
+# (pedido_json, digest, contribuicao_json); digest None remove a linha
+LinhaPedido = Tuple[str, Optional[bytes], Optional[str]]
+
+
+class RollupsDiarios:
+    """
+    Rollups diários de vendas persistidos em SQLite: totais do restaurante, uma linha por dia e
+    uma por (dia, produto) com receita, itens e pedidos, mais o digest e a contribuição de cada
+    pedido já somado e a marca d'água (`criadoEm` mais recente entre eles).
+
+    O conteúdo é mantido por `AgregadosRestaurante`, que grava apenas as linhas alteradas em cada
+    atualização e parte destes rollups ao iniciar, em vez de reagregar o histórico inteiro.
+    """
+
+    def __init__(self, caminho: str) -> None:
+        self.caminho = caminho
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        if caminho != ':memory:':
+            self._conexao.execute('PRAGMA journal_mode=WAL')
+        self._conexao.execute('PRAGMA synchronous=NORMAL')
+        if self._conexao.execute('PRAGMA user_version').fetchone()[0] != VERSAO_ESQUEMA:
+            with self._conexao:
+                for tabela in _TABELAS:
+                    self._conexao.execute(f'DROP TABLE IF EXISTS {tabela}')
+            self._conexao.execute(f'PRAGMA user_version = {VERSAO_ESQUEMA}')
+        self._conexao.executescript(_ESQUEMA)
+        self._lock = threading.Lock()
+
+    def _gravar_totais(self, restaurante_id: int, totais: Tuple[float, int, int], marca: str) -> None:
+        self._conexao.execute(
+            'INSERT OR REPLACE INTO rollup_totais VALUES (?, ?, ?, ?, ?, ?)',
+            (restaurante_id, *totais, marca, time.time()),
+        )
+
+    def salvar(
+        self,
+        restaurante_id: int,
+        totais: Tuple[float, int, int],
+        marca: str,
+        dias: Iterable[LinhaDia],
+        produtos: Iterable[LinhaProdutoDia],
+        pedidos: Iterable[LinhaPedido],
+    ) -> None:
+        """Grava, numa transação, os totais, a marca e as linhas de dia, produto e pedido que mudaram."""
+        dias = list(dias)
+        produtos = list(produtos)
+        pedidos = list(pedidos)
+        with self._lock, self._conexao:
+            self._gravar_totais(restaurante_id, totais, marca)
+            self._conexao.executemany(
+                'DELETE FROM rollup_dia WHERE restaurante_id = ? AND dia = ?',
+                [(restaurante_id, linha[0]) for linha in dias if linha[1] is None],
+            )
+            self._conexao.executemany(
+                'INSERT OR REPLACE INTO rollup_dia VALUES (?, ?, ?, ?, ?)',
+                [(restaurante_id, *linha) for linha in dias if linha[1] is not None],
+            )
+            self._conexao.executemany(
+                'DELETE FROM rollup_produto_dia WHERE restaurante_id = ? AND dia = ? AND produto = ?',
+                [(restaurante_id, linha[0], linha[1]) for linha in produtos if linha[3] is None],
+            )
+            self._conexao.executemany(
+                'INSERT OR REPLACE INTO rollup_produto_dia VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(restaurante_id, *linha) for linha in produtos if linha[3] is not None],
+            )
+            self._conexao.executemany(
+                'DELETE FROM rollup_pedidos WHERE restaurante_id = ? AND pedido = ?',
+                [(restaurante_id, linha[0]) for linha in pedidos if linha[1] is None],
+            )
+            self._conexao.executemany(
+                'INSERT OR REPLACE INTO rollup_pedidos VALUES (?, ?, ?, ?)',
+                [(restaurante_id, *linha) for linha in pedidos if linha[1] is not None],
+            )
+
+    def substituir(
+        self,
+        restaurante_id: int,
+        totais: Tuple[float, int, int],
+        marca: str,
+        dias: Iterable[LinhaDia],
+        produtos: Iterable[LinhaProdutoDia],
+        pedidos: Iterable[LinhaPedido],
+    ) -> None:
+        """Troca, numa transação, todos os rollups do restaurante pelas linhas dadas."""
+        dias = list(dias)
+        produtos = list(produtos)
+        pedidos = list(pedidos)
+        with self._lock, self._conexao:
+            for tabela in _TABELAS[1:]:
+                self._conexao.execute(f'DELETE FROM {tabela} WHERE restaurante_id = ?', (restaurante_id,))
+            self._gravar_totais(restaurante_id, totais, marca)
+            self._conexao.executemany(
+                'INSERT INTO rollup_dia VALUES (?, ?, ?, ?, ?)', [(restaurante_id, *linha) for linha in dias]
+            )
+            self._conexao.executemany(
+                'INSERT INTO rollup_produto_dia VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(restaurante_id, *linha) for linha in produtos],
+            )
+            self._conexao.executemany(
+                'INSERT INTO rollup_pedidos VALUES (?, ?, ?, ?)', [(restaurante_id, *linha) for linha in pedidos]
+            )
+
+    def carregar(self, restaurante_id: int) -> Optional[Dict[str, Any]]:
+        """Rollups persistidos do restaurante (`totais` com marca e data, `dias`, `produtos`) ou None."""
+        with self._lock:
+            totais = self._conexao.execute(
+                'SELECT receita, itens, pedidos, marca, atualizado_em FROM rollup_totais WHERE restaurante_id = ?',
+                (restaurante_id,),
+            ).fetchone()
+            if totais is None:
+                return None
+            return {
+                'totais': totais,
+                'dias': self._conexao.execute(
+                    'SELECT dia, receita, itens, pedidos FROM rollup_dia WHERE restaurante_id = ?', (restaurante_id,)
+                ).fetchall(),
+                'produtos': self._conexao.execute(
+                    'SELECT dia, produto, nome, receita, itens, pedidos, precos FROM rollup_produto_dia '
+                    'WHERE restaurante_id = ?',
+                    (restaurante_id,),
+                ).fetchall(),
+            }
+
+    def digests(self, restaurante_id: int) -> Dict[str, bytes]:
+        """Digest de cada pedido gravado do restaurante, pela chave codificada."""
+        with self._lock:
+            return dict(self._conexao.execute(
+                'SELECT pedido, digest FROM rollup_pedidos WHERE restaurante_id = ?', (restaurante_id,)
+            ))
+
+    def contribuicao(self, restaurante_id: int, pedido: str) -> Optional[str]:
+        """Contribuição gravada (JSON) de um pedido; None se ele não soma nos rollups."""
+        with self._lock:
+            linha = self._conexao.execute(
+                'SELECT contribuicao FROM rollup_pedidos WHERE restaurante_id = ? AND pedido = ?',
+                (restaurante_id, pedido),
+            ).fetchone()
+        return linha[0] if linha else None
+
+    def restaurantes(self) -> List[int]:
+        with self._lock:
+            return [linha[0] for linha in self._conexao.execute('SELECT restaurante_id FROM rollup_totais')]
+
+    def fechar(self) -> None:
+        with self._lock:
+            self._conexao.close()
+
+
+def codificar(valor: Any) -> str:
+    return json.dumps(valor, ensure_ascii=False, separators=(',', ':'))
+
+
+def abrir_rollups(caminho: str) -> Optional[RollupsDiarios]:
+    """Abre os rollups em `caminho` (criando a pasta); vazio ou inacessível, analytics segue só em memória."""
+    if not caminho:
+        return None
+    try:
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        return RollupsDiarios(caminho)
+    except (OSError, sqlite3.Error) as exc:
+        logger.warning("[ANALYTICS] Rollups desativados: não foi possível abrir %s (%s)", caminho, exc)
+        return None
+
+
+rollups: Optional[RollupsDiarios] = abrir_rollups(ANALYTICS_ROLLUPS_DB)
+
+
+__all__ = ['RollupsDiarios', 'VERSAO_ESQUEMA', 'abrir_rollups', 'rollups', 'codificar']
@@ -0,0 +1,129 @@
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional
+
+FECHADO = 'fechado'
+ABERTO = 'aberto'
+MEIO_ABERTO = 'meio_aberto'
+
+
+class _Circuito:
+    __slots__ = ('estado', 'falhas', 'aberto_em', 'sonda_em_andamento', 'ultima_falha')
+
+    def __init__(self) -> None:
+        self.estado = FECHADO
+        self.falhas = 0
+        self.aberto_em = 0.0
+        self.sonda_em_andamento = False
+        self.ultima_falha: Any = None
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por chave (fechado → aberto → meio-aberto).
+
+    Após `limite_falhas` falhas consecutivas o circuito abre e `permitir` passa a negar as
+    chamadas por `tempo_aberto` segundos. Esgotado o tempo, uma única chamada (sonda) é liberada:
+    sucesso fecha o circuito, falha o reabre por mais `tempo_aberto`. `limite_falhas <= 0` desativa.
+    """
+
+    def __init__(self, limite_falhas: int = 5, tempo_aberto: float = 15.0) -> None:
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto = tempo_aberto
+        self.rejeitadas = 0
+        self._circuitos: Dict[Hashable, _Circuito] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ativo(self) -> bool:
+        return self.limite_falhas > 0
+
+    def permitir(self, chave: Hashable) -> bool:
+        """True se a chamada pode seguir; no meio-aberto, só a primeira (a sonda) recebe True."""
+        if not self.ativo:
+            return True
+        with self._lock:
+            circuito = self._circuitos.get(chave)
+            if circuito is None or circuito.estado == FECHADO:
+                return True
+            if circuito.estado == ABERTO and time.monotonic() - circuito.aberto_em >= self.tempo_aberto:
+                circuito.estado = MEIO_ABERTO
+            if circuito.estado == MEIO_ABERTO and not circuito.sonda_em_andamento:
+                circuito.sonda_em_andamento = True
+                return True
+            self.rejeitadas += 1
+            return False
+
+    def registrar_sucesso(self, chave: Hashable) -> Optional[str]:
+        """Zera as falhas da chave. Retorna o estado anterior quando o circuito fecha."""
+        if not self.ativo:
+            return None
+        with self._lock:
+            circuito = self._circuitos.get(chave)
+            if circuito is None:
+                return None
+            anterior = circuito.estado
+            self._circuitos.pop(chave)
+            return anterior if anterior != FECHADO else None
+
+    def registrar_falha(self, chave: Hashable, detalhe: Any = None) -> bool:
+        """
+        Conta uma falha; `detalhe` fica guardado para a resposta rápida enquanto o circuito estiver
+        aberto. Retorna True quando esta falha abre (ou reabre) o circuito.
+        """
+        if not self.ativo:
+            return False
+        with self._lock:
+            circuito = self._circuitos.setdefault(chave, _Circuito())
+            circuito.falhas += 1
+            circuito.ultima_falha = detalhe
+            circuito.sonda_em_andamento = False
+            if circuito.estado == MEIO_ABERTO or (circuito.estado == FECHADO and circuito.falhas >= self.limite_falhas):
+                circuito.estado = ABERTO
+                circuito.aberto_em = time.monotonic()
+                return True
+            return False
+
+    def liberar_sonda(self, chave: Hashable) -> None:
+        """Devolve a vaga da sonda sem contar sucesso nem falha (ex.: resposta inconclusiva)."""
+        with self._lock:
+            circuito = self._circuitos.get(chave)
+            if circuito is not None:
+                circuito.sonda_em_andamento = False
+
+    def estado(self, chave: Hashable) -> str:
+        with self._lock:
+            circuito = self._circuitos.get(chave)
+            if circuito is None:
+                return FECHADO
+            if circuito.estado == ABERTO and time.monotonic() - circuito.aberto_em >= self.tempo_aberto:
+                return MEIO_ABERTO
+            return circuito.estado
+
+    def ultima_falha(self, chave: Hashable) -> Any:
+        with self._lock:
+            circuito = self._circuitos.get(chave)
+            return circuito.ultima_falha if circuito is not None else None
+
+    def reabre_em(self, chave: Hashable) -> float:
+        """Segundos até a próxima sonda (0 se o circuito não estiver aberto)."""
+        with self._lock:
+            circuito = self._circuitos.get(chave)
+            if circuito is None or circuito.estado != ABERTO:
+                return 0.0
+            return max(0.0, self.tempo_aberto - (time.monotonic() - circuito.aberto_em))
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._circuitos.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            chaves = list(self._circuitos)
+        return {
+            'rejeitadas': self.rejeitadas,
+            'circuitos': {str(chave): self.estado(chave) for chave in chaves},
+        }
+
+
+__all__ = ['ABERTO', 'FECHADO', 'MEIO_ABERTO', 'CircuitBreaker']
@@ -0,0 +1,129 @@
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlencode
+
+CORPO_JSON = 'json'
+CORPO_FORM = 'form'
+CODIFICACOES = (CORPO_JSON, CORPO_FORM)
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS codificacao_endpoint (
+    chave TEXT PRIMARY KEY,
+    codificacao TEXT NOT NULL,
+    atualizado_em REAL NOT NULL
+);
+"""
+
+
+def alternativa(codificacao: str) -> str:
+    """A outra codificação do corpo (JSON <-> form-urlencoded)."""
+    return CORPO_FORM if codificacao == CORPO_JSON else CORPO_JSON
+
+
+def _campos_formulario(dados: Dict[str, Any], prefixo: str = '') -> Iterator[Tuple[str, Any]]:
+    for nome, valor in dados.items():
+        campo = f'{prefixo}{nome}'
+        if isinstance(valor, dict):
+            yield from _campos_formulario(valor, f'{campo}.')
+        elif isinstance(valor, (list, tuple)):
+            for item in valor:
+                yield campo, item
+        else:
+            yield campo, '' if valor is None else valor
+
+
+def corpo_formulario(dados: Any) -> Any:
+    """
+    Corpo form-urlencoded de `dados`. Objetos aninhados viram `pai.filho=valor` (o binding de
+    formulários do Spring na API Java), listas repetem o campo; o que não é dict segue como está.
+    """
+    if not isinstance(dados, dict):
+        return dados
+    return urlencode(list(_campos_formulario(dados)))
+
+
+class CodificacaoEndpoints:
+    """
+    Codificação do corpo (JSON ou form-urlencoded) aceita por último em cada endpoint da API externa.
+
+    `preferida` diz qual enviar primeiro (JSON enquanto nada foi aprendido); `registrar` guarda a
+    que funcionou. Com `caminho`, a tabela é persistida em SQLite e recarregada ao iniciar; o
+    arquivo só é escrito quando a codificação de um endpoint muda.
+    """
+
+    def __init__(self, caminho: str = '') -> None:
+        self.caminho = caminho
+        self.economizadas = 0
+        self._tabela: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._conexao: Optional[sqlite3.Connection] = None
+        if caminho:
+            self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+            self._conexao.executescript(_ESQUEMA)
+            for chave, codificacao, atualizado_em in self._conexao.execute(
+                'SELECT chave, codificacao, atualizado_em FROM codificacao_endpoint'
+            ):
+                if codificacao in CODIFICACOES:
+                    self._tabela[chave] = {'codificacao': codificacao, 'sucessos': 0, 'atualizado_em': atualizado_em}
+
+    def preferida(self, chave: str) -> str:
+        with self._lock:
+            entrada = self._tabela.get(chave)
+            return entrada['codificacao'] if entrada is not None else CORPO_JSON
+
+    def registrar(self, chave: str, codificacao: str, primeira_tentativa: bool = True) -> bool:
+        """
+        Guarda a codificação aceita pelo endpoint. `primeira_tentativa` indica que ela foi enviada
+        de primeira (um form acertado assim é uma ida à API economizada). Retorna True se mudou.
+        """
+        if codificacao not in CODIFICACOES:
+            raise ValueError(f'codificação desconhecida: {codificacao!r}')
+        with self._lock:
+            entrada = self._tabela.get(chave)
+            if entrada is not None and entrada['codificacao'] == codificacao:
+                entrada['sucessos'] += 1
+                if primeira_tentativa and codificacao != CORPO_JSON:
+                    self.economizadas += 1
+                return False
+            agora = time.time()
+            self._tabela[chave] = {'codificacao': codificacao, 'sucessos': 1, 'atualizado_em': agora}
+            if self._conexao is not None:
+                with self._conexao:
+                    self._conexao.execute(
+                        'INSERT OR REPLACE INTO codificacao_endpoint (chave, codificacao, atualizado_em) VALUES (?, ?, ?)',
+                        (chave, codificacao, agora),
+                    )
+            return True
+
+    def tabela(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {chave: dict(entrada) for chave, entrada in sorted(self._tabela.items())}
+
+    def esquecer(self, chaves: Optional[Iterable[str]] = None) -> None:
+        """Remove as chaves informadas (todas se None), voltando a tentar JSON primeiro."""
+        with self._lock:
+            removidas = list(self._tabela) if chaves is None else [chave for chave in chaves if chave in self._tabela]
+            for chave in removidas:
+                self._tabela.pop(chave)
+            if self._conexao is not None and removidas:
+                with self._conexao:
+                    self._conexao.executemany(
+                        'DELETE FROM codificacao_endpoint WHERE chave = ?', [(chave,) for chave in removidas]
+                    )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            por_codificacao = {codificacao: 0 for codificacao in CODIFICACOES}
+            for entrada in self._tabela.values():
+                por_codificacao[entrada['codificacao']] += 1
+            return {
+                'endpoints': len(self._tabela),
+                'por_codificacao': por_codificacao,
+                'idas_economizadas': self.economizadas,
+                'persistida': self._conexao is not None,
+            }
+
+
+__all__ = ['CODIFICACOES', 'CORPO_FORM', 'CORPO_JSON', 'CodificacaoEndpoints', 'alternativa', 'corpo_formulario']
@@ -0,0 +1,105 @@
+from http.cookiejar import Cookie
+from typing import Any, Dict, Optional, Tuple
+
+from requests.cookies import CookieConflictError, RequestsCookieJar
+
+# (domínio, caminho) de uma cópia do cookie
+Local = Tuple[str, str]
+
+
+class CookiesSessao(RequestsCookieJar):
+    """
+    Cookie jar das sessões com a API externa, com índice por nome: (nome) -> {(domínio, caminho): Cookie}.
+
+    Trocar um cookie (`substituir`), contar as cópias de um nome e ler seu valor custam O(cópias do
+    nome) em vez de percorrer o jar inteiro. O requests continua usando o jar normalmente:
+    `set_cookie` e `clear` (por onde passam Set-Cookie, `set`, `update` e expiração) mantêm o índice.
+    """
+
+    def __init__(self, policy: Any = None) -> None:
+        super().__init__(policy)
+        self._por_nome: Dict[str, Dict[Local, Cookie]] = {}
+
+    def set_cookie(self, cookie: Cookie, *args: Any, **kwargs: Any) -> None:
+        with self._cookies_lock:
+            super().set_cookie(cookie, *args, **kwargs)
+            copias = self._por_nome.setdefault(cookie.name, {})
+            copias.pop((cookie.domain, cookie.path), None)  # reinsere no fim: o mais recente por último
+            copias[(cookie.domain, cookie.path)] = cookie
+
+    def clear(self, domain: Optional[str] = None, path: Optional[str] = None, name: Optional[str] = None) -> None:
+        with self._cookies_lock:
+            super().clear(domain, path, name)
+            if name is not None:
+                copias = self._por_nome[name]
+                del copias[(domain, path)]
+                if not copias:
+                    del self._por_nome[name]
+            elif domain is None:
+                self._por_nome = {}
+            else:
+                for nome, copias in list(self._por_nome.items()):
+                    for local in [local for local in copias if local[0] == domain and path in (None, local[1])]:
+                        del copias[local]
+                    if not copias:
+                        del self._por_nome[nome]
+
+    def _find_no_duplicates(self, name: str, domain: Optional[str] = None, path: Optional[str] = None) -> str:
+        # Mesma semântica do RequestsCookieJar (KeyError / CookieConflictError), sem varrer o jar.
+        encontrados = [
+            cookie.value
+            for (dominio, caminho), cookie in self._por_nome.get(name, {}).items()
+            if (domain is None or dominio == domain) and (path is None or caminho == path)
+        ]
+        if len(encontrados) > 1:
+            raise CookieConflictError(f"There are multiple cookies with name, {name!r}")
+        if encontrados and encontrados[0] is not None:
+            return encontrados[0]
+        raise KeyError(f"name={name!r}, domain={domain!r}, path={path!r}")
+
+    def substituir(self, nome: str, valor: str, dominio: str = '', caminho: str = '/') -> None:
+        """Troca todas as cópias de `nome` (em qualquer domínio/caminho) por uma só, com `valor`."""
+        with self._cookies_lock:
+            for local in list(self._por_nome.get(nome, ())):
+                self.clear(local[0], local[1], nome)
+            self.set(nome, valor, domain=dominio, path=caminho)
+
+    def contar(self, nome: str) -> int:
+        return len(self._por_nome.get(nome, ()))
+
+    def valor(self, nome: str) -> Optional[str]:
+        """Valor da cópia gravada por último (None se não houver)."""
+        copias = self._por_nome.get(nome)
+        return next(reversed(copias.values())).value if copias else None
+
+
+def substituir_cookie(jar: RequestsCookieJar, nome: str, valor: str) -> None:
+    """
+    Troca o cookie `nome` sem reconstruir o jar. Em `CookiesSessao` usa o índice; num jar comum,
+    remove as cópias de `nome` em cada (domínio, caminho) já indexado pelo cookielib.
+    """
+    if isinstance(jar, CookiesSessao):
+        jar.substituir(nome, valor)
+        return
+    with jar._cookies_lock:
+        for caminhos in jar._cookies.values():
+            for nomes in caminhos.values():
+                nomes.pop(nome, None)
+        jar.set(nome, valor)
+
+
+def contar_cookie(jar: RequestsCookieJar, nome: str) -> int:
+    if isinstance(jar, CookiesSessao):
+        return jar.contar(nome)
+    return sum(1 for cookie in jar if cookie.name == nome)
+
+
+def valor_cookie(jar: RequestsCookieJar, nome: str) -> Optional[str]:
+    """Valor de `nome` mesmo com cópias em domínios diferentes (a última gravada)."""
+    if isinstance(jar, CookiesSessao):
+        return jar.valor(nome)
+    valores = [cookie.value for cookie in jar if cookie.name == nome]
+    return valores[-1] if valores else None
+
+
+__all__ = ['CookiesSessao', 'contar_cookie', 'substituir_cookie', 'valor_cookie']
@@ -0,0 +1,112 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+from ..config import API_CONNECT_TIMEOUT, API_READ_TIMEOUT, DEADLINE_PADRAO, DEADLINES_ROTAS
+
+# Instante (time.monotonic) em que o cliente desiste da requisição atual; None = sem prazo.
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar('deadline', default=None)
+
+# Timeout mínimo repassado ao requests: abaixo disso a chamada nem é feita.
+TIMEOUT_MINIMO = 0.05
+
+
+class DeadlineExcedido(Exception):
+    """O orçamento de tempo da requisição acabou antes da chamada à API externa."""
+
+
+def definir_deadline(segundos: float) -> contextvars.Token:
+    """
+    Define o prazo da requisição atual daqui a `segundos`. Um prazo já definido mais curto
+    prevalece. Devolve o token para `restaurar_deadline`.
+    """
+    limite = time.monotonic() + max(0.0, segundos)
+    atual = _deadline.get()
+    if atual is not None:
+        limite = min(limite, atual)
+    return _deadline.set(limite)
+
+
+def restaurar_deadline(token: contextvars.Token) -> None:
+    _deadline.reset(token)
+
+
+@contextmanager
+def deadline(segundos: float) -> Iterator[None]:
+    token = definir_deadline(segundos)
+    try:
+        yield
+    finally:
+        restaurar_deadline(token)
+
+
+def tempo_restante() -> Optional[float]:
+    """Segundos até o prazo da requisição atual (pode ser negativo), ou None sem prazo."""
+    limite = _deadline.get()
+    return None if limite is None else limite - time.monotonic()
+
+
+def deadline_esgotado() -> bool:
+    restante = tempo_restante()
+    return restante is not None and restante < TIMEOUT_MINIMO
+
+
+def timeout_upstream(connect: Optional[float] = None, read: Optional[float] = None) -> Tuple[float, float]:
+    """
+    Timeout (connect, read) para o requests, limitado ao que resta do prazo (padrão:
+    API_CONNECT_TIMEOUT e API_READ_TIMEOUT). Levanta DeadlineExcedido se não sobrou tempo.
+    O read timeout do requests vale por leitura do socket, então o prazo é respeitado a cada
+    chamada, não byte a byte.
+    """
+    connect = API_CONNECT_TIMEOUT if connect is None else connect
+    read = API_READ_TIMEOUT if read is None else read
+    restante = tempo_restante()
+    if restante is None:
+        return connect, read
+    if restante < TIMEOUT_MINIMO:
+        raise DeadlineExcedido(f'prazo da requisição esgotado ({restante:.2f}s)')
+    return min(connect, restante), min(read, restante)
+
+
+def deadline_da_rota(caminho: str) -> float:
+    """Orçamento da rota: prefixo mais longo de DEADLINES_ROTAS que casa com o caminho após /api/."""
+    relativo = caminho.split('/api/', 1)[-1].strip('/')
+    melhor = None
+    for prefixo in DEADLINES_ROTAS:
+        if (relativo == prefixo or relativo.startswith(prefixo + '/')) and (melhor is None or len(prefixo) > len(melhor)):
+            melhor = prefixo
+    return DEADLINES_ROTAS[melhor] if melhor is not None else DEADLINE_PADRAO
+
+
+def ler_header_deadline(valor: Optional[str], agora_ms: Optional[float] = None) -> Optional[float]:
+    """
+    Converte o header X-Request-Deadline em segundos restantes. Aceita o instante em
+    milissegundos de época (`Date.now() + orçamento` no frontend) ou, para valores pequenos,
+    o próprio orçamento em milissegundos. Valores inválidos são ignorados (None).
+    """
+    if not valor:
+        return None
+    try:
+        numero = float(valor.strip())
+    except ValueError:
+        return None
+    if numero != numero or numero < 0:
+        return None
+    if numero >= 1e11:
+        agora_ms = time.time() * 1000 if agora_ms is None else agora_ms
+        return (numero - agora_ms) / 1000
+    return numero / 1000
+
+
+__all__ = [
+    'DeadlineExcedido',
+    'deadline',
+    'deadline_da_rota',
+    'deadline_esgotado',
+    'definir_deadline',
+    'ler_header_deadline',
+    'restaurar_deadline',
+    'tempo_restante',
+    'timeout_upstream',
+]
@@ -0,0 +1,129 @@
+import codecs
+import json
+from typing import Any, Optional, Tuple
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+JSON = 'json'
+HTML = 'html'
+TEXTO = 'texto'
+
+# Bytes inspecionados quando o Content-Type falta ou é genérico.
+PREFIXO_FAREJAR = 512
+
+_TIPOS_GENERICOS = frozenset({'', 'text/plain', 'application/octet-stream', 'binary/octet-stream'})
+_TIPOS_HTML = frozenset({'text/html', 'application/xhtml+xml'})
+_BOM_UTF8 = codecs.BOM_UTF8
+
+
+def separar_content_type(content_type: Optional[str]) -> Tuple[str, Optional[str]]:
+    """('tipo/subtipo' em minúsculas, charset ou None) a partir do header Content-Type."""
+    mime, _, parametros = (content_type or '').partition(';')
+    charset = None
+    for parametro in parametros.split(';'):
+        nome, _, valor = parametro.partition('=')
+        if nome.strip().lower() == 'charset' and valor.strip():
+            charset = valor.strip().strip('"\'').lower()
+    return mime.strip().lower(), charset
+
+
+def farejar(corpo: bytes) -> str:
+    """Formato pelo começo do corpo (até PREFIXO_FAREJAR bytes): JSON, HTML ou texto."""
+    prefixo = corpo[:PREFIXO_FAREJAR]
+    if prefixo.startswith(_BOM_UTF8):
+        prefixo = prefixo[len(_BOM_UTF8):]
+    prefixo = prefixo.lstrip()
+    if prefixo[:1] in (b'{', b'['):
+        return JSON
+    inicio = prefixo[:9].lower()
+    if inicio.startswith(b'<!doctype') or inicio.startswith(b'<html'):
+        return HTML
+    return TEXTO
+
+
+def classificar(content_type: Optional[str], corpo: bytes) -> str:
+    """Formato pelo Content-Type; o corpo só é farejado se o header faltar ou for genérico."""
+    mime, _ = separar_content_type(content_type)
+    if mime == 'application/json' or mime.endswith('+json'):
+        return JSON
+    if mime in _TIPOS_HTML:
+        return HTML
+    if mime in _TIPOS_GENERICOS:
+        return farejar(corpo)
+    return TEXTO
+
+
+def decodificar_texto(corpo: bytes, charset: Optional[str] = None) -> str:
+    """Bytes -> str uma única vez: charset do header, senão UTF-8 e, se inválido, cp1252."""
+    if charset:
+        try:
+            return corpo.decode(charset, errors='replace')
+        except LookupError:
+            pass
+    try:
+        return corpo.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return corpo.decode('cp1252', errors='replace')
+
+
+def _eh_utf8(charset: Optional[str]) -> bool:
+    return charset is None or charset.replace('_', '-') in ('utf-8', 'utf8')
+
+
+def decodificar_json(corpo: bytes, charset: Optional[str] = None) -> Any:
+    """
+    JSON direto dos bytes (orjson quando instalado). Valores que o orjson recusa mas o json da
+    biblioteca padrão aceita (NaN, inteiros acima de 64 bits) caem no json. Levanta ValueError.
+    """
+    if not _eh_utf8(charset):
+        return json.loads(decodificar_texto(corpo, charset))
+    if corpo.startswith(_BOM_UTF8):
+        corpo = corpo[len(_BOM_UTF8):]
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(corpo)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(corpo)
+
+
+def decodificar_corpo(corpo: Optional[bytes], content_type: Optional[str]) -> Tuple[str, Any, Optional[str]]:
+    """
+    Decodifica o corpo da API externa uma única vez, conforme o Content-Type.
+
+    Retorna (formato, dados, texto): em JSON, `dados` é o objeto e `texto` é None; em HTML e
+    texto, `texto` é o corpo decodificado. JSON inválido (ou `null`) é tratado como texto,
+    como HTML se parecer HTML.
+    """
+    corpo = corpo or b''
+    _, charset = separar_content_type(content_type)
+    formato = classificar(content_type, corpo)
+    if formato == JSON:
+        try:
+            dados = decodificar_json(corpo, charset)
+        except ValueError:
+            dados = None
+        if dados is not None:
+            return JSON, dados, None
+        formato = HTML if farejar(corpo) == HTML else TEXTO
+    return formato, None, decodificar_texto(corpo, charset)
+
+
+__all__ = [
+    'HTML',
+    'JSON',
+    'ORJSON_AVAILABLE',
+    'TEXTO',
+    'classificar',
+    'decodificar_corpo',
+    'decodificar_json',
+    'decodificar_texto',
+    'farejar',
+    'separar_content_type',
+]
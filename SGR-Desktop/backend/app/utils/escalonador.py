@@ -0,0 +1,257 @@
+import contextvars
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Hashable, Iterator, Optional
+
+from ..config import ESCALONADOR_ROTAS
+from .metricas import metricas
+
+# Classes de prioridade, da mais urgente para a menos: escritas (PUT de status, POST, DELETE),
+# listagens (pedidos, cardápio, perfil) e consultas pesadas (analytics, avaliações).
+PRIORIDADES = ('interativa', 'listagem', 'analytics')
+
+# Prioridade dos GETs da rota atual (ESCALONADOR_ROTAS); None fora de uma requisição Flask.
+_prioridade: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('prioridade', default=None)
+
+
+class _Ocupacao:
+    """Vaga ocupada por `vaga()` no contexto atual, para `sem_vaga()` devolvê-la temporariamente."""
+
+    __slots__ = ('escalonador', 'prioridade', 'restaurante', 'ocupada')
+
+    def __init__(self, escalonador: 'EscalonadorUpstream', prioridade: str, restaurante: Optional[Hashable]) -> None:
+        self.escalonador = escalonador
+        self.prioridade = prioridade
+        self.restaurante = restaurante
+        self.ocupada = True
+
+
+_ocupacao: contextvars.ContextVar[Optional[_Ocupacao]] = contextvars.ContextVar('ocupacao_escalonador', default=None)
+
+
+def prioridade_da_rota(method: str, caminho: str) -> str:
+    """Rotas de escrita são interativas; GETs usam o prefixo mais longo de ESCALONADOR_ROTAS (padrão: listagem)."""
+    if method not in ('GET', 'HEAD', 'OPTIONS'):
+        return 'interativa'
+    relativo = caminho.split('/api/', 1)[-1].strip('/')
+    melhor = None
+    for prefixo in ESCALONADOR_ROTAS:
+        if (relativo == prefixo or relativo.startswith(prefixo + '/')) and (melhor is None or len(prefixo) > len(melhor)):
+            melhor = prefixo
+    prioridade = ESCALONADOR_ROTAS.get(melhor) if melhor is not None else None
+    return prioridade if prioridade in PRIORIDADES else 'listagem'
+
+
+def definir_prioridade(prioridade: Optional[str]) -> contextvars.Token:
+    return _prioridade.set(prioridade)
+
+
+def restaurar_prioridade(token: contextvars.Token) -> None:
+    _prioridade.reset(token)
+
+
+def prioridade_atual(method: str) -> str:
+    """Prioridade de uma chamada à API externa: escrita é sempre interativa; GET herda a da rota."""
+    if method != 'GET':
+        return 'interativa'
+    return _prioridade.get() or 'listagem'
+
+
+class EscalonadorUpstream:
+    """
+    Limita a `limite` as chamadas simultâneas à API externa e ordena a fila por prioridade:
+    uma vaga liberada vai para a classe mais urgente com chamadas esperando e, dentro da classe,
+    para o próximo restaurante no rodízio (cada restaurante tem a própria fila FIFO). Assim uma
+    tela de analytics com vários GETs grandes não passa na frente do PUT de status da cozinha,
+    nem um restaurante monopoliza as vagas dos outros.
+
+    `reserva_interativa` vagas só atendem escritas: mesmo com todas as outras ocupadas por GETs
+    lentos, um PUT de status não espera o fim de um deles. Com `limite` igual ou menor que a
+    reserva, GETs não têm vaga e falham na hora com TimeoutError. A prioridade é estrita (escritas são
+    raras; GETs que esperam demais são limitados pelo prazo da requisição).
+    """
+
+    def __init__(self, limite: int = 0, reserva_interativa: int = 1) -> None:
+        self.limite = limite
+        self.reserva_interativa = reserva_interativa
+        self._em_execucao = 0
+        self._filas: Dict[str, 'OrderedDict[Optional[Hashable], Deque[threading.Event]]'] = {
+            prioridade: OrderedDict() for prioridade in PRIORIDADES
+        }
+        self._tamanhos = dict.fromkeys(PRIORIDADES, 0)
+        self._lock = threading.Lock()
+        self.maior_fila = 0
+        self.atendidas = dict.fromkeys(PRIORIDADES, 0)
+        self.enfileiradas = dict.fromkeys(PRIORIDADES, 0)
+        self.desistencias = dict.fromkeys(PRIORIDADES, 0)
+        self._espera_total = dict.fromkeys(PRIORIDADES, 0.0)
+
+    @property
+    def ativo(self) -> bool:
+        return self.limite > 0
+
+    def _vagas(self, prioridade: str) -> int:
+        if prioridade == 'interativa':
+            return self.limite
+        # A reserva sai do limite primeiro; se não sobrar nada, só escritas passam.
+        reserva = min(self.reserva_interativa, self.limite)
+        return self.limite - reserva
+
+    def _despachar(self) -> None:
+        """Entrega as vagas livres às filas, na ordem de prioridade e em rodízio de restaurantes (sob o lock)."""
+        for prioridade in PRIORIDADES:
+            fila = self._filas[prioridade]
+            while fila and self._em_execucao < self._vagas(prioridade):
+                restaurante, eventos = next(iter(fila.items()))
+                evento = eventos.popleft()
+                if eventos:
+                    fila.move_to_end(restaurante)
+                else:
+                    del fila[restaurante]
+                self._tamanhos[prioridade] -= 1
+                self._em_execucao += 1
+                evento.set()
+            if fila:
+                return
+
+    def _entrar(self, prioridade: str, restaurante: Optional[Hashable], espera: Optional[float]) -> float:
+        """Ocupa uma vaga e devolve os segundos na fila; TimeoutError se `espera` acabar antes."""
+        inicio = time.perf_counter()
+        indice = PRIORIDADES.index(prioridade)
+        with self._lock:
+            vagas = self._vagas(prioridade)
+            if not vagas:
+                # Limite todo reservado a escritas: esperar na fila não adiantaria.
+                self.desistencias[prioridade] += 1
+                raise TimeoutError('nenhuma vaga para a classe (limite reservado a escritas)')
+            na_fila = sum(self._tamanhos.values())
+            livre = self._em_execucao < vagas
+            if livre and not any(self._tamanhos[anterior] for anterior in PRIORIDADES[:indice + 1]):
+                self._em_execucao += 1
+                evento = None
+            else:
+                evento = threading.Event()
+                self._filas[prioridade].setdefault(restaurante, deque()).append(evento)
+                self._tamanhos[prioridade] += 1
+                self.enfileiradas[prioridade] += 1
+                self.maior_fila = max(self.maior_fila, na_fila + 1)
+        metricas.observar('sgr_escalonador_fila', na_fila, prioridade=prioridade)
+
+        if evento is not None and not evento.wait(None if espera is None else max(0.0, espera)):
+            with self._lock:
+                if not evento.is_set():
+                    eventos = self._filas[prioridade][restaurante]
+                    eventos.remove(evento)
+                    if not eventos:
+                        del self._filas[prioridade][restaurante]
+                    self._tamanhos[prioridade] -= 1
+                    self.desistencias[prioridade] += 1
+                    self._despachar()
+                    raise TimeoutError('tempo de espera por uma vaga esgotado')
+
+        esperou = time.perf_counter() - inicio
+        with self._lock:
+            self.atendidas[prioridade] += 1
+            self._espera_total[prioridade] += esperou
+        metricas.observar('sgr_escalonador_espera_segundos', esperou, prioridade=prioridade)
+        return esperou
+
+    def _sair(self) -> None:
+        with self._lock:
+            self._em_execucao -= 1
+            self._despachar()
+
+    def ocupar_livre(self, prioridade: str, restaurante: Optional[Hashable] = None) -> Optional[Callable[[], None]]:
+        """
+        Ocupa uma vaga só se houver uma livre agora, sem furar a fila; devolve a função que a
+        libera, ou None. Para chamadas extras e dispensáveis (hedge). Desativado, sempre consegue.
+        """
+        if not self.ativo:
+            return lambda: None
+        indice = PRIORIDADES.index(prioridade)
+        with self._lock:
+            if self._em_execucao >= self._vagas(prioridade):
+                return None
+            if any(self._tamanhos[anterior] for anterior in PRIORIDADES[:indice + 1]):
+                return None
+            self._em_execucao += 1
+            self.atendidas[prioridade] += 1
+        return self._sair
+
+    @contextmanager
+    def vaga(
+        self,
+        prioridade: str,
+        restaurante: Optional[Hashable] = None,
+        espera: Optional[float] = None,
+    ) -> Iterator[float]:
+        """
+        Bloco executado com uma vaga ocupada; devolve os segundos na fila. `espera` limita quanto
+        a chamada aguarda na fila (prazo da requisição); esgotado, levanta TimeoutError.
+        Desativado (`limite` 0), entra direto.
+        """
+        if not self.ativo:
+            yield 0.0
+            return
+        esperou = self._entrar(prioridade, restaurante, espera)
+        ocupacao = _Ocupacao(self, prioridade, restaurante)
+        token = _ocupacao.set(ocupacao)
+        try:
+            yield esperou
+        finally:
+            _ocupacao.reset(token)
+            if ocupacao.ocupada:
+                self._sair()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'ativo': self.ativo,
+                'limite': self.limite,
+                'reserva_interativa': self.reserva_interativa,
+                'em_execucao': self._em_execucao,
+                'fila': dict(self._tamanhos),
+                'restaurantes_na_fila': {prioridade: len(fila) for prioridade, fila in self._filas.items()},
+                'maior_fila': self.maior_fila,
+                'atendidas': dict(self.atendidas),
+                'enfileiradas': dict(self.enfileiradas),
+                'desistencias': dict(self.desistencias),
+                'espera_media_ms': {
+                    prioridade: round(self._espera_total[prioridade] / atendidas * 1000, 2) if atendidas else None
+                    for prioridade, atendidas in self.atendidas.items()
+                },
+            }
+
+
+@contextmanager
+def sem_vaga(espera: Callable[[], Optional[float]] = lambda: None) -> Iterator[None]:
+    """
+    Devolve durante o bloco a vaga ocupada por `vaga()` no contexto atual (espera entre
+    tentativas, por exemplo) e volta à fila, com a mesma prioridade, ao sair. `espera()` é
+    consultada na saída; se a nova espera na fila a esgotar, levanta TimeoutError e a vaga fica
+    devolvida. Fora de `vaga()`, não faz nada.
+    """
+    ocupacao = _ocupacao.get()
+    if ocupacao is None or not ocupacao.ocupada:
+        yield
+        return
+    ocupacao.ocupada = False
+    ocupacao.escalonador._sair()
+    try:
+        yield
+    finally:
+        ocupacao.escalonador._entrar(ocupacao.prioridade, ocupacao.restaurante, espera())
+        ocupacao.ocupada = True
+
+
+__all__ = [
+    'PRIORIDADES',
+    'EscalonadorUpstream',
+    'definir_prioridade',
+    'prioridade_atual',
+    'prioridade_da_rota',
+    'restaurar_prioridade',
+    'sem_vaga',
+]
@@ -0,0 +1,269 @@
+import contextvars
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, Optional, Tuple
+
+import requests
+
+from .metricas import rotulo_endpoint
+from .retentativas import STATUS_RETENTAVEIS
+
+# Latências observadas antes de o limiar de um endpoint valer; até lá, nenhum hedge.
+AMOSTRAS_MINIMAS = 20
+
+# Resultado de uma tentativa: (0 = original, 1 = hedge), resposta, exceção.
+_Resultado = Tuple[int, Optional[requests.Response], Optional[BaseException]]
+
+# Ocupa uma vaga extra para o hedge e devolve a função que a libera, ou None se não houver vaga.
+_Vaga = Callable[[], Optional[Callable[[], None]]]
+
+# Sinal de descarte da tentativa que roda na thread atual; None fora das threads de hedge.
+_descarte: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar('descarte_hedge', default=None)
+
+
+def tentativa_descartada() -> bool:
+    """True na tentativa que perdeu o hedge: o resultado vai fora, então ela não registra nada."""
+    descarte = _descarte.get()
+    return descarte is not None and descarte.is_set()
+
+
+class _Latencias:
+    __slots__ = ('amostras', 'limiar', 'desatualizado')
+
+    def __init__(self, janela: int) -> None:
+        self.amostras: Deque[float] = deque(maxlen=janela)
+        self.limiar: Optional[float] = None
+        self.desatualizado = False
+
+
+class PoliticaHedge:
+    """
+    Hedging de GETs em endpoints selecionados: se a chamada não voltou até o limiar do endpoint,
+    uma segunda chamada idêntica sai em paralelo e vale a que terminar primeiro.
+
+    O limiar é o quantil `quantil` das últimas `janela` latências do endpoint (nunca menos que
+    `atraso_minimo`), então acompanha a API em vez de depender de um número fixo. A taxa de hedges
+    é limitada por um balde de fichas: cada GET elegível rende `taxa_maxima` ficha (até `rajada`)
+    e cada hedge gasta uma, de modo que no máximo ~`taxa_maxima` das chamadas dobram a carga.
+    A chamada perdedora não é cancelada; termina sozinha (dentro do próprio timeout) e é descartada:
+    a partir da escolha da vencedora, `tentativa_descartada()` fica True na thread dela, e a
+    chamada deixa de registrar métricas e latências (a da original lenta entra aqui, como o
+    tempo até a escolha).
+
+    `vaga` (opcional) reserva a vaga extra do hedge no limite de chamadas simultâneas: sem vaga
+    livre, não há hedge. A vaga extra fica ocupada até as duas tentativas terminarem, já que a
+    perdedora segue em voo depois que a requisição devolve a própria vaga.
+    """
+
+    def __init__(
+        self,
+        endpoints: Iterable[str] = (),
+        quantil: float = 0.9,
+        janela: int = 200,
+        atraso_minimo: float = 0.05,
+        taxa_maxima: float = 0.1,
+        rajada: float = 3.0,
+    ) -> None:
+        self.endpoints = frozenset(endpoint.strip('/') for endpoint in endpoints)
+        self.quantil = quantil
+        self.janela = janela
+        self.atraso_minimo = atraso_minimo
+        self.taxa_maxima = taxa_maxima
+        self.rajada = rajada
+        self._fichas = rajada
+        self._latencias: Dict[str, _Latencias] = {}
+        self._contagens = {
+            'elegiveis': 0, 'hedges': 0, 'vencedores': 0, 'negados_pela_taxa': 0, 'negados_sem_vaga': 0,
+        }
+        self._lock = threading.Lock()
+
+    @property
+    def ativo(self) -> bool:
+        return bool(self.endpoints) and self.taxa_maxima > 0
+
+    def elegivel(self, method: str, endpoint_api: str) -> bool:
+        return self.ativo and method == 'GET' and rotulo_endpoint(endpoint_api) in self.endpoints
+
+    def registrar_latencia(self, rotulo: str, segundos: float) -> None:
+        with self._lock:
+            latencias = self._latencias.get(rotulo)
+            if latencias is None:
+                latencias = self._latencias[rotulo] = _Latencias(self.janela)
+            latencias.amostras.append(segundos)
+            latencias.desatualizado = True
+
+    def limiar(self, rotulo: str) -> Optional[float]:
+        """Segundos de espera antes do hedge; None enquanto o endpoint tem poucas amostras."""
+        with self._lock:
+            latencias = self._latencias.get(rotulo)
+            if latencias is None or len(latencias.amostras) < AMOSTRAS_MINIMAS:
+                return None
+            if latencias.desatualizado:
+                ordenadas = sorted(latencias.amostras)
+                posicao = min(len(ordenadas) - 1, int(self.quantil * len(ordenadas)))
+                latencias.limiar = max(self.atraso_minimo, ordenadas[posicao])
+                latencias.desatualizado = False
+            return latencias.limiar
+
+    def _reservar_hedge(self, vaga: Optional[_Vaga]) -> Optional[Callable[[], None]]:
+        """Gasta uma ficha e ocupa a vaga extra; devolve a função que libera a vaga, ou None (sem hedge)."""
+        with self._lock:
+            if self._fichas < 1:
+                self._contagens['negados_pela_taxa'] += 1
+                return None
+            self._fichas -= 1
+        liberar = vaga() if vaga is not None else (lambda: None)
+        with self._lock:
+            if liberar is None:
+                self._fichas += 1
+                self._contagens['negados_sem_vaga'] += 1
+                return None
+            self._contagens['hedges'] += 1
+        return liberar
+
+    def executar(
+        self,
+        chamada: Callable[[], requests.Response],
+        endpoint_api: str,
+        vaga: Optional[_Vaga] = None,
+    ) -> requests.Response:
+        """
+        Executa `chamada` com hedge. Uma tentativa que falha (exceção ou 502/503/504) só é usada
+        se a outra também falhar; se ambas falharem, vale o resultado da original.
+        """
+        rotulo = rotulo_endpoint(endpoint_api)
+        with self._lock:
+            self._contagens['elegiveis'] += 1
+            self._fichas = min(self.rajada, self._fichas + self.taxa_maxima)
+        limiar = self.limiar(rotulo)
+        if limiar is None:
+            inicio = time.perf_counter()
+            response = chamada()
+            self.registrar_latencia(rotulo, time.perf_counter() - inicio)
+            return response
+
+        resultados: 'queue.Queue[_Resultado]' = queue.Queue()
+        descartes = (threading.Event(), threading.Event())
+        em_voo = _EmVoo()
+        inicio = time.perf_counter()
+        self._disparar(chamada, rotulo, 0, resultados, descartes[0], em_voo)
+        pendentes = 1
+        try:
+            resultado = resultados.get(timeout=limiar)
+        except queue.Empty:
+            liberar = self._reservar_hedge(vaga)
+            if liberar is not None:
+                em_voo.ao_terminar(liberar)
+                self._disparar(chamada, rotulo, 1, resultados, descartes[1], em_voo)
+                pendentes = 2
+            resultado = resultados.get()
+        pendentes -= 1
+
+        if pendentes and _falhou(resultado):
+            outro = resultados.get()
+            pendentes -= 1
+            if not _falhou(outro):
+                resultado = outro
+            elif resultado[0] == 1:
+                resultado = outro
+        if pendentes:
+            perdedora = 1 - resultado[0]
+            descartes[perdedora].set()
+            if perdedora == 0:
+                # A original ainda não voltou: a latência dela é pelo menos o tempo até aqui.
+                self.registrar_latencia(rotulo, time.perf_counter() - inicio)
+        if resultado[0] == 1:
+            with self._lock:
+                self._contagens['vencedores'] += 1
+
+        _, response, erro = resultado
+        if erro is not None:
+            raise erro
+        return response
+
+    def _disparar(
+        self,
+        chamada: Callable[[], requests.Response],
+        rotulo: str,
+        indice: int,
+        resultados: 'queue.Queue[_Resultado]',
+        descarte: threading.Event,
+        em_voo: '_EmVoo',
+    ) -> None:
+        em_voo.entrar()
+
+        def rodar() -> None:
+            _descarte.set(descarte)
+            inicio = time.perf_counter()
+            try:
+                response = chamada()
+            except BaseException as exc:
+                em_voo.sair()
+                resultados.put((indice, None, exc))
+                return
+            if not descarte.is_set():
+                self.registrar_latencia(rotulo, time.perf_counter() - inicio)
+            em_voo.sair()
+            resultados.put((indice, response, None))
+
+        # Prazo, sessão forçada e fases da requisição seguem para a thread da tentativa.
+        contexto = contextvars.copy_context()
+        threading.Thread(target=contexto.run, args=(rodar,), name=f'hedge-{rotulo}-{indice}', daemon=True).start()
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._latencias.clear()
+            self._fichas = self.rajada
+            self._contagens = dict.fromkeys(self._contagens, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        rotulos = sorted(self.endpoints)
+        limiares = {rotulo: self.limiar(rotulo) for rotulo in rotulos}
+        with self._lock:
+            return {
+                'endpoints': {
+                    rotulo: {
+                        'amostras': len(self._latencias[rotulo].amostras) if rotulo in self._latencias else 0,
+                        'limiar_ms': round(limiares[rotulo] * 1000, 1) if limiares[rotulo] is not None else None,
+                    }
+                    for rotulo in rotulos
+                },
+                'taxa_maxima': self.taxa_maxima,
+                **self._contagens,
+            }
+
+
+class _EmVoo:
+    """Tentativas de um hedge ainda em andamento; a última a terminar libera a vaga extra."""
+
+    __slots__ = ('_tentativas', '_liberar', '_lock')
+
+    def __init__(self) -> None:
+        self._tentativas = 0
+        self._liberar: Optional[Callable[[], None]] = None
+        self._lock = threading.Lock()
+
+    def entrar(self) -> None:
+        with self._lock:
+            self._tentativas += 1
+
+    def ao_terminar(self, liberar: Callable[[], None]) -> None:
+        with self._lock:
+            self._liberar = liberar
+
+    def sair(self) -> None:
+        with self._lock:
+            self._tentativas -= 1
+            liberar = self._liberar if self._tentativas == 0 else None
+        if liberar is not None:
+            liberar()
+
+
+def _falhou(resultado: _Resultado) -> bool:
+    _, response, erro = resultado
+    return erro is not None or response is None or response.status_code in STATUS_RETENTAVEIS
+
+
+__all__ = ['AMOSTRAS_MINIMAS', 'PoliticaHedge', 'tentativa_descartada']
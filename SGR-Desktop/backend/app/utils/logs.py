@@ -0,0 +1,132 @@
+import atexit
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Tuple
+
+from ..config import LOG_AMOSTRAGEM_JANELA, LOG_LEVEL
+
+LOGGER_RAIZ = 'sgr'
+FORMATO = '%(asctime)s %(levelname)-7s %(message)s'
+
+_listener: Optional[QueueListener] = None
+_config_lock = threading.Lock()
+
+
+class _SaidaPadraoHandler(logging.StreamHandler):
+    """Escreve no `sys.stdout` atual (o app.py troca o stdout por um wrapper UTF-8 no Windows)."""
+
+    def __init__(self) -> None:
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self) -> Any:
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, _valor: Any) -> None:
+        pass
+
+
+class _FilaHandler(QueueHandler):
+    """
+    Enfileira o registro sem formatá-lo: a mensagem (%-args) e o traceback são montados pela
+    thread escritora. A fila é do próprio processo, então o registro não precisa ser serializável.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def obter_logger(nome: str) -> logging.Logger:
+    """Logger do backend (`sgr.<nome>`); a saída vai para a thread escritora após `configurar_logs`."""
+    return logging.getLogger(f'{LOGGER_RAIZ}.{nome}')
+
+
+def configurar_logs(nivel: str = LOG_LEVEL, handler: Optional[logging.Handler] = None) -> QueueListener:
+    """
+    Liga os loggers `sgr.*` a uma fila atendida por uma thread escritora, de modo que a escrita no
+    stdout nunca bloqueie uma requisição. Idempotente: chamadas seguintes só ajustam o nível.
+    """
+    global _listener
+    raiz = logging.getLogger(LOGGER_RAIZ)
+    raiz.setLevel(getattr(logging, str(nivel).upper(), logging.INFO))
+
+    with _config_lock:
+        if _listener is not None:
+            return _listener
+
+        saida = handler or _SaidaPadraoHandler()
+        if saida.formatter is None:
+            saida.setFormatter(logging.Formatter(FORMATO, datefmt='%H:%M:%S'))
+
+        fila: 'queue.SimpleQueue[logging.LogRecord]' = queue.SimpleQueue()
+        raiz.addHandler(_FilaHandler(fila))
+        raiz.propagate = False
+
+        _listener = QueueListener(fila, saida, respect_handler_level=True)
+        _listener.start()
+        atexit.register(encerrar_logs)
+        return _listener
+
+
+def encerrar_logs() -> None:
+    """Esvazia a fila e para a thread escritora."""
+    global _listener
+    with _config_lock:
+        listener, _listener = _listener, None
+    if listener is None:
+        return
+    listener.stop()
+    raiz = logging.getLogger(LOGGER_RAIZ)
+    for handler in list(raiz.handlers):
+        if isinstance(handler, _FilaHandler):
+            raiz.removeHandler(handler)
+
+
+class Amostragem:
+    """
+    Limita mensagens repetitivas a uma por janela de tempo e por chave. A próxima mensagem
+    emitida informa quantas foram suprimidas desde a anterior.
+    """
+
+    def __init__(self, janela: float = LOG_AMOSTRAGEM_JANELA) -> None:
+        self.janela = janela
+        self._estado: Dict[Any, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def liberar(self, chave: Any) -> Optional[int]:
+        """Número de ocorrências suprimidas desde a última liberada, ou None se ainda dentro da janela."""
+        agora = time.monotonic()
+        with self._lock:
+            ultima, suprimidas = self._estado.get(chave, (None, 0))
+            if ultima is not None and agora - ultima < self.janela:
+                self._estado[chave] = (ultima, suprimidas + 1)
+                return None
+            self._estado[chave] = (agora, 0)
+            return suprimidas
+
+    def registrar(self, logger: logging.Logger, chave: Any, nivel: int, mensagem: str, *args: Any) -> bool:
+        if not logger.isEnabledFor(nivel):
+            return False
+        suprimidas = self.liberar(chave)
+        if suprimidas is None:
+            return False
+        if suprimidas:
+            mensagem = f'{mensagem} (+%d ocorrências suprimidas)'
+            args = (*args, suprimidas)
+        logger.log(nivel, mensagem, *args)
+        return True
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._estado.clear()
+
+
+amostragem = Amostragem()
+
+
+__all__ = ['LOGGER_RAIZ', 'Amostragem', 'amostragem', 'configurar_logs', 'encerrar_logs', 'obter_logger']
@@ -0,0 +1,286 @@
+import bisect
+import contextvars
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from flask.json.provider import DefaultJSONProvider
+
+from ..config import METRICAS_ATIVAS
+
+LIMITES_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LIMITES_BYTES = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+LIMITES_TENTATIVAS = (1, 2, 3, 4, 5, 8)
+LIMITES_FILA = (0, 1, 2, 4, 8, 16, 32, 64)
+
+# Nome -> (descrição, limites dos buckets). Rótulos: endpoint (mapeado na API externa, ids
+# trocados por {id}), status (classe: 2xx, 4xx, 5xx ou erro), rota (regra do Flask), fase,
+# resultado (ok ou falha após as retentativas), prioridade (classe do escalonador).
+METRICAS: Dict[str, Tuple[str, Sequence[float]]] = {
+    'sgr_upstream_espera_segundos': ('Espera pela API externa (envio até o corpo baixado)', LIMITES_SEGUNDOS),
+    'sgr_upstream_corpo_bytes': ('Tamanho do corpo recebido da API externa', LIMITES_BYTES),
+    'sgr_upstream_tentativas': ('Chamadas à API externa por chamada idempotente (1 = sem retentativa)', LIMITES_TENTATIVAS),
+    'sgr_escalonador_espera_segundos': ('Espera por uma vaga no escalonador de chamadas à API externa', LIMITES_SEGUNDOS),
+    'sgr_escalonador_fila': ('Chamadas na fila do escalonador quando cada chamada chega', LIMITES_FILA),
+    'sgr_decodificacao_segundos': ('Decodificação da resposta da API externa (JSON, HTML ou texto)', LIMITES_SEGUNDOS),
+    'sgr_rota_segundos': ('Duração total da rota Flask', LIMITES_SEGUNDOS),
+    'sgr_rota_fase_segundos': (
+        'Duração de cada fase da rota (upstream, decodificacao, normalizacao, agregacao, serializacao)', LIMITES_SEGUNDOS,
+    ),
+}
+
+# Fases de uma rota, na ordem do header Server-Timing. `agregacao` é o tempo local restante.
+FASES_ROTA = ('upstream', 'decodificacao', 'normalizacao', 'agregacao', 'serializacao')
+DESCRICOES_FASES = {
+    'upstream': 'API externa',
+    'decodificacao': 'JSON/HTML da API',
+    'normalizacao': 'Normalizacao de pedidos',
+    'agregacao': 'Processamento local',
+    'serializacao': 'jsonify',
+}
+
+
+class _Medicao:
+    __slots__ = ('fases', 'caches')
+
+    def __init__(self) -> None:
+        self.fases: Dict[str, float] = {}
+        self.caches: Dict[str, str] = {}
+
+
+# Fases e caches consultados na requisição atual; None fora de uma requisição Flask.
+_medicao: contextvars.ContextVar[Optional[_Medicao]] = contextvars.ContextVar('medicao', default=None)
+
+_RE_ID = re.compile(r'(?<=/)\d+(?=/|$)|^\d+(?=/|$)')
+
+
+class Histograma:
+    """Contagens por bucket (limite superior inclusivo, como o `le` do Prometheus), soma e total."""
+
+    __slots__ = ('limites', 'contagens', 'soma', 'total')
+
+    def __init__(self, limites: Sequence[float]) -> None:
+        self.limites = tuple(limites)
+        self.contagens = [0] * (len(self.limites) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float) -> None:
+        self.contagens[bisect.bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def acumulados(self) -> List[int]:
+        acumulado, saida = 0, []
+        for contagem in self.contagens:
+            acumulado += contagem
+            saida.append(acumulado)
+        return saida
+
+    def quantil(self, q: float) -> Optional[float]:
+        """Estimativa por interpolação linear dentro do bucket (como `histogram_quantile`)."""
+        if not self.total:
+            return None
+        alvo = q * self.total
+        anterior, inferior = 0, 0.0
+        for limite, acumulado in zip(self.limites, self.acumulados()):
+            if acumulado >= alvo:
+                dentro = acumulado - anterior
+                return inferior + (limite - inferior) * ((alvo - anterior) / dentro if dentro else 1.0)
+            anterior, inferior = acumulado, limite
+        return self.limites[-1] if self.limites else None
+
+
+class RegistroMetricas:
+    """
+    Histogramas por (métrica, rótulos). `observar` custa uma busca binária e um lock curto;
+    a exportação copia as séries sob o lock e formata fora dele.
+    """
+
+    def __init__(self, definicoes: Dict[str, Tuple[str, Sequence[float]]] = METRICAS, ativo: bool = METRICAS_ATIVAS) -> None:
+        self.definicoes = definicoes
+        self.ativo = ativo
+        self._series: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histograma] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, nome: str, valor: float, **rotulos: Any) -> None:
+        if not self.ativo:
+            return
+        chave = (nome, tuple((rotulo, str(valor_rotulo)) for rotulo, valor_rotulo in rotulos.items()))
+        with self._lock:
+            histograma = self._series.get(chave)
+            if histograma is None:
+                histograma = self._series[chave] = Histograma(self.definicoes[nome][1])
+            histograma.observar(valor)
+
+    def _copiar(self) -> List[Tuple[str, Tuple[Tuple[str, str], ...], Histograma]]:
+        with self._lock:
+            copias = []
+            for (nome, rotulos), histograma in self._series.items():
+                copia = Histograma(histograma.limites)
+                copia.contagens, copia.soma, copia.total = list(histograma.contagens), histograma.soma, histograma.total
+                copias.append((nome, rotulos, copia))
+        return sorted(copias, key=lambda serie: (serie[0], serie[1]))
+
+    def exportar_prometheus(self) -> str:
+        """Formato texto do Prometheus (version 0.0.4)."""
+        linhas: List[str] = []
+        atual = None
+        for nome, rotulos, histograma in self._copiar():
+            if nome != atual:
+                atual = nome
+                linhas.append(f'# HELP {nome} {self.definicoes[nome][0]}')
+                linhas.append(f'# TYPE {nome} histogram')
+            base = ','.join(f'{rotulo}="{_escapar(valor)}"' for rotulo, valor in rotulos)
+            separador = ',' if base else ''
+            for limite, acumulado in zip((*histograma.limites, '+Inf'), histograma.acumulados()):
+                le = limite if isinstance(limite, str) else f'{limite:g}'
+                linhas.append(f'{nome}_bucket{{{base}{separador}le="{le}"}} {acumulado}')
+            sufixo = f'{{{base}}}' if base else ''
+            linhas.append(f'{nome}_sum{sufixo} {histograma.soma:.6f}')
+            linhas.append(f'{nome}_count{sufixo} {histograma.total}')
+        return '\n'.join(linhas) + '\n'
+
+    def exportar_json(self) -> Dict[str, Any]:
+        """Por métrica, cada série com rótulos, contagem, soma, média, p50/p95/p99 estimados e buckets [le, acumulado]."""
+        saida: Dict[str, Any] = {}
+        for nome, rotulos, histograma in self._copiar():
+            metrica = saida.setdefault(nome, {'descricao': self.definicoes[nome][0], 'series': []})
+            metrica['series'].append({
+                'rotulos': dict(rotulos),
+                'contagem': histograma.total,
+                'soma': round(histograma.soma, 6),
+                'media': round(histograma.soma / histograma.total, 6) if histograma.total else None,
+                'p50': _arredondar(histograma.quantil(0.5)),
+                'p95': _arredondar(histograma.quantil(0.95)),
+                'p99': _arredondar(histograma.quantil(0.99)),
+                'buckets': [
+                    ['+Inf' if limite is None else f'{limite:g}', acumulado]
+                    for limite, acumulado in zip((*histograma.limites, None), histograma.acumulados())
+                ],
+            })
+        return saida
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _arredondar(valor: Optional[float]) -> Optional[float]:
+    return None if valor is None else round(valor, 6)
+
+
+@lru_cache(maxsize=1024)
+def rotulo_endpoint(endpoint: str) -> str:
+    """Endpoint da API externa sem query string e com ids numéricos trocados por {id}."""
+    return _RE_ID.sub('{id}', endpoint.split('?', 1)[0].strip('/')) or '/'
+
+
+def classe_status(status_code: Optional[int]) -> str:
+    return f'{status_code // 100}xx' if status_code else 'erro'
+
+
+def iniciar_fases() -> contextvars.Token:
+    return _medicao.set(_Medicao())
+
+
+def encerrar_fases(token: contextvars.Token) -> None:
+    _medicao.reset(token)
+
+
+def registrar_fase(fase: str, segundos: float) -> None:
+    """Soma `segundos` à fase da requisição atual (sem efeito fora de uma requisição)."""
+    medicao = _medicao.get()
+    if medicao is not None:
+        medicao.fases[fase] = medicao.fases.get(fase, 0.0) + segundos
+
+
+@contextmanager
+def medir_fase(fase: str) -> Iterator[None]:
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar_fase(fase, time.perf_counter() - inicio)
+
+
+def registrar_cache(nome: str, acerto: bool) -> None:
+    """Marca o cache `nome` como hit ou miss na requisição atual; um miss prevalece."""
+    medicao = _medicao.get()
+    if medicao is not None and medicao.caches.get(nome) != 'miss':
+        medicao.caches[nome] = 'hit' if acerto else 'miss'
+
+
+def tempo_fase(fase: str) -> float:
+    medicao = _medicao.get()
+    return medicao.fases.get(fase, 0.0) if medicao else 0.0
+
+
+def fases_atuais() -> Dict[str, float]:
+    medicao = _medicao.get()
+    return dict(medicao.fases) if medicao else {}
+
+
+def caches_atuais() -> Dict[str, str]:
+    medicao = _medicao.get()
+    return dict(medicao.caches) if medicao else {}
+
+
+def fases_da_rota(total: float) -> Dict[str, float]:
+    """Todas as FASES_ROTA da requisição atual, com `agregacao` = `total` menos as demais."""
+    fases = fases_atuais()
+    medidas = sum(fases.get(fase, 0.0) for fase in FASES_ROTA if fase != 'agregacao')
+    fases['agregacao'] = max(fases.get('agregacao', 0.0), total - medidas)
+    return {fase: fases.get(fase, 0.0) for fase in FASES_ROTA}
+
+
+def cabecalho_server_timing(fases: Dict[str, float], total: float, caches: Optional[Dict[str, str]] = None) -> str:
+    """Valor do header Server-Timing: fases e total em ms, e um item `cache-<nome>` por cache consultado."""
+    itens = [
+        f'{fase};dur={segundos * 1000:.2f};desc="{DESCRICOES_FASES.get(fase, fase)}"'
+        for fase, segundos in fases.items()
+    ]
+    itens.append(f'total;dur={total * 1000:.2f}')
+    itens.extend(f'cache-{nome};desc="{estado}"' for nome, estado in sorted((caches or {}).items()))
+    return ', '.join(itens)
+
+
+class JSONProviderMedido(DefaultJSONProvider):
+    """Provider JSON do Flask que contabiliza o tempo de `jsonify` na fase `serializacao`."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        inicio = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            registrar_fase('serializacao', time.perf_counter() - inicio)
+
+
+metricas = RegistroMetricas()
+
+__all__ = [
+    'FASES_ROTA',
+    'Histograma',
+    'JSONProviderMedido',
+    'RegistroMetricas',
+    'cabecalho_server_timing',
+    'caches_atuais',
+    'classe_status',
+    'encerrar_fases',
+    'fases_atuais',
+    'fases_da_rota',
+    'iniciar_fases',
+    'medir_fase',
+    'metricas',
+    'registrar_cache',
+    'registrar_fase',
+    'rotulo_endpoint',
+    'tempo_fase',
+]
@@ -0,0 +1,169 @@
+import logging
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+from .deadline import TIMEOUT_MINIMO, tempo_restante
+from .logs import amostragem, obter_logger
+from .metricas import metricas, rotulo_endpoint
+
+logger = obter_logger('utils.retentativas')
+
+# Respostas de API externa fora do ar (ou sobrecarregada) que valem uma nova tentativa.
+STATUS_RETENTAVEIS = frozenset({502, 503, 504})
+
+# PUT que grava um estado absoluto (ex.: pedidos/{id}/status-restaurante): repetir não muda o resultado.
+_RE_PUT_STATUS = re.compile(r'/status[^/]*$')
+
+
+def chamada_idempotente(method: str, endpoint_api: str) -> bool:
+    """GET, DELETE e PUT de status podem ser repetidos; POST e os demais PUTs não."""
+    if method in ('GET', 'DELETE'):
+        return True
+    return method == 'PUT' and bool(_RE_PUT_STATUS.search(endpoint_api.split('?', 1)[0].rstrip('/')))
+
+
+def ler_retry_after(valor: Optional[str], agora: Optional[float] = None) -> Optional[float]:
+    """Header Retry-After (segundos ou data HTTP) em segundos a esperar; None se ausente ou inválido."""
+    if not valor:
+        return None
+    valor = valor.strip()
+    if valor.isdigit():
+        return float(valor)
+    try:
+        instante = parsedate_to_datetime(valor).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+    return max(0.0, instante - (time.time() if agora is None else agora))
+
+
+def _motivo_excecao(exc: BaseException) -> Optional[str]:
+    """Conexão recusada, resetada ou cortada no meio do corpo; SSL e read timeout não se repetem."""
+    if isinstance(exc, requests.exceptions.SSLError):
+        return None
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return 'connect_timeout'
+    if isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError)):
+        return 'conexao'
+    return None
+
+
+class PoliticaRetentativas:
+    """
+    Novas tentativas de uma chamada idempotente à API externa após conexão perdida ou 502/503/504.
+
+    Até `tentativas` chamadas extras, separadas por backoff exponencial com jitter completo
+    (sorteado entre 0 e min(`teto`, `base` * 2^n)). Um Retry-After da resposta é respeitado como
+    espera mínima; acima de `retry_after_maximo` a resposta volta sem nova tentativa. Toda espera
+    sai do prazo da requisição (utils/deadline.py): se não couber mais uma tentativa, desiste.
+    """
+
+    def __init__(
+        self,
+        tentativas: int = 2,
+        base: float = 0.2,
+        teto: float = 2.0,
+        retry_after_maximo: float = 5.0,
+        aleatorio: Callable[[], float] = random.random,
+        dormir: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.tentativas = tentativas
+        self.base = base
+        self.teto = teto
+        self.retry_after_maximo = retry_after_maximo
+        self.aleatorio = aleatorio
+        self.dormir = dormir
+        self._contagens = {'retentativas': 0, 'recuperadas': 0, 'esgotadas': 0, 'desistidas': 0}
+        self._motivos: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ativo(self) -> bool:
+        return self.tentativas > 0
+
+    def espera(self, retentativa: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """Segundos antes da retentativa `retentativa` (0, 1, ...); None se não couber no prazo."""
+        if retry_after is not None and retry_after > self.retry_after_maximo:
+            return None
+        espera = max(self.aleatorio() * min(self.teto, self.base * 2 ** retentativa), retry_after or 0.0)
+        restante = tempo_restante()
+        if restante is not None and espera + TIMEOUT_MINIMO >= restante:
+            return None
+        return espera
+
+    def executar(self, chamada: Callable[[], requests.Response], endpoint_api: str = '') -> requests.Response:
+        """
+        Executa `chamada` repetindo-a conforme a política. Devolve a última resposta ou levanta a
+        última exceção quando as tentativas (ou o prazo) acabam. DeadlineExcedido e demais erros
+        passam direto.
+        """
+        retentativa = 0
+        while True:
+            try:
+                response = chamada()
+            except requests.exceptions.RequestException as exc:
+                motivo = _motivo_excecao(exc)
+                if motivo is None or not self._aguardar(endpoint_api, retentativa, motivo, None):
+                    self._encerrar(endpoint_api, retentativa, False)
+                    raise
+            else:
+                if response.status_code not in STATUS_RETENTAVEIS:
+                    self._encerrar(endpoint_api, retentativa, True)
+                    return response
+                motivo = str(response.status_code)
+                retry_after = ler_retry_after(response.headers.get('Retry-After'))
+                if not self._aguardar(endpoint_api, retentativa, motivo, retry_after):
+                    self._encerrar(endpoint_api, retentativa, False)
+                    return response
+            retentativa += 1
+
+    def _aguardar(self, endpoint_api: str, retentativa: int, motivo: str, retry_after: Optional[float]) -> bool:
+        if retentativa >= self.tentativas:
+            return False
+        espera = self.espera(retentativa, retry_after)
+        if espera is None:
+            with self._lock:
+                self._contagens['desistidas'] += 1
+            logger.info("[RETENTATIVA] %s em %s: sem tempo para nova tentativa (Retry-After %s)", motivo, endpoint_api, retry_after)
+            return False
+        with self._lock:
+            self._contagens['retentativas'] += 1
+            self._motivos[motivo] = self._motivos.get(motivo, 0) + 1
+        amostragem.registrar(
+            logger, ('retentativa', rotulo_endpoint(endpoint_api)), logging.WARNING,
+            "[RETENTATIVA] %s em %s: tentativa %d/%d em %.2fs",
+            motivo, endpoint_api, retentativa + 2, self.tentativas + 1, espera,
+        )
+        if espera > 0:
+            self.dormir(espera)
+        return True
+
+    def _encerrar(self, endpoint_api: str, retentativas: int, sucesso: bool) -> None:
+        if retentativas:
+            with self._lock:
+                self._contagens['recuperadas' if sucesso else 'esgotadas'] += 1
+        metricas.observar(
+            'sgr_upstream_tentativas', retentativas + 1,
+            endpoint=rotulo_endpoint(endpoint_api), resultado='ok' if sucesso else 'falha',
+        )
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._contagens = dict.fromkeys(self._contagens, 0)
+            self._motivos.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'tentativas_extras': self.tentativas,
+                **self._contagens,
+                'motivos': dict(self._motivos),
+            }
+
+
+__all__ = ['STATUS_RETENTAVEIS', 'PoliticaRetentativas', 'chamada_idempotente', 'ler_retry_after']
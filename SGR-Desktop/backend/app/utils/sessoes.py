@@ -0,0 +1,129 @@
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional
+
+import requests
+
+from .cookies import contar_cookie
+
+# Restaurante da requisição atual (path, query, corpo ou X-Restaurante-Id); None = não identificado.
+_restaurante: contextvars.ContextVar[Optional[Hashable]] = contextvars.ContextVar('restaurante', default=None)
+
+# Sessão forçada para as chamadas à API externa do contexto atual (ex.: login em sessão própria).
+_sessao: contextvars.ContextVar[Optional[requests.Session]] = contextvars.ContextVar('sessao', default=None)
+
+
+def normalizar_restaurante(valor: Any) -> Optional[int]:
+    """restaurante_id como int (aceita str numérica); None se ausente ou inválido."""
+    if isinstance(valor, bool):
+        return None
+    try:
+        restaurante_id = int(valor)
+    except (TypeError, ValueError):
+        return None
+    return restaurante_id if restaurante_id > 0 else None
+
+
+def definir_restaurante(restaurante_id: Optional[Hashable]) -> contextvars.Token:
+    return _restaurante.set(restaurante_id)
+
+
+def restaurar_restaurante(token: contextvars.Token) -> None:
+    _restaurante.reset(token)
+
+
+def restaurante_atual() -> Optional[Hashable]:
+    return _restaurante.get()
+
+
+def sessao_forcada() -> Optional[requests.Session]:
+    return _sessao.get()
+
+
+@contextmanager
+def usar_sessao(sessao: requests.Session) -> Iterator[requests.Session]:
+    """Chamadas à API externa dentro do bloco usam `sessao`, qualquer que seja o restaurante."""
+    token = _sessao.set(sessao)
+    try:
+        yield sessao
+    finally:
+        _sessao.reset(token)
+
+
+class RegistroSessoes:
+    """
+    Uma `requests.Session` por restaurante, cada uma com o próprio cookie jar e todas sobre o
+    mesmo pool de conexões (`fabrica` monta o adaptador compartilhado).
+
+    Só restaurantes que fizeram login (`adotar`/`obter_ou_criar`) têm sessão própria; os demais
+    seguem na sessão padrão do proxy. As sessões não são fechadas ao sair do registro: fechar
+    uma delas fecharia o pool de todas.
+    """
+
+    def __init__(self, fabrica: Callable[[], requests.Session]) -> None:
+        self.fabrica = fabrica
+        self._sessoes: Dict[Hashable, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def sessao(self, restaurante_id: Optional[Hashable]) -> Optional[requests.Session]:
+        """Sessão própria do restaurante, ou None se ele não tem uma."""
+        if restaurante_id is None:
+            return None
+        return self._sessoes.get(restaurante_id)
+
+    def obter_ou_criar(self, restaurante_id: Hashable) -> requests.Session:
+        sessao = self._sessoes.get(restaurante_id)
+        if sessao is not None:
+            return sessao
+        with self._lock:
+            sessao = self._sessoes.get(restaurante_id)
+            if sessao is None:
+                sessao = self._sessoes[restaurante_id] = self.fabrica()
+            return sessao
+
+    def nova(self) -> requests.Session:
+        """Sessão avulsa (fora do registro) sobre o mesmo pool, ex.: para um login."""
+        return self.fabrica()
+
+    def adotar(self, restaurante_id: Hashable, sessao: requests.Session) -> None:
+        """Registra `sessao` (com os cookies do login) como a sessão do restaurante."""
+        with self._lock:
+            self._sessoes[restaurante_id] = sessao
+
+    def remover(self, restaurante_id: Hashable) -> Optional[requests.Session]:
+        with self._lock:
+            return self._sessoes.pop(restaurante_id, None)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._sessoes.clear()
+
+    def restaurantes(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._sessoes)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sessoes = dict(self._sessoes)
+        return {
+            'sessoes': len(sessoes),
+            'restaurantes': {
+                str(restaurante_id): {
+                    'cookies': len(sessao.cookies),
+                    'jsessionid': contar_cookie(sessao.cookies, 'JSESSIONID') > 0,
+                }
+                for restaurante_id, sessao in sessoes.items()
+            },
+        }
+
+
+__all__ = [
+    'RegistroSessoes',
+    'definir_restaurante',
+    'normalizar_restaurante',
+    'restaurante_atual',
+    'restaurar_restaurante',
+    'sessao_forcada',
+    'usar_sessao',
+]
@@ -0,0 +1,73 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Chamada:
+    __slots__ = ('evento', 'resultado', 'erro')
+
+    def __init__(self) -> None:
+        self.evento = threading.Event()
+        self.resultado: Any = None
+        self.erro: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas idênticas e simultâneas: a primeira (líder) executa a função,
+    as demais (seguidoras) aguardam e recebem o mesmo resultado ou a mesma exceção.
+    Não há cache: a chave é liberada assim que a chamada do líder termina.
+    """
+
+    def __init__(self) -> None:
+        self.lideres = 0
+        self.coalescidas = 0
+        self._chamadas: Dict[Hashable, _Chamada] = {}
+        self._lock = threading.Lock()
+
+    def do(self, chave: Hashable, funcao: Callable[[], Any], espera: Optional[float] = None) -> Any:
+        """
+        Executa `funcao` como líder ou aguarda o líder em andamento. `espera` limita (em segundos)
+        quanto uma seguidora aguarda; esgotado o tempo, levanta TimeoutError.
+        """
+        with self._lock:
+            chamada = self._chamadas.get(chave)
+            lider = chamada is None
+            if lider:
+                chamada = _Chamada()
+                self._chamadas[chave] = chamada
+                self.lideres += 1
+            else:
+                self.coalescidas += 1
+
+        if not lider:
+            if not chamada.evento.wait(espera):
+                raise TimeoutError('tempo de espera pelo líder esgotado')
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            chamada.resultado = funcao()
+            return chamada.resultado
+        except BaseException as exc:
+            chamada.erro = exc
+            raise
+        finally:
+            with self._lock:
+                self._chamadas.pop(chave, None)
+            chamada.evento.set()
+
+    def em_andamento(self) -> int:
+        with self._lock:
+            return len(self._chamadas)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'lideres': self.lideres,
+                'coalescidas': self.coalescidas,
+                'em_andamento': len(self._chamadas),
+            }
+
+
+__all__ = ['SingleFlight']
@@ -0,0 +1,135 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .logs import obter_logger
+
+try:
+    from lxml import etree
+
+    LXML_AVAILABLE = True
+except ImportError:  # pragma: no cover - depende do ambiente
+    etree = None
+    LXML_AVAILABLE = False
+
+logger = obter_logger('utils.tabela_itens')
+
+TAMANHO_BLOCO = 64 * 1024
+
+
+def _texto(celula: Any) -> str:
+    """Equivalente a `get_text(strip=True)` do BeautifulSoup: cada trecho de texto sem espaços nas pontas."""
+    return ''.join(trecho.strip() for trecho in celula.itertext())
+
+
+def _linha_mais_proxima(elemento: Any, limite: Any) -> Optional[Any]:
+    pai = elemento.getparent()
+    while pai is not None and pai is not limite:
+        if pai.tag == 'tr':
+            return pai
+        pai = pai.getparent()
+    return None
+
+
+def _contem(ancestral: Any, elemento: Any) -> bool:
+    while elemento is not None:
+        if elemento is ancestral:
+            return True
+        elemento = elemento.getparent()
+    return False
+
+
+def item_da_linha(celulas: List[Any]) -> Dict[str, Any]:
+    """Monta o item a partir das células de uma linha: id, nome, preço, restaurante e imagem."""
+    item: Dict[str, Any] = {}
+    texto = _texto(celulas[0])
+    item['id'] = int(texto) if texto.isdigit() else None
+    item['nome'] = _texto(celulas[1])
+    preco_text = _texto(celulas[2]).replace('R$', '').replace(',', '.').strip()
+    try:
+        item['preco'] = float(preco_text)
+    except Exception:
+        item['preco'] = 0.0
+    if len(celulas) > 3:
+        restaurante_cell = _texto(celulas[3])
+        if restaurante_cell.isdigit():
+            item['restaurante_id'] = int(restaurante_cell)
+            item['restaurante'] = {'id': int(restaurante_cell)}
+    if len(celulas) > 4:
+        img_link = next(celulas[4].iter('a'), None)
+        if img_link is not None:
+            item['imagemUrl'] = img_link.get('href', '')
+    return item
+
+
+def _itens_da_linha(linha: Any, tabela: Any) -> Iterator[Dict[str, Any]]:
+    """Itens da linha e das linhas aninhadas nela, em ordem de documento (cada célula na `tr` mais próxima)."""
+    for tr in linha.iter('tr'):
+        celulas = [celula for celula in tr.iter('td', 'th') if _linha_mais_proxima(celula, tabela) is tr]
+        if len(celulas) < 3:
+            continue
+        try:
+            item = item_da_linha(celulas)
+        except Exception as exc:
+            logger.warning("[PARSE] Erro ao parsear linha da tabela: %s", exc)
+            continue
+        if item.get('nome') and item.get('id'):
+            yield item
+
+
+def iterar_itens_tabela(partes: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Extrai os itens de `table#tabelaItens` (ou da primeira tabela, se não houver) a partir de
+    trechos de HTML, emitindo cada item assim que a linha fecha.
+
+    Usa os eventos do `HTMLPullParser` do lxml: cada linha de primeiro nível é descartada da
+    árvore depois de processada, então a memória fica proporcional a uma linha. Itens da
+    primeira tabela só são emitidos no fim do documento, caso `tabelaItens` não apareça.
+    """
+    parser = etree.HTMLPullParser(events=('start', 'end'))
+    alvo = None
+    primeira = None
+    pendentes: List[Dict[str, Any]] = []
+
+    def processar() -> Iterator[Dict[str, Any]]:
+        nonlocal alvo, primeira, pendentes
+        for evento, elemento in parser.read_events():
+            if evento == 'start':
+                if elemento.tag == 'table':
+                    if alvo is None and elemento.get('id') == 'tabelaItens':
+                        alvo = elemento
+                        primeira = None
+                        pendentes = []
+                    elif alvo is None and primeira is None:
+                        primeira = elemento
+                continue
+
+            if elemento.tag != 'tr':
+                if elemento is alvo or elemento is primeira or (alvo is None and primeira is None):
+                    elemento.clear(keep_tail=True)
+                continue
+
+            if alvo is not None and _contem(alvo, elemento) and _linha_mais_proxima(elemento, alvo) is None:
+                yield from _itens_da_linha(elemento, alvo)
+            elif primeira is not None and _contem(primeira, elemento) and _linha_mais_proxima(elemento, primeira) is None:
+                pendentes.extend(_itens_da_linha(elemento, primeira))
+
+            if _linha_mais_proxima(elemento, None) is None:
+                elemento.clear(keep_tail=True)
+                pai = elemento.getparent()
+                while pai is not None and elemento.getprevious() is not None:
+                    del pai[0]
+
+    for parte in partes:
+        parser.feed(parte)
+        yield from processar()
+    parser.close()
+    yield from processar()
+    yield from pendentes
+
+
+def extrair_itens_tabela(html_content: str, tamanho_bloco: int = TAMANHO_BLOCO) -> List[Dict[str, Any]]:
+    """Itens da tabela de um documento já recebido, alimentando o parser em blocos."""
+    partes = (html_content[inicio:inicio + tamanho_bloco] for inicio in range(0, len(html_content), tamanho_bloco))
+    return list(iterar_itens_tabela(partes))
+
+
+__all__ = ['LXML_AVAILABLE', 'TAMANHO_BLOCO', 'item_da_linha', 'iterar_itens_tabela', 'extrair_itens_tabela']
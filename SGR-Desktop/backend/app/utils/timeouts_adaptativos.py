@@ -0,0 +1,156 @@
+import bisect
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from .metricas import rotulo_endpoint
+
+# Respostas observadas antes de o timeout de um endpoint deixar de ser o padrão.
+AMOSTRAS_MINIMAS = 20
+
+# Limites dos buckets do esboço: 1 ms a ~10 min em passos de 20% (erro relativo do quantil <= 20%).
+LIMITES_ESBOCO = tuple(0.001 * 1.2 ** indice for indice in range(74))
+
+# Acima deste peso acumulado os pesos são renormalizados (evita overflow do decaimento).
+_PESO_MAXIMO = 1e100
+
+
+class _Esboco:
+    """
+    Histograma de latências com decaimento exponencial: cada observação pesa 2^(1/meia_vida) vezes
+    a anterior, então as últimas ~`meia_vida` respostas valem metade do total. Quantis saem do
+    limite superior do bucket (arredondam para cima, do lado seguro para um timeout).
+    """
+
+    __slots__ = ('pesos', 'peso', 'total', 'amostras', 'media', 'timeout', 'desatualizado')
+
+    def __init__(self) -> None:
+        self.pesos: List[float] = [0.0] * (len(LIMITES_ESBOCO) + 1)
+        self.peso = 1.0
+        self.total = 0.0
+        self.amostras = 0
+        self.media = 0.0
+        self.timeout: Optional[float] = None
+        self.desatualizado = True
+
+    def observar(self, segundos: float, crescimento: float, alfa: float) -> None:
+        self.pesos[bisect.bisect_left(LIMITES_ESBOCO, segundos)] += self.peso
+        self.total += self.peso
+        self.amostras += 1
+        self.media = segundos if self.amostras == 1 else self.media + alfa * (segundos - self.media)
+        self.peso *= crescimento
+        if self.peso > _PESO_MAXIMO:
+            self.pesos = [peso / self.peso for peso in self.pesos]
+            self.total /= self.peso
+            self.peso = 1.0
+        self.desatualizado = True
+
+    def quantil(self, q: float) -> float:
+        alvo = q * self.total
+        acumulado = 0.0
+        for indice, peso in enumerate(self.pesos):
+            acumulado += peso
+            if acumulado >= alvo and peso:
+                return LIMITES_ESBOCO[min(indice, len(LIMITES_ESBOCO) - 1)]
+        return LIMITES_ESBOCO[-1]
+
+
+class TimeoutsAdaptativos:
+    """
+    Timeout de leitura por endpoint da API externa derivado da latência observada:
+    quantil `quantil` (p99) do esboço do endpoint × `fator`, limitado a [`piso`, `teto`].
+
+    Endpoints com menos de AMOSTRAS_MINIMAS respostas usam o timeout padrão (None), assim como os
+    `isentos` (listagens em massa, cujo tempo depende do volume e não da saúde da API). Um timeout
+    estourado entra como amostra do próprio valor (censurada): com `fator` > 1 o próximo timeout
+    do endpoint cresce, em vez de a API lenta ficar presa num limite curto demais.
+    """
+
+    def __init__(
+        self,
+        quantil: float = 0.99,
+        fator: float = 3.0,
+        piso: float = 2.0,
+        teto: float = 30.0,
+        meia_vida: float = 200.0,
+        ativo: bool = True,
+        isentos: Iterable[str] = (),
+    ) -> None:
+        self.quantil = quantil
+        self.fator = fator
+        self.piso = piso
+        self.teto = teto
+        self.meia_vida = meia_vida
+        self.ativo = ativo
+        self.isentos = frozenset(rotulo_endpoint(endpoint) for endpoint in isentos)
+        self._crescimento = 2 ** (1 / meia_vida)
+        self._alfa = 1 - 0.5 ** (1 / meia_vida)
+        self._esbocos: Dict[str, _Esboco] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, endpoint_api: str, segundos: float) -> None:
+        """Latência (envio até o corpo baixado) de uma resposta da API externa."""
+        rotulo = rotulo_endpoint(endpoint_api)
+        if not self.ativo or rotulo in self.isentos:
+            return
+        with self._lock:
+            esboco = self._esbocos.get(rotulo)
+            if esboco is None:
+                esboco = self._esbocos[rotulo] = _Esboco()
+            esboco.observar(segundos, self._crescimento, self._alfa)
+
+    def observar_timeout(self, endpoint_api: str, timeout: float) -> None:
+        """Timeout estourado: a latência real foi pelo menos `timeout`."""
+        self.observar(endpoint_api, timeout)
+
+    def leitura(self, endpoint_api: str) -> Optional[float]:
+        """Timeout de leitura do endpoint, ou None (usar o padrão) sem amostras suficientes."""
+        rotulo = rotulo_endpoint(endpoint_api)
+        if not self.ativo or rotulo in self.isentos:
+            return None
+        with self._lock:
+            esboco = self._esbocos.get(rotulo)
+            if esboco is None or esboco.amostras < AMOSTRAS_MINIMAS:
+                return None
+            if esboco.desatualizado:
+                esboco.timeout = min(self.teto, max(self.piso, esboco.quantil(self.quantil) * self.fator))
+                esboco.desatualizado = False
+            return esboco.timeout
+
+    def tabela(self) -> Dict[str, Dict[str, Any]]:
+        """Por endpoint: amostras, média (EWMA), p50/p99 do esboço e o timeout de leitura em vigor."""
+        with self._lock:
+            rotulos = sorted(self._esbocos)
+        tabela: Dict[str, Dict[str, Any]] = {}
+        for rotulo in rotulos:
+            timeout = self.leitura(rotulo)
+            with self._lock:
+                esboco = self._esbocos[rotulo]
+                tabela[rotulo] = {
+                    'amostras': esboco.amostras,
+                    'media_ms': round(esboco.media * 1000, 1),
+                    'p50_ms': round(esboco.quantil(0.5) * 1000, 1),
+                    'p99_ms': round(esboco.quantil(self.quantil) * 1000, 1),
+                    'timeout_leitura_s': round(timeout, 2) if timeout is not None else None,
+                }
+        return tabela
+
+    def esquecer(self, endpoint_api: Optional[str] = None) -> None:
+        with self._lock:
+            if endpoint_api is None:
+                self._esbocos.clear()
+            else:
+                self._esbocos.pop(rotulo_endpoint(endpoint_api), None)
+
+    def stats(self) -> Dict[str, Any]:
+        tabela = self.tabela()
+        return {
+            'ativo': self.ativo,
+            'isentos': sorted(self.isentos),
+            'endpoints': len(tabela),
+            'timeouts_leitura_s': {
+                rotulo: linha['timeout_leitura_s'] for rotulo, linha in tabela.items() if linha['timeout_leitura_s'] is not None
+            },
+        }
+
+
+__all__ = ['AMOSTRAS_MINIMAS', 'LIMITES_ESBOCO', 'TimeoutsAdaptativos']
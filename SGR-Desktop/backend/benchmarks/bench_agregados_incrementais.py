@@ -0,0 +1,82 @@
+"""
+Benchmark: refresh do dashboard com recálculo completo versus agregados incrementais,
+quando um snapshot novo da API traz poucos pedidos alterados num histórico grande.
+
+Cada rodada simula uma resposta nova da API (dicionários novos, como após o parse do JSON)
+com `alterados` pedidos mudando de status e o mesmo número de pedidos novos.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_agregados_incrementais [quantidade_pedidos] [alterados] [rodadas]
+"""
+
+import contextlib
+import copy
+import io
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+from app import create_app
+from app.models.pedido import normalizar_pedidos
+from app.routes import analytics
+from app.services.pedidos_cache import pedidos_cache
+
+from .dados_sinteticos import gerar_pedidos
+
+
+def _snapshots(base, alterados, rodadas):
+    snapshots = []
+    atual = base
+    proximo_id = max(pedido['id'] for pedido in base) + 1
+    for rodada in range(rodadas):
+        atual = copy.deepcopy(atual)
+        for indice in range(alterados):
+            pedido = atual[(rodada * alterados + indice) % len(atual)]
+            pedido['status'] = 'CANCELADO' if pedido.get('status') != 'CANCELADO' else 'FINALIZADO'
+        novos = copy.deepcopy(atual[:alterados])
+        for pedido in novos:
+            pedido['id'] = proximo_id
+            proximo_id += 1
+        atual = novos + atual
+        snapshots.append(atual)
+    return snapshots
+
+
+def _medir_refresh(app, snapshots, incremental):
+    amostras = []
+    with patch('app.routes.analytics.ANALYTICS_INCREMENTAL', incremental), app.test_request_context():
+        for snapshot in snapshots:
+            pedidos_cache.invalidar()
+            with patch('app.services.pedidos_cache.proxy_request', return_value=(200, snapshot)):
+                inicio = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    analytics.get_dashboard_completo(1)
+                amostras.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(amostras)
+
+
+def main(quantidade=100_000, alterados=20, rodadas=5):
+    base = gerar_pedidos(quantidade)
+    snapshots = _snapshots(base, alterados, rodadas + 1)
+    app = create_app()
+
+    inicio = time.perf_counter()
+    normalizar_pedidos(snapshots[0])
+    normalizacao_completa = (time.perf_counter() - inicio) * 1000
+
+    # Primeiro snapshot aquece memos e agregados; a mediana usa apenas os refreshes seguintes.
+    _medir_refresh(app, snapshots[:1], incremental=True)
+    incremental = _medir_refresh(app, snapshots[1:], incremental=True)
+
+    _medir_refresh(app, snapshots[:1], incremental=False)
+    completo = _medir_refresh(app, snapshots[1:], incremental=False)
+
+    print(f"Histórico sintético: {quantidade} pedidos, {alterados} alterados + {alterados} novos por snapshot")
+    print(f"normalização completa de um snapshot      : {normalizacao_completa:8.1f} ms")
+    print(f"refresh dashboard, recálculo completo     : {completo:8.1f} ms (mediana de {rodadas})")
+    print(f"refresh dashboard, agregados incrementais : {incremental:8.1f} ms (mediana de {rodadas})")
+
+
+if __name__ == '__main__':
+    main(*[int(valor) for valor in sys.argv[1:4]])
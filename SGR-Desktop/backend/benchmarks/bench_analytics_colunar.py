@@ -0,0 +1,68 @@
+"""
+Benchmark: recálculo completo de analytics (ANALYTICS_INCREMENTAL=false) com laços Python sobre
+`Pedido` versus a representação colunar NumPy (`PedidosColunares`, ANALYTICS_COLUNAR=true), em um
+histórico sintético (padrão: 100 mil pedidos).
+
+Mede as rotas `/api/vendas/<id>/anual`, `/api/top-produtos/<id>/anual` e `/api/dashboard/<id>`
+chamando as views diretamente (sem HTTP), com o snapshot já em cache.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_analytics_colunar [quantidade_pedidos] [repeticoes]
+"""
+
+import contextlib
+import io
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+from app import create_app
+from app.routes import analytics
+from app.services.pedidos_colunar import NUMPY_AVAILABLE, carregar_pedidos_colunares
+
+from .dados_sinteticos import gerar_pedidos
+
+ROTAS = [
+    ('vendas anual', analytics.get_vendas_periodo, (1, 'anual')),
+    ('top-produtos anual', analytics.get_top_produtos, (1, 'anual')),
+    ('dashboard', analytics.get_dashboard_completo, (1,)),
+]
+
+
+def _medir(view, args, repeticoes):
+    amostras = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            view(*args)
+        amostras.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(amostras)
+
+
+def main(quantidade=100_000, repeticoes=15):
+    if not NUMPY_AVAILABLE:
+        print("NumPy não está instalado: apenas o caminho em Python puro está disponível.")
+        return
+
+    pedidos = gerar_pedidos(quantidade)
+    app = create_app()
+
+    with patch('app.services.pedidos_cache.proxy_request', return_value=(200, {'data': pedidos})), \
+            patch('app.services.pedidos_cache.pedidos_cache.ttl', 3600), \
+            patch('app.routes.analytics.ANALYTICS_INCREMENTAL', False), app.test_request_context():
+        inicio = time.perf_counter()
+        carregar_pedidos_colunares(1)
+        construcao = (time.perf_counter() - inicio) * 1000
+
+        print(f"Histórico sintético: {quantidade} pedidos, mediana de {repeticoes} execuções")
+        print(f"normalização + colunas (uma vez/snapshot): {construcao:8.1f} ms")
+        for nome, view, args in ROTAS:
+            python_puro = _medir(view, args, repeticoes)
+            with patch('app.routes.analytics.ANALYTICS_COLUNAR', True):
+                colunar = _medir(view, args, repeticoes)
+            print(f"{nome:<20}: Python {python_puro:8.1f} ms | NumPy {colunar:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main(*[int(valor) for valor in sys.argv[1:3]])
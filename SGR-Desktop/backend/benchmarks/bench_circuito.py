@@ -0,0 +1,68 @@
+"""
+Benchmark: proxy com a API externa fora do ar, com e sem circuit breaker.
+
+A sessão falsa espera `atraso` segundos e lança Timeout (como um API_TIMEOUT esgotado).
+Simula o polling do frontend: várias rodadas em que o dashboard dispara três GETs em paralelo
+(pedidos concluídos, top produtos, vendas). Mede o tempo de cada rodada e quantas chamadas
+chegaram à API externa.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_circuito [rodadas] [atraso_s]
+"""
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from app import proxy
+from app.utils import logs
+
+ENDPOINTS = ('pedidos/restaurante', 'pedidos/restaurante/concluidos', 'itens/restaurante/1')
+
+
+def _sessao(atraso):
+    def request_fora_do_ar(**kwargs):
+        time.sleep(atraso)
+        raise requests.exceptions.Timeout('Connection timeout')
+
+    sessao = MagicMock()
+    sessao.request.side_effect = request_fora_do_ar
+    sessao.cookies = requests.cookies.RequestsCookieJar()
+    return sessao
+
+
+def _medir(rodadas, atraso, limite_falhas):
+    sessao = _sessao(atraso)
+    proxy.upstream_circuito.limpar()
+    duracoes = []
+    with patch('app.proxy.api_session', sessao), \
+         patch.object(proxy.upstream_circuito, 'limite_falhas', limite_falhas), \
+         patch.object(proxy.upstream_circuito, 'tempo_aberto', 60), \
+         ThreadPoolExecutor(max_workers=len(ENDPOINTS)) as executor:
+        for _ in range(rodadas):
+            inicio = time.perf_counter()
+            list(executor.map(lambda endpoint: proxy.proxy_request('GET', endpoint), ENDPOINTS))
+            duracoes.append(time.perf_counter() - inicio)
+    proxy.upstream_circuito.limpar()
+    return duracoes, sessao.request.call_count
+
+
+def main():
+    rodadas = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    atraso = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    logs.configurar_logs('CRITICAL')
+    print(f"{rodadas} rodadas de {len(ENDPOINTS)} GETs em paralelo, API fora do ar (timeout simulado de {atraso}s)")
+    for titulo, limite_falhas in (('sem circuit breaker', 0), ('circuit breaker (5 falhas)', 5)):
+        duracoes, chamadas = _medir(rodadas, atraso, limite_falhas)
+        ordenadas = sorted(duracoes)
+        print(
+            f"  {titulo:<27}: total {sum(duracoes):6.2f}s, rodada mediana {ordenadas[len(ordenadas) // 2] * 1000:7.1f} ms, "
+            f"última {duracoes[-1] * 1000:7.1f} ms, {chamadas} chamadas à API"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: POSTs para um endpoint que só aceita form-urlencoded, com e sem a codificação aprendida.
+
+Servidor HTTP/1.1 local que responde 401 a corpos JSON e 201 a formulários, com `atraso`
+segundos por requisição (simula a ida até a API na nuvem). "Sem aprendizado" esquece a tabela
+antes de cada POST (o comportamento anterior: sempre JSON primeiro e reenvio em form); "aprendido"
+usa `codificacao_endpoints` como no proxy.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_codificacao [atraso_ms] [posts]
+"""
+
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from app import proxy
+from app.utils import logs
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    atraso = 0.0
+    requisicoes = 0
+
+    def do_POST(self):
+        type(self).requisicoes += 1
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(self.atraso)
+        form = self.headers.get('Content-Type', '').startswith('application/x-www-form-urlencoded')
+        corpo = b'{"id": 1}' if form else b'{"message": "Unauthorized"}'
+        self.send_response(201 if form else 401)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def _medir(posts, aprender):
+    _Handler.requisicoes = 0
+    proxy.codificacao_endpoints.esquecer()
+    dados = {'nome': 'Pizza', 'preco': 39.9, 'restaurante': {'id': 7}}
+    inicio = time.perf_counter()
+    for _ in range(posts):
+        if not aprender:
+            proxy.codificacao_endpoints.esquecer()
+        status_code, _ = proxy.proxy_request('POST', 'cardapio/add', data=dados, params={'restaurante_id': 7})
+        assert status_code == 201, status_code
+    return (time.perf_counter() - inicio) / posts * 1000, _Handler.requisicoes / posts
+
+
+def main():
+    _Handler.atraso = (float(sys.argv[1]) if len(sys.argv) > 1 else 40) / 1000
+    posts = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    logs.configurar_logs('CRITICAL')
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{httpd.server_address[1]}/api/'
+
+    print(f"{posts} POSTs em cardapio/add, atraso simulado de {_Handler.atraso * 1000:.0f} ms por ida à API")
+    with patch('app.proxy.API_EXTERNA_BASE_URL', url), patch('app.proxy.LOG_REQUEST_DUMPS', False):
+        for titulo, aprender in (('sem aprendizado', False), ('aprendido', True)):
+            duracao, idas = _medir(posts, aprender)
+            print(f"  {titulo:<15}: {duracao:6.1f} ms por POST, {idas:.2f} idas à API por POST")
+    httpd.shutdown()
+    httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: custo por requisição da troca do JSESSIONID, por tamanho do cookie jar.
+
+Cada "requisição" faz o que o proxy faz com os cookies: conta as cópias de JSESSIONID, troca o
+valor (o servidor e o Cookie manual deixaram duas cópias) e monta o header Cookie de uma requisição
+preparada. "Reconstrução" é o comportamento anterior (copiar todos os cookies, limpar o jar e
+regravar um a um); "jar comum" usa substituir_cookie sobre um RequestsCookieJar; "indexado" usa
+CookiesSessao, o jar das sessões do proxy.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_cookies [requisicoes]
+"""
+
+import sys
+import time
+
+import requests
+from requests.cookies import RequestsCookieJar
+
+from app.utils import logs
+from app.utils.cookies import CookiesSessao, contar_cookie, substituir_cookie, valor_cookie
+
+
+def _reconstruir(jar, nome, valor):
+    cookies = [(cookie.name, cookie.value, cookie.domain, cookie.path) for cookie in jar if cookie.name != nome]
+    jar.clear()
+    for nome_cookie, valor_cookie_, dominio, caminho in cookies:
+        jar.set(nome_cookie, valor_cookie_, domain=dominio, path=caminho)
+    jar.set(nome, valor)
+
+
+def _jar(classe, tamanho):
+    jar = classe()
+    for indice in range(tamanho - 1):
+        jar.set(f'c{indice}', 'x' * 16, domain='api.exemplo.com', path='/')
+    jar.set('JSESSIONID', 'servidor', domain='api.exemplo.com', path='/')
+    return jar
+
+
+def _medir(classe, trocar, tamanho, requisicoes, preparar):
+    sessao = requests.Session()
+    sessao.cookies = _jar(classe, tamanho)
+    requisicao = requests.Request('GET', 'http://api.exemplo.com/api/pedidos')
+    inicio = time.perf_counter()
+    for numero in range(requisicoes):
+        sessao.cookies.set('JSESSIONID', f'manual{numero}')
+        if contar_cookie(sessao.cookies, 'JSESSIONID') > 1:
+            trocar(sessao.cookies, 'JSESSIONID', valor_cookie(sessao.cookies, 'JSESSIONID'))
+        if preparar:
+            sessao.prepare_request(requisicao)
+    assert len(sessao.cookies) == tamanho
+    return (time.perf_counter() - inicio) / requisicoes * 1e6
+
+
+def main():
+    requisicoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    logs.configurar_logs('CRITICAL')
+    casos = (
+        ('reconstrução', RequestsCookieJar, _reconstruir),
+        ('jar comum', RequestsCookieJar, substituir_cookie),
+        ('indexado', CookiesSessao, substituir_cookie),
+    )
+
+    print(f"{requisicoes} requisições por caso, µs por requisição (troca do JSESSIONID / + prepare_request)")
+    for tamanho in (3, 10, 25, 50):
+        print(f"  {tamanho} cookies:")
+        for titulo, classe, trocar in casos:
+            troca = _medir(classe, trocar, tamanho, requisicoes, False)
+            total = _medir(classe, trocar, tamanho, requisicoes, True)
+            print(f"    {titulo:<13}: {troca:7.1f} / {total:7.1f}")
+
+
+if __name__ == '__main__':
+    main()
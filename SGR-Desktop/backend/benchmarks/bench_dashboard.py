@@ -0,0 +1,78 @@
+"""
+Benchmark: latência de GET /api/dashboard/<id> antes e depois da camada de serviço de pedidos.
+
+- antes: o dashboard busca os pedidos concluídos via HTTP loopback no próprio servidor
+  (GET /api/pedidos/restaurante/<id>/concluidos + encode/decode JSON), como fazia o código antigo;
+- depois: o dashboard chama `services.pedidos.listar_pedidos_concluidos` em processo.
+
+A API externa é simulada com um histórico sintético, então o resultado mede apenas o custo local.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_dashboard [quantidade_pedidos] [repeticoes]
+"""
+
+import contextlib
+import io
+import logging
+import statistics
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+import requests
+from werkzeug.serving import make_server
+
+from app import create_app
+from app.services.pedidos_cache import pedidos_cache
+
+from .dados_sinteticos import gerar_pedidos
+
+
+def _medir(client, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resposta = client.get('/api/dashboard/1')
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        assert resposta.status_code == 200
+    return tempos
+
+
+def _resumo(nome, tempos):
+    tempos_ordenados = sorted(tempos)
+    p95 = tempos_ordenados[max(0, int(len(tempos_ordenados) * 0.95) - 1)]
+    print(f"{nome:<8} media={statistics.mean(tempos):8.2f} ms  mediana={statistics.median(tempos):8.2f} ms  p95={p95:8.2f} ms")
+
+
+def main(quantidade=5000, repeticoes=30):
+    pedidos = gerar_pedidos(quantidade)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app = create_app()
+    servidor = make_server('127.0.0.1', 0, app, threaded=True)
+    porta = servidor.server_port
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    def concluidos_via_loopback(restaurante_id):
+        resposta = requests.get(f'http://127.0.0.1:{porta}/api/pedidos/restaurante/{restaurante_id}/concluidos', timeout=10)
+        dados = resposta.json()
+        return resposta.status_code, dados.get('data', []), len(pedidos)
+
+    pedidos_cache.invalidar()
+    with patch('app.services.pedidos_cache.proxy_request', return_value=(200, pedidos)):
+        client = app.test_client()
+        with contextlib.redirect_stdout(io.StringIO()):
+            client.get('/api/dashboard/1')
+            with patch('app.routes.analytics.listar_pedidos_concluidos', side_effect=concluidos_via_loopback):
+                antes = _medir(client, repeticoes)
+            depois = _medir(client, repeticoes)
+
+    servidor.shutdown()
+    print(f"Dashboard com {quantidade} pedidos sintéticos, {repeticoes} repetições")
+    _resumo('antes', antes)
+    _resumo('depois', depois)
+
+
+if __name__ == '__main__':
+    argumentos = [int(valor) for valor in sys.argv[1:3]]
+    main(*argumentos)
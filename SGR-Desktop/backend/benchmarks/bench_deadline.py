@@ -0,0 +1,61 @@
+"""
+Benchmark: operação com várias chamadas à API externa travada, com e sem prazo da requisição.
+
+A sessão falsa respeita o timeout recebido: espera o read timeout e lança Timeout, como uma API
+que aceita a conexão mas não responde. Uma "operação" faz três chamadas em sequência (como as
+rotas que buscam pedidos, itens e avaliações). Sem prazo, cada chamada consome o read timeout
+inteiro; com o prazo (DEADLINE_PADRAO ou X-Request-Deadline), a soma fica limitada ao orçamento.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_deadline [read_timeout_s] [orcamento_s]
+"""
+
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from app import proxy
+from app.utils import logs
+from app.utils.deadline import deadline
+
+ENDPOINTS = ('pedidos/restaurante', 'itens/restaurante/1', 'avaliacoes/1')
+
+
+def _sessao_travada():
+    def request_travado(**kwargs):
+        _, read = kwargs['timeout']
+        time.sleep(read)
+        raise requests.exceptions.Timeout('Read timed out')
+
+    sessao = MagicMock()
+    sessao.request.side_effect = request_travado
+    sessao.cookies = requests.cookies.RequestsCookieJar()
+    return sessao
+
+
+def _operacao():
+    return [proxy.proxy_request('GET', endpoint)[0] for endpoint in ENDPOINTS]
+
+
+def main():
+    read_timeout = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    orcamento = float(sys.argv[2]) if len(sys.argv) > 2 else 1.5
+    logs.configurar_logs('CRITICAL')
+    print(f"{len(ENDPOINTS)} chamadas em sequência à API travada (read timeout {read_timeout}s)")
+    with patch('app.proxy.api_session', _sessao_travada()), \
+         patch('app.utils.deadline.API_READ_TIMEOUT', read_timeout), \
+         patch.object(proxy.upstream_circuito, 'limite_falhas', 0):
+        for titulo, prazo in (('sem prazo', None), (f'prazo de {orcamento}s', orcamento)):
+            inicio = time.perf_counter()
+            if prazo is None:
+                status = _operacao()
+            else:
+                with deadline(prazo):
+                    status = _operacao()
+            print(f"  {titulo:<16}: {time.perf_counter() - inicio:5.2f}s, status {status}")
+
+
+if __name__ == '__main__':
+    main()
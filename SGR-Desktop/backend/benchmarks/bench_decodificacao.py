@@ -0,0 +1,116 @@
+"""
+Benchmark: decodificação de respostas grandes da API externa, antes e depois do pipeline por
+Content-Type.
+
+"Antes" reproduz o caminho antigo de `proxy_request`: `response.json()` sempre, e para HTML/texto
+`response.text` até três vezes (sem charset no header, o requests adivinha a codificação a cada
+acesso). "Depois" é `decodificar_corpo`: um único decode, JSON direto dos bytes (orjson quando
+instalado; a linha "json padrão" desliga o orjson).
+
+Payloads: `pedidos/restaurante` com N pedidos (JSON, com e sem charset no header e sem
+Content-Type) e uma página HTML de tamanho parecido (só a decodificação, sem o parse do HTML).
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_decodificacao [pedidos] [repeticoes]
+"""
+
+import json
+import sys
+import time
+from unittest.mock import patch
+
+import requests
+
+from app.utils.decodificacao import ORJSON_AVAILABLE, decodificar_corpo
+
+
+def _pedidos(quantidade):
+    return [
+        {
+            'id': i,
+            'restaurante_id': 1,
+            'status': 'FINALIZADO' if i % 3 else 'PENDENTE',
+            'valorTotal': 37.5 + i % 50,
+            'criadoEm': f'2026-{1 + i % 12:02d}-{1 + i % 28:02d}T12:{i % 60:02d}:00',
+            'observacoes': 'Sem cebola, por favor. Entregar na portaria.',
+            'cliente': {'id': 1000 + i, 'nome': f'Cliente {i}', 'telefone': '(11) 91234-5678'},
+            'itens': [
+                {'id': j, 'nome': f'Prato {j}', 'quantidade': 1 + j % 3, 'precoUnitario': 19.9 + j}
+                for j in range(3)
+            ],
+        }
+        for i in range(quantidade)
+    ]
+
+
+def _html(linhas):
+    corpo = ''.join(
+        f'<tr><td>{i}</td><td>Prato {i} à moda da casa</td><td>Descrição do prato {i}</td><td>R$ {19 + i % 40},90</td></tr>'
+        for i in range(linhas)
+    )
+    return f'<!DOCTYPE html><html><body><table id="tabelaItens">{corpo}</table></body></html>'
+
+
+def _resposta(corpo, content_type):
+    resposta = requests.Response()
+    resposta.status_code = 200
+    if content_type:
+        resposta.headers['Content-Type'] = content_type
+    resposta._content = corpo
+    return resposta
+
+
+def _antigo(resposta):
+    """Caminho anterior de proxy_request (JSON tentado sempre; HTML/texto via response.text)."""
+    content_type = resposta.headers.get('Content-Type', '').lower()
+    try:
+        return resposta.json()
+    except ValueError:
+        pass
+    if 'text/html' in content_type or (
+        resposta.text and (resposta.text.strip().startswith('<!DOCTYPE') or resposta.text.strip().startswith('<html'))
+    ):
+        return resposta.text
+    return resposta.text[:500]
+
+
+def _novo(resposta):
+    formato, dados, texto = decodificar_corpo(resposta.content, resposta.headers.get('Content-Type'))
+    return dados if dados is not None else texto
+
+
+def _medir(funcao, resposta, repeticoes):
+    funcao(resposta)
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao(resposta)
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    pedidos = json.dumps(_pedidos(quantidade), ensure_ascii=False).encode('utf-8')
+    html = _html(quantidade).encode('utf-8')
+    cenarios = (
+        ('JSON, charset=UTF-8', pedidos, 'application/json;charset=UTF-8'),
+        ('JSON, sem charset', pedidos, 'application/json'),
+        ('JSON, sem Content-Type', pedidos, None),
+        ('HTML, charset=UTF-8', html, 'text/html;charset=UTF-8'),
+        ('HTML, sem Content-Type', html, None),
+    )
+    print(
+        f"pedidos/restaurante com {quantidade} pedidos ({len(pedidos) / 1e6:.1f} MB), HTML de {len(html) / 1e6:.1f} MB, "
+        f"{repeticoes} repetições (ms por resposta; orjson {'instalado' if ORJSON_AVAILABLE else 'ausente'})"
+    )
+    for titulo, corpo, content_type in cenarios:
+        resposta = _resposta(corpo, content_type)
+        antes = _medir(_antigo, resposta, repeticoes)
+        depois = _medir(_novo, resposta, repeticoes)
+        with patch('app.utils.decodificacao.ORJSON_AVAILABLE', False):
+            padrao = _medir(_novo, resposta, repeticoes)
+        print(f"  {titulo:<23}: antes {antes:8.1f} | depois {depois:7.1f} | depois, json padrão {padrao:7.1f}")
+
+
+if __name__ == '__main__':
+    main()
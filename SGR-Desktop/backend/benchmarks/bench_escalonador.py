@@ -0,0 +1,132 @@
+"""
+Benchmark: latência do PUT de status da cozinha com telas de analytics atualizando, com e sem escalonador.
+
+Servidor HTTP/1.1 local que imita a API Java: `trabalhadores` threads atendem as requisições (as
+demais esperam), GETs levam `pesado` ms (dump de pedidos) e PUTs 5 ms. `restaurantes` restaurantes
+mantêm, cada um, 4 GETs de analytics simultâneos em laço; um restaurante extra faz um PUT
+pedidos/{id}/status-restaurante a cada 100 ms. Sem escalonador o PUT entra na fila do servidor atrás
+dos GETs; com ele no máximo `trabalhadores` chamadas vão à API, uma vaga reservada para escritas.
+Mostra p50/p99 do PUT, GETs por segundo e a divisão dos GETs entre os restaurantes.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_escalonador [segundos] [restaurantes] [trabalhadores] [pesado_ms]
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from app import proxy
+from app.utils import logs
+from app.utils.escalonador import EscalonadorUpstream, definir_prioridade
+from app.utils.sessoes import definir_restaurante
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    trabalhadores = threading.Semaphore(4)
+    pesado = 0.0
+
+    def _responder(self, atraso):
+        with self.trabalhadores:
+            time.sleep(atraso)
+        corpo = b'{"status": "ok"}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        self._responder(self.pesado)
+
+    def do_PUT(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self._responder(0.005)
+
+    def log_message(self, *args):
+        pass
+
+
+def _medir(segundos, restaurantes, escalonador):
+    fim = time.monotonic() + segundos
+    gets = Counter()
+    lock = threading.Lock()
+    puts = []
+
+    def analytics(restaurante, tela):
+        definir_prioridade('analytics')
+        definir_restaurante(restaurante)
+        indice = 0
+        while time.monotonic() < fim:
+            indice += 1
+            status_code, _ = proxy.proxy_request('GET', 'pedidos/restaurante', params={'tela': tela, 'n': indice})
+            with lock:
+                gets[restaurante] += status_code == 200
+
+    def cozinha():
+        definir_restaurante(restaurantes + 1)
+        pedido = 0
+        while time.monotonic() < fim:
+            pedido += 1
+            inicio = time.perf_counter()
+            status_code, _ = proxy.proxy_request(
+                'PUT', f'pedidos/{pedido}/status-restaurante', params={'status': 'EM_PREPARO'},
+            )
+            assert status_code == 200, status_code
+            puts.append(time.perf_counter() - inicio)
+            time.sleep(0.1)
+
+    with patch('app.proxy.upstream_escalonador', escalonador):
+        threads = [
+            threading.Thread(target=analytics, args=(restaurante, f'{restaurante}-{tela}'))
+            for restaurante in range(1, restaurantes + 1) for tela in range(4)
+        ]
+        threads.append(threading.Thread(target=cozinha))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    puts.sort()
+    percentis = [puts[min(len(puts) - 1, int(len(puts) * q))] * 1000 for q in (0.5, 0.99)]
+    return percentis, gets
+
+
+def main():
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    restaurantes = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    trabalhadores = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    _Handler.pesado = (float(sys.argv[4]) if len(sys.argv) > 4 else 150) / 1000
+    _Handler.trabalhadores = threading.Semaphore(trabalhadores)
+    logs.configurar_logs('CRITICAL')
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{httpd.server_address[1]}/api/'
+
+    print(
+        f"{restaurantes} restaurantes x 4 GETs de analytics simultâneos ({_Handler.pesado * 1000:.0f} ms cada) "
+        f"+ 1 PUT de status a cada 100 ms; API com {trabalhadores} trabalhadores, {segundos:g}s por caso"
+    )
+    casos = (
+        ('sem escalonador', EscalonadorUpstream(0)),
+        ('com escalonador', EscalonadorUpstream(trabalhadores, 1)),
+    )
+    with patch('app.proxy.API_EXTERNA_BASE_URL', url), patch('app.proxy.LOG_REQUEST_DUMPS', False), \
+         patch.object(proxy.upstream_circuito, 'limite_falhas', 0):
+        for titulo, escalonador in casos:
+            (p50, p99), gets = _medir(segundos, restaurantes, escalonador)
+            divisao = ' / '.join(str(gets[restaurante]) for restaurante in sorted(gets))
+            print(
+                f"  {titulo:<15}: PUT p50 {p50:6.1f} ms, p99 {p99:6.1f} ms | "
+                f"GETs {sum(gets.values()) / segundos:5.1f}/s (por restaurante: {divisao})"
+            )
+    httpd.shutdown()
+    httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark: listagem filtrada de pedidos em memória (`buscar_pedidos_restaurante`) versus
+consultas indexadas no espelho SQLite (`buscar_pedidos_espelho`), com o snapshot já carregado.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_espelho_pedidos [quantidade_pedidos] [repeticoes]
+"""
+
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.services import pedidos_espelho
+from app.services.pedidos import buscar_pedidos_restaurante
+from app.services.pedidos_espelho import PedidosEspelho, buscar_pedidos_espelho
+
+from .dados_sinteticos import gerar_pedidos
+
+
+def _medir(funcao, filtros, repeticoes):
+    amostras = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, pedidos, _ = funcao(1, **filtros)
+        amostras.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(amostras), len(pedidos)
+
+
+def main(quantidade=100_000, repeticoes=15):
+    pedidos = gerar_pedidos(quantidade)
+    hoje = datetime.now().date()
+    consultas = [
+        ('status=PENDENTE', {'status': 'PENDENTE'}),
+        ('últimos 7 dias', {'data_inicio': (hoje - timedelta(days=7)).isoformat(), 'data_fim': hoje.isoformat()}),
+        ('ENTREGUE, último mês', {'status': 'ENTREGUE', 'data_inicio': (hoje - timedelta(days=30)).isoformat()}),
+    ]
+
+    with tempfile.TemporaryDirectory() as diretorio, \
+            patch('app.services.pedidos_cache.proxy_request', return_value=(200, {'data': pedidos})), \
+            patch('app.services.pedidos_cache.pedidos_cache.ttl', 3600):
+        espelho = PedidosEspelho(os.path.join(diretorio, 'pedidos.sqlite3'))
+        with patch.object(pedidos_espelho, 'espelho', espelho):
+            inicio = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                buscar_pedidos_espelho(1)
+            sincronizacao = (time.perf_counter() - inicio) * 1000
+
+            print(f"Histórico sintético: {quantidade} pedidos, mediana de {repeticoes} execuções")
+            print(f"carga inicial do espelho (normalização + escrita): {sincronizacao:8.1f} ms")
+            for nome, filtros in consultas:
+                memoria, total = _medir(buscar_pedidos_restaurante, filtros, repeticoes)
+                sqlite, _ = _medir(buscar_pedidos_espelho, filtros, repeticoes)
+                print(f"{nome:<22} ({total:>6} pedidos): memória {memoria:7.1f} ms | SQLite {sqlite:7.1f} ms")
+        espelho.fechar()
+
+
+if __name__ == '__main__':
+    main(*[int(valor) for valor in sys.argv[1:3]])
@@ -0,0 +1,97 @@
+"""
+Benchmark: latência de cauda de GET pedidos/restaurante, com e sem hedge.
+
+Servidor HTTP/1.1 local cuja latência tem cauda longa: cada requisição sorteia `lenta` (com a
+probabilidade dada) e demora `atraso_lento` segundos; as demais demoram 10 ms. Os GETs são
+sequenciais, como o polling de uma tela. Com hedge, o endpoint é selecionado e o limiar vem do p90
+observado; a taxa de hedges fica limitada a HEDGE_TAXA_MAXIMA.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_hedge [gets] [lenta] [atraso_lento_ms]
+"""
+
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from app import proxy
+from app.config import HEDGE_ATRASO_MINIMO, HEDGE_JANELA, HEDGE_QUANTIL, HEDGE_TAXA_MAXIMA
+from app.utils import logs
+from app.utils.hedge import PoliticaHedge
+
+ENDPOINT = 'pedidos/restaurante'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    aleatorio = random.Random(0)
+    lock = threading.Lock()
+    lenta = 0.0
+    atraso_lento = 0.0
+    requisicoes = 0
+
+    def do_GET(self):
+        with self.lock:
+            type(self).requisicoes += 1
+            lenta = self.aleatorio.random() < self.lenta
+        time.sleep(self.atraso_lento if lenta else 0.01)
+        corpo = b'[{"id": 1, "status": "PENDENTE"}]'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def _medir(gets, politica):
+    _Handler.aleatorio = random.Random(0)
+    _Handler.requisicoes = 0
+    duracoes = []
+    with patch('app.proxy.upstream_hedge', politica):
+        for _ in range(gets):
+            inicio = time.perf_counter()
+            status_code, _ = proxy.proxy_request('GET', ENDPOINT)
+            duracoes.append(time.perf_counter() - inicio)
+            assert status_code == 200, status_code
+    duracoes.sort()
+    percentis = [duracoes[min(len(duracoes) - 1, int(len(duracoes) * q))] * 1000 for q in (0.5, 0.9, 0.99)]
+    return percentis, duracoes[-1] * 1000, _Handler.requisicoes / gets
+
+
+def main():
+    gets = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    _Handler.lenta = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    _Handler.atraso_lento = (float(sys.argv[3]) if len(sys.argv) > 3 else 400) / 1000
+    logs.configurar_logs('CRITICAL')
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{httpd.server_address[1]}/api/'
+
+    print(
+        f"{gets} GETs sequenciais em {ENDPOINT}, {_Handler.lenta:.0%} lentos ({_Handler.atraso_lento * 1000:.0f} ms), "
+        f"demais 10 ms; hedge no p{HEDGE_QUANTIL * 100:.0f}, taxa máxima {HEDGE_TAXA_MAXIMA:.0%}"
+    )
+    casos = (
+        ('sem hedge', PoliticaHedge()),
+        ('com hedge', PoliticaHedge([ENDPOINT], HEDGE_QUANTIL, HEDGE_JANELA, HEDGE_ATRASO_MINIMO, HEDGE_TAXA_MAXIMA)),
+    )
+    with patch('app.proxy.API_EXTERNA_BASE_URL', url), patch('app.proxy.LOG_REQUEST_DUMPS', False):
+        for titulo, politica in casos:
+            (p50, p90, p99), maximo, idas = _medir(gets, politica)
+            print(
+                f"  {titulo:<9}: p50 {p50:6.1f} ms, p90 {p90:6.1f} ms, p99 {p99:6.1f} ms, máx {maximo:6.1f} ms, "
+                f"{idas:.3f} idas à API por GET"
+            )
+    httpd.shutdown()
+    httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Microbenchmark: extração do restaurante_id no HTML de login.
+
+Compara o caminho com DOM (BeautifulSoup + `_extrair_restaurante_id_login`, em 'html.parser'
+e 'lxml') com o caminho rápido por expressões regulares (`_restaurante_id_login_rapido`):
+
+- fixture `sample_html_login` dos testes (id em <script>);
+- página de tamanho real (~60 KiB: head com CSS/JS, menu, formulários) com o id num input hidden
+  no fim do documento, o que obriga a percorrer tudo;
+- página grande do `bench_parse_html` (id só num link no fim).
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_login_html
+"""
+
+import contextlib
+import io
+import timeit
+
+from bs4 import BeautifulSoup
+
+from app import proxy
+
+from .bench_parse_html import gerar_pagina_login
+
+# Mesmo HTML da fixture sample_html_login (tests/conftest.py)
+SAMPLE_HTML_LOGIN = """
+    <html>
+    <head>
+        <script>
+            var restaurante_id = 123;
+        </script>
+    </head>
+    <body>
+        <h1>Login bem-sucedido</h1>
+        <p>Bem-vindo(a), Restaurante Teste.</p>
+    </body>
+    </html>
+    """
+
+
+def gerar_pagina_real():
+    head = ''.join(f'<link rel="stylesheet" href="/css/modulo{i}.css"><meta name="m{i}" content="v{i}">' for i in range(30))
+    scripts = ''.join(
+        f'<script>window.modulo{i} = {{ ativo: true, rotas: ["/a{i}", "/b{i}"], tema: "claro" }};</script>' for i in range(15)
+    )
+    menu = '<nav><ul>' + ''.join(f'<li class="item"><a href="/secao/{i}" title="Seção {i}">Seção {i}</a></li>' for i in range(80)) + '</ul></nav>'
+    cards = ''.join(
+        f'<div class="card" data-posicao="{i}"><h3>Pedido {i}</h3><p>Descrição com <b>destaque</b> e &amp; entidades.</p>'
+        f'<form action="/acao/{i}" method="post"><input type="text" name="campo{i}" value="x">'
+        f'<button type="submit">Enviar</button></form></div>'
+        for i in range(250)
+    )
+    return (
+        f'<!DOCTYPE html><html><head><title>Painel</title>{head}{scripts}</head><body>'
+        '<p>Login bem-sucedido! Bem-vindo(a), Restaurante Real.</p>'
+        f'{menu}{cards}<input type="hidden" name="restaurante_id" value="321"></body></html>'
+    )
+
+
+def _dom(parser, html_content):
+    return proxy._extrair_restaurante_id_login(BeautifulSoup(html_content, parser))
+
+
+def main():
+    cenarios = [
+        ('fixture sample_html_login', SAMPLE_HTML_LOGIN, 2000),
+        ('página real', gerar_pagina_real(), 50),
+        ('página grande (2000 blocos)', gerar_pagina_login(2000), 5),
+    ]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _, html_content, _ in cenarios:
+            assert proxy._restaurante_id_login_rapido(html_content) == _dom('html.parser', html_content)
+
+    for titulo, html_content, repeticoes in cenarios:
+        print(f"{titulo} ({len(html_content) / 1024:.1f} KiB), média de {repeticoes} execuções")
+        medicoes = [
+            ('DOM, html.parser', lambda: _dom('html.parser', html_content)),
+            ('DOM, lxml', lambda: _dom('lxml', html_content)),
+            ('regex, sem DOM', lambda: proxy._restaurante_id_login_rapido(html_content)),
+        ]
+        for nome, funcao in medicoes:
+            with contextlib.redirect_stdout(io.StringIO()):
+                melhor = min(timeit.repeat(funcao, number=repeticoes, repeat=3)) / repeticoes
+            print(f"  {nome:<17}: {melhor * 1e6:10.1f} µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Microbenchmark: custo de log por requisição no `proxy_request`.
+
+Chama o proxy com uma sessão falsa (resposta JSON pronta, sem rede) e mede o tempo por
+requisição visto pela thread da requisição.
+Os cenários combinam LOG_REQUEST_DUMPS (dump de endpoints, corpo e cookies) e LOG_LEVEL, com o
+stdout num arquivo e num console lento (100 µs por escrita, como o console do Windows).
+O tempo de esvaziar a fila da thread escritora é medido à parte.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_logs_proxy [requisicoes]
+"""
+
+import contextlib
+import json
+import logging
+import sys
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from app import proxy
+from app.utils import logs
+
+
+def _sessao():
+    resposta = requests.Response()
+    resposta.status_code = 200
+    resposta.headers['Content-Type'] = 'application/json'
+    resposta._content = json.dumps({'status': 'success', 'data': [{'id': i, 'nome': f'Item {i}'} for i in range(20)]}).encode()
+    sessao = MagicMock()
+    sessao.request.return_value = resposta
+    sessao.cookies = requests.cookies.RequestsCookieJar()
+    sessao.cookies.set('JSESSIONID', 'ABCDEF0123456789ABCDEF0123456789')
+    return sessao
+
+
+class ConsoleLento:
+    """Saída que custa `atraso` segundos por escrita, com o GIL liberado (como uma escrita bloqueante)."""
+
+    def __init__(self, saida, atraso=100e-6):
+        self.saida = saida
+        self.atraso = atraso
+
+    def write(self, texto):
+        time.sleep(self.atraso)
+        return self.saida.write(texto)
+
+    def flush(self):
+        self.saida.flush()
+
+    def tell(self):
+        return self.saida.tell()
+
+
+def _medir(requisicoes, dumps, nivel, lento=False):
+    corpo = {'nome': 'Prato', 'descricao': 'Descrição longa ' * 10, 'preco': 12.5, 'restaurante': {'id': 1}}
+    logs.configurar_logs(nivel)
+    with tempfile.TemporaryFile('w+', encoding='utf-8') as arquivo, \
+         contextlib.redirect_stdout(ConsoleLento(arquivo) if lento else arquivo) as saida, \
+         patch('app.proxy.api_session', _sessao()), \
+         patch('app.proxy.LOG_REQUEST_DUMPS', dumps):
+        for _ in range(50):
+            proxy.proxy_request('POST', 'cardapio/add', data=corpo, params={'restaurante_id': 1})
+        logs.encerrar_logs()
+        logs.configurar_logs(nivel)
+
+        inicio = time.perf_counter()
+        for _ in range(requisicoes):
+            proxy.proxy_request('POST', 'cardapio/add', data=corpo, params={'restaurante_id': 1})
+        por_requisicao = (time.perf_counter() - inicio) / requisicoes
+
+        inicio = time.perf_counter()
+        logs.encerrar_logs()
+        esvaziar = time.perf_counter() - inicio
+        saida.flush()
+        bytes_escritos = saida.tell()
+    logs.configurar_logs()
+    return por_requisicao, esvaziar, bytes_escritos
+
+
+def main():
+    requisicoes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{requisicoes} requisições POST com sessão falsa")
+    for lento in (False, True):
+        print('  stdout: ' + ('console lento (100 µs por escrita)' if lento else 'arquivo'))
+        for dumps, nivel in ((True, 'INFO'), (False, 'INFO'), (False, 'WARNING')):
+            por_requisicao, esvaziar, bytes_escritos = _medir(requisicoes, dumps, nivel, lento)
+            titulo = f"LOG_REQUEST_DUMPS={'on' if dumps else 'off'}, LOG_LEVEL={nivel}"
+            print(
+                f"    {titulo:<40}: {por_requisicao * 1e6:8.1f} µs/req, "
+                f"fila esvaziada em {esvaziar * 1000:7.1f} ms, {bytes_escritos / requisicoes:6.0f} B/req"
+            )
+    logging.shutdown()
+
+
+if __name__ == '__main__':
+    main()
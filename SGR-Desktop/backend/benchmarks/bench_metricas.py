@@ -0,0 +1,68 @@
+"""
+Benchmark: custo dos histogramas de latência por requisição.
+
+Mede o tempo médio de `proxy_request` (sessão falsa, resposta JSON pronta) e de uma rota Flask
+completa (`GET /api/cardapio/<id>` pelo test client) com as métricas ligadas e desligadas
+(`metricas.ativo`, o mesmo efeito de METRICAS_ATIVAS=false), e o tempo de exportar /api/metrics.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_metricas [repeticoes]
+"""
+
+import json
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from app import create_app, proxy
+from app.utils import logs
+from app.utils.metricas import metricas
+
+
+def _sessao():
+    resposta = requests.Response()
+    resposta.status_code = 200
+    resposta.headers['Content-Type'] = 'application/json'
+    resposta._content = json.dumps([{'id': i, 'nome': f'Item {i}', 'preco': 10.0} for i in range(20)]).encode()
+    sessao = MagicMock()
+    sessao.request.return_value = resposta
+    sessao.cookies = requests.cookies.RequestsCookieJar()
+    return sessao
+
+
+def _medir(funcao, repeticoes):
+    funcao()
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    client = create_app().test_client()
+    logs.configurar_logs('CRITICAL')
+    cenarios = (
+        ('proxy_request', lambda: proxy.proxy_request('GET', 'cardapio/7')),
+        ('rota /api/cardapio/7', lambda: client.get('/api/cardapio/7')),
+    )
+    print(f"{repeticoes} repetições (µs por chamada)")
+    with patch('app.proxy.api_session', _sessao()), patch('app.proxy.LOG_REQUEST_DUMPS', False):
+        for titulo, funcao in cenarios:
+            tempos = {}
+            for ativo in (False, True):
+                metricas.ativo = ativo
+                tempos[ativo] = _medir(funcao, repeticoes)
+            print(
+                f"  {titulo:<21}: sem métricas {tempos[False]:7.1f} µs, com métricas {tempos[True]:7.1f} µs "
+                f"(+{tempos[True] - tempos[False]:5.1f} µs)"
+            )
+    metricas.ativo = True
+    print(f"  exportar Prometheus  : {_medir(metricas.exportar_prometheus, 200):7.1f} µs")
+    print(f"  exportar JSON        : {_medir(metricas.exportar_json, 200):7.1f} µs")
+
+
+if __name__ == '__main__':
+    main()
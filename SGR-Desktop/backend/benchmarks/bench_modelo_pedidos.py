@@ -0,0 +1,138 @@
+"""
+Benchmark: memória e CPU do modelo normalizado (`Pedido`/`ItemPedido` com __slots__)
+em um histórico sintético de pedidos (padrão: 100 mil).
+
+- memória: bytes alocados pelo payload bruto, pelos `Pedido`s com __slots__ e pelos mesmos
+  registros representados como dicionários;
+- CPU: agregação estilo dashboard sobre os dicionários brutos (`dict.get` encadeado e
+  `fromisoformat` a cada requisição, como as rotas faziam) versus sobre os atributos tipados,
+  além do custo único da normalização.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_modelo_pedidos [quantidade_pedidos]
+"""
+
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from app.models.pedido import normalizar_pedidos
+from app.utils.status import is_status_concluido
+
+from .dados_sinteticos import gerar_pedidos
+
+
+def _agregar_dicts(pedidos):
+    total_vendas = 0.0
+    produtos = 0
+    por_dia = {}
+    for pedido in pedidos:
+        if not is_status_concluido(pedido.get('status')):
+            continue
+        restaurante = pedido.get('restaurante')
+        restaurante_id = restaurante.get('id') if isinstance(restaurante, dict) else pedido.get('restaurante_id')
+        if not restaurante_id or int(restaurante_id) != 1:
+            continue
+        valor_pedido = 0.0
+        for item in pedido.get('itens') or []:
+            quantidade = item.get('quantidade', 0) or item.get('quantidadeItem', 0) or 0
+            preco = 0.0
+            if item.get('itemRestaurante') and isinstance(item.get('itemRestaurante'), dict):
+                preco = float(item['itemRestaurante'].get('preco', 0) or 0)
+            elif item.get('item_restaurante') and isinstance(item.get('item_restaurante'), dict):
+                preco = float(item['item_restaurante'].get('preco', 0) or 0)
+            elif item.get('preco'):
+                preco = float(item.get('preco', 0) or 0)
+            valor_pedido += quantidade * preco
+            produtos += quantidade
+        criado_em = pedido.get('criadoEm') or pedido.get('criado_em')
+        dia = datetime.fromisoformat(str(criado_em).replace('Z', '+00:00')).date()
+        por_dia[dia] = por_dia.get(dia, 0.0) + valor_pedido
+        total_vendas += valor_pedido
+    return total_vendas, produtos, len(por_dia)
+
+
+def _agregar_modelos(pedidos):
+    total_vendas = 0.0
+    produtos = 0
+    por_dia = {}
+    for pedido in pedidos:
+        if not pedido.concluido or pedido.restaurante_id != 1:
+            continue
+        por_dia[pedido.data] = por_dia.get(pedido.data, 0.0) + pedido.valor_total
+        total_vendas += pedido.valor_total
+        produtos += pedido.quantidade_itens
+    return total_vendas, produtos, len(por_dia)
+
+
+def _como_dicts(pedidos):
+    return [
+        {
+            'id': pedido.id,
+            'restaurante_id': pedido.restaurante_id,
+            'status': pedido.status,
+            'concluido': pedido.concluido,
+            'criado_em': pedido.criado_em,
+            'data': pedido.data,
+            'itens': [
+                {
+                    'produto_id': item.produto_id,
+                    'nome': item.nome,
+                    'quantidade': item.quantidade,
+                    'preco_unitario': item.preco_unitario,
+                    'observacoes': item.observacoes,
+                }
+                for item in pedido.itens
+            ],
+            'valor_itens': pedido.valor_itens,
+            'valor_informado': pedido.valor_informado,
+            'valor_total': pedido.valor_total,
+            'quantidade_itens': pedido.quantidade_itens,
+            'bruto': pedido.bruto,
+        }
+        for pedido in pedidos
+    ]
+
+
+def _memoria(funcao):
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    resultado = funcao()
+    depois = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return resultado, depois - antes
+
+
+def _cronometrar(funcao, repeticoes=5):
+    melhor = float('inf')
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return resultado, melhor * 1000
+
+
+def main(quantidade=100_000):
+    brutos, mem_bruto = _memoria(lambda: gerar_pedidos(quantidade))
+    modelos, mem_modelos = _memoria(lambda: normalizar_pedidos(brutos))
+    _, mem_dicts = _memoria(lambda: _como_dicts(modelos))
+
+    _, t_normalizar = _cronometrar(lambda: normalizar_pedidos(brutos), repeticoes=3)
+    r_dicts, t_dicts = _cronometrar(lambda: _agregar_dicts(brutos))
+    r_modelos, t_modelos = _cronometrar(lambda: _agregar_modelos(modelos))
+    assert abs(r_dicts[0] - r_modelos[0]) < 1e-6 * max(1.0, r_dicts[0]) and r_dicts[1:] == r_modelos[1:]
+
+    mb = 1024 * 1024
+    print(f"Histórico sintético: {quantidade} pedidos")
+    print(f"memória payload bruto            : {mem_bruto / mb:8.1f} MB")
+    print(f"memória Pedido/ItemPedido (slots): {mem_modelos / mb:8.1f} MB")
+    print(f"memória mesmos registros em dict : {mem_dicts / mb:8.1f} MB")
+    print(f"normalização (uma vez/snapshot)  : {t_normalizar:8.1f} ms")
+    print(f"agregação sobre dicts brutos     : {t_dicts:8.1f} ms por requisição")
+    print(f"agregação sobre Pedido           : {t_modelos:8.1f} ms por requisição")
+
+
+if __name__ == '__main__':
+    main(*[int(valor) for valor in sys.argv[1:2]])
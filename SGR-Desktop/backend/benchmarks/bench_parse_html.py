@@ -0,0 +1,119 @@
+"""
+Benchmark: `parse_html_response` em tabelas de cardápio e páginas de login sintéticas grandes.
+
+Compara a extração antiga (várias passadas `find_all` sobre a árvore, sempre com 'html.parser')
+com a atual (uma passada pela árvore) nos parsers 'html.parser' e 'lxml'.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_parse_html [linhas_tabela]
+"""
+
+import contextlib
+import io
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from app import proxy
+
+
+def gerar_tabela_itens(linhas):
+    corpo = ''.join(
+        f'<tr><td>{indice}</td><td>Prato {indice} <b>especial</b></td><td>R$ {indice % 90 + 9},90</td>'
+        f'<td>{indice % 5 + 1}</td><td><a href="/imagens/prato{indice}.jpg">Imagem</a></td></tr>'
+        for indice in range(1, linhas + 1)
+    )
+    return (
+        '<!DOCTYPE html><html><head><title>Cardápio</title></head><body>'
+        '<nav>' + ''.join(f'<a href="/secao/{i}">Seção {i}</a>' for i in range(50)) + '</nav>'
+        '<table id="tabelaItens"><tr><th>ID</th><th>Nome</th><th>Preço</th><th>Restaurante</th><th>Imagem</th></tr>'
+        + corpo + '</table></body></html>'
+    )
+
+
+def gerar_pagina_login(blocos):
+    # restaurante_id só no último link: o pior caso, todas as fontes são percorridas
+    conteudo = ''.join(
+        f'<div class="card" data-posicao="{i}"><p>Texto {i}</p><a href="/ajuda/{i}">Ajuda</a>'
+        f'<input type="hidden" name="token_{i}" value="{i}"></div>'
+        for i in range(blocos)
+    )
+    return (
+        '<!DOCTYPE html><html><head><script>var tema = "claro";</script></head><body>'
+        '<p>Login bem-sucedido! Bem-vindo(a), Restaurante Benchmark.</p>'
+        + conteudo + '<a href="/restaurante.html?restaurante_id=42">Painel</a></body></html>'
+    )
+
+
+def _legado(html_content, endpoint):
+    """Extração anterior: várias passadas find_all com 'html.parser'."""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    if 'restaurantes/login' in endpoint:
+        for script in soup.find_all('script'):
+            if script.string and re.search(r'restaurante[_\s]*id\s*[=:]\s*(\d+)', script.string, re.IGNORECASE):
+                return 'script'
+        for inp in soup.find_all('input', {'type': 'hidden'}):
+            if 'restaurante' in inp.get('name', '').lower() and 'id' in inp.get('name', '').lower():
+                return int(inp.get('value', 0))
+        elementos = soup.find_all(attrs={'data-restaurante-id': True})
+        if elementos:
+            return int(elementos[0].get('data-restaurante-id'))
+        for link in soup.find_all('a', href=True):
+            id_match = re.search(r'[?&](?:id|restaurante_id)=(\d+)', link.get('href', ''), re.IGNORECASE)
+            if id_match:
+                return int(id_match.group(1))
+        return None
+
+    tabela = soup.find('table', id='tabelaItens') or soup.find('table')
+    itens = []
+    for row in tabela.find_all('tr'):
+        cells = row.find_all(['td', 'th'])
+        if len(cells) >= 3:
+            texto = cells[0].get_text(strip=True)
+            nome = cells[1].get_text(strip=True)
+            if texto.isdigit() and nome:
+                itens.append((int(texto), nome, cells[2].get_text(strip=True)))
+    return itens
+
+
+def _medir(funcao, repeticoes):
+    melhores = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            funcao()
+        melhores.append(time.perf_counter() - inicio)
+    return min(melhores) * 1000
+
+
+def _atual(parser, html_content, endpoint):
+    def executar():
+        anterior = proxy.HTML_PARSER_BACKEND
+        proxy.HTML_PARSER_BACKEND = parser
+        try:
+            return proxy.parse_html_response(html_content, endpoint)
+        finally:
+            proxy.HTML_PARSER_BACKEND = anterior
+
+    return executar
+
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    cenarios = [
+        (f'tabelaItens, {linhas} linhas', gerar_tabela_itens(linhas), 'itens/restaurante/1'),
+        ('login, 2000 blocos', gerar_pagina_login(2000), 'restaurantes/login'),
+    ]
+
+    for titulo, html_content, endpoint in cenarios:
+        print(f"{titulo} ({len(html_content) // 1024} KiB)")
+        print(f"  legado (html.parser, várias passadas): {_medir(lambda: _legado(html_content, endpoint), 5):8.1f} ms")
+        for parser in ('html.parser', 'lxml'):
+            tempo = _medir(_atual(parser, html_content, endpoint), 5)
+            print(f"  atual ({parser:<11}, uma passada)   : {tempo:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: primeira rajada de requisições à API externa com e sem aquecimento do pool.
+
+Servidor HTTP/1.1 local que atrasa cada nova conexão em `handshake` segundos (simula o
+TCP + TLS até a API na nuvem) e responde rápido nas conexões já abertas. Mede a rajada inicial
+do dashboard (quatro GETs em paralelo) com a sessão fria e depois de `aquecer_conexoes`, e o
+reuso de conexões numa sequência de rajadas.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_pool [handshake_ms] [rodadas]
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app import proxy
+from app.services.conexoes import aquecer_conexoes, estatisticas_pool
+from app.utils import logs
+
+PARALELAS = 4
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    handshake = 0.0
+
+    def setup(self):
+        time.sleep(self.handshake)
+        super().setup()
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        corpo = b'[]'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def _rajada(sessao, url, executor):
+    inicio = time.perf_counter()
+    list(executor.map(lambda i: sessao.get(f'{url}pedidos/{i}', timeout=5).status_code, range(PARALELAS)))
+    return time.perf_counter() - inicio
+
+
+def _medir(url, rodadas, aquecer):
+    sessao = proxy._criar_sessao()
+    if aquecer:
+        aquecer_conexoes(PARALELAS, sessao=sessao, url=url)
+    with ThreadPoolExecutor(max_workers=PARALELAS) as executor:
+        duracoes = [_rajada(sessao, url, executor) for _ in range(rodadas)]
+    return duracoes, estatisticas_pool(sessao)
+
+
+def main():
+    _Handler.handshake = (float(sys.argv[1]) if len(sys.argv) > 1 else 150) / 1000
+    rodadas = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    logs.configurar_logs('CRITICAL')
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{httpd.server_address[1]}/api/'
+
+    print(f"{rodadas} rajadas de {PARALELAS} GETs em paralelo, handshake simulado de {_Handler.handshake * 1000:.0f} ms")
+    for titulo, aquecer in (('sessão fria', False), ('pool aquecido', True)):
+        duracoes, estatisticas = _medir(url, rodadas, aquecer)
+        print(
+            f"  {titulo:<14}: primeira rajada {duracoes[0] * 1000:7.1f} ms, demais (mediana) "
+            f"{sorted(duracoes[1:])[len(duracoes) // 2 - 1] * 1000:6.1f} ms, "
+            f"{estatisticas['conexoes_criadas']} conexões para {estatisticas['requisicoes']} requisições "
+            f"(reuso {estatisticas['taxa_reuso']:.0%})"
+        )
+    httpd.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: GETs contra uma API instável, com e sem retentativas.
+
+Servidor HTTP/1.1 local que, a cada requisição, derruba a conexão sem responder (`quedas`) ou
+responde 503 (`indisponivel`) com as probabilidades dadas, e 200 nas demais, após `atraso`
+segundos. O circuit breaker fica desligado para medir só a política de retentativas. Mede a
+fração de erros que chegaria ao usuário, a latência por GET e as idas à API.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_retentativas [gets] [quedas] [indisponivel] [atraso_ms]
+"""
+
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from app import proxy
+from app.utils import logs
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    aleatorio = random.Random(0)
+    quedas = 0.0
+    indisponivel = 0.0
+    atraso = 0.0
+    requisicoes = 0
+
+    def do_GET(self):
+        type(self).requisicoes += 1
+        sorteio = self.aleatorio.random()
+        time.sleep(self.atraso)
+        if sorteio < self.quedas:
+            self.close_connection = True
+            return
+        indisponivel = sorteio < self.quedas + self.indisponivel
+        corpo = b'{"message": "Service Unavailable"}' if indisponivel else b'[{"id": 1}]'
+        self.send_response(503 if indisponivel else 200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def _medir(gets, tentativas):
+    _Handler.aleatorio = random.Random(0)
+    _Handler.requisicoes = 0
+    erros, duracoes = 0, []
+    with patch.object(proxy.upstream_retentativas, 'tentativas', tentativas):
+        for _ in range(gets):
+            inicio = time.perf_counter()
+            status_code, _ = proxy.proxy_request('GET', 'pedidos/restaurante')
+            duracoes.append(time.perf_counter() - inicio)
+            erros += status_code >= 500
+    duracoes.sort()
+    return erros / gets, duracoes[len(duracoes) // 2] * 1000, duracoes[int(len(duracoes) * 0.99)] * 1000, _Handler.requisicoes / gets
+
+
+def main():
+    gets = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    _Handler.quedas = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    _Handler.indisponivel = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+    _Handler.atraso = (float(sys.argv[4]) if len(sys.argv) > 4 else 5) / 1000
+    logs.configurar_logs('CRITICAL')
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{httpd.server_address[1]}/api/'
+
+    print(
+        f"{gets} GETs, {_Handler.quedas:.0%} conexões derrubadas, {_Handler.indisponivel:.0%} respostas 503, "
+        f"atraso de {_Handler.atraso * 1000:.0f} ms (backoff base {proxy.upstream_retentativas.base:g}s, "
+        f"teto {proxy.upstream_retentativas.teto:g}s)"
+    )
+    with patch('app.proxy.API_EXTERNA_BASE_URL', url), patch('app.proxy.LOG_REQUEST_DUMPS', False), \
+         patch.object(proxy.upstream_circuito, 'limite_falhas', 0):
+        for titulo, tentativas in (('sem retentativas', 0), ('2 retentativas', 2)):
+            taxa_erros, p50, p99, idas = _medir(gets, tentativas)
+            print(f"  {titulo:<16}: {taxa_erros:6.2%} erros ao usuário, p50 {p50:6.1f} ms, p99 {p99:7.1f} ms, {idas:.2f} idas à API por GET")
+    httpd.shutdown()
+    httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: gráfico de vendas "anual" (`/api/vendas/<id>/anual`) com rollups diários persistidos.
+
+- partida a frio: primeira requisição de um processo novo, com o snapshot da API já em mãos,
+  sem rollups (reagrega o histórico inteiro) e com os agregados restaurados dos rollups na
+  inicialização (compara digests, sem reagregar nem regravar);
+- restauração dos rollups na inicialização (`restaurar_agregados`);
+- partida a frio com a API fora do ar: apenas os rollups persistidos;
+- regime: requisições seguintes, recálculo a partir dos pedidos versus leitura dos rollups.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_rollups_anual [quantidade_pedidos] [repeticoes]
+"""
+
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+from app import create_app
+from app.routes import analytics
+from app.services import pedidos as pedidos_servico
+from app.services import pedidos_agregados
+from app.services.pedidos_cache import pedidos_cache
+from app.services.pedidos_rollups import RollupsDiarios
+
+from .dados_sinteticos import gerar_pedidos
+
+
+def _chamar():
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resposta, status_code = analytics.get_vendas_periodo(1, 'anual')
+    assert status_code == 200, resposta.get_json()
+    return (time.perf_counter() - inicio) * 1000
+
+
+def _restaurar():
+    inicio = time.perf_counter()
+    assert pedidos_agregados.restaurar_agregados() == 1
+    return (time.perf_counter() - inicio) * 1000
+
+
+def _processo_novo():
+    """Descarta o estado em memória (memos e agregados), como num processo recém-iniciado."""
+    pedidos_agregados.limpar_agregados()
+    pedidos_servico._normalizados.clear()
+    pedidos_cache.invalidar()
+
+
+def main(quantidade=100_000, repeticoes=15):
+    pedidos = gerar_pedidos(quantidade)
+    app = create_app()
+
+    with tempfile.TemporaryDirectory() as diretorio, app.test_request_context(), \
+            patch('app.services.pedidos_cache.pedidos_cache.ttl', 3600):
+        rollups = RollupsDiarios(os.path.join(diretorio, 'rollups.sqlite3'))
+
+        with patch('app.services.pedidos_cache.proxy_request', return_value=(200, {'data': pedidos})):
+            _processo_novo()
+            frio_sem_rollups = _chamar()
+
+            with patch.object(pedidos_agregados, 'rollups', rollups):
+                _processo_novo()
+                carga_inicial = _chamar()
+                _processo_novo()
+                restauracao = _restaurar()
+                frio_com_rollups = _chamar()
+                regime_rollups = statistics.median(_chamar() for _ in range(repeticoes))
+
+            with patch('app.routes.analytics.ANALYTICS_INCREMENTAL', False):
+                regime_recalculo = statistics.median(_chamar() for _ in range(repeticoes))
+
+        with patch('app.services.pedidos_cache.proxy_request', return_value=(503, {'status': 'error'})), \
+                patch.object(pedidos_agregados, 'rollups', rollups):
+            _processo_novo()
+            _restaurar()
+            frio_api_fora = _chamar()
+
+        rollups.fechar()
+        _processo_novo()
+
+    print(f"Histórico sintético: {quantidade} pedidos; vendas anual (inclui normalizar o snapshot quando há API)")
+    print(f"partida a frio, sem rollups               : {frio_sem_rollups:8.1f} ms")
+    print(f"partida a frio, gravando rollups (1ª vez) : {carga_inicial:8.1f} ms")
+    print(f"restauração dos rollups na inicialização  : {restauracao:8.1f} ms")
+    print(f"partida a frio, agregados restaurados     : {frio_com_rollups:8.1f} ms")
+    print(f"partida a frio, API fora, rollups em disco: {frio_api_fora:8.1f} ms")
+    print(f"regime, recálculo a partir dos pedidos    : {regime_recalculo:8.1f} ms")
+    print(f"regime, rollups                           : {regime_rollups:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main(*[int(valor) for valor in sys.argv[1:3]])
@@ -0,0 +1,69 @@
+"""
+Benchmark: tabela `tabelaItens` grande lida com a árvore completa do BeautifulSoup (lxml)
+versus a extração em fluxo de `utils/tabela_itens.py`.
+
+Cada modo roda num subprocesso próprio para medir o pico de memória residente (ru_maxrss)
+acrescentado pela extração, além do tempo.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_tabela_itens_fluxo [linhas_tabela]
+"""
+
+import contextlib
+import io
+import resource
+import subprocess
+import sys
+import time
+
+from .bench_parse_html import gerar_tabela_itens
+
+
+def _arvore(html_content):
+    from bs4 import BeautifulSoup
+
+    from app.proxy import _item_da_linha, _linhas_tabela, _localizar_tabela_itens
+
+    soup = BeautifulSoup(html_content, 'lxml')
+    linhas = _linhas_tabela(_localizar_tabela_itens(soup))
+    itens = [_item_da_linha(celulas) for celulas in linhas if len(celulas) >= 3]
+    return [item for item in itens if item.get('nome') and item.get('id')]
+
+
+def _fluxo(html_content):
+    from app.utils.tabela_itens import extrair_itens_tabela
+
+    return extrair_itens_tabela(html_content)
+
+
+def _executar(modo, linhas):
+    html_content = gerar_tabela_itens(linhas)
+    funcao = _arvore if modo == 'arvore' else _fluxo
+    funcao(gerar_tabela_itens(10))  # importações e aquecimento fora da medição
+    antes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        itens = funcao(html_content)
+    duracao = (time.perf_counter() - inicio) * 1000
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - antes
+    print(f"{len(itens)} {duracao:.1f} {pico / 1024:.1f}")
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == '--modo':
+        _executar(sys.argv[2], int(sys.argv[3]))
+        return
+
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"tabelaItens com {linhas} linhas ({len(gerar_tabela_itens(linhas)) // 1024} KiB)")
+    for modo, titulo in (('arvore', 'BeautifulSoup + lxml (árvore)'), ('fluxo', 'HTMLPullParser (fluxo)')):
+        saida = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_tabela_itens_fluxo', '--modo', modo, str(linhas)],
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        itens, duracao, pico = int(saida[0]), float(saida[1]), float(saida[2])
+        print(f"  {titulo:<30}: {duracao:8.1f} ms, +{pico:6.1f} MiB de pico ({itens} itens)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: timeout de leitura fixo x adaptativo por endpoint.
+
+Servidor HTTP/1.1 local com dois endpoints: `itens/{id}` responde em 5 ms, mas uma fração
+(`travadas`) das requisições trava por 5 s; `pedidos/restaurante` sempre leva `pesado` ms (o dump
+grande). As chamadas são sequenciais, quatro consultas de item para cada listagem de pedidos. Com o
+timeout fixo todas esperam `leitura_fixa` segundos; no adaptativo cada endpoint usa p99 × fator do
+que já observou (piso de 0,2 s e teto igual ao fixo). Mede o tempo perdido nas travadas e se o
+endpoint pesado sofre timeouts indevidos. Com travadas acima de ~1% das chamadas o p99 passa a ser a
+própria trava e o timeout do endpoint sobe até o teto, como esperado.
+
+Uso (a partir de SGR-Desktop/backend):
+    python -m benchmarks.bench_timeouts [chamadas] [travadas] [pesado_ms] [leitura_fixa_s]
+"""
+
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from app import proxy
+from app.utils import logs
+from app.utils.timeouts_adaptativos import TimeoutsAdaptativos
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    aleatorio = random.Random(0)
+    lock = threading.Lock()
+    travadas = 0.0
+    pesado = 0.0
+
+    def do_GET(self):
+        if self.path.startswith('/api/itens/'):
+            with self.lock:
+                travada = self.aleatorio.random() < self.travadas
+            time.sleep(5.0 if travada else 0.005)
+        else:
+            time.sleep(self.pesado)
+        corpo = b'{"id": 1}'
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+        except OSError:
+            pass  # o cliente já desistiu (timeout)
+
+    def log_message(self, *args):
+        pass
+
+
+def _medir(chamadas, timeouts):
+    _Handler.aleatorio = random.Random(0)
+    resultado = {'itens': [], 'pedidos': []}
+    estouros = {'itens': 0, 'pedidos': 0}
+    with patch('app.proxy.upstream_timeouts', timeouts):
+        for indice in range(chamadas):
+            tipo, endpoint = ('pedidos', 'pedidos/restaurante') if indice % 5 == 4 else ('itens', f'cardapio/item/{indice}')
+            inicio = time.perf_counter()
+            status_code, _ = proxy.proxy_request('GET', endpoint)
+            resultado[tipo].append(time.perf_counter() - inicio)
+            estouros[tipo] += status_code == 504
+    return resultado, estouros
+
+
+def main():
+    chamadas = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    _Handler.travadas = float(sys.argv[2]) if len(sys.argv) > 2 else 0.005
+    _Handler.pesado = (float(sys.argv[3]) if len(sys.argv) > 3 else 150) / 1000
+    leitura_fixa = float(sys.argv[4]) if len(sys.argv) > 4 else 3.0
+    logs.configurar_logs('CRITICAL')
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{httpd.server_address[1]}/api/'
+
+    print(
+        f"{chamadas} GETs sequenciais: itens/{{id}} em 5 ms ({_Handler.travadas:.1%} travam 5 s), "
+        f"pedidos/restaurante em {_Handler.pesado * 1000:.0f} ms; leitura fixa de {leitura_fixa:g}s"
+    )
+    casos = (
+        ('fixo', TimeoutsAdaptativos(ativo=False)),
+        ('adaptativo', TimeoutsAdaptativos(fator=3, piso=0.2, teto=leitura_fixa)),
+    )
+    with patch('app.proxy.API_EXTERNA_BASE_URL', url), patch('app.proxy.LOG_REQUEST_DUMPS', False), \
+         patch('app.proxy.API_READ_TIMEOUT', leitura_fixa), patch('app.utils.deadline.API_READ_TIMEOUT', leitura_fixa), \
+         patch.object(proxy.upstream_circuito, 'limite_falhas', 0):
+        for titulo, timeouts in casos:
+            inicio = time.perf_counter()
+            duracoes, estouros = _medir(chamadas, timeouts)
+            total = time.perf_counter() - inicio
+            pior_item = max(duracoes['itens']) * 1000
+            media_pedidos = sum(duracoes['pedidos']) / len(duracoes['pedidos']) * 1000
+            leituras = {rotulo: linha['timeout_leitura_s'] for rotulo, linha in timeouts.tabela().items()}
+            print(
+                f"  {titulo:<10}: total {total:6.2f}s | itens: {estouros['itens']} timeouts, pior {pior_item:6.0f} ms | "
+                f"pedidos: {estouros['pedidos']} timeouts, média {media_pedidos:5.0f} ms | leitura final {leituras or '-'}"
+            )
+    httpd.shutdown()
+    httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
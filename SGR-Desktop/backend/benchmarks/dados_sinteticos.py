@@ -0,0 +1,53 @@
+"""
+Geração de históricos sintéticos de pedidos no formato da API Java (`pedidos/restaurante`),
+usados pelos scripts de benchmark.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+STATUS = ['FINALIZADO', 'ENTREGUE', 'CONCLUIDO', 'PENDENTE', 'EM_PREPARO', 'CANCELADO']
+
+
+def gerar_pedidos(
+    quantidade: int,
+    restaurante_id: int = 1,
+    dias: int = 1825,
+    produtos: int = 40,
+    semente: int = 42,
+) -> List[Dict[str, Any]]:
+    """Gera `quantidade` pedidos distribuídos nos últimos `dias`, com as variações de chave reais."""
+    aleatorio = random.Random(semente)
+    agora = datetime.now()
+    pedidos = []
+
+    for pedido_id in range(1, quantidade + 1):
+        criado_em = agora - timedelta(minutes=aleatorio.randint(0, dias * 24 * 60))
+        itens = []
+        for _ in range(aleatorio.randint(1, 4)):
+            produto_id = aleatorio.randint(1, produtos)
+            item_restaurante = {'id': produto_id, 'nome': f'Produto {produto_id}', 'preco': 5.0 + produto_id}
+            if aleatorio.random() < 0.5:
+                itens.append({'quantidade': aleatorio.randint(1, 3), 'itemRestaurante': item_restaurante})
+            else:
+                itens.append({'quantidade': aleatorio.randint(1, 3), 'item_restaurante': item_restaurante})
+
+        pedido: Dict[str, Any] = {
+            'id': pedido_id,
+            'status': aleatorio.choice(STATUS),
+            'itens': itens,
+            'observacoesGerais': None,
+        }
+        if aleatorio.random() < 0.5:
+            pedido['restaurante'] = {'id': restaurante_id, 'nome': 'Restaurante Benchmark'}
+            pedido['criadoEm'] = criado_em.isoformat()
+        else:
+            pedido['restaurante_id'] = restaurante_id
+            pedido['criado_em'] = criado_em.isoformat()
+        pedidos.append(pedido)
+
+    return pedidos
+
+
+__all__ = ['gerar_pedidos']
@@ -14,14 +14,36 @@ a = Analysis(
     hiddenimports=[
         'app',
         'app.config',
+        'app.models.pedido',
         'app.proxy',
         'app.routes.analytics',
         'app.routes.avaliacoes',
         'app.routes.cardapio',
         'app.routes.pedidos',
         'app.routes.system',
+        'app.services.conexoes',
         'app.services.diagnostics',
+        'app.services.pedidos',
+        'app.services.pedidos_agregados',
+        'app.services.pedidos_cache',
+        'app.services.pedidos_colunar',
+        'app.services.pedidos_espelho',
+        'app.services.pedidos_rollups',
+        'app.utils.circuit_breaker',
+        'app.utils.codificacao_endpoints',
+        'app.utils.cookies',
+        'app.utils.deadline',
+        'app.utils.decodificacao',
+        'app.utils.escalonador',
+        'app.utils.hedge',
+        'app.utils.logs',
+        'app.utils.metricas',
+        'app.utils.retentativas',
+        'app.utils.sessoes',
+        'app.utils.singleflight',
         'app.utils.status',
+        'app.utils.tabela_itens',
+        'app.utils.timeouts_adaptativos',
         'flask',
         'flask_cors',
         'requests',
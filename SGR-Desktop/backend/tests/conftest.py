@@ -11,6 +11,68 @@ import sys
 # Adicionar diretório raiz ao path para imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Rollups de analytics só em memória: os testes não gravam na pasta de dados do usuário
+os.environ['ANALYTICS_ROLLUPS_DB'] = ''
+
+
+@pytest.fixture(autouse=True)
+def circuito_fechado():
+    """
+    Fixture: Circuit breaker do proxy zerado
+
+    Falhas simuladas num teste não podem abrir o circuito para os seguintes
+    """
+    from app.proxy import upstream_circuito
+
+    upstream_circuito.limpar()
+    yield
+    upstream_circuito.limpar()
+
+
+@pytest.fixture(autouse=True)
+def codificacoes_esquecidas():
+    """
+    Fixture: Tabela de codificações do proxy vazia
+
+    Um endpoint que aprendeu form-urlencoded num teste não pode mudar a primeira tentativa dos seguintes
+    """
+    from app.proxy import codificacao_endpoints
+
+    codificacao_endpoints.esquecer()
+    yield
+    codificacao_endpoints.esquecer()
+
+
+@pytest.fixture(autouse=True)
+def timeouts_esquecidos():
+    """
+    Fixture: Latências dos timeouts adaptativos vazias
+
+    Respostas simuladas num teste não podem encurtar o timeout de leitura dos seguintes
+    """
+    from app.proxy import upstream_timeouts
+
+    upstream_timeouts.esquecer()
+    yield
+    upstream_timeouts.esquecer()
+
+
+@pytest.fixture(autouse=True)
+def retentativas_desligadas():
+    """
+    Fixture: Política de retentativas do proxy desligada e zerada
+
+    Cada proxy_request simulado conta uma única ida à API; testes de retentativa religam explicitamente
+    """
+    from app.proxy import upstream_retentativas
+
+    tentativas = upstream_retentativas.tentativas
+    upstream_retentativas.tentativas = 0
+    upstream_retentativas.limpar()
+    yield
+    upstream_retentativas.tentativas = tentativas
+    upstream_retentativas.limpar()
+
 
 @pytest.fixture(scope='session')
 def test_config():
@@ -5,8 +5,12 @@ Foco: Testar endpoints Flask e respostas HTTP
 Estratégia: Usar Flask test client para simular requisições
 """
 
+from datetime import datetime
+from unittest.mock import patch
+
 import pytest
 from app import create_app
+from app.services.pedidos_cache import pedidos_cache
 
 
 @pytest.fixture
@@ -71,6 +75,37 @@ class TestFlaskEndpoints:
         assert 'status' in data
 
 
+class TestDashboardEndpoint:
+    """
+    Teste: Endpoint /api/dashboard/{id}
+
+    Objetivo: Garantir que o dashboard calcula as métricas a partir do serviço de
+    pedidos em processo, com uma única busca na API externa e sem loopback HTTP.
+    """
+
+    @patch('app.services.pedidos_cache.proxy_request')
+    def test_dashboard_calcula_metricas_sem_loopback(self, mock_proxy, client):
+        pedidos_cache.invalidar()
+        hoje = datetime.now().isoformat()
+        mock_proxy.return_value = (200, [
+            {'id': 1, 'status': 'FINALIZADO', 'restaurante_id': 1, 'criadoEm': hoje,
+             'itens': [{'quantidade': 2, 'preco': 25.0}]},
+            {'id': 2, 'status': 'PENDENTE', 'restaurante_id': 1, 'criadoEm': hoje,
+             'itens': [{'quantidade': 1, 'preco': 30.0}]},
+        ])
+
+        with patch('requests.get') as mock_loopback:
+            response = client.get('/api/dashboard/1')
+            mock_loopback.assert_not_called()
+
+        assert response.status_code == 200
+        cards = response.get_json()['data']['cards']
+        assert cards['total_vendas']['valor_numerico'] == 50.0
+        assert cards['quantidade_produtos']['valor_numerico'] == 2
+        mock_proxy.assert_called_once_with('GET', 'pedidos/restaurante')
+        pedidos_cache.invalidar()
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
 
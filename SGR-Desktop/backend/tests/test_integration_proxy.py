@@ -5,9 +5,14 @@ Foco: Testar interação entre Flask e API externa Java
 Estratégia: Mock da API externa para simular respostas
 """
 
+import json
+import threading
+import time
+
 import pytest
+import requests
 from unittest.mock import patch, MagicMock
-from app.proxy import proxy_request
+from app.proxy import proxy_request, upstream_circuito, upstream_singleflight
 
 
 class TestProxyRequest:
@@ -136,6 +141,157 @@ class TestProxyRequest:
         assert response_data['status'] == 'error'
 
 
+class TestProxySingleFlight:
+    """
+    Teste: GETs idênticos e simultâneos compartilham uma única requisição externa
+    """
+
+    @staticmethod
+    def _resposta_json(payload):
+        resposta = requests.Response()
+        resposta.status_code = 200
+        resposta.headers['Content-Type'] = 'application/json'
+        resposta._content = json.dumps(payload).encode()
+        return resposta
+
+    @patch('app.proxy.api_session')
+    def test_gets_simultaneos_sao_coalescidos(self, mock_session):
+        def request_lento(**kwargs):
+            time.sleep(0.2)
+            return self._resposta_json([{'id': 1}])
+
+        mock_session.request.side_effect = request_lento
+        mock_session.cookies.get.return_value = 'ABC'
+        coalescidas_antes = upstream_singleflight.coalescidas
+
+        resultados = []
+        threads = [
+            threading.Thread(target=lambda: resultados.append(proxy_request('GET', 'pedidos/restaurante')))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert mock_session.request.call_count == 1
+        assert resultados == [(200, [{'id': 1}])] * 4
+        assert upstream_singleflight.coalescidas - coalescidas_antes == 3
+
+    @patch('app.proxy.api_session')
+    def test_posts_nao_sao_coalescidos(self, mock_session):
+        mock_session.request.return_value = self._resposta_json({'status': 'success'})
+
+        proxy_request('POST', 'avaliacoes-prato', data={'nota': 5})
+        proxy_request('POST', 'avaliacoes-prato', data={'nota': 5})
+
+        assert mock_session.request.call_count == 2
+
+
+class TestProxyCircuitBreaker:
+    """
+    Teste: Circuit breaker do proxy com a API externa fora do ar
+
+    Cenários testados:
+    - Após o limite de falhas, responde na hora com o diagnóstico original, sem chamar a API
+    - Famílias de endpoint têm circuitos independentes
+    - Esgotado o tempo aberto, uma única sonda vai à API; sucesso fecha o circuito
+    - Respostas 4xx não contam como falha
+    - GETs coalescidos contam uma única falha (só o líder registra)
+    """
+
+    @pytest.fixture(autouse=True)
+    def limites(self):
+        with patch.object(upstream_circuito, 'limite_falhas', 3), \
+             patch.object(upstream_circuito, 'tempo_aberto', 30):
+            yield
+
+    @patch('app.proxy.api_session')
+    def test_circuito_aberto_responde_sem_chamar_api(self, mock_session):
+        mock_session.request.side_effect = requests.exceptions.ConnectionError("Connection refused")
+
+        for _ in range(3):
+            proxy_request('GET', 'pedidos/restaurante')
+        status_code, response_data = proxy_request('GET', 'pedidos/restaurante')
+
+        assert mock_session.request.call_count == 3
+        assert status_code == 503
+        assert response_data['diagnostico']['tipo_erro'] == 'connection_error'
+        assert response_data['diagnostico']['circuito']['estado'] == 'aberto'
+        assert response_data['diagnostico']['circuito']['familia'] == 'pedidos'
+
+        mock_session.request.side_effect = None
+        mock_session.request.return_value = TestProxySingleFlight._resposta_json([])
+        assert proxy_request('GET', 'cardapio/1')[0] == 200
+
+    @patch('app.proxy.api_session')
+    def test_sonda_unica_fecha_circuito(self, mock_session):
+        mock_session.request.side_effect = requests.exceptions.Timeout("Connection timeout")
+        for _ in range(3):
+            proxy_request('GET', 'pedidos/restaurante')
+        assert upstream_circuito.estado('pedidos') == 'aberto'
+
+        liberar = threading.Event()
+
+        def request_lento(**kwargs):
+            liberar.wait(2)
+            return TestProxySingleFlight._resposta_json([{'id': 1}])
+
+        mock_session.request.side_effect = request_lento
+        mock_session.cookies.get.return_value = 'ABC'
+        upstream_circuito.tempo_aberto = 0
+
+        resultados = []
+        sonda = threading.Thread(target=lambda: resultados.append(proxy_request('GET', 'pedidos/1')))
+        sonda.start()
+        while mock_session.request.call_count < 4:
+            time.sleep(0.01)
+        rejeitada = proxy_request('POST', 'pedidos/2', data={'status': 'PRONTO'})
+        liberar.set()
+        sonda.join()
+
+        assert mock_session.request.call_count == 4
+        assert rejeitada[0] == 504
+        assert resultados == [(200, [{'id': 1}])]
+        assert upstream_circuito.estado('pedidos') == 'fechado'
+
+    @patch('app.proxy.api_session')
+    def test_erros_4xx_nao_abrem_circuito(self, mock_session):
+        resposta = TestProxySingleFlight._resposta_json({'status': 'error'})
+        resposta.status_code = 404
+        mock_session.request.return_value = resposta
+
+        for _ in range(5):
+            proxy_request('POST', 'pedidos/1', data={'x': 1})
+
+        assert mock_session.request.call_count == 5
+        assert upstream_circuito.estado('pedidos') == 'fechado'
+
+    @patch('app.proxy.api_session')
+    def test_gets_coalescidos_contam_uma_falha(self, mock_session):
+        def request_lento(**kwargs):
+            time.sleep(0.2)
+            resposta = TestProxySingleFlight._resposta_json({'status': 'error'})
+            resposta.status_code = 503
+            return resposta
+
+        mock_session.request.side_effect = request_lento
+        mock_session.cookies.get.return_value = 'ABC'
+
+        threads = [threading.Thread(target=lambda: proxy_request('GET', 'pedidos/restaurante')) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert mock_session.request.call_count == 1
+        assert upstream_circuito.estado('pedidos') == 'fechado'
+        proxy_request('GET', 'pedidos/restaurante')
+        assert upstream_circuito.estado('pedidos') == 'fechado'
+        proxy_request('GET', 'pedidos/restaurante')
+        assert upstream_circuito.estado('pedidos') == 'aberto'
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
 
@@ -0,0 +1,181 @@
+"""
+🧪 TESTES DE UNIDADE - Codificação aprendida por endpoint
+
+Foco: Garantir que utils/codificacao_endpoints.py lembra a codificação (JSON ou form-urlencoded)
+aceita por cada endpoint, que proxy_request envia essa primeiro (uma única ida à API) e que a
+tabela sobrevive a reinícios quando persistida
+"""
+
+import json
+from urllib.parse import parse_qsl
+
+import pytest
+import requests
+from unittest.mock import patch
+
+from app import create_app, proxy
+from app.utils.codificacao_endpoints import (
+    CORPO_FORM,
+    CORPO_JSON,
+    CodificacaoEndpoints,
+    alternativa,
+    corpo_formulario,
+)
+
+
+def _resposta(status, payload):
+    resposta = requests.Response()
+    resposta.status_code = status
+    resposta.headers['Content-Type'] = 'application/json'
+    resposta._content = json.dumps(payload).encode()
+    return resposta
+
+
+def _so_form(mensagem_json=None, status_json=401):
+    """API que só aceita form-urlencoded: JSON recebe `status_json`."""
+    def responder(method, url, **kwargs):
+        if 'json' in kwargs:
+            return _resposta(status_json, {'message': mensagem_json or 'Unauthorized'})
+        return _resposta(201, {'id': 9})
+    return responder
+
+
+class TestCodificacaoEndpoints:
+    """
+    Teste: Tabela de codificações
+
+    Cenários testados:
+    - JSON enquanto nada foi aprendido; registro troca e conta sucessos
+    - Form acertado de primeira conta como ida economizada
+    - Persistência em SQLite e `esquecer`
+    - Corpo de formulário com objetos aninhados (`restaurante.id`)
+    """
+
+    def test_aprende_e_conta(self):
+        tabela = CodificacaoEndpoints()
+
+        assert tabela.preferida('POST itens') == CORPO_JSON
+        assert tabela.registrar('POST itens', CORPO_FORM, primeira_tentativa=False) is True
+        assert tabela.registrar('POST itens', CORPO_FORM) is False
+
+        assert tabela.preferida('POST itens') == CORPO_FORM
+        assert tabela.tabela()['POST itens']['sucessos'] == 2
+        assert tabela.stats()['idas_economizadas'] == 1
+        assert alternativa(CORPO_FORM) == CORPO_JSON
+        with pytest.raises(ValueError):
+            tabela.registrar('POST itens', 'xml')
+
+    def test_persistencia(self, tmp_path):
+        caminho = str(tmp_path / 'codificacoes.db')
+        tabela = CodificacaoEndpoints(caminho)
+        tabela.registrar('POST itens', CORPO_FORM)
+        tabela.registrar('POST avaliacoes', CORPO_FORM)
+        tabela.esquecer(['POST avaliacoes'])
+
+        recarregada = CodificacaoEndpoints(caminho)
+
+        assert recarregada.preferida('POST itens') == CORPO_FORM
+        assert recarregada.preferida('POST avaliacoes') == CORPO_JSON
+        assert recarregada.stats()['persistida'] is True
+
+    def test_corpo_formulario(self):
+        corpo = corpo_formulario({'nome': 'Pão de queijo', 'restaurante': {'id': 7}, 'tags': ['a', 'b'], 'obs': None})
+
+        assert parse_qsl(corpo, keep_blank_values=True) == [
+            ('nome', 'Pão de queijo'), ('restaurante.id', '7'), ('tags', 'a'), ('tags', 'b'), ('obs', ''),
+        ]
+        assert corpo_formulario('a=1') == 'a=1'
+
+
+class TestCodificacaoProxy:
+    """
+    Teste: proxy_request com a codificação aprendida
+
+    Cenários testados:
+    - 401 em JSON: reenvia em form e aprende; a próxima vai direto em form (uma chamada)
+    - 400 com mensagem de formato também dispara a outra codificação
+    - Endpoint aprendido que volta a exigir JSON reaprende
+    - Ids no caminho compartilham a mesma entrada; GET não consulta a tabela
+    - /api/proxy/codificacoes expõe e esquece a tabela
+    """
+
+    @patch('app.proxy.api_session')
+    def test_aprende_form_e_economiza_ida(self, mock_session):
+        mock_session.request.side_effect = _so_form()
+        dados = {'nome': 'Pizza', 'restaurante': {'id': 7}}
+
+        status_code, _ = proxy.proxy_request('POST', 'cardapio/add', data=dados, params={'restaurante_id': 7})
+
+        assert status_code == 201
+        assert mock_session.request.call_count == 2
+        form = mock_session.request.call_args
+        assert form.kwargs['headers']['Content-Type'] == 'application/x-www-form-urlencoded'
+        assert dict(parse_qsl(form.kwargs['data'])) == {'nome': 'Pizza', 'restaurante.id': '7'}
+        assert form.kwargs['params'] == {'restaurante_id': 7}
+        assert proxy.codificacao_endpoints.preferida('POST itens') == CORPO_FORM
+
+        mock_session.request.reset_mock()
+        status_code, _ = proxy.proxy_request('POST', 'cardapio/add', data=dados)
+
+        assert status_code == 201
+        assert mock_session.request.call_count == 1
+        assert proxy.codificacao_endpoints.stats()['idas_economizadas'] == 1
+
+    @patch('app.proxy.api_session')
+    def test_erro_400_de_formato(self, mock_session):
+        mock_session.request.side_effect = _so_form('Invalid content-type', status_json=400)
+
+        status_code, _ = proxy.proxy_request('POST', 'avaliacoes', data={'nota': 5})
+
+        assert status_code == 201
+        assert proxy.codificacao_endpoints.preferida('POST avaliacoes') == CORPO_FORM
+
+    @patch('app.proxy.api_session')
+    def test_400_comum_nao_reenvia(self, mock_session):
+        mock_session.request.return_value = _resposta(400, {'message': 'Preço obrigatório'})
+
+        status_code, _ = proxy.proxy_request('POST', 'avaliacoes', data={'nota': 5})
+
+        assert status_code == 400
+        assert mock_session.request.call_count == 1
+        assert proxy.codificacao_endpoints.tabela() == {}
+
+    @patch('app.proxy.api_session')
+    def test_reaprende_json(self, mock_session):
+        proxy.codificacao_endpoints.registrar('POST avaliacoes', CORPO_FORM)
+
+        def so_json(method, url, **kwargs):
+            return _resposta(201, {'id': 1}) if 'json' in kwargs else _resposta(403, {'message': 'Forbidden'})
+
+        mock_session.request.side_effect = so_json
+
+        status_code, _ = proxy.proxy_request('POST', 'avaliacoes', data={'nota': 5})
+
+        assert status_code == 201
+        assert 'data' in mock_session.request.call_args_list[0].kwargs
+        assert proxy.codificacao_endpoints.preferida('POST avaliacoes') == CORPO_JSON
+
+    @patch('app.proxy.api_session')
+    def test_chave_sem_ids_e_get_ignorado(self, mock_session):
+        mock_session.request.side_effect = _so_form()
+
+        proxy.proxy_request('POST', 'pedidos/12/status', data={'status': 'PRONTO'})
+        proxy.proxy_request('GET', 'pedidos/12/status')
+
+        assert list(proxy.codificacao_endpoints.tabela()) == ['POST pedidos/{id}/status']
+        assert proxy.codificacao_endpoints.preferida('POST pedidos/{id}/status') == CORPO_FORM
+
+    def test_rota_de_inspecao(self):
+        proxy.codificacao_endpoints.registrar('POST itens', CORPO_FORM)
+        client = create_app().test_client()
+
+        tabela = client.get('/api/proxy/codificacoes').get_json()
+        depois = client.delete('/api/proxy/codificacoes?chave=POST itens').get_json()
+
+        assert tabela['codificacoes']['POST itens']['codificacao'] == CORPO_FORM
+        assert tabela['estatisticas']['por_codificacao'] == {'json': 0, 'form': 1}
+        assert depois['codificacoes'] == {}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,109 @@
+"""
+🧪 TESTES DE UNIDADE - Pool de conexões com a API externa
+
+Foco: Garantir que a sessão usa o pool configurado, que o aquecimento abre conexões keep-alive
+reaproveitadas pelas requisições seguintes e que as estatísticas do pool refletem o reuso
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from unittest.mock import MagicMock
+
+from app import proxy
+from app.services.conexoes import aquecer_conexoes, estatisticas_pool, iniciar_aquecimento
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _responder(self, corpo):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        return corpo
+
+    def do_HEAD(self):
+        self._responder(b'{}')
+
+    def do_GET(self):
+        self.wfile.write(self._responder(b'{"ok": true}'))
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}/api/'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestPoolConexoes:
+    """
+    Teste: Pool de conexões da sessão com a API externa
+
+    Cenários testados:
+    - Sessão criada com o tamanho de pool e as tentativas configurados
+    - Aquecimento abre N conexões em paralelo sem enviar cookies
+    - Requisições seguintes reaproveitam as conexões aquecidas
+    - Estatísticas toleram sessão substituída por mock
+    - Aquecimento desativado por padrão: nenhuma thread de keep-alive
+    """
+
+    def test_sessao_usa_pool_configurado(self):
+        sessao = proxy._criar_sessao()
+        adaptador = sessao.get_adapter('https://api.exemplo.com')
+
+        assert adaptador._pool_maxsize == proxy.API_POOL_MAXSIZE
+        assert adaptador._pool_block == proxy.API_POOL_BLOCK
+        assert adaptador.max_retries.total == proxy.API_MAX_RETRIES
+
+    def test_aquecimento_abre_conexoes(self, servidor):
+        sessao = proxy._criar_sessao()
+        sessao.cookies.set('JSESSIONID', 'ABC')
+
+        assert aquecer_conexoes(3, sessao=sessao, url=servidor) == 3
+
+        estatisticas = estatisticas_pool(sessao)
+        assert estatisticas['conexoes_criadas'] == 3
+        assert estatisticas['conexoes_ociosas'] == 3
+        assert sessao.cookies.get('JSESSIONID') == 'ABC'
+
+    def test_requisicoes_reaproveitam_conexoes_aquecidas(self, servidor):
+        sessao = proxy._criar_sessao()
+        aquecer_conexoes(2, sessao=sessao, url=servidor)
+
+        for _ in range(10):
+            assert sessao.get(servidor + 'pedidos').json() == {'ok': True}
+
+        estatisticas = estatisticas_pool(sessao)
+        assert estatisticas['conexoes_criadas'] == 2
+        assert estatisticas['requisicoes'] == 12
+        assert estatisticas['conexoes_reusadas'] == 10
+
+    def test_estatisticas_com_sessao_mock(self):
+        estatisticas = estatisticas_pool(MagicMock())
+
+        assert estatisticas['pools'] == 0
+        assert estatisticas['taxa_reuso'] == 0.0
+        assert aquecer_conexoes(2, sessao=MagicMock()) == 0
+
+    def test_aquecimento_com_api_fora_do_ar(self):
+        sessao = proxy._criar_sessao()
+
+        assert aquecer_conexoes(2, sessao=sessao, url='http://127.0.0.1:9/') == 0
+
+    def test_aquecimento_desativado_por_padrao(self):
+        assert iniciar_aquecimento() is None
+        assert not any(thread.name == 'sgr-keepalive' for thread in threading.enumerate())
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,153 @@
+"""
+🧪 TESTES DE UNIDADE - Cookies das sessões com a API externa
+
+Foco: Garantir que utils/cookies.py mantém o índice por nome coerente com o jar (Set-Cookie,
+set, clear, expiração), troca cookies sem reconstruir o jar e continua compatível com o requests
+"""
+
+import http.client
+import io
+import random
+import time
+
+import pytest
+import requests
+from requests.cookies import CookieConflictError, MockRequest, MockResponse, RequestsCookieJar, create_cookie
+
+from app import proxy
+from app.utils.cookies import CookiesSessao, contar_cookie, substituir_cookie, valor_cookie
+
+
+def _indice(jar):
+    return {(nome, local) for nome, copias in jar._por_nome.items() for local in copias}
+
+
+def _conteudo(jar):
+    return {(cookie.name, (cookie.domain, cookie.path)) for cookie in jar}
+
+
+class TestCookiesSessao:
+    """
+    Teste: Jar indexado por nome
+
+    Cenários testados:
+    - substituir remove as cópias em outros domínios e caminhos; contar e valor em O(cópias)
+    - get/[]/in com a mesma semântica do RequestsCookieJar (KeyError, CookieConflictError)
+    - clear por nome, domínio e total; expiração mantém o índice
+    - Operações aleatórias: índice igual ao conteúdo e ao de um RequestsCookieJar comum
+    """
+
+    def test_substituir_contar_valor(self):
+        jar = CookiesSessao()
+        jar.set('JSESSIONID', 'servidor', domain='api.exemplo.com', path='/')
+        jar.set('JSESSIONID', 'manual')
+        jar.set('tema', 'escuro')
+
+        assert jar.contar('JSESSIONID') == 2
+        assert jar.valor('JSESSIONID') == 'manual'
+
+        jar.substituir('JSESSIONID', 'novo')
+
+        assert jar.contar('JSESSIONID') == 1
+        assert jar['JSESSIONID'] == 'novo'
+        assert jar.get('tema') == 'escuro'
+        assert len(jar) == 2
+
+    def test_semantica_do_requests(self):
+        jar = CookiesSessao()
+        jar.set('JSESSIONID', 'a', domain='um.com', path='/')
+        jar.set('JSESSIONID', 'b', domain='dois.com', path='/')
+
+        with pytest.raises(CookieConflictError):
+            jar.get('JSESSIONID')
+        assert jar.get('JSESSIONID', domain='dois.com') == 'b'
+        assert jar.get('ausente', 'padrao') == 'padrao'
+        assert 'ausente' not in jar
+        with pytest.raises(KeyError):
+            jar['ausente']
+
+    def test_clear_e_expiracao(self):
+        jar = CookiesSessao()
+        jar.set('a', '1', domain='um.com', path='/')
+        jar.set('b', '2', domain='um.com', path='/x')
+        jar.set('c', '3', domain='dois.com', path='/')
+        jar.set_cookie(create_cookie('velho', 'x', expires=int(time.time()) - 10))
+
+        jar.clear_expired_cookies()
+        assert jar.contar('velho') == 0
+
+        jar.clear('um.com', '/x')
+        assert _indice(jar) == {('a', ('um.com', '/')), ('c', ('dois.com', '/'))}
+        jar.clear('um.com')
+        assert _indice(jar) == {('c', ('dois.com', '/'))}
+        jar.clear()
+        assert _indice(jar) == set() and len(jar) == 0
+
+    def test_operacoes_aleatorias(self):
+        aleatorio = random.Random(7)
+        indexado, comum = CookiesSessao(), RequestsCookieJar()
+        for _ in range(2000):
+            nome = aleatorio.choice(['JSESSIONID', 'tema', 'lang', 'x'])
+            dominio = aleatorio.choice(['', 'api.com', 'cdn.com'])
+            caminho = aleatorio.choice(['/', '/api'])
+            operacao = aleatorio.random()
+            if operacao < 0.5:
+                valor = str(aleatorio.random())
+                indexado.set(nome, valor, domain=dominio, path=caminho)
+                comum.set(nome, valor, domain=dominio, path=caminho)
+            elif operacao < 0.7:
+                substituir_cookie(indexado, nome, 'sub')
+                substituir_cookie(comum, nome, 'sub')
+            else:
+                argumentos = (dominio, caminho, nome) if operacao < 0.9 else (dominio,)
+                for jar in (indexado, comum):
+                    try:
+                        jar.clear(*argumentos)
+                    except KeyError:
+                        pass
+
+            assert _indice(indexado) == _conteudo(indexado) == _conteudo(comum)
+            assert contar_cookie(indexado, nome) == contar_cookie(comum, nome)
+            assert valor_cookie(indexado, nome) in ([c.value for c in comum if c.name == nome] or [None])
+
+
+class TestCookiesRequests:
+    """
+    Teste: CookiesSessao dentro de uma requests.Session
+
+    Cenários testados:
+    - Sessões do proxy usam o jar indexado
+    - Set-Cookie da resposta entra no índice; o header Cookie sai do jar
+    - Jar comum (ex.: sessão substituída nos testes) continua aceito pelas funções auxiliares
+    """
+
+    def test_sessoes_do_proxy(self):
+        assert isinstance(proxy.api_session.cookies, CookiesSessao)
+        assert isinstance(proxy.sessoes.nova().cookies, CookiesSessao)
+
+    def test_set_cookie_e_header(self):
+        sessao = proxy._criar_sessao()
+        login = requests.Request('POST', 'https://api.exemplo.com/login').prepare()
+        cabecalhos = http.client.parse_headers(io.BytesIO(b'Set-Cookie: JSESSIONID=abc; Path=/\r\n\r\n'))
+        sessao.cookies.extract_cookies(MockResponse(cabecalhos), MockRequest(login))
+        sessao.cookies.set('JSESSIONID', 'manual')
+
+        assert sessao.cookies.contar('JSESSIONID') == 2
+
+        substituir_cookie(sessao.cookies, 'JSESSIONID', 'xyz')
+        preparada = sessao.prepare_request(requests.Request('POST', 'https://api.exemplo.com/upload'))
+
+        assert preparada.headers['Cookie'] == 'JSESSIONID=xyz'
+
+    def test_jar_comum(self):
+        jar = RequestsCookieJar()
+        jar.set('JSESSIONID', 'a', domain='um.com', path='/')
+        jar.set('JSESSIONID', 'b')
+
+        assert contar_cookie(jar, 'JSESSIONID') == 2
+        assert valor_cookie(jar, 'JSESSIONID') == 'b'
+        assert valor_cookie(jar, 'ausente') is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
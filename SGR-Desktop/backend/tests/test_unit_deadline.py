@@ -0,0 +1,215 @@
+"""
+🧪 TESTES DE UNIDADE - Prazos (deadlines) das requisições
+
+Foco: Garantir que utils/deadline.py limita os timeouts das chamadas à API externa ao tempo
+restante da requisição, e que o proxy e o Flask respeitam o prazo (X-Request-Deadline)
+"""
+
+import json
+import threading
+import time
+
+import pytest
+import requests
+from unittest.mock import patch
+
+from app import create_app, proxy
+from app.utils.deadline import (
+    DeadlineExcedido,
+    deadline,
+    deadline_da_rota,
+    ler_header_deadline,
+    tempo_restante,
+    timeout_upstream,
+)
+
+
+def _resposta_json(payload):
+    resposta = requests.Response()
+    resposta.status_code = 200
+    resposta.headers['Content-Type'] = 'application/json'
+    resposta._content = json.dumps(payload).encode()
+    return resposta
+
+
+class TestDeadline:
+    """
+    Teste: Prazo da requisição no contexto atual
+
+    Cenários testados:
+    - Sem prazo, timeouts de conexão e leitura são os configurados
+    - Prazo limita os dois timeouts; prazo esgotado levanta DeadlineExcedido
+    - Prazo interno mais longo não estende o externo; saída do bloco restaura o anterior
+    - Header X-Request-Deadline em época (ms) ou relativo (ms); valores inválidos ignorados
+    - Orçamento por rota usa o prefixo mais longo
+    """
+
+    def test_sem_prazo_usa_timeouts_configurados(self):
+        assert tempo_restante() is None
+        assert timeout_upstream(5, 30) == (5, 30)
+
+    def test_prazo_limita_timeouts(self):
+        with deadline(2):
+            connect, read = timeout_upstream(5, 30)
+
+        assert connect == pytest.approx(2, abs=0.05)
+        assert read == pytest.approx(2, abs=0.05)
+        assert timeout_upstream(1, 30) == (1, 30)
+
+    def test_prazo_esgotado(self):
+        with deadline(0):
+            with pytest.raises(DeadlineExcedido):
+                timeout_upstream()
+
+    def test_prazo_interno_nao_estende_externo(self):
+        with deadline(1):
+            with deadline(60):
+                assert tempo_restante() <= 1
+            with deadline(0.5):
+                assert tempo_restante() <= 0.5
+            assert 0.5 < tempo_restante() <= 1
+        assert tempo_restante() is None
+
+    def test_ler_header_deadline(self):
+        assert ler_header_deadline('1700000030000', agora_ms=1700000000000) == 30
+        assert ler_header_deadline('1699999990000', agora_ms=1700000000000) == -10
+        assert ler_header_deadline('2500') == 2.5
+        assert ler_header_deadline(None) is None
+        assert ler_header_deadline('amanhã') is None
+        assert ler_header_deadline('-5') is None
+        assert ler_header_deadline('nan') is None
+
+    def test_deadline_da_rota(self):
+        rotas = {'upload': 120.0, 'restaurantes/upload': 90.0, 'dashboard': 20.0}
+        with patch('app.utils.deadline.DEADLINES_ROTAS', rotas), patch('app.utils.deadline.DEADLINE_PADRAO', 30.0):
+            assert deadline_da_rota('/api/restaurantes/upload/logo') == 90
+            assert deadline_da_rota('/api/restaurantes/1') == 30
+            assert deadline_da_rota('/api/dashboard/1') == 20
+            assert deadline_da_rota('/api/dashboards') == 30
+
+
+class TestDeadlineProxy:
+    """
+    Teste: proxy_request respeita o prazo da requisição
+
+    Cenários testados:
+    - Timeout repassado ao requests é (conexão, leitura) limitado ao prazo
+    - Prazo esgotado responde 504 sem chamar a API e sem contar falha no circuit breaker
+    - Seguidora do single-flight não espera o líder além do próprio prazo
+    - Seguidora com prazo maior não herda o 504 de prazo do líder: refaz a chamada
+    """
+
+    @patch('app.proxy.api_session')
+    def test_timeout_limitado_ao_prazo(self, mock_session):
+        mock_session.request.return_value = _resposta_json({'status': 'success'})
+
+        with deadline(3):
+            proxy.proxy_request('POST', 'avaliacoes-prato', data={'nota': 5})
+
+        connect, read = mock_session.request.call_args.kwargs['timeout']
+        assert connect <= 3 and read <= 3
+
+    @patch('app.proxy.api_session')
+    def test_prazo_esgotado_nao_chama_api(self, mock_session):
+        with deadline(0), patch.object(proxy.upstream_circuito, 'limite_falhas', 1):
+            status_code, response_data = proxy.proxy_request('GET', 'pedidos/restaurante')
+
+        assert status_code == 504
+        assert response_data['diagnostico']['tipo_erro'] == 'deadline_excedido'
+        mock_session.request.assert_not_called()
+        assert proxy.upstream_circuito.estado('pedidos') == 'fechado'
+
+    @patch('app.proxy.api_session')
+    def test_seguidora_respeita_proprio_prazo(self, mock_session):
+        liberar = threading.Event()
+
+        def request_lento(**kwargs):
+            liberar.wait(2)
+            return _resposta_json([{'id': 1}])
+
+        mock_session.request.side_effect = request_lento
+        mock_session.cookies.get.return_value = 'ABC'
+
+        lider = threading.Thread(target=lambda: proxy.proxy_request('GET', 'pedidos/restaurante'))
+        lider.start()
+        while mock_session.request.call_count == 0:
+            time.sleep(0.01)
+
+        inicio = time.perf_counter()
+        with deadline(0.2):
+            status_code, response_data = proxy.proxy_request('GET', 'pedidos/restaurante')
+        duracao = time.perf_counter() - inicio
+        liberar.set()
+        lider.join()
+
+        assert status_code == 504
+        assert response_data['diagnostico']['tipo_erro'] == 'deadline_excedido'
+        assert duracao < 1
+
+    @patch('app.proxy.api_session')
+    def test_seguidora_nao_herda_prazo_do_lider(self, mock_session):
+        def request_lento(**kwargs):
+            _, leitura = kwargs['timeout']
+            time.sleep(min(leitura, 0.3))
+            if leitura < 0.3:
+                raise requests.exceptions.ReadTimeout('lento')
+            return _resposta_json([{'id': 1}])
+
+        mock_session.request.side_effect = request_lento
+        mock_session.cookies.get.return_value = 'ABC'
+
+        resultados = {}
+
+        def lider():
+            with deadline(0.15):
+                resultados['lider'] = proxy.proxy_request('GET', 'pedidos/restaurante')
+
+        thread = threading.Thread(target=lider)
+        thread.start()
+        while mock_session.request.call_count == 0:
+            time.sleep(0.01)
+        with deadline(3):
+            resultados['seguidora'] = proxy.proxy_request('GET', 'pedidos/restaurante')
+        thread.join()
+
+        assert resultados['lider'][0] == 504
+        assert resultados['lider'][1]['diagnostico']['tipo_erro'] == 'deadline_excedido'
+        assert resultados['seguidora'] == (200, [{'id': 1}])
+        assert mock_session.request.call_count == 2
+        assert proxy.upstream_singleflight.stats()['em_andamento'] == 0
+
+
+class TestDeadlineFlask:
+    """
+    Teste: Prazo definido por requisição no Flask
+    """
+
+    @pytest.fixture
+    def client(self):
+        app = create_app()
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    @patch('app.proxy.api_session')
+    def test_header_encurta_prazo(self, mock_session, client):
+        mock_session.request.return_value = _resposta_json({'id': 1})
+
+        client.get('/api/restaurantes/1', headers={'X-Request-Deadline': '2000'})
+
+        connect, read = mock_session.request.call_args.kwargs['timeout']
+        assert read <= 2
+        assert tempo_restante() is None
+
+    @patch('app.proxy.api_session')
+    def test_header_expirado_responde_504(self, mock_session, client):
+        expirado = str(int(time.time() * 1000) - 1000)
+
+        response = client.get('/api/restaurantes/1', headers={'X-Request-Deadline': expirado})
+
+        assert response.status_code == 504
+        mock_session.request.assert_not_called()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
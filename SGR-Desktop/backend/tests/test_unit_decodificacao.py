@@ -0,0 +1,138 @@
+"""
+🧪 TESTES DE UNIDADE - Decodificação das respostas da API externa
+
+Foco: Garantir que utils/decodificacao.py escolhe o formato pelo Content-Type (farejando o
+começo do corpo só quando o header falta), decodifica o corpo uma única vez e que
+proxy_request não volta a decodificar a resposta
+"""
+
+import json
+
+import pytest
+import requests
+from unittest.mock import patch
+
+from app import proxy
+from app.utils.decodificacao import (
+    HTML,
+    JSON,
+    TEXTO,
+    classificar,
+    decodificar_corpo,
+    decodificar_json,
+    decodificar_texto,
+    separar_content_type,
+)
+
+
+def _resposta(corpo, content_type=None, status=200):
+    resposta = requests.Response()
+    resposta.status_code = status
+    if content_type is not None:
+        resposta.headers['Content-Type'] = content_type
+    resposta._content = corpo
+    return resposta
+
+
+class TestDecodificacao:
+    """
+    Teste: Escolha do formato e decodificação do corpo
+
+    Cenários testados:
+    - Content-Type JSON, +json e HTML decidem sem olhar o corpo
+    - Header ausente ou genérico: prefixo farejado (JSON, HTML, texto)
+    - JSON com BOM, charset não UTF-8 e NaN (fallback para o json padrão)
+    - JSON inválido ou `null` vira texto (ou HTML se parecer HTML)
+    - Texto: charset do header, UTF-8 e fallback cp1252
+    """
+
+    def test_content_type_decide(self):
+        assert separar_content_type('application/json; charset="UTF-8"') == ('application/json', 'utf-8')
+        assert classificar('application/json', b'<html>') == JSON
+        assert classificar('application/problem+json', b'{}') == JSON
+        assert classificar('text/html;charset=utf-8', b'{"a": 1}') == HTML
+        assert classificar('text/csv', b'[1]') == TEXTO
+
+    def test_fareja_sem_header(self):
+        assert classificar(None, b'\xef\xbb\xbf  \n[{"id": 1}]') == JSON
+        assert classificar('text/plain', b'{"id": 1}') == JSON
+        assert classificar('', b'\n<!DOCTYPE html><html></html>') == HTML
+        assert classificar('application/octet-stream', b'<HTML><body>') == HTML
+        assert classificar(None, b'OK') == TEXTO
+
+    def test_json(self):
+        assert decodificar_json(b'\xef\xbb\xbf{"nome": "P\xc3\xa3o"}') == {'nome': 'Pão'}
+        assert decodificar_json('{"nome": "Pão"}'.encode('latin-1'), 'iso-8859-1') == {'nome': 'Pão'}
+        valor = decodificar_json(b'{"x": NaN, "grande": 123456789012345678901234567890}')
+        assert valor['x'] != valor['x'] and valor['grande'] == 123456789012345678901234567890
+        with pytest.raises(ValueError):
+            decodificar_json(b'{quebrado')
+
+    def test_json_sem_orjson(self):
+        with patch('app.utils.decodificacao.ORJSON_AVAILABLE', False):
+            assert decodificar_json(b'[1, 2]') == [1, 2]
+
+    def test_json_invalido_vira_texto(self):
+        assert decodificar_corpo(b'null', 'application/json') == (TEXTO, None, 'null')
+        assert decodificar_corpo(b'<html>erro</html>', 'application/json') == (HTML, None, '<html>erro</html>')
+        assert decodificar_corpo(b'', None) == (TEXTO, None, '')
+
+    def test_texto(self):
+        assert decodificar_texto('Olá'.encode('latin-1'), 'iso-8859-1') == 'Olá'
+        assert decodificar_texto('Olá'.encode('utf-8')) == 'Olá'
+        assert decodificar_texto('Olá'.encode('cp1252')) == 'Olá'
+        assert decodificar_texto(b'abc', 'charset-inexistente') == 'abc'
+
+
+class TestDecodificacaoProxy:
+    """
+    Teste: proxy_request decodifica a resposta uma única vez
+
+    Cenários testados:
+    - JSON sem Content-Type é reconhecido pelo prefixo
+    - HTML vai para parse_html_response já decodificado, sem `response.text`/`response.json()`
+    - Texto de erro reaproveita o corpo decodificado
+    """
+
+    @pytest.fixture(autouse=True)
+    def sem_decodificacao_do_requests(self):
+        def proibido(*_args, **_kwargs):
+            raise AssertionError('resposta decodificada pelo requests')
+
+        with patch.object(requests.Response, 'text', property(proibido)), \
+             patch.object(requests.Response, 'json', proibido):
+            yield
+
+    @patch('app.proxy.api_session')
+    def test_json_sem_content_type(self, mock_session):
+        mock_session.request.return_value = _resposta(json.dumps([{'id': 1}]).encode())
+
+        status_code, response_data = proxy.proxy_request('GET', 'pedidos/restaurante')
+
+        assert status_code == 200
+        assert response_data == [{'id': 1}]
+
+    @patch('app.proxy.parse_html_response')
+    @patch('app.proxy.api_session')
+    def test_html_decodificado_uma_vez(self, mock_session, mock_parse):
+        html = '<html><body><table id="tabelaItens"></table>Pão</body></html>'
+        mock_session.request.return_value = _resposta(html.encode('utf-8'), 'text/html;charset=UTF-8')
+        mock_parse.return_value = {'status': 'success', 'data': []}
+
+        status_code, response_data = proxy.proxy_request('GET', 'cardapio/1')
+
+        assert status_code == 200
+        mock_parse.assert_called_once_with(html, 'itens/restaurante/1')
+
+    @patch('app.proxy.api_session')
+    def test_texto_de_erro(self, mock_session):
+        mock_session.request.return_value = _resposta(b'Falha interna', 'text/plain', status=500)
+
+        status_code, response_data = proxy.proxy_request('GET', 'avaliacoes/1')
+
+        assert status_code == 500
+        assert response_data['response_text'] == 'Falha interna'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,423 @@
+"""
+🧪 TESTES DE UNIDADE - Escalonador de chamadas à API externa
+
+Foco: Garantir que utils/escalonador.py limita as chamadas simultâneas, atende a fila por prioridade
+(escritas, listagens, analytics) em rodízio entre restaurantes, reserva vagas para escritas, desiste
+no fim do prazo e que proxy_request, hedges, esperas entre tentativas e uploads respeitam o limite
+"""
+
+import io
+import json
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from app import create_app, proxy
+from app.utils.deadline import deadline
+from app.utils.escalonador import (
+    EscalonadorUpstream,
+    definir_prioridade,
+    prioridade_atual,
+    prioridade_da_rota,
+    restaurar_prioridade,
+    sem_vaga,
+)
+from app.utils.hedge import AMOSTRAS_MINIMAS, PoliticaHedge
+
+
+def _resposta(payload=None):
+    resposta = requests.Response()
+    resposta.status_code = 200
+    resposta.headers['Content-Type'] = 'application/json'
+    resposta._content = json.dumps(payload if payload is not None else {}).encode()
+    return resposta
+
+
+def _aguardar(condicao, limite=2.0):
+    fim = time.monotonic() + limite
+    while not condicao():
+        assert time.monotonic() < fim, 'condição não atingida'
+        time.sleep(0.002)
+
+
+def _ocupar(escalonador, prioridade='analytics', restaurante=None):
+    """Thread que segura uma vaga até o evento devolvido ser disparado."""
+    liberar, dentro = threading.Event(), threading.Event()
+
+    def segurar():
+        with escalonador.vaga(prioridade, restaurante):
+            dentro.set()
+            liberar.wait(5)
+
+    thread = threading.Thread(target=segurar)
+    thread.start()
+    assert dentro.wait(2)
+    return liberar, thread
+
+
+def _enfileirar(escalonador, ordem, prioridade, restaurante=None):
+    """Thread que entra na fila e anota (prioridade, restaurante) ao ganhar a vaga; espera ela enfileirar."""
+    antes = escalonador.stats()['enfileiradas'][prioridade]
+
+    def entrar():
+        with escalonador.vaga(prioridade, restaurante):
+            ordem.append((prioridade, restaurante))
+
+    thread = threading.Thread(target=entrar)
+    thread.start()
+    _aguardar(lambda: escalonador.stats()['enfileiradas'][prioridade] > antes)
+    return thread
+
+
+class TestPrioridades:
+    """
+    Teste: Classe de prioridade de rotas e chamadas
+
+    Cenários testados:
+    - Rotas de escrita são interativas; dashboard, vendas, top-produtos e avaliações são analytics
+    - Demais GETs (pedidos, cardápio) são listagem
+    - Chamada de escrita é sempre interativa; GET herda a classe da rota
+    """
+
+    def test_prioridade_da_rota(self):
+        assert prioridade_da_rota('PUT', '/api/pedidos/5/status') == 'interativa'
+        assert prioridade_da_rota('POST', '/api/avaliacoes-prato') == 'interativa'
+        assert prioridade_da_rota('GET', '/api/dashboard/1') == 'analytics'
+        assert prioridade_da_rota('GET', '/api/vendas/1/semana') == 'analytics'
+        assert prioridade_da_rota('GET', '/api/avaliacoes/pratos/1') == 'analytics'
+        assert prioridade_da_rota('GET', '/api/pedidos/restaurante/1') == 'listagem'
+        assert prioridade_da_rota('GET', '/api/cardapio/1') == 'listagem'
+
+    def test_prioridade_atual(self):
+        assert prioridade_atual('GET') == 'listagem'
+        token = definir_prioridade('analytics')
+        try:
+            assert prioridade_atual('GET') == 'analytics'
+            assert prioridade_atual('PUT') == 'interativa'
+        finally:
+            restaurar_prioridade(token)
+
+
+class TestEscalonadorUpstream:
+    """
+    Teste: EscalonadorUpstream
+
+    Cenários testados:
+    - Nunca mais que `limite` chamadas simultâneas
+    - Vaga liberada vai para escrita, depois listagem, depois analytics
+    - Dentro da classe, rodízio entre restaurantes
+    - Vagas reservadas: escrita entra com as demais ocupadas por GETs
+    - Limite todo reservado (limite 1, reserva 1): GETs não têm vaga, escritas entram
+    - Espera esgotada: TimeoutError e a chamada sai da fila
+    - Desativado (limite 0): entra direto
+    - Vaga extra (hedge) só se houver uma livre e ninguém na fila
+    - sem_vaga devolve a vaga durante o bloco e volta à fila ao sair
+    """
+
+    def test_limite_de_simultaneas(self):
+        escalonador = EscalonadorUpstream(limite=2, reserva_interativa=0)
+        lock = threading.Lock()
+        estado = {'atual': 0, 'maximo': 0}
+
+        def chamada():
+            with escalonador.vaga('listagem'):
+                with lock:
+                    estado['atual'] += 1
+                    estado['maximo'] = max(estado['maximo'], estado['atual'])
+                time.sleep(0.02)
+                with lock:
+                    estado['atual'] -= 1
+
+        threads = [threading.Thread(target=chamada) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert estado['maximo'] == 2
+        assert escalonador.stats()['atendidas']['listagem'] == 8
+        assert escalonador.stats()['em_execucao'] == 0
+
+    def test_ordem_de_prioridade(self):
+        escalonador = EscalonadorUpstream(limite=1, reserva_interativa=0)
+        liberar, ocupante = _ocupar(escalonador)
+        ordem = []
+        threads = [_enfileirar(escalonador, ordem, prioridade) for prioridade in ('analytics', 'listagem', 'interativa')]
+
+        liberar.set()
+        for thread in (ocupante, *threads):
+            thread.join()
+
+        assert [prioridade for prioridade, _ in ordem] == ['interativa', 'listagem', 'analytics']
+
+    def test_rodizio_entre_restaurantes(self):
+        escalonador = EscalonadorUpstream(limite=1, reserva_interativa=0)
+        liberar, ocupante = _ocupar(escalonador)
+        ordem = []
+        threads = [_enfileirar(escalonador, ordem, 'analytics', restaurante) for restaurante in (1, 1, 1, 2)]
+        assert escalonador.stats()['restaurantes_na_fila']['analytics'] == 2
+
+        liberar.set()
+        for thread in (ocupante, *threads):
+            thread.join()
+
+        assert [restaurante for _, restaurante in ordem] == [1, 2, 1, 1]
+
+    def test_reserva_interativa(self):
+        escalonador = EscalonadorUpstream(limite=2, reserva_interativa=1)
+        liberar, ocupante = _ocupar(escalonador)
+
+        with pytest.raises(TimeoutError):
+            with escalonador.vaga('analytics', espera=0.05):
+                pass
+        inicio = time.perf_counter()
+        with escalonador.vaga('interativa', espera=0.05) as esperou:
+            assert esperou < 0.05
+        assert time.perf_counter() - inicio < 0.05
+
+        liberar.set()
+        ocupante.join()
+
+    def test_limite_todo_reservado(self):
+        escalonador = EscalonadorUpstream(limite=1, reserva_interativa=1)
+
+        assert escalonador.ocupar_livre('listagem') is None
+        inicio = time.perf_counter()
+        with pytest.raises(TimeoutError):
+            with escalonador.vaga('analytics', espera=1.0):
+                pass
+        assert time.perf_counter() - inicio < 0.5
+        assert escalonador.stats()['desistencias']['analytics'] == 1
+        with escalonador.vaga('interativa', espera=0.05):
+            assert escalonador.stats()['em_execucao'] == 1
+        assert EscalonadorUpstream(limite=3, reserva_interativa=1)._vagas('listagem') == 2
+
+    def test_espera_esgotada(self):
+        escalonador = EscalonadorUpstream(limite=1, reserva_interativa=0)
+        liberar, ocupante = _ocupar(escalonador)
+
+        with pytest.raises(TimeoutError):
+            with escalonador.vaga('listagem', restaurante=3, espera=0.05):
+                pass
+
+        stats = escalonador.stats()
+        assert stats['desistencias']['listagem'] == 1
+        assert stats['fila']['listagem'] == 0 and stats['restaurantes_na_fila']['listagem'] == 0
+        liberar.set()
+        ocupante.join()
+        with escalonador.vaga('listagem', espera=0.05):
+            assert escalonador.stats()['em_execucao'] == 1
+
+    def test_desativado(self):
+        escalonador = EscalonadorUpstream(limite=0)
+
+        with escalonador.vaga('analytics') as esperou, escalonador.vaga('analytics'):
+            assert esperou == 0.0
+        assert escalonador.stats()['ativo'] is False
+        assert escalonador.stats()['atendidas']['analytics'] == 0
+
+    def test_ocupar_livre(self):
+        escalonador = EscalonadorUpstream(limite=2, reserva_interativa=1)
+        liberar = escalonador.ocupar_livre('listagem')
+        assert liberar is not None
+        assert escalonador.ocupar_livre('listagem') is None  # a outra vaga é reservada a escritas
+        liberar_interativa = escalonador.ocupar_livre('interativa')
+        assert liberar_interativa is not None
+        assert escalonador.ocupar_livre('interativa') is None
+
+        liberar()
+        liberar_interativa()
+        assert escalonador.stats()['em_execucao'] == 0
+        assert EscalonadorUpstream(limite=0).ocupar_livre('analytics') is not None
+
+    def test_sem_vaga(self):
+        escalonador = EscalonadorUpstream(limite=1, reserva_interativa=0)
+
+        with escalonador.vaga('listagem'):
+            with sem_vaga():
+                with escalonador.vaga('interativa', espera=0.05):
+                    assert escalonador.stats()['em_execucao'] == 1
+                assert escalonador.stats()['em_execucao'] == 0
+            assert escalonador.stats()['em_execucao'] == 1
+        assert escalonador.stats()['em_execucao'] == 0
+
+        with pytest.raises(TimeoutError):
+            with escalonador.vaga('listagem'):
+                with sem_vaga(lambda: 0.05):
+                    liberar, ocupante = _ocupar(escalonador, 'interativa')
+        assert escalonador.stats()['em_execucao'] == 1
+        liberar.set()
+        ocupante.join()
+        assert escalonador.stats()['em_execucao'] == 0
+
+
+class TestEscalonadorProxy:
+    """
+    Teste: proxy_request com escalonador
+
+    Cenários testados:
+    - PUT de status não espera GETs lentos de analytics ocupando as vagas
+    - Sem vaga até o fim do prazo: 504 deadline_excedido sem chamar a API externa
+    - Hedge ocupa vaga própria e não sai sem uma livre: chamadas em voo nunca passam do limite
+    - Espera entre tentativas devolve a vaga: uma escrita entra nesse intervalo
+    - Uploads de imagem esperam vaga como as demais escritas
+    - Estado do escalonador em /api/health
+    """
+
+    @patch('app.proxy.api_session')
+    def test_put_status_na_frente_de_analytics(self, mock_session):
+        def request(method, url, **kwargs):
+            if method == 'GET':
+                time.sleep(0.3)
+            return _resposta()
+
+        mock_session.request.side_effect = request
+        escalonador = EscalonadorUpstream(limite=3, reserva_interativa=1)
+
+        def analytics(indice):
+            definir_prioridade('analytics')
+            proxy.proxy_request('GET', f'pedidos/{indice}')
+
+        with patch('app.proxy.upstream_escalonador', escalonador):
+            threads = [threading.Thread(target=analytics, args=(indice,)) for indice in range(6)]
+            for thread in threads:
+                thread.start()
+            _aguardar(lambda: escalonador.stats()['fila']['analytics'] == 4)
+
+            inicio = time.perf_counter()
+            status_code, _ = proxy.proxy_request('PUT', 'pedidos/9/status-restaurante', params={'status': 'PRONTO'})
+            duracao = time.perf_counter() - inicio
+            for thread in threads:
+                thread.join()
+
+        assert status_code == 200
+        assert duracao < 0.15
+        assert escalonador.stats()['atendidas'] == {'interativa': 1, 'listagem': 0, 'analytics': 6}
+
+    @patch('app.proxy.api_session')
+    def test_sem_vaga_ate_o_prazo(self, mock_session):
+        escalonador = EscalonadorUpstream(limite=1, reserva_interativa=0)
+        liberar, ocupante = _ocupar(escalonador)
+
+        with patch('app.proxy.upstream_escalonador', escalonador), deadline(0.1):
+            status_code, response_data = proxy.proxy_request('GET', 'pedidos/restaurante')
+
+        liberar.set()
+        ocupante.join()
+        assert status_code == 504
+        assert response_data['diagnostico']['tipo_erro'] == 'deadline_excedido'
+        mock_session.request.assert_not_called()
+        assert escalonador.stats()['desistencias']['listagem'] == 1
+
+    @patch('app.proxy.api_session')
+    def test_hedge_respeita_o_limite(self, mock_session):
+        lock = threading.Lock()
+        estado = {'chamadas': 0, 'atual': 0, 'maximo': 0}
+
+        def request(method, url, **kwargs):
+            with lock:
+                estado['chamadas'] += 1
+                lenta = estado['chamadas'] <= 2
+                estado['atual'] += 1
+                estado['maximo'] = max(estado['maximo'], estado['atual'])
+            time.sleep(0.3 if lenta else 0.0)
+            with lock:
+                estado['atual'] -= 1
+            return _resposta([])
+
+        mock_session.request.side_effect = request
+        escalonador = EscalonadorUpstream(limite=3, reserva_interativa=0)
+        hedge = PoliticaHedge(['pedidos/restaurante'], atraso_minimo=0.0)
+        for _ in range(AMOSTRAS_MINIMAS):
+            hedge.registrar_latencia('pedidos/restaurante', 0.05)
+
+        with patch('app.proxy.upstream_escalonador', escalonador), patch('app.proxy.upstream_hedge', hedge):
+            threads = [
+                threading.Thread(target=proxy.proxy_request, args=('GET', 'pedidos/restaurante'), kwargs={'params': {'pagina': pagina}})
+                for pagina in range(2)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            _aguardar(lambda: escalonador.stats()['em_execucao'] == 0)
+
+        assert estado['maximo'] == 3
+        assert hedge.stats()['hedges'] == 1 and hedge.stats()['negados_sem_vaga'] == 1
+
+    @patch('app.proxy.api_session')
+    def test_espera_entre_tentativas_libera_a_vaga(self, mock_session):
+        status_get = iter([503, 200])
+
+        def request(method, url, **kwargs):
+            resposta = _resposta()
+            resposta.status_code = next(status_get) if method == 'GET' else 200
+            return resposta
+
+        mock_session.request.side_effect = request
+        escalonador = EscalonadorUpstream(limite=1, reserva_interativa=0)
+        resultado = {}
+        dormindo = threading.Event()
+
+        def aguardar(segundos):
+            dormindo.set()
+            proxy._aguardar_retentativa(0.3)
+
+        with patch('app.proxy.upstream_escalonador', escalonador), \
+             patch.object(proxy.upstream_retentativas, 'tentativas', 1), \
+             patch.object(proxy.upstream_retentativas, 'dormir', aguardar):
+            thread = threading.Thread(target=lambda: resultado.update(get=proxy.proxy_request('GET', 'pedidos/1')))
+            thread.start()
+            assert dormindo.wait(2)
+
+            inicio = time.perf_counter()
+            with deadline(0.15):
+                status_code, _ = proxy.proxy_request('PUT', 'pedidos/9/status-restaurante', params={'status': 'PRONTO'})
+            duracao = time.perf_counter() - inicio
+            thread.join()
+
+        assert status_code == 200 and duracao < 0.15
+        assert resultado['get'][0] == 200
+        assert escalonador.stats()['em_execucao'] == 0
+
+    def test_upload_espera_vaga(self):
+        escalonador = EscalonadorUpstream(limite=1, reserva_interativa=0)
+        sessao = MagicMock()
+        sessao.post.return_value = _resposta({'url': '/uploads/prato.png'})
+        liberar, ocupante = _ocupar(escalonador)
+        resultado = {}
+
+        def enviar():
+            cliente = create_app().test_client()
+            resposta = cliente.post('/api/upload/imagem', data={'imagem': (io.BytesIO(b'png'), 'prato.png')})
+            resultado.update(status=resposta.status_code, json=resposta.get_json())
+
+        with patch('app.routes.system.upstream_escalonador', escalonador), \
+             patch('app.routes.system.sessao_da_requisicao', return_value=sessao):
+            thread = threading.Thread(target=enviar)
+            thread.start()
+            _aguardar(lambda: escalonador.stats()['fila']['interativa'] == 1)
+            sessao.post.assert_not_called()
+
+            liberar.set()
+            ocupante.join()
+            thread.join()
+
+        assert resultado['status'] == 200 and resultado['json']['url'] == '/uploads/prato.png'
+        assert escalonador.stats()['atendidas']['interativa'] == 1
+
+    def test_health(self):
+        escalonador = EscalonadorUpstream(limite=4, reserva_interativa=1)
+        with patch('app.routes.system.upstream_escalonador', escalonador), \
+             patch('app.routes.system.proxy_request', return_value=(200, {})):
+            stats = create_app().test_client().get('/api/health').get_json()['escalonador']
+
+        assert stats['ativo'] is True and stats['limite'] == 4
+        assert stats['fila'] == {'interativa': 0, 'listagem': 0, 'analytics': 0}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
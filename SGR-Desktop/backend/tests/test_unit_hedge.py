@@ -0,0 +1,242 @@
+"""
+🧪 TESTES DE UNIDADE - Hedging de GETs lentos
+
+Foco: Garantir que utils/hedge.py só dispara a segunda chamada em endpoints selecionados e depois do
+limiar adaptativo (quantil das latências recentes), usa a resposta que chegar primeiro, prefere a
+tentativa que não falhou e respeita o limite da taxa de hedges
+"""
+
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from app import create_app, proxy
+from app.utils.deadline import DeadlineExcedido, deadline, timeout_upstream
+from app.utils.hedge import AMOSTRAS_MINIMAS, PoliticaHedge, tentativa_descartada
+from app.utils.timeouts_adaptativos import TimeoutsAdaptativos
+
+
+def _resposta(status_code=200, payload=None):
+    resposta = requests.Response()
+    resposta.status_code = status_code
+    resposta.headers['Content-Type'] = 'application/json'
+    resposta._content = json.dumps(payload if payload is not None else {}).encode()
+    return resposta
+
+
+def _politica(limiar=0.02, **kwargs):
+    """Política com o endpoint `pedidos/restaurante` aquecido em `limiar` segundos."""
+    kwargs = {'endpoints': ['pedidos/restaurante'], 'atraso_minimo': 0.0, **kwargs}
+    politica = PoliticaHedge(**kwargs)
+    for _ in range(AMOSTRAS_MINIMAS):
+        politica.registrar_latencia('pedidos/restaurante', limiar)
+    return politica
+
+
+def _chamada(*comportamentos):
+    """Cada chamada consome o próximo (atraso, resultado); resultado pode ser exceção."""
+    fila = list(comportamentos)
+    lock = threading.Lock()
+    chamadas = []
+
+    def chamada():
+        with lock:
+            atraso, resultado = fila.pop(0)
+            chamadas.append(resultado)
+        time.sleep(atraso)
+        if isinstance(resultado, BaseException):
+            raise resultado
+        return resultado
+
+    chamada.chamadas = chamadas
+    return chamada
+
+
+class TestPoliticaHedge:
+    """
+    Teste: PoliticaHedge
+
+    Cenários testados:
+    - Elegível só para GET nos endpoints configurados (ids normalizados para {id})
+    - Limiar = quantil das latências recentes, com piso; sem amostras suficientes, sem hedge
+    - Resposta lenta: hedge vence; resposta rápida: nenhum hedge
+    - Tentativa que falha (exceção ou 503) cede lugar à outra; ambas falhando, vale a original
+    - Taxa máxima: sem fichas, espera a original
+    - Prazo da requisição chega à thread da tentativa
+    - Perdedora é marcada como descartada e não registra latência (a original lenta entra censurada)
+    """
+
+    def test_elegivel(self):
+        politica = PoliticaHedge(['pedidos/restaurante', 'itens/restaurante/{id}'])
+
+        assert politica.elegivel('GET', 'pedidos/restaurante')
+        assert politica.elegivel('GET', 'itens/restaurante/7')
+        assert not politica.elegivel('POST', 'pedidos/restaurante')
+        assert not politica.elegivel('GET', 'pedidos/5')
+        assert not PoliticaHedge().elegivel('GET', 'pedidos/restaurante')
+
+    def test_limiar_adaptativo(self):
+        politica = PoliticaHedge(['pedidos/restaurante'], quantil=0.9, janela=100, atraso_minimo=0.05)
+        for _ in range(AMOSTRAS_MINIMAS - 1):
+            politica.registrar_latencia('pedidos/restaurante', 0.01)
+        assert politica.limiar('pedidos/restaurante') is None
+
+        for indice in range(100):
+            politica.registrar_latencia('pedidos/restaurante', (indice + 1) / 100)
+        assert politica.limiar('pedidos/restaurante') == pytest.approx(0.91)
+
+        for _ in range(100):
+            politica.registrar_latencia('pedidos/restaurante', 0.001)
+        assert politica.limiar('pedidos/restaurante') == 0.05
+
+    def test_hedge_vence_resposta_lenta(self):
+        politica = _politica()
+        chamada = _chamada((0.5, _resposta(200, {'de': 'original'})), (0.0, _resposta(200, {'de': 'hedge'})))
+
+        inicio = time.perf_counter()
+        resposta = politica.executar(chamada, 'pedidos/restaurante')
+
+        assert resposta.json() == {'de': 'hedge'}
+        assert time.perf_counter() - inicio < 0.3
+        assert politica.stats()['hedges'] == 1 and politica.stats()['vencedores'] == 1
+
+    def test_resposta_rapida_sem_hedge(self):
+        politica = _politica(limiar=0.2)
+        chamada = _chamada((0.0, _resposta(200)))
+
+        assert politica.executar(chamada, 'pedidos/restaurante').status_code == 200
+        assert len(chamada.chamadas) == 1
+        assert politica.stats()['hedges'] == 0
+
+    def test_falha_cede_para_a_outra(self):
+        politica = _politica()
+        chamada = _chamada(
+            (0.1, requests.exceptions.ConnectionError('reset')),
+            (0.2, _resposta(200, {'de': 'hedge'})),
+        )
+        assert politica.executar(chamada, 'pedidos/restaurante').json() == {'de': 'hedge'}
+
+        chamada = _chamada((0.1, _resposta(200, {'de': 'original'})), (0.0, _resposta(503)))
+        assert politica.executar(chamada, 'pedidos/restaurante').json() == {'de': 'original'}
+
+        chamada = _chamada((0.1, _resposta(502)), (0.0, requests.exceptions.ConnectionError('reset')))
+        assert politica.executar(chamada, 'pedidos/restaurante').status_code == 502
+
+    def test_taxa_maxima(self):
+        # quantil 0 com piso de 10 ms: limiar fixo, toda chamada original (50 ms) passa dele.
+        politica = _politica(taxa_maxima=0.25, rajada=1.0, quantil=0.0, atraso_minimo=0.01)
+        for _ in range(9):
+            politica.executar(_chamada((0.05, _resposta(200)), (0.0, _resposta(200))), 'pedidos/restaurante')
+
+        stats = politica.stats()
+        assert stats['elegiveis'] == 9
+        assert stats['hedges'] == 3
+        assert stats['negados_pela_taxa'] == 6
+
+    def test_prazo_na_thread(self):
+        politica = _politica()
+        chamada = _chamada((0.0, None))
+
+        def com_prazo():
+            timeout_upstream()
+            return chamada()
+
+        with deadline(0):
+            with pytest.raises(DeadlineExcedido):
+                politica.executar(com_prazo, 'pedidos/restaurante')
+
+    def test_perdedora_descartada(self):
+        politica = _politica()
+        terminou = threading.Event()
+        descartada = []
+
+        def chamada():
+            if not politica.stats()['hedges']:
+                time.sleep(0.3)
+                descartada.append(tentativa_descartada())
+                terminou.set()
+                return _resposta(200, {'de': 'original'})
+            return _resposta(200, {'de': 'hedge'})
+
+        assert politica.executar(chamada, 'pedidos/restaurante').json() == {'de': 'hedge'}
+        assert terminou.wait(2)
+        time.sleep(0.05)
+
+        assert descartada == [True]
+        assert politica.stats()['endpoints']['pedidos/restaurante']['amostras'] == AMOSTRAS_MINIMAS + 2
+
+
+class TestHedgeProxy:
+    """
+    Teste: proxy_request com hedge configurado
+
+    Cenários testados:
+    - GET lento num endpoint selecionado responde com a cópia rápida
+    - Estado do hedge (limiar e contagens) em /api/health
+    - Cada tentativa tem cookie jar próprio: só os cookies da vencedora chegam à sessão, e a
+      perdedora não alimenta os timeouts adaptativos
+    """
+
+    @patch('app.proxy.api_session')
+    def test_get_lento(self, mock_session):
+        politica = _politica()
+        respostas = iter([(0.5, [{'id': 'lento'}]), (0.0, [{'id': 'rapido'}])])
+        lock = threading.Lock()
+
+        def request(**kwargs):
+            with lock:
+                atraso, payload = next(respostas)
+            time.sleep(atraso)
+            return _resposta(200, payload)
+
+        mock_session.request.side_effect = request
+        with patch('app.proxy.upstream_hedge', politica):
+            status_code, response_data = proxy.proxy_request('GET', 'pedidos/restaurante')
+
+        assert status_code == 200 and response_data == [{'id': 'rapido'}]
+        assert mock_session.request.call_count == 2
+
+    def test_perdedora_nao_mexe_na_sessao(self):
+        politica = _politica()
+        sessao = proxy._criar_sessao()
+        respostas = iter([(0.3, 'lenta'), (0.0, 'rapida')])
+        lock = threading.Lock()
+        terminou = threading.Event()
+
+        def request(self, method, url, **kwargs):
+            with lock:
+                atraso, origem = next(respostas)
+            time.sleep(atraso)
+            resposta = _resposta(200, [{'id': origem}])
+            resposta.cookies.set('origem', origem)
+            self.cookies.set('origem', origem)  # como o requests faz ao receber Set-Cookie
+            if origem == 'lenta':
+                terminou.set()
+            return resposta
+
+        with patch('app.proxy.api_session', sessao), patch('app.proxy.upstream_hedge', politica), \
+             patch('app.proxy.upstream_timeouts', TimeoutsAdaptativos()) as timeouts, \
+             patch('requests.Session.request', request):
+            status_code, response_data = proxy.proxy_request('GET', 'pedidos/restaurante')
+            assert terminou.wait(2)
+            time.sleep(0.05)
+
+        assert status_code == 200 and response_data == [{'id': 'rapida'}]
+        assert sessao.cookies.get('origem') == 'rapida'
+        assert timeouts.tabela()['pedidos/restaurante']['amostras'] == 1
+
+    def test_health(self):
+        with patch('app.proxy.upstream_hedge', _politica()) as politica, \
+             patch('app.routes.system.upstream_hedge', politica), \
+             patch('app.routes.system.proxy_request', return_value=(200, {})):
+            hedge = create_app().test_client().get('/api/health').get_json()['hedge']
+
+        assert hedge['endpoints']['pedidos/restaurante'] == {'amostras': AMOSTRAS_MINIMAS, 'limiar_ms': 20.0}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
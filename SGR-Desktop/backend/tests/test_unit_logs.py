@@ -0,0 +1,192 @@
+"""
+🧪 TESTES DE UNIDADE - Logs em fila e amostragem
+
+Foco: Garantir que utils/logs.py entrega os registros pela thread escritora, que mensagens
+repetitivas são amostradas e que LOG_REQUEST_DUMPS desliga o dump das requisições no proxy
+"""
+
+import logging
+
+import pytest
+import requests
+from unittest.mock import MagicMock, patch
+
+from app import proxy
+from app.utils import logs
+from app.utils.logs import Amostragem, configurar_logs, encerrar_logs, obter_logger
+
+
+class _ColetorHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.registros = []
+
+    def emit(self, record):
+        self.registros.append(record)
+
+
+@pytest.fixture
+def coletor():
+    """Liga os loggers `sgr.*` a um handler de teste e restaura o estado anterior no fim."""
+    anterior = logs._listener
+    logs._listener = None
+    raiz = logging.getLogger(logs.LOGGER_RAIZ)
+    handlers, nivel, propagate = list(raiz.handlers), raiz.level, raiz.propagate
+    for handler in handlers:
+        raiz.removeHandler(handler)
+
+    handler = _ColetorHandler()
+    configurar_logs('DEBUG', handler=handler)
+    yield handler
+
+    encerrar_logs()
+    for handler_original in handlers:
+        raiz.addHandler(handler_original)
+    raiz.setLevel(nivel)
+    raiz.propagate = propagate
+    logs._listener = anterior
+
+
+class TestAmostragem:
+    """
+    Teste: Amostragem de mensagens repetitivas
+
+    Cenários testados:
+    - Primeira ocorrência é liberada, as seguintes na janela são suprimidas
+    - Após a janela, a mensagem informa quantas foram suprimidas
+    - Chaves diferentes não interferem entre si
+    - Nível desabilitado não conta como ocorrência
+    """
+
+    def test_suprime_dentro_da_janela(self):
+        amostragem = Amostragem(janela=60)
+
+        with patch('app.utils.logs.time.monotonic', side_effect=[0.0, 1.0, 2.0, 61.0]):
+            assert amostragem.liberar('a') == 0
+            assert amostragem.liberar('a') is None
+            assert amostragem.liberar('a') is None
+            assert amostragem.liberar('a') == 2
+
+    def test_chaves_independentes(self):
+        amostragem = Amostragem(janela=60)
+
+        assert amostragem.liberar('a') == 0
+        assert amostragem.liberar('b') == 0
+        assert amostragem.liberar('a') is None
+
+    def test_registrar_anexa_contagem_suprimida(self):
+        amostragem = Amostragem(janela=60)
+        logger = MagicMock()
+        logger.isEnabledFor.return_value = True
+
+        with patch('app.utils.logs.time.monotonic', side_effect=[0.0, 1.0, 61.0]):
+            assert amostragem.registrar(logger, 'k', logging.WARNING, '[X] falhou %s', 'a')
+            assert not amostragem.registrar(logger, 'k', logging.WARNING, '[X] falhou %s', 'b')
+            assert amostragem.registrar(logger, 'k', logging.WARNING, '[X] falhou %s', 'c')
+
+        assert logger.log.call_args_list[0].args == (logging.WARNING, '[X] falhou %s', 'a')
+        assert logger.log.call_args_list[1].args == (
+            logging.WARNING, '[X] falhou %s (+%d ocorrências suprimidas)', 'c', 1,
+        )
+
+    def test_nivel_desabilitado_nao_consome_janela(self):
+        amostragem = Amostragem(janela=60)
+        logger = MagicMock()
+        logger.isEnabledFor.return_value = False
+
+        assert not amostragem.registrar(logger, 'k', logging.DEBUG, 'msg')
+        assert amostragem.liberar('k') == 0
+
+
+class TestLogsEmFila:
+    """
+    Teste: Entrega assíncrona pela thread escritora
+
+    Cenários testados:
+    - Registro chega ao handler com a mensagem formatada e o traceback
+    - configurar_logs é idempotente
+    - Nível configurado filtra antes de enfileirar
+    - configurar_logs não mexe na configuração global do logging: registros (inclusive de outros
+      loggers) mantêm arquivo, linha e thread
+    """
+
+    def test_registro_entregue_ao_handler(self, coletor):
+        logger = obter_logger('teste')
+
+        try:
+            raise ValueError('falha')
+        except ValueError:
+            logger.error('[TESTE] erro %s', 42, exc_info=True)
+        logs._listener.stop()
+        logs._listener.start()
+
+        assert len(coletor.registros) == 1
+        registro = coletor.registros[0]
+        assert registro.name == 'sgr.teste'
+        assert registro.getMessage() == '[TESTE] erro 42'
+        assert registro.exc_info[0] is ValueError
+
+    def test_configurar_logs_idempotente(self, coletor):
+        listener = logs._listener
+
+        assert configurar_logs('DEBUG') is listener
+        assert sum(isinstance(h, logs._FilaHandler) for h in logging.getLogger(logs.LOGGER_RAIZ).handlers) == 1
+
+    def test_nivel_filtra_antes_da_fila(self, coletor):
+        configurar_logs('WARNING')
+        obter_logger('teste').info('[TESTE] descartado')
+        obter_logger('teste').warning('[TESTE] mantido')
+        logs._listener.stop()
+        logs._listener.start()
+
+        assert [registro.getMessage() for registro in coletor.registros] == ['[TESTE] mantido']
+
+    def test_configuracao_global_preservada(self, coletor):
+        obter_logger('teste').warning('[TESTE] origem')
+        logs._listener.stop()
+        logs._listener.start()
+
+        registro = coletor.registros[0]
+        assert registro.filename == 'test_unit_logs.py' and registro.lineno > 0
+        assert registro.threadName is not None
+        assert logging._srcfile is not None and logging.logThreads
+
+
+class TestDumpRequisicao:
+    """
+    Teste: LOG_REQUEST_DUMPS no proxy
+    """
+
+    def _sessao(self):
+        resposta = requests.Response()
+        resposta.status_code = 200
+        resposta.headers['Content-Type'] = 'application/json'
+        resposta._content = b'{"status": "success"}'
+        sessao = MagicMock()
+        sessao.request.return_value = resposta
+        sessao.cookies = requests.cookies.RequestsCookieJar()
+        return sessao
+
+    def test_desligado_por_padrao(self):
+        assert proxy.LOG_REQUEST_DUMPS is False
+
+    @pytest.mark.parametrize('ligado', [True, False])
+    def test_dump_segue_configuracao(self, ligado):
+        with patch('app.proxy.api_session', self._sessao()), \
+             patch('app.proxy.LOG_REQUEST_DUMPS', ligado), \
+             patch('app.proxy._registrar_dump_requisicao') as dump:
+            proxy.proxy_request('POST', 'itens', data={'nome': 'X'})
+
+        assert dump.called is ligado
+
+    def test_dump_mascara_senha(self, coletor):
+        proxy._registrar_dump_requisicao('POST', 'restaurantes/login', 'restaurantes/login', {'email': 'a', 'senha': 'segredo'}, None)
+        logs._listener.stop()
+        logs._listener.start()
+
+        mensagens = ' '.join(registro.getMessage() for registro in coletor.registros)
+        assert 'segredo' not in mensagens
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,296 @@
+"""
+🧪 TESTES DE UNIDADE - Métricas de latência
+
+Foco: Garantir que utils/metricas.py mantém histogramas corretos, que proxy_request e as rotas
+Flask registram espera, corpo, decodificação e fases, que /api/metrics exporta em
+formato Prometheus e JSON e que as respostas trazem o header Server-Timing
+"""
+
+import json
+
+import pytest
+import requests
+from unittest.mock import patch
+
+from app import create_app, proxy
+from app.services.pedidos_cache import invalidar_pedidos_cache
+from app.utils.metricas import (
+    Histograma,
+    RegistroMetricas,
+    cabecalho_server_timing,
+    caches_atuais,
+    classe_status,
+    encerrar_fases,
+    fases_da_rota,
+    iniciar_fases,
+    medir_fase,
+    metricas,
+    registrar_cache,
+    registrar_fase,
+    rotulo_endpoint,
+)
+
+
+def _resposta_json(payload, status=200):
+    resposta = requests.Response()
+    resposta.status_code = status
+    resposta.headers['Content-Type'] = 'application/json'
+    resposta._content = json.dumps(payload).encode()
+    return resposta
+
+
+def _serie(nome, **rotulos):
+    for serie in metricas.exportar_json().get(nome, {}).get('series', []):
+        if all(serie['rotulos'].get(chave) == valor for chave, valor in rotulos.items()):
+            return serie
+    return None
+
+
+@pytest.fixture(autouse=True)
+def metricas_limpas():
+    metricas.limpar()
+    yield
+    metricas.limpar()
+
+
+class TestHistograma:
+    """
+    Teste: Histograma e registro de métricas
+
+    Cenários testados:
+    - Buckets com limite superior inclusivo e acumulados
+    - Quantis estimados por interpolação dentro do bucket
+    - Rótulos de endpoint sem ids nem query string; classe do status
+    - Exportação Prometheus com HELP/TYPE, buckets, _sum e _count
+    - Registro inativo não guarda séries
+    """
+
+    def test_buckets_inclusivos(self):
+        histograma = Histograma((0.1, 1.0))
+        for valor in (0.05, 0.1, 0.5, 2.0):
+            histograma.observar(valor)
+
+        assert histograma.contagens == [2, 1, 1]
+        assert histograma.acumulados() == [2, 3, 4]
+        assert histograma.total == 4
+        assert histograma.soma == pytest.approx(2.65)
+
+    def test_quantil_interpolado(self):
+        histograma = Histograma((1.0, 2.0))
+        for _ in range(10):
+            histograma.observar(1.5)
+
+        assert histograma.quantil(0.5) == pytest.approx(1.5)
+        assert Histograma((1.0,)).quantil(0.5) is None
+
+    def test_rotulo_endpoint_e_status(self):
+        assert rotulo_endpoint('itens/restaurante/7') == 'itens/restaurante/{id}'
+        assert rotulo_endpoint('/pedidos/12/status?x=1') == 'pedidos/{id}/status'
+        assert rotulo_endpoint('avaliacoes-prato') == 'avaliacoes-prato'
+        assert classe_status(204) == '2xx'
+        assert classe_status(None) == 'erro'
+
+    def test_exportar_prometheus(self):
+        registro = RegistroMetricas({'sgr_teste_segundos': ('Teste', (0.1, 1.0))}, ativo=True)
+        registro.observar('sgr_teste_segundos', 0.05, rota='/api/x', status='2xx')
+        registro.observar('sgr_teste_segundos', 5.0, rota='/api/x', status='2xx')
+
+        texto = registro.exportar_prometheus()
+
+        assert '# TYPE sgr_teste_segundos histogram' in texto
+        assert 'sgr_teste_segundos_bucket{rota="/api/x",status="2xx",le="0.1"} 1' in texto
+        assert 'sgr_teste_segundos_bucket{rota="/api/x",status="2xx",le="+Inf"} 2' in texto
+        assert 'sgr_teste_segundos_count{rota="/api/x",status="2xx"} 2' in texto
+
+    def test_registro_inativo(self):
+        registro = RegistroMetricas({'sgr_teste_segundos': ('Teste', (1.0,))}, ativo=False)
+        registro.observar('sgr_teste_segundos', 0.5)
+
+        assert registro.exportar_json() == {}
+
+
+class TestMetricasProxy:
+    """
+    Teste: Instrumentação de proxy_request
+
+    Cenários testados:
+    - Espera e tamanho do corpo por endpoint mapeado e classe de status
+    - Decodificação rotulada pelo formato (json, texto)
+    - Timeout registrado com status 'erro'
+    """
+
+    @patch('app.proxy.api_session')
+    def test_registra_espera_corpo_e_decodificacao(self, mock_session):
+        mock_session.request.return_value = _resposta_json([{'id': 1}])
+
+        proxy.proxy_request('GET', 'cardapio/7')
+
+        espera = _serie('sgr_upstream_espera_segundos', endpoint='itens/restaurante/{id}', status='2xx')
+        corpo = _serie('sgr_upstream_corpo_bytes', endpoint='itens/restaurante/{id}')
+        decodificacao = _serie('sgr_decodificacao_segundos', formato='json')
+        assert espera['contagem'] == 1
+        assert corpo['soma'] == len(json.dumps([{'id': 1}]))
+        assert decodificacao['rotulos']['endpoint'] == 'itens/restaurante/{id}'
+
+    @patch('app.proxy.api_session')
+    def test_resposta_texto(self, mock_session):
+        resposta = _resposta_json(None, status=500)
+        resposta.headers['Content-Type'] = 'text/plain'
+        resposta._content = b'ok'
+        mock_session.request.return_value = resposta
+
+        proxy.proxy_request('GET', 'avaliacoes/1')
+
+        assert _serie('sgr_decodificacao_segundos', formato='texto')['contagem'] == 1
+        assert _serie('sgr_upstream_espera_segundos', status='5xx') is not None
+
+    @patch('app.proxy.api_session')
+    def test_timeout_registrado_como_erro(self, mock_session):
+        mock_session.request.side_effect = requests.exceptions.Timeout('lento')
+
+        status_code, _ = proxy.proxy_request('GET', 'avaliacoes/1')
+
+        assert status_code == 504
+        assert _serie('sgr_upstream_espera_segundos', endpoint='avaliacoes/{id}', status='erro')['contagem'] == 1
+        assert _serie('sgr_upstream_corpo_bytes') is None
+
+
+class TestMetricasRotas:
+    """
+    Teste: Métricas das rotas Flask e endpoint /api/metrics
+
+    Cenários testados:
+    - Duração da rota por regra, método, classe de status e restaurante
+    - Fases upstream, decodificacao, agregacao e serializacao registradas
+    - /api/metrics em texto Prometheus (padrão) e JSON (?formato=json ou Accept)
+    """
+
+    @pytest.fixture
+    def client(self):
+        app = create_app()
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    @patch('app.proxy.api_session')
+    def test_rota_e_fases(self, mock_session, client):
+        mock_session.request.return_value = _resposta_json([{'id': 1, 'nome': 'Pizza', 'preco': 10}])
+
+        assert client.get('/api/cardapio/7').status_code == 200
+
+        rota = _serie('sgr_rota_segundos', rota='/api/cardapio/<int:restaurante_id>')
+        assert rota['rotulos'] == {
+            'rota': '/api/cardapio/<int:restaurante_id>', 'metodo': 'GET', 'status': '2xx', 'restaurante': '7',
+        }
+        fases = {
+            fase: _serie('sgr_rota_fase_segundos', rota='/api/cardapio/<int:restaurante_id>', fase=fase)
+            for fase in ('upstream', 'decodificacao', 'agregacao', 'serializacao')
+        }
+        assert all(serie['contagem'] == 1 for serie in fases.values())
+        assert fases['upstream']['soma'] > 0 and fases['serializacao']['soma'] > 0
+        assert sum(serie['soma'] for serie in fases.values()) <= rota['soma'] + 1e-5
+
+    def test_metrics_prometheus(self, client):
+        client.get('/api/rota-inexistente')
+
+        response = client.get('/api/metrics')
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        assert 'sgr_rota_segundos_count{rota="sem_rota",metodo="GET",status="4xx",restaurante=""} 1' in response.get_data(as_text=True)
+
+    def test_metrics_json(self, client):
+        client.get('/api/rota-inexistente')
+
+        por_parametro = client.get('/api/metrics?formato=json').get_json()
+        por_accept = client.get('/api/metrics', headers={'Accept': 'application/json'}).get_json()
+
+        assert por_parametro['status'] == 'success'
+        serie = por_parametro['metricas']['sgr_rota_segundos']['series'][0]
+        assert serie['buckets'][-1] == ['+Inf', 1]
+        assert 'sgr_rota_segundos' in por_accept['metricas']
+
+
+
+class TestServerTiming:
+    """
+    Teste: Header Server-Timing e campo _timing
+
+    Cenários testados:
+    - Fases medidas na requisição; miss de cache prevalece sobre hit
+    - Formato do header (ms, desc, total e caches)
+    - Rota do dashboard com hit/miss do snapshot de pedidos
+    - `_timing` no JSON apenas com SERVER_TIMING_JSON; header desligado com SERVER_TIMING=false
+    """
+
+    @pytest.fixture
+    def client(self):
+        app = create_app()
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    def test_fases_e_caches_da_requisicao(self):
+        token = iniciar_fases()
+        try:
+            with medir_fase('normalizacao'):
+                pass
+            registrar_fase('upstream', 0.010)
+            registrar_cache('pedidos', False)
+            registrar_cache('pedidos', True)
+            registrar_cache('agregados', True)
+
+            fases = fases_da_rota(0.050)
+            caches = caches_atuais()
+        finally:
+            encerrar_fases(token)
+
+        assert list(fases) == ['upstream', 'decodificacao', 'normalizacao', 'agregacao', 'serializacao']
+        assert fases['upstream'] == 0.010
+        assert fases['agregacao'] == pytest.approx(0.040 - fases['normalizacao'])
+        assert caches == {'pedidos': 'miss', 'agregados': 'hit'}
+        registrar_cache('pedidos', True)  # fora de uma requisição: sem efeito
+        assert caches_atuais() == {}
+
+    def test_cabecalho(self):
+        valor = cabecalho_server_timing({'upstream': 0.0123, 'agregacao': 0.002}, 0.015, {'pedidos': 'hit'})
+
+        assert valor == (
+            'upstream;dur=12.30;desc="API externa", agregacao;dur=2.00;desc="Processamento local", '
+            'total;dur=15.00, cache-pedidos;desc="hit"'
+        )
+
+    @patch('app.proxy.api_session')
+    def test_dashboard_com_cache(self, mock_session, client):
+        invalidar_pedidos_cache()
+        mock_session.request.return_value = _resposta_json([])
+
+        primeira = client.get('/api/dashboard/7')
+        segunda = client.get('/api/dashboard/7')
+
+        assert primeira.headers['Timing-Allow-Origin'] == '*'
+        assert primeira.headers['Server-Timing'].startswith('upstream;dur=')
+        assert 'cache-pedidos;desc="miss"' in primeira.headers['Server-Timing']
+        assert 'cache-pedidos;desc="hit"' in segunda.headers['Server-Timing']
+        assert '_timing' not in primeira.get_json()
+        invalidar_pedidos_cache()
+
+    @patch('app.proxy.api_session')
+    def test_timing_no_json(self, mock_session, client):
+        mock_session.request.return_value = _resposta_json({'id': 1, 'nome': 'Cantina'})
+
+        with patch('app.SERVER_TIMING_JSON', True):
+            corpo = client.get('/api/restaurantes/1').get_json()
+
+        assert set(corpo['_timing']) == {'total_ms', 'fases_ms', 'caches'}
+        assert corpo['_timing']['fases_ms']['upstream'] > 0
+
+    def test_server_timing_desligado(self, client):
+        with patch('app.SERVER_TIMING', False):
+            response = client.get('/api/metrics')
+
+        assert 'Server-Timing' not in response.headers
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
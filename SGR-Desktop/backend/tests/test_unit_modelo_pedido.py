@@ -0,0 +1,87 @@
+"""
+🧪 TESTES DE UNIDADE - Modelo Normalizado de Pedidos
+
+Foco: Garantir que as variações de chave da API Java são resolvidas uma única vez
+em `Pedido`/`ItemPedido` (app/models/pedido.py)
+"""
+
+from datetime import date
+
+import pytest
+from app.models.pedido import ItemPedido, Pedido, normalizar_pedidos
+
+
+class TestItemPedido:
+    """
+    Teste: Normalização de itens
+
+    Cenários testados:
+    - Preço vindo de itemRestaurante / item_restaurante
+    - Fallbacks de preço (preco, valorUnitario, valor, subtotal)
+    - Quantidade em `quantidadeItem`
+    """
+
+    def test_item_restaurante_camel_case(self):
+        item = ItemPedido.from_dict({'quantidade': 2, 'itemRestaurante': {'id': 7, 'nome': 'Pizza', 'preco': '30.5'}})
+
+        assert item.produto_id == 7
+        assert item.nome == 'Pizza'
+        assert item.preco_unitario == 30.5
+        assert item.subtotal == 61.0
+
+    def test_item_restaurante_snake_case(self):
+        item = ItemPedido.from_dict({'quantidadeItem': 3, 'item_restaurante': {'id': 8, 'nome': 'Suco', 'valor': 6}})
+
+        assert item.quantidade == 3
+        assert item.preco_unitario == 6.0
+
+    def test_fallbacks_de_preco(self):
+        assert ItemPedido.from_dict({'quantidade': 1, 'valorUnitario': 12}).preco_unitario == 12.0
+        assert ItemPedido.from_dict({'quantidade': 1, 'valor': 9}).preco_unitario == 9.0
+        assert ItemPedido.from_dict({'quantidade': 4, 'subtotal': 20}).preco_unitario == 5.0
+        assert ItemPedido.from_dict({'quantidade': 1, 'preco': 'abc'}).preco_unitario == 0.0
+
+    def test_item_usa_slots(self):
+        item = ItemPedido.from_dict({'quantidade': 1})
+
+        assert not hasattr(item, '__dict__')
+
+
+class TestPedido:
+    """
+    Teste: Campos pré-calculados do pedido (data, restaurante_id, valor_total, concluido)
+    """
+
+    def test_campos_pre_calculados(self):
+        pedido = Pedido({
+            'id': 1,
+            'status': 'entregue',
+            'restaurante': {'id': '3'},
+            'criadoEm': '2024-01-15T10:00:00Z',
+            'itens': [{'quantidade': 2, 'preco': 25.0}, {'quantidade': 1, 'preco': 10.0}, 'invalido'],
+        })
+
+        assert pedido.restaurante_id == 3
+        assert pedido.concluido is True
+        assert pedido.status == 'ENTREGUE'
+        assert pedido.data == date(2024, 1, 15)
+        assert pedido.valor_total == 60.0
+        assert pedido.quantidade_itens == 3
+        assert len(pedido.itens) == 2
+
+    def test_valor_informado_quando_itens_sem_preco(self):
+        pedido = Pedido({'id': 2, 'status': 'PENDENTE', 'restaurante_id': 1, 'criado_em': 'data-invalida', 'valorTotal': 45})
+
+        assert pedido.valor_total == 45.0
+        assert pedido.concluido is False
+        assert pedido.data is None
+
+    def test_normalizar_ignora_registros_invalidos(self, sample_pedidos):
+        pedidos = normalizar_pedidos(sample_pedidos + [None, 'texto'])
+
+        assert [pedido.id for pedido in pedidos] == [1, 2]
+        assert pedidos[0].valor_total == 50.0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
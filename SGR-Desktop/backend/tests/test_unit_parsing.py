@@ -5,8 +5,13 @@ Foco: Testar funções de parsing que convertem HTML da API Java para JSON estru
 """
 
 import pytest
+from unittest.mock import patch
+
+from app import proxy
 from app.proxy import parse_html_response
 
+PARSERS = ['html.parser'] + (['lxml'] if proxy.LXML_AVAILABLE else [])
+
 
 class TestParseHtmlResponse:
     """
@@ -136,6 +141,117 @@ class TestParseHtmlResponse:
         assert 'status' in result
 
 
+
+class TestParserHtmlConfiguravel:
+    """
+    Teste: Backend de parser configurável (HTML_PARSER) e extração em uma passada
+
+    Cenários testados:
+    - 'auto' escolhe lxml quando instalado; valores desconhecidos caem para html.parser
+    - Mesma saída com html.parser e lxml
+    - Prioridade das fontes de restaurante_id no login (script > input > data-* > link)
+    - Tabela sem id usada como fallback e linhas de cabeçalho ignoradas
+    """
+
+    def test_resolver_parser(self):
+        assert proxy._resolver_parser_html('html.parser') == 'html.parser'
+        assert proxy._resolver_parser_html('html5lib') == 'html.parser'
+        with patch('app.proxy.LXML_AVAILABLE', False):
+            assert proxy._resolver_parser_html('auto') == 'html.parser'
+            assert proxy._resolver_parser_html('lxml') == 'html.parser'
+        with patch('app.proxy.LXML_AVAILABLE', True):
+            assert proxy._resolver_parser_html('auto') == 'lxml'
+
+    @pytest.mark.parametrize('parser', PARSERS)
+    def test_prioridade_do_restaurante_id(self, parser):
+        html_login = """
+        <html><body>
+            <a href="/painel?restaurante_id=4">Painel</a>
+            <div data-restaurante-id="3"></div>
+            <input type="hidden" name="restauranteId" value="2">
+            <script>var tema = 'claro';</script>
+        </body></html>
+        """
+        with patch('app.proxy.HTML_PARSER_BACKEND', parser):
+            assert parse_html_response(html_login, 'restaurantes/login')['data'] == {'restaurante_id': 2}
+            sem_input = html_login.replace('name="restauranteId"', 'name="token"')
+            assert parse_html_response(sem_input, 'restaurantes/login')['data'] == {'restaurante_id': 3}
+            sem_data = sem_input.replace('data-restaurante-id', 'data-outro')
+            assert parse_html_response(sem_data, 'restaurantes/login')['data'] == {'restaurante_id': 4}
+            com_script = html_login.replace("var tema = 'claro';", 'var restaurante_id = 1;')
+            assert parse_html_response(com_script, 'restaurantes/login')['data'] == {'restaurante_id': 1}
+
+    @pytest.mark.parametrize('parser', PARSERS)
+    def test_tabela_sem_id_e_cabecalho(self, parser):
+        html_tabela = """
+        <table>
+            <tr><th>ID</th><th>Nome</th><th>Preço</th><th>Restaurante</th><th>Imagem</th></tr>
+            <tr><td>7</td><td>Suco <b>natural</b></td><td>R$ 8,50</td><td>3</td>
+                <td><span><a href="/img/suco.jpg">ver</a></span></td></tr>
+            <tr><td>x</td><td>Sem id</td><td>1,00</td></tr>
+        </table>
+        """
+        with patch('app.proxy.HTML_PARSER_BACKEND', parser):
+            result = parse_html_response(html_tabela, 'itens')
+
+        assert result == [{
+            'id': 7,
+            'nome': 'Suconatural',
+            'preco': 8.5,
+            'restaurante_id': 3,
+            'restaurante': {'id': 3},
+            'imagemUrl': '/img/suco.jpg',
+        }]
+
+
+
+PAGINAS_LOGIN = [
+    '<script>var restaurante_id = 7;</script><input type="hidden" name="restaurante_id" value="8">',
+    '<script>var config = {"restaurante_id": 9};</script>',
+    '<!-- <script>var restaurante_id = 1;</script> --><a href="/painel?id=2">Painel</a>',
+    '<a title="a > b" href="/x?modo=1&amp;restaurante_id=3">Painel</a>',
+    '<div data-restaurante-id="abc"></div><span data-restaurante-id="5"></span><a href="?id=6">x</a>',
+    '<INPUT TYPE="hidden" NAME="RestauranteId" VALUE=" 10 "><a href="?id=11">x</a>',
+    '<input type="HIDDEN" name="restaurante_id" value="12"><a data-restaurante-id=\'13\' href="#">x</a>',
+    '<style>a[href="?id=4"] { color: red; }</style><p>Sem id</p>',
+    '<p>Bem-vindo(a), Sem Identificador.</p>',
+]
+
+
+class TestLoginCaminhoRapido:
+    """
+    Teste: Caminho rápido do login por expressões regulares (sem montar DOM)
+
+    Cenários testados:
+    - Fixture sample_html_login resolvida sem BeautifulSoup
+    - Mesmo restaurante_id que o caminho com DOM (scripts, JSON, comentários, entidades,
+      aspas com '>', atributos em maiúsculas, data-* inválido antes de um válido)
+    - BeautifulSoup só é usado quando o caminho rápido não encontra o id
+    """
+
+    def test_fixture_sem_montar_dom(self, sample_html_login):
+        with patch('app.proxy.BeautifulSoup') as mock_soup:
+            result = parse_html_response(sample_html_login, 'restaurantes/login')
+
+        mock_soup.assert_not_called()
+        assert result['data']['restaurante_id'] == 123
+
+    @pytest.mark.parametrize('parser', PARSERS)
+    @pytest.mark.parametrize('pagina', PAGINAS_LOGIN)
+    def test_mesmo_resultado_que_o_dom(self, parser, pagina):
+        html_login = f'<html><head></head><body>{pagina}</body></html>'
+        soup = proxy.BeautifulSoup(html_login, parser)
+
+        assert proxy._restaurante_id_login_rapido(html_login) == proxy._extrair_restaurante_id_login(soup)
+
+    def test_sem_id_recorre_ao_dom(self):
+        with patch('app.proxy._extrair_restaurante_id_login', return_value=77) as mock_dom:
+            result = parse_html_response('<p>Bem-vindo(a), Sem Id.</p>', 'restaurantes/login')
+
+        mock_dom.assert_called_once()
+        assert result['data']['restaurante_id'] == 77
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
 
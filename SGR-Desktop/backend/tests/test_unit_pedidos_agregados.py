@@ -0,0 +1,390 @@
+"""
+🧪 TESTES DE UNIDADE - Agregados incrementais de analytics
+
+Foco: Testar a atualização incremental por diferença de snapshots (services/pedidos_agregados.py)
+e a equivalência das rotas de analytics com o recálculo completo em Python
+"""
+
+import os
+import subprocess
+import sys
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app import create_app
+from app.models.pedido import normalizar_pedidos
+from app.services.pedidos import carregar_pedidos
+from app.services import pedidos_agregados
+from app.services.pedidos_agregados import (
+    AgregadosRestaurante,
+    limpar_agregados,
+    obter_agregados,
+    restaurar_agregados,
+)
+from app.services.pedidos_cache import pedidos_cache
+from app.services.pedidos_rollups import RollupsDiarios, abrir_rollups
+
+LIMITES = [date(2024, 1, 1), date(2024, 1, 8), date(2024, 1, 15)]
+
+
+def _pedido(pedido_id, status='FINALIZADO', dia=10, quantidade=1, preco=10.0, produto=(7, 'Pizza')):
+    return {
+        'id': pedido_id,
+        'status': status,
+        'restaurante_id': 1,
+        'criadoEm': f'2024-01-{dia:02d}T12:00:00',
+        'itens': [{'itemRestaurante': {'id': produto[0], 'nome': produto[1], 'preco': preco}, 'quantidade': quantidade}],
+    }
+
+
+@pytest.fixture
+def agregados():
+    """Fixture: Agregados já sincronizados com dois pedidos concluídos e um pendente"""
+    agregados = AgregadosRestaurante(1)
+    agregados.atualizar(normalizar_pedidos([
+        _pedido(1, dia=3, quantidade=2),
+        _pedido(2, dia=10),
+        _pedido(3, status='PENDENTE', dia=10),
+    ]))
+    return agregados
+
+
+class TestAgregadosIncrementais:
+    """
+    Teste: Aplicação de diferenças entre snapshots
+
+    Cenários testados:
+    - Snapshot inicial agrega apenas pedidos concluídos
+    - Pedido novo ou que passa a concluído é somado sem reaplicar os demais
+    - Pedido que sai do conjunto concluído ou do snapshot tem a contribuição revertida
+    - Conteúdo alterado substitui a contribuição anterior
+    - Pedido normalizado de novo com o mesmo conteúdo é reconhecido pelo digest e não reaplicado
+    - Digest estável entre processos (PYTHONHASHSEED) e igual com e sem orjson
+    - Empate no top de produtos: venda mais recente primeiro e, no mesmo dia, ordem do nome
+    """
+
+    def test_snapshot_inicial(self, agregados):
+        assert (agregados.total_vendas, agregados.produtos_vendidos, agregados.total_pedidos) == (30.0, 3, 2)
+        assert agregados.somar_por_intervalos(LIMITES) == ([20.0, 10.0], [2, 1], [1, 1])
+
+    def test_snapshot_igual_nao_reaplica(self, agregados):
+        alterados = agregados.atualizar(normalizar_pedidos([
+            _pedido(1, dia=3, quantidade=2),
+            _pedido(2, dia=10),
+            _pedido(3, status='PENDENTE', dia=10),
+        ]))
+
+        assert alterados == 0
+        assert agregados.aplicados == 2
+
+    def test_pedido_concluido_depois(self, agregados):
+        alterados = agregados.atualizar(normalizar_pedidos([
+            _pedido(1, dia=3, quantidade=2),
+            _pedido(2, dia=10),
+            _pedido(3, status='ENTREGUE', dia=10),
+        ]))
+
+        assert alterados == 1
+        assert agregados.total_pedidos == 3
+        assert agregados.somar_por_intervalos(LIMITES)[0] == [20.0, 20.0]
+
+    def test_pedido_cancelado_e_removido_sao_revertidos(self, agregados):
+        agregados.atualizar(normalizar_pedidos([
+            _pedido(2, status='CANCELADO', dia=10),
+            _pedido(3, status='PENDENTE', dia=10),
+        ]))
+
+        assert (agregados.total_vendas, agregados.produtos_vendidos, agregados.total_pedidos) == (0.0, 0, 0)
+        assert agregados.somar_por_intervalos(LIMITES) == ([0.0, 0.0], [0, 0], [0, 0])
+        assert agregados.top_produtos(date(2024, 1, 1)) == []
+        assert agregados.revertidos == 2
+
+    def test_conteudo_alterado_substitui_contribuicao(self, agregados):
+        agregados.atualizar(normalizar_pedidos([
+            _pedido(1, dia=3, quantidade=2),
+            _pedido(2, dia=10, quantidade=3, preco=12.0),
+            _pedido(3, status='PENDENTE', dia=10),
+        ]))
+
+        top = agregados.top_produtos(date(2024, 1, 1))
+        assert agregados.total_vendas == 56.0
+        assert top[0]['quantidade'] == 5
+        assert top[0]['preco_unitario'] == 12.0
+
+    def test_mesmo_conteudo_em_objeto_novo(self, agregados):
+        pedidos = normalizar_pedidos([
+            _pedido(1, dia=3, quantidade=2),
+            _pedido(2, dia=10),
+            _pedido(3, status='PENDENTE', dia=10),
+        ])
+        pedidos[1].bruto['observacao'] = 'sem cebola'  # fora do que soma nos agregados
+
+        assert agregados.atualizar(pedidos) == 0
+        assert (agregados.aplicados, agregados.revertidos) == (2, 0)
+        assert all(isinstance(visto[1], bytes) for visto in agregados._vistos.values())
+
+    def test_digest_estavel(self):
+        pedido = normalizar_pedidos([_pedido(1, produto=(None, 'Suco de laranja'))])[0]
+        contribuicao = pedidos_agregados._contribuicao(pedido)
+        digest = pedidos_agregados._assinatura(pedido, contribuicao)
+
+        codigo = (
+            "from app.models.pedido import normalizar_pedidos\n"
+            "from app.services import pedidos_agregados as m\n"
+            f"p = normalizar_pedidos([{_pedido(1, produto=(None, 'Suco de laranja'))!r}])[0]\n"
+            "print(m._assinatura(p, m._contribuicao(p)).hex())"
+        )
+        for semente in ('1', '2'):
+            saida = subprocess.run(
+                [sys.executable, '-c', codigo], capture_output=True, text=True, check=True,
+                env=dict(os.environ, PYTHONHASHSEED=semente), cwd=os.path.dirname(os.path.dirname(__file__)),
+            ).stdout.split()[-1]
+            assert saida == digest.hex()
+        with patch.object(pedidos_agregados, 'orjson', None):
+            assert pedidos_agregados._assinatura(pedido, contribuicao) == digest
+
+    def test_desempate_top_produtos(self):
+        agregados = AgregadosRestaurante(1)
+        agregados.atualizar(normalizar_pedidos([
+            _pedido(1, dia=3, produto=(1, 'Antigo')),
+            _pedido(2, dia=10, produto=(2, 'Suco')),
+            _pedido(3, dia=10, produto=(3, 'Bolo')),
+        ]))
+
+        nomes = [produto['nome'] for produto in agregados.top_produtos(date(2024, 1, 1))]
+        assert nomes == ['Bolo', 'Suco', 'Antigo']
+
+
+class TestNormalizacaoIncremental:
+    """
+    Teste: Snapshot novo reaproveita os `Pedido`s inalterados do anterior
+    """
+
+    @patch('app.services.pedidos_cache.proxy_request')
+    def test_reaproveita_pedidos_iguais(self, mock_proxy):
+        pedidos_cache.invalidar()
+        mock_proxy.return_value = (200, [_pedido(1), _pedido(2)])
+        _, anteriores = carregar_pedidos(1)
+
+        pedidos_cache.invalidar()
+        mock_proxy.return_value = (200, [_pedido(1), _pedido(2, status='ENTREGUE')])
+        _, atuais = carregar_pedidos(1)
+        pedidos_cache.invalidar()
+
+        assert atuais[0] is anteriores[0]
+        assert atuais[1] is not anteriores[1]
+        assert atuais[1].status == 'ENTREGUE'
+
+
+class TestRollupsPersistidos:
+    """
+    Teste: Rollups diários persistidos em SQLite
+
+    Cenários testados:
+    - Processo novo parte dos rollups gravados (totais, dias e produtos) sem reagregar
+    - Inicialização restaura os agregados de cada restaurante com rollups
+    - Primeiro snapshot após restaurar aplica só os pedidos depois da marca d'água ou com digest divergente
+    - Primeira sincronização sem restaurar regrava os rollups do restaurante inteiros
+    - Primeiro snapshot após restaurar não soma pedidos duas vezes
+    - Alterações e remoções posteriores atualizam as linhas gravadas
+    - Pasta do arquivo criada ao abrir os rollups
+    - API fora do ar com rollups persistidos continua respondendo, marcada como stale com a idade
+    """
+
+    @pytest.fixture
+    def rollups(self, tmp_path):
+        rollups = RollupsDiarios(str(tmp_path / 'rollups.sqlite3'))
+        yield rollups
+        rollups.fechar()
+
+    def _snapshot(self):
+        return normalizar_pedidos([
+            _pedido(1, dia=3, quantidade=2),
+            _pedido(2, dia=10),
+            _pedido(3, status='PENDENTE', dia=10),
+        ])
+
+    def test_restaura_estado(self, rollups):
+        AgregadosRestaurante(1, rollups).atualizar(self._snapshot())
+
+        restaurado = AgregadosRestaurante(1, rollups)
+        assert restaurado.reserva() < 5
+
+        assert restaurado.restaurado
+        assert restaurado.marca == '2024-01-10T12:00:00'
+        assert (restaurado.total_vendas, restaurado.produtos_vendidos, restaurado.total_pedidos) == (30.0, 3, 2)
+        assert restaurado.somar_por_intervalos(LIMITES) == ([20.0, 10.0], [2, 1], [1, 1])
+        assert restaurado.top_produtos(date(2024, 1, 1))[0]['quantidade'] == 3
+
+    def test_restaurar_na_inicializacao(self, rollups):
+        AgregadosRestaurante(1, rollups).atualizar(self._snapshot())
+        limpar_agregados()
+
+        with patch.object(pedidos_agregados, 'rollups', rollups):
+            assert restaurar_agregados() == 1
+            assert restaurar_agregados() == 0
+        assert pedidos_agregados._agregados[1].total_pedidos == 2
+        limpar_agregados()
+
+    def test_primeiro_snapshot_aplica_so_diferencas(self, rollups):
+        AgregadosRestaurante(1, rollups).atualizar(self._snapshot())
+        restaurado = AgregadosRestaurante(1, rollups)
+
+        with patch.object(rollups, 'contribuicao', wraps=rollups.contribuicao) as contribuicao:
+            alterados = restaurado.atualizar(normalizar_pedidos([
+                _pedido(1, dia=3, quantidade=2),
+                _pedido(2, dia=10),
+                _pedido(3, dia=10),
+                _pedido(4, dia=12),
+            ]))
+
+        assert alterados == 2
+        assert restaurado.aplicados == 2 and restaurado.revertidos == 0
+        contribuicao.assert_called_once()
+        assert restaurado.marca == '2024-01-12T12:00:00'
+        assert restaurado.somar_por_intervalos(LIMITES) == ([20.0, 30.0], [2, 3], [1, 3])
+
+    def test_primeira_sincronizacao_regrava(self, rollups):
+        with patch.object(rollups, 'substituir', wraps=rollups.substituir) as substituir:
+            AgregadosRestaurante(1, rollups).atualizar(self._snapshot())
+        substituir.assert_called_once()
+        assert len(rollups.digests(1)) == 3
+
+        with patch.object(rollups, 'substituir', wraps=rollups.substituir) as substituir:
+            AgregadosRestaurante(1, rollups).atualizar(normalizar_pedidos([_pedido(2, dia=10)]))
+        substituir.assert_not_called()
+        assert AgregadosRestaurante(1, rollups).somar_por_intervalos(LIMITES) == ([0.0, 10.0], [0, 1], [0, 1])
+
+    def test_primeiro_snapshot_apos_restaurar_nao_duplica(self, rollups):
+        AgregadosRestaurante(1, rollups).atualizar(self._snapshot())
+        restaurado = AgregadosRestaurante(1, rollups)
+        assert restaurado.atualizar(self._snapshot()) == 0
+        assert not restaurado.restaurado
+
+        novamente = AgregadosRestaurante(1, rollups)
+        assert (novamente.total_vendas, novamente.produtos_vendidos, novamente.total_pedidos) == (30.0, 3, 2)
+        assert novamente.somar_por_intervalos(LIMITES) == ([20.0, 10.0], [2, 1], [1, 1])
+
+    def test_alteracao_apos_restaurar(self, rollups):
+        AgregadosRestaurante(1, rollups).atualizar(self._snapshot())
+        restaurado = AgregadosRestaurante(1, rollups)
+        restaurado.atualizar(normalizar_pedidos([
+            _pedido(1, status='CANCELADO', dia=3, quantidade=2),
+            _pedido(2, dia=10),
+            _pedido(3, dia=10),
+        ]))
+        assert restaurado.somar_por_intervalos(LIMITES) == ([0.0, 20.0], [0, 2], [0, 2])
+
+        novamente = AgregadosRestaurante(1, rollups)
+        assert novamente.somar_por_intervalos(LIMITES) == ([0.0, 20.0], [0, 2], [0, 2])
+        assert novamente.top_produtos(date(2024, 1, 1))[0]['quantidade'] == 2
+
+    def test_remocao_apos_restaurar(self, rollups):
+        AgregadosRestaurante(1, rollups).atualizar(self._snapshot())
+        restaurado = AgregadosRestaurante(1, rollups)
+        assert restaurado.atualizar(normalizar_pedidos([_pedido(2, dia=10)])) == 2
+        assert (restaurado.total_vendas, restaurado.total_pedidos) == (10.0, 1)
+        restaurado.atualizar(normalizar_pedidos([]))
+
+        novamente = AgregadosRestaurante(1, rollups)
+        assert (novamente.total_vendas, novamente.total_pedidos) == (0.0, 0)
+        assert novamente.somar_por_intervalos(LIMITES) == ([0.0, 0.0], [0, 0], [0, 0])
+        assert rollups.digests(1) == {}
+
+    def test_cria_pasta(self, tmp_path):
+        aberto = abrir_rollups(str(tmp_path / 'dados' / 'analytics_rollups.sqlite3'))
+        assert aberto is not None
+        assert (tmp_path / 'dados').is_dir()
+        aberto.fechar()
+        assert abrir_rollups('') is None
+
+    @patch('app.services.pedidos_cache.proxy_request')
+    def test_api_fora_do_ar_serve_rollups(self, mock_proxy, rollups):
+        AgregadosRestaurante(1, rollups).atualizar(self._snapshot())
+        limpar_agregados()
+        pedidos_cache.invalidar()
+        mock_proxy.return_value = (503, {'status': 'error'})
+
+        with patch.object(pedidos_agregados, 'rollups', rollups):
+            status_code, agregados, idade = obter_agregados(1)
+            resposta = create_app().test_client().get('/api/vendas/1/semanal').get_json()
+        limpar_agregados()
+
+        assert status_code == 200
+        assert agregados.total_pedidos == 2
+        assert idade is not None and idade < 5
+        assert resposta['status'] == 'success'
+        assert resposta['stale'] is True and resposta['idade_segundos'] >= 0
+
+    @patch('app.services.pedidos_cache.proxy_request')
+    def test_sincronizado_nao_e_stale(self, mock_proxy, rollups):
+        limpar_agregados()
+        pedidos_cache.invalidar()
+        mock_proxy.return_value = (200, [_pedido(1), _pedido(2)])
+
+        with patch.object(pedidos_agregados, 'rollups', rollups):
+            status_code, agregados, idade = obter_agregados(1)
+            resposta = create_app().test_client().get('/api/vendas/1/semanal').get_json()
+        limpar_agregados()
+        pedidos_cache.invalidar()
+
+        assert (status_code, idade) == (200, None)
+        assert not agregados.restaurado
+        assert 'stale' not in resposta
+
+
+class TestEquivalenciaComRecalculo:
+    """
+    Teste: As rotas de analytics devolvem o mesmo resultado com agregados incrementais e com o
+    recálculo completo (ANALYTICS_INCREMENTAL=false)
+    """
+
+    @pytest.fixture
+    def client(self):
+        app = create_app()
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    @pytest.fixture
+    def pedidos_api(self):
+        hoje = datetime.now()
+        pedidos = []
+        for indice in range(60):
+            criado_em = (hoje - timedelta(days=indice * 11)).isoformat()
+            pedidos.append({
+                'id': indice,
+                'status': 'FINALIZADO' if indice % 4 else 'PENDENTE',
+                'restaurante_id': 1,
+                'criadoEm': criado_em,
+                'itens': [
+                    {'itemRestaurante': {'id': indice % 5, 'nome': f'Produto {indice % 5}', 'preco': 10.0 + indice % 5},
+                     'quantidade': 1 + indice % 3},
+                ],
+            })
+        return pedidos
+
+    @pytest.mark.parametrize('url', [
+        '/api/vendas/1/semanal',
+        '/api/vendas/1/mensal',
+        '/api/vendas/1/anual',
+        '/api/top-produtos/1/semanal',
+        '/api/top-produtos/1/anual',
+        '/api/dashboard/1',
+    ])
+    def test_resultado_igual(self, client, pedidos_api, url):
+        limpar_agregados()
+        pedidos_cache.invalidar()
+        with patch('app.services.pedidos_cache.proxy_request', return_value=(200, pedidos_api)):
+            incremental = client.get(url).get_json()
+            with patch('app.routes.analytics.ANALYTICS_INCREMENTAL', False):
+                recalculado = client.get(url).get_json()
+        limpar_agregados()
+
+        assert incremental == recalculado
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
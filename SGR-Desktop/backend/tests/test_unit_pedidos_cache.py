@@ -0,0 +1,150 @@
+"""
+🧪 TESTES DE UNIDADE - Cache de Snapshots de Pedidos
+
+Foco: Garantir que chamadas dentro da janela de validade custam uma única ida à API externa
+"""
+
+import pytest
+from unittest.mock import patch
+
+from app import create_app
+from app.services.pedidos_cache import PedidosSnapshotCache, buscar_pedidos_snapshot, pedidos_cache
+
+
+@pytest.fixture(autouse=True)
+def limpar_cache():
+    """Fixture: Isola o cache global entre os testes"""
+    pedidos_cache.invalidar()
+    yield
+    pedidos_cache.invalidar()
+
+
+class TestPedidosSnapshotCache:
+    """
+    Teste: Cache com TTL por restaurante
+
+    Cenários testados:
+    - Hit dentro do TTL e miss após expiração
+    - Respostas de erro não são armazenadas
+    - Invalidação explícita (por restaurante e total)
+    - Snapshot buscado antes de uma invalidação não volta ao cache (geração)
+    """
+
+    def test_hit_dentro_do_ttl(self):
+        """Teste: Segunda leitura dentro do TTL deve ser hit"""
+        cache = PedidosSnapshotCache(ttl=60)
+        cache.set(1, (200, [{'id': 1}]))
+
+        assert cache.get(1) == (200, [{'id': 1}])
+        assert cache.get(2) is None
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_expiracao_do_ttl(self):
+        """Teste: Snapshot expirado deve ser descartado"""
+        cache = PedidosSnapshotCache(ttl=10)
+        with patch('app.services.pedidos_cache.time.monotonic', return_value=100.0):
+            cache.set(1, (200, []))
+        with patch('app.services.pedidos_cache.time.monotonic', return_value=111.0):
+            assert cache.get(1) is None
+        assert cache.stats()['entradas'] == 0
+
+    def test_erro_nao_e_armazenado(self):
+        """Teste: Respostas diferentes de 200 não entram no cache"""
+        cache = PedidosSnapshotCache(ttl=60)
+        cache.set(1, (503, {'status': 'error'}))
+
+        assert cache.get(1) is None
+
+    def test_invalidacao(self):
+        """Teste: invalidar() remove um restaurante ou todos"""
+        cache = PedidosSnapshotCache(ttl=60)
+        cache.set(1, (200, []))
+        cache.set(2, (200, []))
+
+        cache.invalidar(1)
+        assert cache.get(1) is None
+        assert cache.get(2) is not None
+
+        cache.invalidar()
+        assert cache.get(2) is None
+        assert cache.stats()['invalidacoes'] == 2
+
+    def test_geracao_descarta_snapshot_antigo(self):
+        """Teste: set() com geração anterior a uma invalidação não armazena"""
+        cache = PedidosSnapshotCache(ttl=60)
+        geracao_1, geracao_2 = cache.geracao(1), cache.geracao(2)
+        cache.invalidar(1)
+
+        cache.set(1, (200, [{'status': 'PENDENTE'}]), geracao_1)
+        cache.set(2, (200, []), geracao_2)
+        assert cache.get(1) is None
+        assert cache.get(2) is not None
+
+        geracao_2 = cache.geracao(2)
+        cache.invalidar()
+        cache.set(2, (200, []), geracao_2)
+        assert cache.get(2) is None
+        assert cache.stats()['descartados'] == 2
+
+
+class TestBuscarPedidosSnapshot:
+    """
+    Teste: N chamadas de rotas na mesma janela custam uma ida à API externa
+
+    Cenários testados:
+    - Chamadas repetidas usam um único request
+    - Invalidação força nova busca; uma busca em andamento durante a invalidação não volta ao cache
+    - PUT de status invalida só o restaurante da requisição
+    """
+
+    @patch('app.services.pedidos_cache.proxy_request')
+    def test_chamadas_repetidas_usam_um_unico_request(self, mock_proxy):
+        mock_proxy.return_value = (200, [{'id': 1, 'restaurante_id': 1}])
+
+        for _ in range(5):
+            status_code, dados = buscar_pedidos_snapshot(1)
+
+        assert status_code == 200
+        assert dados == [{'id': 1, 'restaurante_id': 1}]
+        mock_proxy.assert_called_once_with('GET', 'pedidos/restaurante')
+
+    @patch('app.services.pedidos_cache.proxy_request')
+    def test_invalidacao_forca_nova_busca(self, mock_proxy):
+        mock_proxy.return_value = (200, [])
+
+        buscar_pedidos_snapshot(1)
+        pedidos_cache.invalidar()
+        buscar_pedidos_snapshot(1)
+
+        assert mock_proxy.call_count == 2
+
+    @patch('app.services.pedidos_cache.proxy_request')
+    def test_busca_em_andamento_durante_invalidacao(self, mock_proxy):
+        def proxy_request(method, endpoint):
+            pedidos_cache.invalidar(1)  # PUT de status concluído enquanto o GET estava na API
+            return 200, [{'id': 1, 'status': 'PENDENTE'}]
+
+        mock_proxy.side_effect = proxy_request
+        assert buscar_pedidos_snapshot(1) == (200, [{'id': 1, 'status': 'PENDENTE'}])
+
+        mock_proxy.side_effect = None
+        mock_proxy.return_value = (200, [{'id': 1, 'status': 'PRONTO'}])
+        assert buscar_pedidos_snapshot(1) == (200, [{'id': 1, 'status': 'PRONTO'}])
+
+    def test_put_status_invalida_o_restaurante(self):
+        pedidos_cache.set(1, (200, []))
+        pedidos_cache.set(2, (200, []))
+
+        with patch('app.routes.pedidos.proxy_request', return_value=(200, {})):
+            resposta = create_app().test_client().put(
+                '/api/pedidos/5/status', json={'status': 'pronto'}, headers={'X-Restaurante-Id': '1'}
+            )
+
+        assert resposta.status_code == 200
+        assert pedidos_cache.get(1) is None
+        assert pedidos_cache.get(2) is not None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
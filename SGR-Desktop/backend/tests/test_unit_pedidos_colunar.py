@@ -0,0 +1,127 @@
+"""
+🧪 TESTES DE UNIDADE - Pedidos em formato colunar (NumPy)
+
+Foco: Testar as agregações vetorizadas (services/pedidos_colunar.py, ANALYTICS_COLUNAR) e a
+equivalência com o recálculo em Python puro.
+"""
+
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from app import create_app
+from app.models.pedido import normalizar_pedidos
+from app.services.pedidos_cache import pedidos_cache
+from app.services.pedidos_colunar import PedidosColunares
+
+
+@pytest.fixture(autouse=True)
+def limpar_cache():
+    """Fixture: Isola o cache global entre os testes"""
+    pedidos_cache.invalidar()
+    yield
+    pedidos_cache.invalidar()
+
+
+@pytest.fixture
+def colunas():
+    """Fixture: Três pedidos concluídos (um sem data) com itens repetidos"""
+    return PedidosColunares(normalizar_pedidos([
+        {'id': 1, 'status': 'FINALIZADO', 'restaurante_id': 1, 'criadoEm': '2024-01-10T10:00:00',
+         'itens': [{'itemRestaurante': {'id': 7, 'nome': 'Pizza', 'preco': 40.0}, 'quantidade': 2}]},
+        {'id': 2, 'status': 'FINALIZADO', 'restaurante_id': 1, 'criadoEm': '2024-01-03T10:00:00',
+         'itens': [{'nome': 'Suco', 'preco': 8.0, 'quantidade': 3},
+                   {'itemRestaurante': {'id': 7, 'nome': 'Pizza', 'preco': 45.0}, 'quantidade': 1}]},
+        {'id': 3, 'status': 'FINALIZADO', 'restaurante_id': 1,
+         'itens': [{'nome': 'Suco', 'preco': 8.0, 'quantidade': 5}]},
+    ]))
+
+
+class TestPedidosColunares:
+    """
+    Teste: Agregações vetorizadas
+
+    Cenários testados:
+    - Somas por intervalo de datas (pedidos sem data ficam fora dos intervalos)
+    - Totais incluem pedidos sem data
+    - Top produtos por quantidade, com maior preço unitário e empate pela ordem de aparição
+    """
+
+    def test_somar_por_intervalos(self, colunas):
+        vendas, produtos, pedidos = colunas.somar_por_intervalos(
+            [date(2024, 1, 1), date(2024, 1, 8), date(2024, 1, 15)]
+        )
+
+        assert vendas == [69.0, 80.0]
+        assert produtos == [4, 2]
+        assert pedidos == [1, 1]
+
+    def test_totais_incluem_pedidos_sem_data(self, colunas):
+        assert (colunas.total_pedidos, colunas.total_vendas, colunas.produtos_vendidos) == (3, 189.0, 11)
+
+    def test_top_produtos(self, colunas):
+        resultado = colunas.top_produtos(date(2024, 1, 1))
+
+        assert [produto['nome'] for produto in resultado] == ['Pizza', 'Suco']
+        assert resultado[0]['quantidade'] == 3
+        assert resultado[0]['valor_total'] == 125.0
+        assert resultado[0]['preco_unitario'] == 45.0
+
+    def test_top_produtos_sem_itens_no_periodo(self, colunas):
+        assert colunas.top_produtos(date(2025, 1, 1)) == []
+
+
+class TestEquivalenciaComPythonPuro:
+    """
+    Teste: Com ANALYTICS_INCREMENTAL=false, as rotas de analytics devolvem o mesmo resultado
+    com as colunas NumPy (ANALYTICS_COLUNAR) e com os laços em Python
+    """
+
+    @pytest.fixture
+    def client(self):
+        app = create_app()
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    @pytest.fixture
+    def pedidos_api(self):
+        hoje = datetime.now()
+        pedidos = []
+        for indice in range(60):
+            criado_em = (hoje - timedelta(days=indice * 11)).isoformat()
+            pedidos.append({
+                'id': indice,
+                'status': 'FINALIZADO' if indice % 4 else 'PENDENTE',
+                'restaurante_id': 1,
+                'criadoEm': criado_em,
+                'itens': [
+                    {'itemRestaurante': {'id': indice % 5, 'nome': f'Produto {indice % 5}', 'preco': 10.0 + indice % 5},
+                     'quantidade': 1 + indice % 3},
+                ],
+            })
+        return pedidos
+
+    @pytest.mark.parametrize('url', [
+        '/api/vendas/1/semanal',
+        '/api/vendas/1/mensal',
+        '/api/vendas/1/anual',
+        '/api/top-produtos/1/semanal',
+        '/api/top-produtos/1/anual',
+        '/api/dashboard/1',
+    ])
+    def test_resultado_igual(self, client, pedidos_api, url):
+        with patch('app.services.pedidos_cache.proxy_request', return_value=(200, pedidos_api)), \
+                patch('app.routes.analytics.ANALYTICS_INCREMENTAL', False):
+            python_puro = client.get(url).get_json()
+            with patch('app.routes.analytics.ANALYTICS_COLUNAR', True):
+                vetorizado = client.get(url).get_json()
+
+        assert vetorizado == python_puro
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,184 @@
+"""
+🧪 TESTES DE UNIDADE - Espelho SQLite de pedidos
+
+Foco: Testar a sincronização e as consultas indexadas do espelho local (services/pedidos_espelho.py)
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.models.pedido import normalizar_pedidos
+from app.services import pedidos_espelho
+from app.services.pedidos import buscar_pedidos_restaurante
+from app.services.pedidos_cache import pedidos_cache
+from app.services.pedidos_espelho import PedidosEspelho, buscar_pedidos_espelho, listar_concluidos_espelho
+
+
+@pytest.fixture(autouse=True)
+def limpar_cache():
+    """Fixture: Isola o cache global entre os testes"""
+    pedidos_cache.invalidar()
+    yield
+    pedidos_cache.invalidar()
+
+
+@pytest.fixture
+def espelho(tmp_path):
+    """Fixture: Espelho SQLite temporário instalado como espelho global"""
+    espelho = PedidosEspelho(str(tmp_path / 'pedidos.sqlite3'))
+    with patch.object(pedidos_espelho, 'espelho', espelho):
+        yield espelho
+    espelho.fechar()
+
+
+@pytest.fixture
+def pedidos_api():
+    """Fixture: Pedidos no formato variável da API Java"""
+    return [
+        {'id': 1, 'status': 'FINALIZADO', 'restaurante': {'id': 1}, 'criadoEm': '2024-01-10T10:00:00'},
+        {'id': 2, 'status': 'PENDENTE', 'restaurante_id': 1, 'criado_em': '2024-01-12T10:00:00'},
+        {'id': 3, 'status': 'ENTREGUE', 'restaurante_id': 2, 'criadoEm': '2024-01-11T10:00:00'},
+        {'id': 4, 'status': 'ENTREGUE', 'criadoEm': '2024-01-13T10:00:00'},
+        {'id': 5, 'status': 'pendente', 'restaurante_id': 1, 'criadoEm': '2024-01-09T10:00:00'},
+    ]
+
+
+class TestConsultasEspelho:
+    """
+    Teste: Consultas do espelho equivalem ao filtro em memória
+
+    Cenários testados:
+    - Listagem com e sem filtros de status e intervalo de datas
+    - Pedidos concluídos exigem restaurante identificado
+    """
+
+    @pytest.mark.parametrize('filtros', [
+        {},
+        {'status': 'pendente'},
+        {'status': 'concluido'},
+        {'data_inicio': '2024-01-10', 'data_fim': '2024-01-12'},
+        {'status': 'ENTREGUE', 'data_inicio': '2024-01-13'},
+    ])
+    @patch('app.services.pedidos_cache.proxy_request')
+    def test_equivale_ao_filtro_em_memoria(self, mock_proxy, espelho, pedidos_api, filtros):
+        mock_proxy.return_value = (200, pedidos_api)
+
+        esperado = buscar_pedidos_restaurante(1, **filtros)
+        obtido = buscar_pedidos_espelho(1, **filtros)
+
+        assert obtido == esperado
+
+    @patch('app.services.pedidos_cache.proxy_request')
+    def test_concluidos(self, mock_proxy, espelho, pedidos_api):
+        mock_proxy.return_value = (200, pedidos_api)
+
+        status_code, pedidos, total = listar_concluidos_espelho(1)
+
+        assert status_code == 200
+        assert [pedido['id'] for pedido in pedidos] == [1]
+        assert total == 5
+
+
+class TestSincronizacaoEspelho:
+    """
+    Teste: Sincronização incremental e disponibilidade com a API fora do ar
+
+    Cenários testados:
+    - Só pedidos alterados são regravados; os que saem do snapshot são removidos
+    - Pedidos sem id entram com chave sintética estável e aparecem como na listagem direta
+    - Ids gravados como texto: '007' e 7 são pedidos distintos e voltam como vieram da API
+    - Espelho desatualizado com a API lenta: serve os dados locais e sincroniza em segundo plano
+    - API fora do ar: serve o espelho local; sem dados locais, propaga o erro
+    """
+
+    def test_sincroniza_apenas_pedidos_alterados(self, espelho, pedidos_api):
+        pedidos = normalizar_pedidos(pedidos_api)
+        assert espelho.sincronizar(1, pedidos) == 4  # pedido 3 é de outro restaurante
+
+        atualizados = pedidos[1:] + normalizar_pedidos([{'id': 6, 'status': 'PENDENTE', 'criadoEm': '2024-01-14T10:00:00'}])
+        assert espelho.sincronizar(1, atualizados) == 2  # pedido 1 removido, pedido 6 novo
+        assert espelho.total_recebido(1) == 5
+
+    @patch('app.services.pedidos_cache.proxy_request')
+    def test_pedidos_sem_id(self, mock_proxy, espelho, pedidos_api):
+        sem_id = {'status': 'PENDENTE', 'restaurante_id': 1, 'criadoEm': '2024-01-11T12:00:00'}
+        mock_proxy.return_value = (200, pedidos_api + [dict(sem_id), dict(sem_id)])
+
+        esperado = buscar_pedidos_restaurante(1)
+        obtido = buscar_pedidos_espelho(1)
+
+        assert obtido == esperado
+        assert sum(pedido.get('id') is None for pedido in obtido[1]) == 2
+        pedidos = normalizar_pedidos(pedidos_api + [dict(sem_id), dict(sem_id)])
+        espelho.sincronizar(1, pedidos)
+        assert espelho.sincronizar(1, pedidos) == 0  # chaves sintéticas estáveis entre sincronizações
+
+    def test_ids_como_texto(self, espelho, tmp_path):
+        pedidos = normalizar_pedidos([
+            {'id': 7, 'status': 'PENDENTE', 'restaurante_id': 1, 'criadoEm': '2024-01-10T10:00:00'},
+            {'id': '007', 'status': 'PENDENTE', 'restaurante_id': 1, 'criadoEm': '2024-01-11T10:00:00'},
+            {'id': 'A-1', 'status': 'PENDENTE', 'restaurante_id': 1, 'criadoEm': '2024-01-12T10:00:00'},
+        ])
+        assert espelho.sincronizar(1, pedidos) == 3
+        assert espelho.sincronizar(1, pedidos[1:]) == 1  # só o pedido 7 removido
+
+        reaberto = PedidosEspelho(espelho.caminho)
+        assert [pedido['id'] for pedido in reaberto.consultar(1)] == ['A-1', '007']
+        reaberto.fechar()
+
+    @patch('app.services.pedidos_cache.proxy_request')
+    def test_sincroniza_em_segundo_plano(self, mock_proxy, espelho, pedidos_api):
+        mock_proxy.return_value = (200, pedidos_api)
+        buscar_pedidos_espelho(1)
+        espelho.expirar()
+        pedidos_cache.invalidar()
+
+        liberar = threading.Event()
+        chamadas = []
+
+        def api_lenta(*args, **kwargs):
+            chamadas.append(args)
+            liberar.wait(5)
+            return 200, pedidos_api[1:]
+
+        mock_proxy.side_effect = api_lenta
+        with patch.object(pedidos_espelho, 'PEDIDOS_ESPELHO_ESPERA', 0.05):
+            inicio = time.perf_counter()
+            status_code, pedidos, _ = buscar_pedidos_espelho(1)
+            assert buscar_pedidos_espelho(1)[0] == 200
+            assert time.perf_counter() - inicio < 2
+
+        assert status_code == 200
+        assert [pedido['id'] for pedido in pedidos] == [4, 2, 1, 5]
+        assert len(chamadas) == 1  # uma sincronização por restaurante
+
+        sincronizacao = pedidos_espelho._sincronizacoes.get(1)
+        liberar.set()
+        sincronizacao.join(5)
+        assert [pedido['id'] for pedido in buscar_pedidos_espelho(1)[1]] == [4, 2, 5]
+
+    @patch('app.services.pedidos_cache.proxy_request')
+    def test_serve_espelho_quando_api_falha(self, mock_proxy, espelho, pedidos_api):
+        mock_proxy.return_value = (200, pedidos_api)
+        buscar_pedidos_espelho(1)
+        espelho.expirar()
+        pedidos_cache.invalidar()
+
+        mock_proxy.return_value = (504, {'status': 'error'})
+        status_code, pedidos, _ = buscar_pedidos_espelho(1)
+
+        assert status_code == 200
+        assert [pedido['id'] for pedido in pedidos] == [4, 2, 1, 5]
+
+    @patch('app.services.pedidos_cache.proxy_request')
+    def test_sem_dados_locais_propaga_erro(self, mock_proxy, espelho):
+        mock_proxy.return_value = (503, {'status': 'error'})
+
+        assert buscar_pedidos_espelho(1) == (503, [], 0)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
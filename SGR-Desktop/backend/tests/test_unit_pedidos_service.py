@@ -0,0 +1,102 @@
+"""
+🧪 TESTES DE UNIDADE - Serviço de Pedidos
+
+Foco: Testar a API Python de busca, normalização e filtro de pedidos (services/pedidos.py)
+"""
+
+import pytest
+from unittest.mock import patch
+
+from app.models.pedido import normalizar_pedidos
+from app.services.pedidos import filtrar_pedidos, listar_pedidos_concluidos, normalizar_pedido
+from app.services.pedidos_cache import pedidos_cache
+
+
+@pytest.fixture(autouse=True)
+def limpar_cache():
+    """Fixture: Isola o cache global entre os testes"""
+    pedidos_cache.invalidar()
+    yield
+    pedidos_cache.invalidar()
+
+
+@pytest.fixture
+def pedidos_api():
+    """Fixture: Pedidos no formato variável da API Java"""
+    return [
+        {'id': 1, 'status': 'FINALIZADO', 'restaurante': {'id': 1}, 'criadoEm': '2024-01-10T10:00:00'},
+        {'id': 2, 'status': 'PENDENTE', 'restaurante_id': 1, 'criado_em': '2024-01-12T10:00:00'},
+        {'id': 3, 'status': 'ENTREGUE', 'restaurante_id': 2, 'criadoEm': '2024-01-11T10:00:00'},
+        {'id': 4, 'status': 'ENTREGUE', 'criadoEm': '2024-01-13T10:00:00'},
+        'registro_invalido',
+    ]
+
+
+class TestFiltrarPedidos:
+    """
+    Teste: Filtro e normalização de pedidos
+
+    Cenários testados:
+    - Filtro por restaurante, status e intervalo de datas
+    - Pedidos sem restaurante (aceitos só na listagem geral)
+    - Ordenação do mais recente para o mais antigo
+    - Snapshot original não é alterado
+    """
+
+    def test_filtra_por_restaurante_e_ordena(self, pedidos_api):
+        resultado = filtrar_pedidos(normalizar_pedidos(pedidos_api), 1)
+
+        assert [pedido.id for pedido in resultado] == [4, 2, 1]
+
+    def test_exigir_restaurante_descarta_pedidos_sem_id(self, pedidos_api):
+        resultado = filtrar_pedidos(normalizar_pedidos(pedidos_api), 1, exigir_restaurante=True)
+
+        assert [pedido.id for pedido in resultado] == [2, 1]
+
+    def test_filtro_status_concluido_aceita_sinonimos(self, pedidos_api):
+        resultado = filtrar_pedidos(normalizar_pedidos(pedidos_api), 1, status='concluido')
+
+        assert [pedido.id for pedido in resultado] == [1]
+
+    def test_filtro_intervalo_de_datas(self, pedidos_api):
+        resultado = filtrar_pedidos(normalizar_pedidos(pedidos_api), 1, data_inicio='2024-01-11', data_fim='2024-01-12')
+
+        assert [pedido.id for pedido in resultado] == [2]
+
+    def test_normalizacao_nao_altera_snapshot(self, pedidos_api):
+        original = pedidos_api[1]
+        normalizado = normalizar_pedido(original, 1)
+
+        assert normalizado['criadoEm'] == '2024-01-12T10:00:00'
+        assert normalizado['itens'] == []
+        assert 'criadoEm' not in original
+
+
+class TestListarPedidosConcluidos:
+    """
+    Teste: Pedidos concluídos obtidos em processo (sem loopback HTTP)
+    """
+
+    @patch('app.services.pedidos_cache.proxy_request')
+    def test_lista_apenas_concluidos_do_restaurante(self, mock_proxy, pedidos_api):
+        mock_proxy.return_value = (200, {'data': pedidos_api})
+
+        status_code, pedidos, total = listar_pedidos_concluidos(1)
+
+        assert status_code == 200
+        assert [pedido.id for pedido in pedidos] == [1]
+        assert total == 4  # registros que não são objetos são descartados
+
+    @patch('app.services.pedidos_cache.proxy_request')
+    def test_erro_da_api_retorna_lista_vazia(self, mock_proxy):
+        mock_proxy.return_value = (503, {'status': 'error'})
+
+        status_code, pedidos, total = listar_pedidos_concluidos(1)
+
+        assert status_code == 503
+        assert pedidos == []
+        assert total == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,185 @@
+"""
+🧪 TESTES DE UNIDADE - Retentativas de chamadas idempotentes à API externa
+
+Foco: Garantir que utils/retentativas.py repete apenas chamadas idempotentes após conexão perdida
+ou 502/503/504, com backoff exponencial limitado e jitter, respeitando Retry-After e o prazo da
+requisição, e que as tentativas aparecem nas estatísticas e nas métricas
+"""
+
+import json
+from email.utils import formatdate
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from app import create_app, proxy
+from app.utils.deadline import deadline
+from app.utils.metricas import metricas
+from app.utils.retentativas import PoliticaRetentativas, chamada_idempotente, ler_retry_after
+
+
+def _resposta(status_code=200, payload=None, headers=None):
+    resposta = requests.Response()
+    resposta.status_code = status_code
+    resposta.headers['Content-Type'] = 'application/json'
+    resposta.headers.update(headers or {})
+    resposta._content = json.dumps(payload if payload is not None else {}).encode()
+    return resposta
+
+
+def _politica(**kwargs):
+    esperas = []
+    politica = PoliticaRetentativas(aleatorio=lambda: 0.5, dormir=esperas.append, **kwargs)
+    return politica, esperas
+
+
+def _chamada(*resultados):
+    return MagicMock(side_effect=list(resultados))
+
+
+class TestPoliticaRetentativas:
+    """
+    Teste: PoliticaRetentativas
+
+    Cenários testados:
+    - GET, DELETE e PUT de status são idempotentes; POST e PUT de cadastro não
+    - 503 seguido de 200 e conexão resetada seguida de 200 se recuperam
+    - SSL e read timeout não se repetem; tentativas esgotadas devolvem a última resposta
+    - Backoff exponencial com jitter e teto; Retry-After (segundos ou data) como espera mínima
+    - Retry-After acima do máximo ou espera além do prazo: desiste sem dormir
+    """
+
+    def test_chamada_idempotente(self):
+        assert chamada_idempotente('GET', 'pedidos/restaurante')
+        assert chamada_idempotente('DELETE', 'itens/3')
+        assert chamada_idempotente('PUT', 'pedidos/5/status-restaurante')
+        assert chamada_idempotente('PUT', 'pedidos/5/status')
+        assert not chamada_idempotente('PUT', 'itens/3')
+        assert not chamada_idempotente('POST', 'pedidos/5/status')
+
+    def test_ler_retry_after(self):
+        assert ler_retry_after('3') == 3.0
+        assert ler_retry_after(formatdate(1000.0 + 7, usegmt=True), agora=1000.0) == pytest.approx(7.0)
+        assert ler_retry_after(formatdate(900.0, usegmt=True), agora=1000.0) == 0.0
+        assert ler_retry_after('depois') is None
+        assert ler_retry_after(None) is None
+
+    def test_recupera_apos_503_e_conexao(self):
+        politica, esperas = _politica(tentativas=3, base=0.2, teto=2.0)
+        chamada = _chamada(
+            _resposta(503),
+            requests.exceptions.ConnectionError('Connection reset by peer'),
+            _resposta(200, {'ok': True}),
+        )
+
+        resposta = politica.executar(chamada, 'pedidos/restaurante')
+
+        assert resposta.status_code == 200
+        assert chamada.call_count == 3
+        assert esperas == [pytest.approx(0.1), pytest.approx(0.2)]
+        stats = politica.stats()
+        assert stats['retentativas'] == 2 and stats['recuperadas'] == 1
+        assert stats['motivos'] == {'503': 1, 'conexao': 1}
+
+    def test_erros_que_nao_se_repetem(self):
+        politica, esperas = _politica()
+        for erro in (requests.exceptions.SSLError('cert'), requests.exceptions.ReadTimeout('lento')):
+            chamada = _chamada(erro, _resposta(200))
+            with pytest.raises(type(erro)):
+                politica.executar(chamada)
+            assert chamada.call_count == 1
+        assert esperas == []
+
+    def test_tentativas_esgotadas(self):
+        politica, _ = _politica(tentativas=2)
+        chamada = _chamada(_resposta(502), _resposta(504), _resposta(503), _resposta(200))
+
+        assert politica.executar(chamada).status_code == 503
+        assert chamada.call_count == 3
+        assert politica.stats()['esgotadas'] == 1
+
+    def test_backoff_com_teto(self):
+        politica, _ = _politica(base=0.2, teto=1.0)
+
+        assert [politica.espera(n) for n in range(5)] == [
+            pytest.approx(0.1), pytest.approx(0.2), pytest.approx(0.4), pytest.approx(0.5), pytest.approx(0.5),
+        ]
+        politica.aleatorio = lambda: 0.0
+        assert politica.espera(3) == 0.0
+
+    def test_retry_after(self):
+        politica, esperas = _politica(retry_after_maximo=5)
+        chamada = _chamada(_resposta(503, headers={'Retry-After': '2'}), _resposta(200))
+        assert politica.executar(chamada).status_code == 200
+        assert esperas == [2.0]
+
+        chamada = _chamada(_resposta(503, headers={'Retry-After': '60'}), _resposta(200))
+        assert politica.executar(chamada).status_code == 503
+        assert chamada.call_count == 1
+        assert politica.stats()['desistidas'] == 1
+
+    def test_prazo_da_requisicao(self):
+        politica, esperas = _politica(base=1.0)
+        chamada = _chamada(_resposta(503), _resposta(200))
+
+        with deadline(0.3):
+            assert politica.executar(chamada).status_code == 503
+
+        assert chamada.call_count == 1
+        assert esperas == []
+
+
+class TestRetentativasProxy:
+    """
+    Teste: proxy_request com a política de retentativas ligada
+
+    Cenários testados:
+    - GET com conexão resetada responde 200 sem o usuário repetir o clique
+    - POST não é repetido; PUT de status é
+    - Tentativas registradas em sgr_upstream_tentativas e em /api/health
+    """
+
+    @pytest.fixture(autouse=True)
+    def ligada(self):
+        with patch.object(proxy.upstream_retentativas, 'tentativas', 2), \
+             patch.object(proxy.upstream_retentativas, 'dormir', lambda segundos: None):
+            metricas.limpar()
+            yield
+            metricas.limpar()
+
+    @patch('app.proxy.api_session')
+    def test_get_recuperado(self, mock_session):
+        mock_session.request.side_effect = [
+            requests.exceptions.ConnectionError('Connection reset by peer'),
+            _resposta(200, [{'id': 1}]),
+        ]
+
+        status_code, response_data = proxy.proxy_request('GET', 'pedidos/restaurante')
+
+        assert status_code == 200 and response_data == [{'id': 1}]
+        assert mock_session.request.call_count == 2
+        series = metricas.exportar_json()['sgr_upstream_tentativas']['series']
+        assert series[0]['rotulos'] == {'endpoint': 'pedidos/restaurante', 'resultado': 'ok'}
+        assert series[0]['soma'] == 2
+
+    @patch('app.proxy.api_session')
+    def test_post_nao_repete_put_status_repete(self, mock_session):
+        mock_session.request.return_value = _resposta(503)
+        assert proxy.proxy_request('POST', 'pedidos/5', data={'status': 'PRONTO'})[0] == 503
+        assert mock_session.request.call_count == 1
+
+        mock_session.request.reset_mock()
+        mock_session.request.side_effect = [_resposta(503), _resposta(200, {'status': 'PRONTO'})]
+        assert proxy.proxy_request('PUT', 'pedidos/5/status-restaurante', params={'status': 'PRONTO'})[0] == 200
+        assert mock_session.request.call_count == 2
+
+    def test_health(self):
+        with patch('app.routes.system.proxy_request', return_value=(200, {})):
+            response = create_app().test_client().get('/api/health')
+
+        assert response.get_json()['retentativas']['tentativas_extras'] == 2
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
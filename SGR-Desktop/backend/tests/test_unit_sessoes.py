@@ -0,0 +1,218 @@
+"""
+🧪 TESTES DE UNIDADE - Sessões por restaurante
+
+Foco: Garantir que utils/sessoes.py mantém uma sessão (cookie jar) por restaurante sobre o mesmo
+pool de conexões, que proxy_request usa a sessão do restaurante da requisição e que a troca do
+JSESSIONID não reconstrói o jar
+"""
+
+import io
+import json
+import threading
+
+import pytest
+import requests
+from unittest.mock import MagicMock, patch
+
+from app import create_app, proxy
+from app.services.pedidos_cache import invalidar_pedidos_cache
+from app.utils.cookies import substituir_cookie
+from app.utils.sessoes import (
+    RegistroSessoes,
+    definir_restaurante,
+    normalizar_restaurante,
+    restaurar_restaurante,
+)
+
+
+def _sessao(payload=None, set_cookie=None):
+    resposta = requests.Response()
+    resposta.status_code = 200
+    resposta.headers['Content-Type'] = 'application/json'
+    if set_cookie:
+        resposta.headers['Set-Cookie'] = set_cookie
+    resposta._content = json.dumps(payload if payload is not None else []).encode()
+    sessao = MagicMock()
+    sessao.request.return_value = resposta
+    sessao.cookies = requests.cookies.RequestsCookieJar()
+    return sessao
+
+
+@pytest.fixture(autouse=True)
+def sessoes_limpas():
+    proxy.clear_session_cookie()
+    invalidar_pedidos_cache()
+    yield
+    proxy.clear_session_cookie()
+    invalidar_pedidos_cache()
+
+
+class TestRegistroSessoes:
+    """
+    Teste: Registro de sessões e troca de cookies
+
+    Cenários testados:
+    - substituir_cookie remove as cópias em outros domínios e preserva os demais cookies
+    - Uma sessão por restaurante, todas com o adaptador (pool) da api_session
+    - Criação concorrente do mesmo restaurante devolve a mesma sessão
+    - restaurante_id normalizado (str numérica, inválidos)
+    """
+
+    def test_substituir_cookie(self):
+        jar = requests.cookies.RequestsCookieJar()
+        jar.set('JSESSIONID', 'antigo', domain='api.exemplo.com', path='/')
+        jar.set('JSESSIONID', 'manual')
+        jar.set('tema', 'escuro')
+
+        substituir_cookie(jar, 'JSESSIONID', 'novo')
+
+        assert [cookie.value for cookie in jar if cookie.name == 'JSESSIONID'] == ['novo']
+        assert jar.get('tema') == 'escuro'
+
+    def test_sessoes_compartilham_pool(self):
+        primeira = proxy.sessoes.obter_ou_criar(1)
+        segunda = proxy.sessoes.obter_ou_criar(2)
+
+        assert proxy.sessoes.obter_ou_criar(1) is primeira
+        assert primeira.cookies is not segunda.cookies
+        assert primeira.get_adapter('https://api') is proxy.api_session.get_adapter('https://api')
+        assert segunda.get_adapter('http://api') is proxy.api_session.get_adapter('http://api')
+
+    def test_criacao_concorrente(self):
+        registro = RegistroSessoes(requests.Session)
+        barreira = threading.Barrier(16)
+        obtidas = []
+
+        def obter():
+            barreira.wait()
+            obtidas.append(registro.obter_ou_criar(7))
+
+        threads = [threading.Thread(target=obter) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(sessao) for sessao in obtidas}) == 1
+        assert registro.restaurantes() == [7]
+
+    def test_normalizar_restaurante(self):
+        assert normalizar_restaurante('12') == 12
+        assert normalizar_restaurante(3) == 3
+        assert normalizar_restaurante('abc') is None
+        assert normalizar_restaurante(0) is None
+        assert normalizar_restaurante(True) is None
+
+
+class TestSessoesProxy:
+    """
+    Teste: proxy_request com sessões por restaurante
+
+    Cenários testados:
+    - set_session_cookie grava na sessão do restaurante e na padrão, sem duplicatas
+    - Restaurante da requisição escolhe a sessão; desconhecido usa a api_session
+    - Set-Cookie de um restaurante não altera a sessão do outro
+    - Rotas Flask identificam o restaurante pelo path, header e corpo; o snapshot de pedidos
+      de um restaurante não é servido a requisições sem restaurante
+    - Login em sessão própria adotada pelo restaurante
+    - Escrita sem restaurante identificado com mais de um login: recusada, sem usar o último login
+    """
+
+    def test_set_session_cookie(self):
+        proxy.set_session_cookie('JSESSIONID=aaa', 1)
+        proxy.set_session_cookie('JSESSIONID=bbb', 2)
+        proxy.set_session_cookie('JSESSIONID=ccc', 2)
+
+        assert proxy.sessoes.sessao(1).cookies.get('JSESSIONID') == 'aaa'
+        assert proxy.sessoes.sessao(2).cookies.get('JSESSIONID') == 'ccc'
+        assert len(proxy.sessoes.sessao(2).cookies) == 1
+        assert proxy.api_session.cookies.get('JSESSIONID') == 'ccc'
+
+    def test_sessao_do_restaurante(self):
+        restaurante_1, restaurante_2, padrao = _sessao(), _sessao(), _sessao()
+        proxy.sessoes.adotar(1, restaurante_1)
+        proxy.sessoes.adotar(2, restaurante_2)
+
+        with patch('app.proxy.api_session', padrao):
+            for restaurante_id in (1, 2, 99, None):
+                token = definir_restaurante(restaurante_id)
+                try:
+                    proxy.proxy_request('GET', 'avaliacoes/1')
+                finally:
+                    restaurar_restaurante(token)
+
+        assert restaurante_1.request.call_count == 1
+        assert restaurante_2.request.call_count == 1
+        assert padrao.request.call_count == 2
+
+    def test_set_cookie_isolado(self):
+        restaurante_1 = _sessao(set_cookie='JSESSIONID=novo1; Path=/; HttpOnly')
+        restaurante_2 = _sessao()
+        restaurante_1.cookies.set('JSESSIONID', 'velho1', domain='api.exemplo.com', path='/')
+        restaurante_2.cookies.set('JSESSIONID', 'sessao2')
+        proxy.sessoes.adotar(1, restaurante_1)
+        proxy.sessoes.adotar(2, restaurante_2)
+
+        token = definir_restaurante(1)
+        try:
+            proxy.proxy_request('GET', 'avaliacoes/1')
+        finally:
+            restaurar_restaurante(token)
+
+        assert [cookie.value for cookie in restaurante_1.cookies] == ['novo1']
+        assert restaurante_2.cookies.get('JSESSIONID') == 'sessao2'
+        assert proxy.session_cookies_store[1] == 'JSESSIONID=novo1'
+
+    def test_rotas_identificam_restaurante(self):
+        restaurante_7 = _sessao()
+        proxy.sessoes.adotar(7, restaurante_7)
+        client = create_app().test_client()
+
+        with patch('app.proxy.api_session', _sessao()) as padrao:
+            client.get('/api/cardapio/7')
+            client.get('/api/pedidos/5', headers={'X-Restaurante-Id': '7'})
+            client.post('/api/cardapio/add', json={'nome': 'Pizza', 'preco': 30, 'restaurante_id': 7})
+            client.get('/api/pedidos/5')
+
+        assert restaurante_7.request.call_count == 3
+        assert padrao.request.call_count == 1
+
+    def test_login_em_sessao_propria(self):
+        def login(method, endpoint, data=None, params=None):
+            proxy.sessao_da_requisicao().cookies.set('JSESSIONID', 'login7', domain='api.exemplo.com', path='/')
+            return 200, {'status': 'success', 'data': {'restaurante_id': 7}}
+
+        client = create_app().test_client()
+        with patch('app.routes.system.proxy_request', side_effect=login):
+            response = client.post('/api/restaurantes/login', json={'email': 'a@b.c', 'senha': 'x'})
+
+        assert response.status_code == 200
+        sessao = proxy.sessoes.sessao(7)
+        assert sessao is not None and sessao is not proxy.api_session
+        assert [cookie.value for cookie in sessao.cookies] == ['login7']
+        assert proxy.api_session.cookies.get('JSESSIONID') == 'login7'
+        assert proxy.get_session_cookie(7) == 'JSESSIONID=login7'
+
+    def test_escrita_sem_restaurante_recusada(self):
+        restaurante_7, restaurante_8 = _sessao(), _sessao()
+        proxy.sessoes.adotar(7, restaurante_7)
+        client = create_app().test_client()
+
+        with patch('app.proxy.api_session', _sessao()) as padrao:
+            client.delete('/api/cardapio/delete/3')  # um único login: a api_session é dele
+            proxy.sessoes.adotar(8, restaurante_8)
+            recusada = client.delete('/api/cardapio/delete/3')
+            upload = client.post('/api/upload/imagem', data={'imagem': (io.BytesIO(b'png'), 'a.png')})
+            client.delete('/api/cardapio/delete/3', headers={'X-Restaurante-Id': '8'})
+            client.get('/api/pedidos/5')
+
+        assert recusada.status_code == 400
+        assert 'X-Restaurante-Id' in recusada.get_json()['message']
+        assert upload.status_code == 400
+        assert padrao.request.call_count == 2  # o DELETE com um único login e o GET
+        assert restaurante_8.request.call_count == 1
+        assert restaurante_7.request.call_count == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
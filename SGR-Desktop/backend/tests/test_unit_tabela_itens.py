@@ -0,0 +1,92 @@
+"""
+🧪 TESTES DE UNIDADE - Extração em fluxo da tabela de itens
+
+Foco: Garantir que utils/tabela_itens.py produz os mesmos itens que o parser BeautifulSoup
+sobre o corpus de arquivos de referência em tests/golden/tabela_itens
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+from unittest.mock import patch
+
+from app.proxy import parse_html_response
+from app.utils.tabela_itens import LXML_AVAILABLE, extrair_itens_tabela, iterar_itens_tabela
+
+GOLDEN = Path(__file__).parent / 'golden' / 'tabela_itens'
+CASOS = sorted(caminho.stem for caminho in GOLDEN.glob('*.html'))
+
+pytestmark = pytest.mark.skipif(not LXML_AVAILABLE, reason='lxml não instalado')
+
+
+def _carregar(caso):
+    html_content = (GOLDEN / f'{caso}.html').read_text(encoding='utf-8')
+    esperado = json.loads((GOLDEN / f'{caso}.json').read_text(encoding='utf-8'))
+    return html_content, esperado
+
+
+class TestTabelaItensGolden:
+    """
+    Teste: Paridade com o parser anterior no corpus de referência
+
+    Cenários testados:
+    - Tabela com cabeçalho, linhas curtas e colunas opcionais
+    - Fallback para a primeira tabela e preferência por table#tabelaItens
+    - HTML malformado (células sem fechamento, entidades, comentários)
+    - Tabela aninhada dentro de uma célula
+    - Documento sem tabela (cai no fluxo genérico de parse_html_response)
+    - Tamanho dos blocos entregues ao parser não altera o resultado
+    """
+
+    @pytest.mark.parametrize('caso', CASOS)
+    def test_parse_html_response_igual_ao_golden(self, caso):
+        html_content, esperado = _carregar(caso)
+
+        with patch('app.proxy.HTML_PARSER_BACKEND', 'lxml'):
+            assert parse_html_response(html_content, 'itens/restaurante/1') == esperado
+
+    @pytest.mark.parametrize('caso', CASOS)
+    @pytest.mark.parametrize('tamanho_bloco', [1, 37, 64 * 1024])
+    def test_blocos_de_qualquer_tamanho(self, caso, tamanho_bloco):
+        html_content, esperado = _carregar(caso)
+
+        itens = extrair_itens_tabela(html_content, tamanho_bloco)
+
+        assert itens == (esperado if isinstance(esperado, list) else [])
+
+
+class TestTabelaItensFluxo:
+    """
+    Teste: Emissão incremental dos itens
+    """
+
+    def test_item_emitido_antes_do_fim_do_documento(self):
+        consumidas = []
+
+        def partes():
+            yield '<html><body><table id="tabelaItens">'
+            for indice in range(1, 4):
+                consumidas.append(indice)
+                yield f'<tr><td>{indice}</td><td>Item {indice}</td><td>R$ 1,00</td></tr>'
+            consumidas.append('fim')
+            yield '</table></body></html>'
+
+        itens = iterar_itens_tabela(partes())
+        primeiro = next(itens)
+
+        assert primeiro['id'] == 1
+        assert 'fim' not in consumidas
+        assert [item['id'] for item in itens] == [2, 3]
+
+    def test_primeira_tabela_so_no_fim(self):
+        html_content = (
+            '<table><tr><td>1</td><td>Resumo</td><td>1,00</td></tr></table>'
+            '<table id="tabelaItens"><tr><td>2</td><td>Item</td><td>2,00</td></tr></table>'
+        )
+
+        assert [item['id'] for item in extrair_itens_tabela(html_content, 10)] == [2]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
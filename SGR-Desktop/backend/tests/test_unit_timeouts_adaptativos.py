@@ -0,0 +1,170 @@
+"""
+🧪 TESTES DE UNIDADE - Timeouts adaptativos por endpoint
+
+Foco: Garantir que utils/timeouts_adaptativos.py deriva o timeout de leitura da latência observada
+(p99 × fator, entre piso e teto), acompanha mudanças da API, cresce após timeouts estourados e que
+proxy_request usa e expõe esses valores
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from app import create_app, proxy
+from app.config import TIMEOUT_ADAPTATIVO
+from app.utils.timeouts_adaptativos import AMOSTRAS_MINIMAS, TimeoutsAdaptativos
+
+
+def _resposta(payload=None):
+    resposta = requests.Response()
+    resposta.status_code = 200
+    resposta.headers['Content-Type'] = 'application/json'
+    resposta._content = json.dumps(payload if payload is not None else []).encode()
+    return resposta
+
+
+def _observar(timeouts, endpoint, segundos, vezes):
+    for _ in range(vezes):
+        timeouts.observar(endpoint, segundos)
+
+
+class TestTimeoutsAdaptativos:
+    """
+    Teste: TimeoutsAdaptativos
+
+    Cenários testados:
+    - Sem amostras suficientes: timeout padrão (None)
+    - Endpoint barato cai no piso; endpoint pesado ganha p99 × fator; nada passa do teto
+    - p99 ignora a mediana: poucas respostas lentas definem o timeout
+    - Ids viram {id}: itens/1 e itens/2 compartilham o esboço
+    - API mais lenta: o timeout acompanha após algumas meias-vidas
+    - Timeout estourado aumenta o próximo timeout
+    - Desativado: sempre o padrão
+    - Endpoints isentos (listagens em massa) sempre usam o padrão
+    """
+
+    def test_sem_amostras(self):
+        timeouts = TimeoutsAdaptativos()
+        _observar(timeouts, 'itens/1', 0.01, AMOSTRAS_MINIMAS - 1)
+
+        assert timeouts.leitura('itens/1') is None
+        timeouts.observar('itens/1', 0.01)
+        assert timeouts.leitura('itens/2') == 2.0
+
+    def test_piso_fator_teto(self):
+        timeouts = TimeoutsAdaptativos(fator=3, piso=2, teto=30)
+        _observar(timeouts, 'itens/1', 0.02, 50)
+        _observar(timeouts, 'pedidos/restaurante', 4.0, 50)
+        _observar(timeouts, 'relatorios', 20.0, 50)
+
+        assert timeouts.leitura('itens/1') == 2.0
+        assert 12.0 <= timeouts.leitura('pedidos/restaurante') <= 12.0 * 1.2
+        assert timeouts.leitura('relatorios') == 30.0
+
+    def test_p99_segue_a_cauda(self):
+        timeouts = TimeoutsAdaptativos(fator=2, piso=0.1)
+        _observar(timeouts, 'pedidos/restaurante', 0.1, 97)
+        _observar(timeouts, 'pedidos/restaurante', 3.0, 3)
+
+        assert 6.0 <= timeouts.leitura('pedidos/restaurante') <= 6.0 * 1.2
+
+    def test_acompanha_api_mais_lenta(self):
+        timeouts = TimeoutsAdaptativos(fator=2, piso=0.1, meia_vida=20)
+        _observar(timeouts, 'pedidos/restaurante', 0.2, 200)
+        antes = timeouts.leitura('pedidos/restaurante')
+
+        _observar(timeouts, 'pedidos/restaurante', 2.0, 100)
+
+        assert antes < 0.5
+        assert timeouts.leitura('pedidos/restaurante') >= 4.0
+
+    def test_timeout_estourado_aumenta(self):
+        timeouts = TimeoutsAdaptativos(fator=3, piso=0.1, meia_vida=10)
+        _observar(timeouts, 'pedidos/restaurante', 0.1, 50)
+        antes = timeouts.leitura('pedidos/restaurante')
+
+        timeouts.observar_timeout('pedidos/restaurante', antes)
+
+        assert timeouts.leitura('pedidos/restaurante') > antes
+
+    def test_desativado(self):
+        timeouts = TimeoutsAdaptativos(ativo=False)
+        _observar(timeouts, 'itens/1', 0.01, 50)
+
+        assert timeouts.leitura('itens/1') is None
+        assert timeouts.tabela() == {}
+
+    def test_isentos(self):
+        timeouts = TimeoutsAdaptativos(isentos=('pedidos/restaurante', 'cardapio/{id}'))
+        for endpoint in ('pedidos/restaurante', 'cardapio/7', 'itens/1'):
+            _observar(timeouts, endpoint, 0.01, AMOSTRAS_MINIMAS)
+        timeouts.observar_timeout('pedidos/restaurante', 2.0)
+
+        assert timeouts.leitura('pedidos/restaurante') is None
+        assert timeouts.leitura('cardapio/8') is None
+        assert timeouts.leitura('itens/1') == timeouts.piso
+        assert list(timeouts.tabela()) == ['itens/{id}']
+
+
+class TestTimeoutsProxy:
+    """
+    Teste: proxy_request com timeouts adaptativos
+
+    Cenários testados:
+    - Cada resposta alimenta o esboço; após AMOSTRAS_MINIMAS o timeout de leitura vai ao requests
+    - Timeout estourado responde 504 com a leitura em vigor no diagnóstico
+    - GET/DELETE /api/proxy/timeouts mostra e esquece os valores; /api/health resume
+    - Configuração padrão: desligado, com pedidos/restaurante isento
+    """
+
+    @pytest.fixture(autouse=True)
+    def timeouts_ligados(self):
+        timeouts = TimeoutsAdaptativos(teto=proxy.API_READ_TIMEOUT, isentos=proxy.TIMEOUT_ADAPTATIVO_ISENTOS)
+        with patch('app.proxy.upstream_timeouts', timeouts), patch('app.routes.system.upstream_timeouts', timeouts):
+            yield
+
+    def test_padrao(self):
+        assert not TIMEOUT_ADAPTATIVO
+        assert 'pedidos/restaurante' in proxy.upstream_timeouts.isentos
+
+    @patch('app.proxy.api_session')
+    def test_timeout_repassado(self, mock_session):
+        mock_session.request.return_value = _resposta()
+        for _ in range(AMOSTRAS_MINIMAS + 1):
+            proxy.proxy_request('GET', 'cardapio/item/5')
+
+        primeira = mock_session.request.call_args_list[0].kwargs['timeout']
+        ultima = mock_session.request.call_args_list[-1].kwargs['timeout']
+        assert primeira[1] == proxy.API_READ_TIMEOUT
+        assert ultima[1] == proxy.upstream_timeouts.leitura('itens/5') == proxy.upstream_timeouts.piso
+
+    @patch('app.proxy.api_session')
+    def test_diagnostico_do_timeout(self, mock_session):
+        _observar(proxy.upstream_timeouts, 'itens/5', 0.01, AMOSTRAS_MINIMAS)
+        mock_session.request.side_effect = requests.exceptions.ReadTimeout('lento')
+
+        status_code, response_data = proxy.proxy_request('GET', 'cardapio/item/5')
+
+        assert status_code == 504
+        assert response_data['diagnostico']['timeout_configurado'].endswith(f'{proxy.upstream_timeouts.piso:g}s leitura')
+        assert proxy.upstream_timeouts.tabela()['itens/{id}']['amostras'] == AMOSTRAS_MINIMAS + 1
+
+    def test_rota_e_health(self):
+        _observar(proxy.upstream_timeouts, 'restaurantes/perfil', 0.5, AMOSTRAS_MINIMAS)
+        client = create_app().test_client()
+
+        dados = client.get('/api/proxy/timeouts').get_json()
+        assert dados['timeouts']['restaurantes/perfil']['amostras'] == AMOSTRAS_MINIMAS
+        assert dados['timeouts']['restaurantes/perfil']['timeout_leitura_s'] >= 1.5
+
+        with patch('app.routes.system.proxy_request', return_value=(200, {})):
+            health = client.get('/api/health').get_json()
+        assert 'restaurantes/perfil' in health['timeouts_adaptativos']['timeouts_leitura_s']
+
+        assert client.delete('/api/proxy/timeouts?endpoint=restaurantes/perfil').get_json()['timeouts'] == {}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
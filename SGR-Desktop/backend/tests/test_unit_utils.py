@@ -5,7 +5,12 @@ Foco: Testar funções puras e isoladas (Caixa-Branca)
 Princípio FIRST: Fast, Independent, Repeatable, Self-validating, Timely
 """
 
+import threading
+
 import pytest
+from unittest.mock import patch
+from app.utils.circuit_breaker import ABERTO, FECHADO, MEIO_ABERTO, CircuitBreaker
+from app.utils.singleflight import SingleFlight
 from app.utils.status import is_status_concluido
 
 
@@ -64,6 +69,130 @@ class TestIsStatusConcluido:
         assert is_status_concluido('  PENDENTE  ') is False
 
 
+class TestSingleFlight:
+    """
+    Teste: Coalescência de chamadas idênticas simultâneas
+
+    Cenários testados:
+    - Seguidoras recebem o resultado do líder sem executar a função
+    - Exceções do líder são propagadas para as seguidoras
+    - Chamadas sequenciais não são coalescidas (sem cache)
+    """
+
+    def test_chamadas_simultaneas_executam_uma_vez(self):
+        """Teste: 5 chamadas simultâneas com a mesma chave executam a função 1 vez"""
+        grupo = SingleFlight()
+        liberar = threading.Event()
+        execucoes = []
+
+        def funcao():
+            execucoes.append(1)
+            liberar.wait(2)
+            return 'resultado'
+
+        resultados = []
+        threads = [
+            threading.Thread(target=lambda: resultados.append(grupo.do('chave', funcao)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        while grupo.stats()['coalescidas'] < 4:
+            pass
+        liberar.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(execucoes) == 1
+        assert resultados == ['resultado'] * 5
+        assert grupo.stats() == {'lideres': 1, 'coalescidas': 4, 'em_andamento': 0}
+
+    def test_excecao_propagada(self):
+        """Teste: Exceção do líder é relançada"""
+        grupo = SingleFlight()
+
+        def funcao():
+            raise ValueError('falha')
+
+        with pytest.raises(ValueError):
+            grupo.do('chave', funcao)
+        assert grupo.em_andamento() == 0
+
+    def test_chamadas_sequenciais_nao_coalescem(self):
+        """Teste: Sem sobreposição no tempo, cada chamada executa a função"""
+        grupo = SingleFlight()
+        contador = []
+
+        grupo.do('chave', lambda: contador.append(1))
+        grupo.do('chave', lambda: contador.append(1))
+
+        assert len(contador) == 2
+        assert grupo.stats()['coalescidas'] == 0
+
+
+class TestCircuitBreaker:
+    """
+    Teste: Circuit breaker fechado → aberto → meio-aberto
+
+    Cenários testados:
+    - Abre após o limite de falhas consecutivas; sucesso no meio do caminho zera a contagem
+    - Aberto nega chamadas até o fim do tempo aberto
+    - Meio-aberto libera uma única sonda; sucesso fecha, falha reabre
+    - Chaves independentes e limite 0 desativa
+    """
+
+    def test_abre_apos_falhas_consecutivas(self):
+        circuito = CircuitBreaker(limite_falhas=3, tempo_aberto=10)
+
+        assert circuito.registrar_falha('pedidos') is False
+        circuito.registrar_sucesso('pedidos')
+        assert [circuito.registrar_falha('pedidos', (503, {})) for _ in range(3)] == [False, False, True]
+
+        assert circuito.estado('pedidos') == ABERTO
+        assert circuito.permitir('pedidos') is False
+        assert circuito.ultima_falha('pedidos') == (503, {})
+        assert circuito.permitir('itens') is True
+        assert circuito.stats()['rejeitadas'] == 1
+
+    def test_meio_aberto_libera_uma_sonda(self):
+        circuito = CircuitBreaker(limite_falhas=1, tempo_aberto=10)
+
+        with patch('app.utils.circuit_breaker.time.monotonic', return_value=100.0):
+            circuito.registrar_falha('pedidos')
+        with patch('app.utils.circuit_breaker.time.monotonic', return_value=105.0):
+            assert circuito.permitir('pedidos') is False
+            assert circuito.reabre_em('pedidos') == pytest.approx(5.0)
+        with patch('app.utils.circuit_breaker.time.monotonic', return_value=110.0):
+            assert circuito.estado('pedidos') == MEIO_ABERTO
+            assert circuito.permitir('pedidos') is True
+            assert circuito.permitir('pedidos') is False
+
+        assert circuito.registrar_sucesso('pedidos') == MEIO_ABERTO
+        assert circuito.estado('pedidos') == FECHADO
+        assert circuito.permitir('pedidos') is True
+
+    def test_sonda_com_falha_reabre(self):
+        circuito = CircuitBreaker(limite_falhas=2, tempo_aberto=10)
+
+        with patch('app.utils.circuit_breaker.time.monotonic', return_value=100.0):
+            circuito.registrar_falha('pedidos')
+            circuito.registrar_falha('pedidos')
+        with patch('app.utils.circuit_breaker.time.monotonic', return_value=111.0):
+            assert circuito.permitir('pedidos') is True
+            assert circuito.registrar_falha('pedidos') is True
+            assert circuito.estado('pedidos') == ABERTO
+            assert circuito.permitir('pedidos') is False
+
+    def test_limite_zero_desativa(self):
+        circuito = CircuitBreaker(limite_falhas=0)
+
+        for _ in range(10):
+            circuito.registrar_falha('pedidos')
+
+        assert circuito.permitir('pedidos') is True
+        assert circuito.estado('pedidos') == FECHADO
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
 
@@ -54,6 +54,8 @@ async function apiRequest(endpoint, options = {}) {
         const response = await fetch(`${window.API_BASE_URL}${endpoint}`, {
             headers: {
                 'Content-Type': 'application/json',
+                // Restaurante logado: o backend usa a sessão (cookies) dele na API externa
+                'X-Restaurante-Id': String(window.restaurante_id),
                 ...options.headers
             },
             ...options
@@ -84,7 +86,9 @@ async function carregarAvaliacoes(isPrato) {
         console.log(`🔗 Endpoint completo: ${window.API_BASE_URL}${endpoint}`);
         console.log(`🆔 Restaurante ID: ${restauranteId}`);
         
-        const response = await fetch(`${window.API_BASE_URL}${endpoint}`);
+        const response = await fetch(`${window.API_BASE_URL}${endpoint}`, {
+            headers: { 'X-Restaurante-Id': String(window.restaurante_id) }
+        });
         
         console.log(`📡 Status HTTP: ${response.status}`);
         console.log(`📋 Headers:`, [...response.headers.entries()]);
@@ -147,6 +147,8 @@ async function apiRequest(endpoint, options = {}) {
         const response = await fetch(`${window.API_BASE_URL}${endpoint}`, {
             headers: {
                 'Content-Type': 'application/json',
+                // Restaurante logado: o backend usa a sessão (cookies) dele na API externa
+                'X-Restaurante-Id': String(window.restaurante_id),
                 ...options.headers
             },
             ...options
@@ -168,7 +170,9 @@ async function carregarTabela() {
     try {
         showStatus('Carregando cardápio...', 'loading');
         
-        const response = await fetch(`${window.API_BASE_URL}/cardapio/${window.restaurante_id}`);
+        const response = await fetch(`${window.API_BASE_URL}/cardapio/${window.restaurante_id}`, {
+            headers: { 'X-Restaurante-Id': String(window.restaurante_id) }
+        });
         const cardapioData = await response.json();
         
         if (cardapioData.status === 'success') {
@@ -505,6 +509,7 @@ async function fazerUploadImagem(arquivo) {
         
         const response = await fetch(`${window.API_BASE_URL}/upload/imagem`, {
             method: 'POST',
+            headers: { 'X-Restaurante-Id': String(window.restaurante_id) },
             body: formData
         });
         
@@ -601,7 +606,8 @@ async function adicionarPratoAPI(dados) {
             method: 'POST', 
             body: JSON.stringify(novoPrato), 
             headers: { 
-                'Content-Type': 'application/json' 
+                'Content-Type': 'application/json',
+                'X-Restaurante-Id': String(window.restaurante_id)
             } 
         });
         
@@ -660,7 +666,7 @@ async function editarPratoAPI(itemId, dados) {
         const response = await fetch(`${window.API_BASE_URL}/cardapio/edit/${itemId}`, { 
             method: 'PUT', 
             body: JSON.stringify(novosDados), 
-            headers: { 'Content-Type': 'application/json' } 
+            headers: { 'Content-Type': 'application/json', 'X-Restaurante-Id': String(window.restaurante_id) } 
         });
         
         console.log('[CARDAPIO] Resposta (editar):', response.status, response.statusText);
@@ -716,7 +722,10 @@ async function handleRemoverPrato() {
         
         for (const itemId of itemIds) {
             try {
-                const response = await fetch(`${window.API_BASE_URL}/cardapio/delete/${itemId}`, { method: 'DELETE' });
+                const response = await fetch(`${window.API_BASE_URL}/cardapio/delete/${itemId}`, {
+                    method: 'DELETE',
+                    headers: { 'X-Restaurante-Id': String(window.restaurante_id) }
+                });
                 
                 if (response.status === 409) {
                     const data = await response.json();
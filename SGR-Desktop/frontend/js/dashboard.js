@@ -43,6 +43,8 @@ async function apiRequest(endpoint, options = {}) {
         const response = await fetch(`${window.API_BASE_URL}${endpoint}`, {
             headers: {
                 'Content-Type': 'application/json',
+                // Restaurante logado: o backend usa a sessão (cookies) dele na API externa
+                'X-Restaurante-Id': String(window.restaurante_id),
                 ...options.headers
             },
             ...options
@@ -74,7 +76,9 @@ async function carregarDashboard() {
         const restauranteId = window.restaurante_id;
         
         console.log(`[DASHBOARD] Carregando dados para restaurante ${restauranteId}...`);
-        const response = await fetch(`${window.API_BASE_URL}/dashboard/${restauranteId}`);
+        const response = await fetch(`${window.API_BASE_URL}/dashboard/${restauranteId}`, {
+            headers: { 'X-Restaurante-Id': String(window.restaurante_id) }
+        });
         
         // IMPORTANTE: Parsear JSON antes de verificar status
         // Se der erro no parse, pode ser resposta vazia ou HTML
@@ -273,7 +273,11 @@ const PedidosApp = {
                 const response = await fetch(url, {
                     method: 'GET',
                     headers: {
-                        'Content-Type': 'application/json'
+                        'Content-Type': 'application/json',
+                        // Restaurante logado: o backend usa a sessão (cookies) dele na API externa
+                        'X-Restaurante-Id': String(this.config.restaurante_id),
+                        // Prazo em que o fetch é abortado: o backend não continua trabalhando depois disso
+                        'X-Request-Deadline': String(inicioTempo + 30000)
                     },
                     signal: controller.signal
                 });
@@ -328,7 +332,9 @@ const PedidosApp = {
     async carregarDetalhesPedido(pedidoId) {
         try {
             const url = `${this.config.API_BASE_URL}/pedidos/${pedidoId}`;
-            const response = await fetch(url);
+            const response = await fetch(url, {
+                headers: { 'X-Restaurante-Id': String(this.config.restaurante_id) }
+            });
             
             if (!response.ok) {
                 throw new Error(`Erro HTTP: ${response.status}`);
@@ -592,7 +598,8 @@ const PedidosApp = {
             const response = await fetch(`${this.config.API_BASE_URL}/pedidos/${pedidoId}/status`, {
                 method: 'PUT',
                 headers: {
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'X-Restaurante-Id': String(this.config.restaurante_id)
                 },
                 body: JSON.stringify({ status: novoStatus })
             });
@@ -39,7 +39,8 @@ async function carregarDadosRestaurante() {
             method: 'GET',
             credentials: 'include', // Envia cookies de sessão
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/json',
+                'X-Restaurante-Id': String(window.restaurante_id)
             }
         });
         
@@ -50,7 +51,8 @@ async function carregarDadosRestaurante() {
                 method: 'GET',
                 credentials: 'include', // Envia cookies de sessão
                 headers: {
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'X-Restaurante-Id': String(window.restaurante_id)
                 }
             });
         }
@@ -235,6 +237,7 @@ async function fazerUploadImagem(arquivo, tipo) {
         const response = await fetch(`${window.API_BASE_URL}/restaurantes/upload/${tipo}`, {
             method: 'POST',
             credentials: 'include', // Importante: envia cookies de sessão para autenticação
+            headers: { 'X-Restaurante-Id': String(window.restaurante_id) },
             body: formData
             // Não definir Content-Type manualmente - o browser define automaticamente com boundary para FormData
         });
@@ -290,7 +293,8 @@ async function salvarAlteracoes() {
             method: 'PUT',
             credentials: 'include', // Envia cookies de sessão
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/json',
+                'X-Restaurante-Id': String(window.restaurante_id)
             },
             body: JSON.stringify(dados)
         });
@@ -42,6 +42,8 @@ async function apiRequest(endpoint, options = {}) {
         const response = await fetch(`${window.API_BASE_URL}${endpoint}`, {
             headers: {
                 'Content-Type': 'application/json',
+                // Restaurante logado: o backend usa a sessão (cookies) dele na API externa
+                'X-Restaurante-Id': String(window.restaurante_id),
                 ...options.headers
             },
             ...options
@@ -19,7 +19,9 @@ function startFlask() {
         // Iniciar processo Flask com Python
         flaskProcess = spawn(pythonPath, [flaskPath], {
             cwd: path.join(__dirname, '..', 'backend'),
-            stdio: ['pipe', 'pipe', 'pipe']
+            stdio: ['pipe', 'pipe', 'pipe'],
+            // Bancos locais (rollups de analytics) na pasta de dados do usuário
+            env: { ...process.env, SGR_DADOS_DIR: app.getPath('userData') }
         });
     } else {
         // Modo produção: usar executável do Flask
@@ -54,7 +56,9 @@ function startFlask() {
         console.log(`🚀 Iniciando Flask a partir de: ${finalPath}`);
         flaskProcess = spawn(finalPath, [], {
             cwd: path.dirname(finalPath),
-            stdio: ['pipe', 'pipe', 'pipe']
+            stdio: ['pipe', 'pipe', 'pipe'],
+            // Bancos locais (rollups de analytics) na pasta de dados do usuário
+            env: { ...process.env, SGR_DADOS_DIR: app.getPath('userData') }
         });
     }
     